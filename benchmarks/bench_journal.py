@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for write-behind STARLOG journaling.
+
+N concurrent agents each make K STARLOG writes (`update_debug_diary`), each followed
+by `--think-ms` of model time, then one `check`. The writes go to a stand-in STARLOG
+server. Every call costs an MCP round trip (`--rtt-ms`), and every write costs a
+synchronous append plus fsync of the agent's diary on the shared disk, as STARLOG
+does. Modes compared:
+
+- per-call: today's behaviour, each write waits for the server
+- journal/<policy>: writes go through journal.wrap_session with that durability policy
+
+For each mode the benchmark reports:
+- agent writes/s: how fast agents got through their writes and thinking
+- end-to-end writes/s: includes the `check` that waits for every write to reach STARLOG
+- fsyncs: server plus journal
+
+Usage:
+    python benchmarks/bench_journal.py
+    python benchmarks/bench_journal.py --agents 1 8 32 --writes 100 --rtt-ms 2 --think-ms 0
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from powerset_agents_core import journal as journal_module  # noqa: E402
+from powerset_agents_core.journal import get_journal, wrap_session  # noqa: E402
+
+
+class StubStarlogServer:
+    """STARLOG stand-in: a round trip per call and an fsynced diary append per write."""
+
+    def __init__(self, rtt: float, pool: ThreadPoolExecutor):
+        self.rtt = rtt
+        self.pool = pool
+        self.fsyncs = 0
+
+    def _write(self, path: str, content: str) -> None:
+        with open(os.path.join(path, "debug_diary.md"), "a") as f:
+            f.write(content + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.fsyncs += 1
+
+    async def call_tool(self, name: str, arguments: Optional[Dict[str, Any]] = None) -> str:
+        await asyncio.sleep(self.rtt)
+        if name == "update_debug_diary":
+            await asyncio.get_running_loop().run_in_executor(self.pool, self._write, arguments["path"], arguments["content"])
+        return "ok"
+
+
+async def _run(mode: str, agents: int, writes: int, rtt: float, think: float, root: str) -> Dict[str, float]:
+    pool = ThreadPoolExecutor(max_workers=min(64, agents * 2))
+    server = StubStarlogServer(rtt, pool)
+    paths = [os.path.join(root, mode.replace("/", "_"), f"agent{n}") for n in range(agents)]
+    for path in paths:
+        os.makedirs(path, exist_ok=True)
+    journals = []
+    if mode != "per-call":
+        journals = [get_journal(path, policy=mode.split("/")[1], interval_ms=20) for path in paths]
+    writes_done: List[float] = []
+
+    async def agent(path: str) -> None:
+        session = server if mode == "per-call" else wrap_session(StubSession(server), ack=lambda entry: "ok")
+        for n in range(writes):
+            await session.call_tool("update_debug_diary", {"path": path, "content": f"note {n}"})
+            if think:
+                await asyncio.sleep(think)
+        writes_done.append(time.perf_counter())
+        await session.call_tool("check", {"path": path})
+
+    started = time.perf_counter()
+    await asyncio.gather(*(agent(path) for path in paths))
+    finished = time.perf_counter()
+    for journal in journals:
+        journal.close()
+    pool.shutdown()
+    total = agents * writes
+    return {
+        "agent_writes_per_s": total / (max(writes_done) - started),
+        "end_to_end_writes_per_s": total / (finished - started),
+        "fsyncs": server.fsyncs + sum(journal.fsyncs for journal in journals),
+    }
+
+
+class StubSession:
+    """Per-agent session object, so wrapping one agent's session leaves the server untouched."""
+
+    def __init__(self, server: StubStarlogServer):
+        self.server = server
+
+    async def call_tool(self, name: str, arguments: Optional[Dict[str, Any]] = None) -> str:
+        return await self.server.call_tool(name, arguments)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark write-behind STARLOG journaling")
+    parser.add_argument("--agents", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--writes", type=int, default=50, help="STARLOG writes per agent")
+    parser.add_argument("--rtt-ms", type=float, default=1.0, help="Simulated MCP round trip")
+    parser.add_argument("--think-ms", type=float, default=5.0, help="Simulated model time after each write")
+    parser.add_argument("--dir", default=None, help="Directory on the disk to test (default: a temp dir)")
+    args = parser.parse_args()
+
+    modes = ["per-call", "journal/always", "journal/interval", "journal/session"]
+    print(f"{'agents':>6}  {'mode':<17} {'agent writes/s':>14} {'end-to-end/s':>13} {'fsyncs':>7}")
+    for agents in args.agents:
+        for mode in modes:
+            root = tempfile.mkdtemp(dir=args.dir, prefix="bench_journal_")
+            try:
+                result = asyncio.run(_run(mode, agents, args.writes, args.rtt_ms / 1000, args.think_ms / 1000, root))
+            finally:
+                journal_module._close_all()
+                shutil.rmtree(root, ignore_errors=True)
+            print(f"{agents:>6}  {mode:<17} {result['agent_writes_per_s']:>14.0f} "
+                  f"{result['end_to_end_writes_per_s']:>13.0f} {result['fsyncs']:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for system prompt rendering.
+
+Compares the original per-call f-string in _generate_library_learning_prompt against the
+LRU-cached renderer in powerset_agents_core.prompts, and reports how often a
+provider prefix cache would hit across a fleet of agents for each layout.
+
+Usage:
+    python benchmarks/bench_prompt.py
+    python benchmarks/bench_prompt.py --agents 500 --prefix-chars 1024
+"""
+
+import argparse
+import sys
+import timeit
+from pathlib import Path
+from typing import Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from powerset_agents_core.prompts import render_library_learning_prompt  # noqa: E402
+
+
+def legacy_prompt(fields: Dict[str, str]) -> str:
+    """The f-string _generate_library_learning_prompt rendered before prompts were cached."""
+    name = fields["name"]
+    pkg_path = fields["pkg_path"]
+    help_command = fields["help_command"]
+    instructions = fields["instructions"]
+    starlog_path = fields["starlog_path"]
+    workspace_path = fields["workspace_path"]
+    curriculum_path = fields["curriculum_path"]
+    return f"""You are {name}, a specialized library learning agent.
+
+Your mission: Learn the {pkg_path} library and complete user requests. The `help command` for this library is: `{help_command}`.
+
+CURRICULUM: {instructions}
+
+CAPABILITIES:
+- STARLOG MCP: Session management and progress tracking
+- Waypoint MCP: Navigate through structured learning sequences  
+- NetworkEditTool: Read, write, and edit files
+- BashTool: Run commands, test code, explore the library
+
+CRITICAL DIRECTORY SEPARATION:
+- WORKING DIRECTORY: Use current directory for all file operations (reading user files, writing code)
+- STARLOG DIRECTORY: ALWAYS use "{starlog_path}" for ALL STARLOG commands
+
+STARLOG PATH RULE: For ALL STARLOG commands, ALWAYS use path="{starlog_path}":
+- fly("{starlog_path}")
+- check("{starlog_path}")  
+- start_starlog(..., path="{starlog_path}")
+- update_debug_diary(..., path="{starlog_path}")
+- add_rule(..., path="{starlog_path}")
+- All other STARLOG commands
+
+WORKFLOW:
+1. Start session: Use fly("{starlog_path}") to initialize your STARLOG session journey
+2. Learn library: Use waypoint with {curriculum_path}
+3. Complete request: Follow user's request using your library knowledge (work in current directory)
+4. Upload project: Use waypoint with /tmp/github_update_protocol.json to create and upload to GitHub
+
+WORKSPACE: {workspace_path}
+
+Your main workflow is to use starlog.fly("{starlog_path}") then follow instructions to begin the session. Once session is confirmed started by STARLOG, use the library learning PD in waypoint. Then, proceed as necessary to complete user request. Once you are done, use waypoint with github_update_protocol.
+
+Begin by calling fly("{starlog_path}") to start your session."""
+
+
+def make_fleet(agents: int, libraries: int) -> List[Dict[str, str]]:
+    """Synthetic fleet: `agents` agents spread over `libraries` distinct libraries."""
+    fleet = []
+    for i in range(agents):
+        lib = f"library_{i % libraries}"
+        fleet.append({
+            "name": f"{lib.title()}Agent{i}",
+            "pkg_path": lib,
+            "help_command": f"python -c 'import {lib}; help({lib})'",
+            "instructions": f"Learn {lib} to build things with it",
+            "starlog_path": f"/tmp/{lib}_starlog_{i}",
+            "workspace_path": "/tmp",
+            "curriculum_path": "/tmp/understand_powerset_library.json",
+        })
+    return fleet
+
+
+def prefix_hit_rate(prompts: List[str], prefix_chars: int) -> float:
+    """Fraction of requests whose first `prefix_chars` characters were already seen."""
+    seen = set()
+    hits = 0
+    for prompt in prompts:
+        key = prompt[:prefix_chars]
+        if len(prompt) >= prefix_chars and key in seen:
+            hits += 1
+        seen.add(key)
+    return hits / len(prompts)
+
+
+def time_per_call(render: Callable[[], object], calls: int) -> float:
+    return min(timeit.repeat(render, number=calls, repeat=5)) / calls
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark system prompt rendering")
+    parser.add_argument("--agents", type=int, default=200)
+    parser.add_argument("--libraries", type=int, default=20)
+    parser.add_argument("--prefix-chars", type=int, default=1024,
+                        help="Minimum prefix a provider caches (roughly 4 chars per token)")
+    args = parser.parse_args()
+
+    fleet = make_fleet(args.agents, args.libraries)
+    sample = fleet[0]
+
+    assert render_library_learning_prompt(**sample).text == legacy_prompt(sample)
+
+    cold = time_per_call(lambda: render_library_learning_prompt.__wrapped__(**sample), 10000)
+    warm = time_per_call(lambda: render_library_learning_prompt(**sample), 10000)
+    legacy = time_per_call(lambda: legacy_prompt(sample), 10000)
+
+    legacy_prompts = [legacy_prompt(f) for f in fleet]
+    pinned_prompts = [render_library_learning_prompt(**f, pin_prefix=True).text for f in fleet]
+
+    print(f"{'render':<32} {'us/call':>10}")
+    print("-" * 44)
+    print(f"{'legacy f-string':<32} {legacy * 1e6:>10.2f}")
+    print(f"{'prompts renderer (uncached)':<32} {cold * 1e6:>10.2f}")
+    print(f"{'prompts renderer (cache hit)':<32} {warm * 1e6:>10.2f}")
+    print()
+    print(f"prefix-cache hit rate over {args.agents} agents ({args.prefix_chars} char prefix)")
+    print(f"  legacy layout: {prefix_hit_rate(legacy_prompts, args.prefix_chars):.1%}")
+    print(f"  pinned layout: {prefix_hit_rate(pinned_prompts, args.prefix_chars):.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Diff two benchmark result files produced by run_benchmarks.py.
+
+Usage:
+    python benchmarks/compare.py benchmarks/results/v0.1.0.json benchmarks/results/dev.json
+    python benchmarks/compare.py old.json new.json --threshold 0.10
+"""
+
+import argparse
+import json
+import sys
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="Relative slowdown of the median reported as a regression")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    print(f"baseline:  {baseline['meta']['label']} ({baseline['meta']['git_revision'][:10]})")
+    print(f"candidate: {candidate['meta']['label']} ({candidate['meta']['git_revision'][:10]})\n")
+    print(f"{'benchmark':<40} {'baseline us':>12} {'candidate us':>13} {'change':>9}")
+    print("-" * 78)
+
+    regressions = 0
+    names = sorted(set(baseline["benchmarks"]) | set(candidate["benchmarks"]))
+    for name in names:
+        old = baseline["benchmarks"].get(name, {})
+        new = candidate["benchmarks"].get(name, {})
+        if "median" not in old or "median" not in new:
+            print(f"{name:<40} {'-' if 'median' not in old else old['median'] * 1e6:>12} "
+                  f"{'-' if 'median' not in new else new['median'] * 1e6:>13}")
+            continue
+        change = new["median"] / old["median"] - 1
+        flag = "  REGRESSION" if change > args.threshold else ""
+        regressions += bool(flag)
+        print(f"{name:<40} {old['median'] * 1e6:>12.1f} {new['median'] * 1e6:>13.1f} {change:>+8.1%}{flag}")
+
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Import-time benchmark for the powerset agent packages.
+
+Runs `python -X importtime -c "import <module>"` in fresh interpreters and reports the
+cumulative import cost of each module, plus whether heavy dependencies (heaven_base,
+payload_discovery) were pulled in as a side effect.
+
+Usage:
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --repeat 10 --json import_time.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+DEFAULT_MODULES = [
+    "powerset_agents_core",
+    "metastack_powerset_agent",
+    "payloaddiscovery_powerset_agent",
+]
+
+HEAVY_DEPENDENCIES = ["heaven_base", "payload_discovery"]
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+
+def _parse_importtime(stderr: str) -> Dict[str, int]:
+    """Parse -X importtime output into {module: cumulative_us}."""
+    cumulative = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue  # header line
+        cumulative[parts[2].strip()] = int(parts[1].strip())
+    return cumulative
+
+
+def measure_module(module: str, repeat: int) -> Dict[str, object]:
+    """Import module `repeat` times in fresh interpreters and summarise the timings."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(SRC_DIR), env.get("PYTHONPATH")]))
+
+    samples: List[int] = []
+    heavy_loaded: Dict[str, bool] = {dep: False for dep in HEAVY_DEPENDENCIES}
+    error: Optional[str] = None
+
+    for _ in range(repeat):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            capture_output=True, text=True, env=env
+        )
+        if proc.returncode != 0:
+            error = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "import failed"
+            break
+
+        timings = _parse_importtime(proc.stderr)
+        samples.append(timings.get(module, 0))
+        for dep in HEAVY_DEPENDENCIES:
+            heavy_loaded[dep] = heavy_loaded[dep] or dep in timings
+
+    return {
+        "module": module,
+        "samples_us": samples,
+        "median_us": int(statistics.median(samples)) if samples else None,
+        "min_us": min(samples) if samples else None,
+        "heavy_dependencies_loaded": heavy_loaded,
+        "error": error,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure import time of powerset agent packages")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES, help="Modules to import")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per module")
+    parser.add_argument("--json", dest="json_path", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    results = [measure_module(module, args.repeat) for module in args.modules]
+
+    print(f"{'module':<36} {'median ms':>10} {'min ms':>10}  heavy deps loaded")
+    print("-" * 80)
+    for result in results:
+        if result["error"]:
+            print(f"{result['module']:<36} {'error':>10} {'':>10}  {result['error']}")
+            continue
+        loaded = [dep for dep, hit in result["heavy_dependencies_loaded"].items() if hit]
+        print(
+            f"{result['module']:<36} {result['median_us'] / 1000:>10.2f} "
+            f"{result['min_us'] / 1000:>10.2f}  {', '.join(loaded) or '-'}"
+        )
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"python": sys.version, "results": results}, f, indent=2)
+        print(f"\nResults written to {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the powerset agent factory and agent startup.
+
+Measures factory throughput, prompt generation latency, tool resolution, import time and
+end-to-end agent startup against stub MCP servers and a stub LLM provider. Results are
+written as JSON so releases can be diffed offline with benchmarks/compare.py.
+
+Usage:
+    python benchmarks/run_benchmarks.py --label v0.1.0
+    python benchmarks/run_benchmarks.py --filter prompt --repeat 20
+    python benchmarks/compare.py benchmarks/results/v0.1.0.json benchmarks/results/dev.json
+"""
+
+import argparse
+import asyncio
+import copy
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent / "src"))
+sys.path.insert(0, str(BENCH_DIR))
+
+from import_time import DEFAULT_MODULES, measure_module  # noqa: E402
+
+STUB_MCP_SERVER = str(BENCH_DIR / "stub_mcp_server.py")
+
+# name -> function(repeat) returning per-operation samples in seconds
+BENCHMARKS: Dict[str, Callable[[int], List[float]]] = {}
+
+
+def benchmark(name: str) -> Callable:
+    def register(func: Callable[[int], List[float]]) -> Callable[[int], List[float]]:
+        BENCHMARKS[name] = func
+        return func
+    return register
+
+
+def _timed(func: Callable[[], Any], repeat: int, number: int = 1) -> List[float]:
+    """Per-call seconds for `repeat` rounds of `number` calls."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - started) / number)
+    return samples
+
+
+_curriculum_configs: List[Any] = []
+
+
+def _curriculum_config():
+    """Shared PayloadDiscoveryConfig pointing at a small curriculum file (created once)."""
+    if not _curriculum_configs:
+        from powerset_agents_core.config import PayloadDiscoveryConfig
+
+        path = Path(tempfile.mkdtemp()) / "bench_curriculum.json"
+        path.write_text(json.dumps({"root_files": ["README.md"], "directories": {}, "waypoints": []}))
+        _curriculum_configs.append(PayloadDiscoveryConfig(path=str(path), instructions="Learn bench_library"))
+    return _curriculum_configs[0]
+
+
+def _factory_kwargs(index: int = 0) -> Dict[str, Any]:
+    return {
+        "pkg_path": "bench_library",
+        "help_command": "python -c 'import bench_library; help(bench_library)'",
+        "payload_discovery_config": _curriculum_config(),
+        "name": f"BenchAgent{index}",
+        "starlog_path": f"/tmp/bench_starlog_{index}",
+    }
+
+
+@benchmark("factory.create_uncached")
+def bench_create_uncached(repeat: int) -> List[float]:
+    from powerset_agents_core.factory import create_library_powerset_agent
+
+    kwargs = _factory_kwargs()
+    return _timed(lambda: create_library_powerset_agent(**kwargs, use_cache=False), repeat, number=50)
+
+
+@benchmark("factory.create_cached")
+def bench_create_cached(repeat: int) -> List[float]:
+    from powerset_agents_core.factory import create_library_powerset_agent
+
+    kwargs = _factory_kwargs()
+    create_library_powerset_agent(**kwargs)
+    return _timed(lambda: create_library_powerset_agent(**kwargs), repeat, number=200)
+
+
+@benchmark("factory.batch_100")
+def bench_batch(repeat: int) -> List[float]:
+    from powerset_agents_core.batch import create_library_powerset_agents
+
+    specs = [_factory_kwargs(i) for i in range(100)]
+    return [sample / 100 for sample in _timed(lambda: list(create_library_powerset_agents(specs)), repeat)]
+
+
+@benchmark("prompt.generate_cold")
+def bench_prompt_cold(repeat: int) -> List[float]:
+    from powerset_agents_core.config import LibraryPowersetAgentConfig
+    from powerset_agents_core.factory import _generate_library_learning_prompt
+    from powerset_agents_core.prompts import render_library_learning_prompt
+
+    config = LibraryPowersetAgentConfig(**_factory_kwargs())
+
+    def render():
+        render_library_learning_prompt.cache_clear()
+        _generate_library_learning_prompt(config)
+
+    return _timed(render, repeat, number=500)
+
+
+@benchmark("prompt.generate_warm")
+def bench_prompt_warm(repeat: int) -> List[float]:
+    from powerset_agents_core.config import LibraryPowersetAgentConfig
+    from powerset_agents_core.factory import _generate_library_learning_prompt
+
+    config = LibraryPowersetAgentConfig(**_factory_kwargs())
+    return _timed(lambda: _generate_library_learning_prompt(config), repeat, number=2000)
+
+
+@benchmark("tools.resolve")
+def bench_resolve_tools(repeat: int) -> List[float]:
+    from powerset_agents_core.factory import _resolve_tool_classes
+
+    return _timed(lambda: _resolve_tool_classes(["networkedittool", "bashtool"]), repeat, number=2000)
+
+
+@benchmark("tools.resolve_first_call")
+def bench_resolve_tools_first_call(repeat: int) -> List[float]:
+    """First resolution in a fresh interpreter, including the tool module imports."""
+    code = (
+        "import sys, time; sys.path.insert(0, sys.argv[1]); "
+        "from powerset_agents_core.factory import _resolve_tool_classes; "
+        "t = time.perf_counter(); _resolve_tool_classes(['networkedittool', 'bashtool']); "
+        "print(time.perf_counter() - t)"
+    )
+    samples = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", code, str(BENCH_DIR.parent / "src")],
+                             capture_output=True, text=True, check=True)
+        samples.append(float(out.stdout.strip()))
+    return samples
+
+
+def _import_benchmark(module: str) -> Callable[[int], List[float]]:
+    def run(repeat: int) -> List[float]:
+        result = measure_module(module, repeat)
+        if result["error"]:
+            raise RuntimeError(result["error"])
+        return [us / 1e6 for us in result["samples_us"]]
+    return run
+
+
+for _module in DEFAULT_MODULES:
+    BENCHMARKS[f"import.{_module}"] = _import_benchmark(_module)
+
+
+async def _mcp_handshake(spec: Dict[str, Any]) -> None:
+    """Spawn a stdio MCP server, initialize it and list its tools."""
+    proc = await asyncio.create_subprocess_exec(
+        spec["command"], *spec["args"],
+        stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE
+    )
+
+    async def send(message: Dict[str, Any]) -> None:
+        proc.stdin.write((json.dumps({"jsonrpc": "2.0", **message}) + "\n").encode())
+        await proc.stdin.drain()
+
+    await send({"id": 1, "method": "initialize", "params": {"protocolVersion": "2024-11-05"}})
+    await proc.stdout.readline()
+    await send({"method": "notifications/initialized"})
+    await send({"id": 2, "method": "tools/list"})
+    await proc.stdout.readline()
+    proc.stdin.close()
+    await proc.wait()
+
+
+async def _stub_llm(prompt: str, agent_config: Any) -> str:
+    """Stub provider: bring up the agent's MCP servers, then answer without a model call."""
+    await asyncio.gather(*(_mcp_handshake(spec) for spec in agent_config.mcp_servers.values()))
+    return f"stub response to: {prompt}"
+
+
+@benchmark("startup.stub_e2e")
+def bench_startup(repeat: int) -> List[float]:
+    """Config build + MCP spawn/handshake + one stub completion through AgentRunner."""
+    from powerset_agents_core.factory import create_library_powerset_agent
+    from powerset_agents_core.runner import AgentRunner
+
+    async def start_once(index: int) -> None:
+        agent_config = copy.copy(create_library_powerset_agent(**_factory_kwargs(index), use_cache=False))
+        agent_config.mcp_servers = {
+            name: {"transport": "stdio", "command": sys.executable, "args": [STUB_MCP_SERVER]}
+            for name in agent_config.mcp_servers
+        }
+        runner = AgentRunner(agent_config, concurrency=1, executor=_stub_llm, provider="stub")
+        async for result in runner.run(["hello"]):
+            if not result.ok:
+                raise result.error
+
+    samples = []
+    for index in range(repeat):
+        started = time.perf_counter()
+        asyncio.run(start_once(index))
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def _summarize(samples: List[float]) -> Dict[str, Any]:
+    median = statistics.median(samples)
+    return {
+        "unit": "seconds/op",
+        "samples": samples,
+        "median": median,
+        "min": min(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "ops_per_sec": 1 / median if median else None,
+    }
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=BENCH_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run powerset agent benchmarks")
+    parser.add_argument("--label", default="dev", help="Name of the results file")
+    parser.add_argument("--output-dir", default=str(BENCH_DIR / "results"))
+    parser.add_argument("--filter", default="", help="Only run benchmarks whose name contains this")
+    parser.add_argument("--repeat", type=int, default=7)
+    args = parser.parse_args()
+
+    import powerset_agents_core
+
+    results: Dict[str, Any] = {}
+    for name, func in BENCHMARKS.items():
+        if args.filter not in name:
+            continue
+        try:
+            results[name] = _summarize(func(args.repeat))
+            print(f"{name:<40} {results[name]['median'] * 1e6:>14.1f} us/op")
+        except Exception as e:
+            results[name] = {"error": f"{type(e).__name__}: {e}"}
+            print(f"{name:<40} {'error':>14}  {e}")
+
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    output_path = output_dir / f"{args.label}.json"
+    output_path.write_text(json.dumps({
+        "meta": {
+            "label": args.label,
+            "package_version": powerset_agents_core.__version__,
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.time(),
+            "repeat": args.repeat,
+        },
+        "benchmarks": results,
+    }, indent=2))
+    print(f"\nResults written to {output_path}")
+
+
+if __name__ == "__main__":
+    main()
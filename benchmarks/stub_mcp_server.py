@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Minimal stdio MCP server used by the benchmarks in place of starlog/waypoint.
+
+Speaks newline-delimited JSON-RPC and answers `initialize`, `tools/list`, `tools/call`
+and `ping` with canned responses, so agent startup can be timed without the real
+servers or any network access.
+"""
+
+import json
+import sys
+
+TOOLS = [
+    {"name": "fly", "description": "Stub STARLOG fly", "inputSchema": {"type": "object"}},
+    {"name": "get_waypoint_progress", "description": "Stub waypoint", "inputSchema": {"type": "object"}},
+]
+
+
+def handle(request):
+    method = request.get("method")
+    if method == "initialize":
+        return {
+            "protocolVersion": request.get("params", {}).get("protocolVersion", "2024-11-05"),
+            "capabilities": {"tools": {}},
+            "serverInfo": {"name": "stub-mcp", "version": "0.0.0"},
+        }
+    if method == "tools/list":
+        return {"tools": TOOLS}
+    if method == "tools/call":
+        return {"content": [{"type": "text", "text": "ok"}], "isError": False}
+    if method == "ping":
+        return {}
+    raise KeyError(method)
+
+
+def main():
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        request = json.loads(line)
+        if "id" not in request:
+            continue  # notification
+        try:
+            response = {"jsonrpc": "2.0", "id": request["id"], "result": handle(request)}
+        except KeyError as e:
+            response = {"jsonrpc": "2.0", "id": request["id"],
+                        "error": {"code": -32601, "message": f"Method not found: {e}"}}
+        sys.stdout.write(json.dumps(response) + "\n")
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
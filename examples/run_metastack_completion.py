@@ -3,7 +3,7 @@
 MetaStack Powerset Agent - Completion Style Example
 
 This shows how to use the MetaStack agent with HEAVEN's completion runner
-for direct prompt → response execution.
+for direct prompt → response execution, printing output as it streams in.
 
 Usage:
     python run_metastack_completion.py "Build me a Pydantic model for X"
@@ -22,7 +22,7 @@ logger = logging.getLogger(__name__)
 # Set up environment
 os.environ['HEAVEN_DATA_DIR'] = '/tmp/heaven_data'
 
-from heaven_base.tool_utils.completion_runners import exec_completion_style
+from powerset_agents_core.streaming import stream_agent
 from metastack_powerset_agent import create_metastack_agent
 
 
@@ -50,16 +50,14 @@ async def main():
     print("-" * 60)
     
     try:
-        # Execute using completion style
+        # Execute using completion style, printing events (tool calls, command output,
+        # messages) as they arrive instead of after the whole run
         logger.info("Executing agent with completion style")
-        result = await exec_completion_style(
-            prompt=prompt,
-            agent=agent_config
-        )
+        async for event in stream_agent(prompt, agent_config):
+            print(event.render(), end="", flush=True)
+            if event.kind == "error":
+                raise RuntimeError(event.data["error"])
         logger.info("Agent execution completed successfully")
-        
-        # Just print whatever comes back
-        print(result)
             
     except Exception as e:
         logger.error(f"Error executing MetaStack agent: {e}", exc_info=True)
@@ -21,7 +21,7 @@ logger = logging.getLogger(__name__)
 # Set up environment
 os.environ['HEAVEN_DATA_DIR'] = '/tmp/heaven_data'
 
-from heaven_base.tool_utils.hermes_utils import use_hermes_dict
+from powerset_agents_core.streaming import hermes_executor, stream_agent
 from metastack_powerset_agent import create_metastack_agent
 
 
@@ -51,38 +51,26 @@ Include validation, relationships between models, and methods for generating for
     print("-" * 60)
     
     try:
-        # Execute using Hermes runner
+        # Execute using Hermes runner, printing tool calls, waypoint/STARLOG steps and
+        # AI messages as they arrive
         logger.info("Executing agent with Hermes runner")
-        result = await use_hermes_dict(
-            goal=goal,
+        executor = hermes_executor(
             iterations=3,
-            agent=agent_config,
             target_container="mind_of_god",
             source_container="mind_of_god",
             return_summary=False,
             ai_messages_only=True
         )
+        async for event in stream_agent(goal, agent_config, executor=executor):
+            print(event.render(), end="", flush=True)
+            if event.kind == "error":
+                raise RuntimeError(event.data["error"])
+            if event.kind == "done" and isinstance(event.data["result"], dict):
+                result = event.data["result"]
+                print("="*60)
+                print(f"📊 Status: {result.get('status', 'Unknown')}")
+                print(f"🆔 History ID: {result.get('history_id', 'No history ID')}")
         logger.info("Agent execution completed successfully")
-        
-        print("✅ Hermes execution completed!")
-        print("="*60)
-        print(f"📊 Status: {result.get('status', 'Unknown')}")
-        print(f"🆔 History ID: {result.get('history_id', 'No history ID')}")
-        
-        if 'messages' in result:
-            print(f"💬 Messages count: {len(result['messages'])}")
-            print("\n🤖 Final AI Response:")
-            print("-" * 40)
-            
-            # Show the final AI response
-            for msg in result['messages']:
-                if msg.get('type') == 'AIMessage':
-                    content = msg.get('content', '')
-                    print(content)
-                    break  # Show only the final response
-        else:
-            print("📝 Result:")
-            print(result)
             
     except Exception as e:
         logger.error(f"Error executing MetaStack agent with Hermes: {e}", exc_info=True)
@@ -1,11 +1,15 @@
-"""PayloadDiscovery Powerset Agent creation."""
+"""PayloadDiscovery Powerset Agent creation (thin wrapper over the agent registry's "payloaddiscovery" entry)."""
 
-import os
-from powerset_agents_core.factory import create_library_powerset_agent
-from powerset_agents_core.config import PayloadDiscoveryConfig
+from typing import Optional
+from powerset_agents_core.registry import get_registry
+from powerset_agents_core.workspace import AgentWorkspace
 
 
-def create_payloaddiscovery_agent(starlog_path: str = "/tmp/payloaddiscovery_agent_starlog") -> "HeavenAgentConfig":
+def create_payloaddiscovery_agent(
+    starlog_path: str = "/tmp/payloaddiscovery_agent_starlog",
+    workspace: Optional[AgentWorkspace] = None,
+    use_knowledge_pack: bool = False
+) -> "HeavenAgentConfig":
     """
     Create a PayloadDiscovery powerset agent that can learn and use payload_discovery.
     
@@ -13,6 +17,10 @@ def create_payloaddiscovery_agent(starlog_path: str = "/tmp/payloaddiscovery_age
     
     Args:
         starlog_path: Path for agent's STARLOG session tracking
+        workspace: Isolated directory tree from WorkspaceAllocator; overrides starlog_path,
+            the workspace directory and HEAVEN_DATA_DIR so several agents can run in parallel
+        use_knowledge_pack: Start from the knowledge pack saved after an earlier learning
+            pass (for the installed library version) instead of walking the curriculum
         
     Returns:
         HeavenAgentConfig ready to be used with HEAVEN framework
@@ -20,23 +28,11 @@ def create_payloaddiscovery_agent(starlog_path: str = "/tmp/payloaddiscovery_age
     Example:
         >>> agent_config = create_payloaddiscovery_agent()
         >>> # Use with HEAVEN framework to run the agent
+        >>> parallel_config = create_payloaddiscovery_agent(workspace=get_workspace_allocator().allocate("payloaddiscovery"))
     """
-    
-    # Create the PayloadDiscovery config for learning PayloadDiscovery
-    pd_config = PayloadDiscoveryConfig(
-        path="/tmp/understand_powerset_library.json",  # Generic library learning PD
-        instructions="Learn payload_discovery library to build prompt injection sequences and learning curricula"
-    )
-    
-    # Create the agent using the factory
-    agent_config = create_library_powerset_agent(
-        pkg_path="payload_discovery",
-        help_command="python -c 'import payload_discovery; help(payload_discovery)'",
-        payload_discovery_config=pd_config,
-        name="PayloadDiscoveryPowersetAgent", 
+    return get_registry().create(
+        "payloaddiscovery",
+        workspace=workspace,
         starlog_path=starlog_path,
-        description="Specialized agent for learning payload_discovery and building learning curricula",
-        workspace_path="/tmp"
+        use_knowledge_pack=use_knowledge_pack
     )
-    
-    return agent_config
\ No newline at end of file
@@ -7,34 +7,34 @@ and create any prompt injection sequence for waypoint.
 
 Usage:
 1. Start the HEAVEN HTTP server: python /home/GOD/core/image/http_server.py  
-2. Run this script: python -m payloaddiscovery_powerset_agent.cli
+2. Run this script: python -m payloaddiscovery_powerset_agent.cli (same as: powerset-agent run payloaddiscovery)
+
+Add --attach to talk to the agent through the shared powerset agent daemon instead
+(started on first use); later invocations skip rebuilding the config and importing HEAVEN.
+Add --prompt "..." to run a single prompt and print the output as it streams in.
 """
 
 # No sys.path manipulation - use installed packages only
 
-from heaven_base.cli import make_cli
-from .agent import create_payloaddiscovery_agent
+import argparse
+import asyncio
+import sys
+
+from powerset_agents_core.cli import run_agent, stream_prompt
 
 
 def main():
     """Create and run PayloadDiscovery powerset agent CLI."""
-    print("🌟 Initializing PayloadDiscovery Powerset Agent...")
-    
-    # Create the agent config
-    agent_config = create_payloaddiscovery_agent()
-    
-    # Create CLI instance
-    cli = make_cli(
-        agent_config=agent_config,
-        server_url="http://localhost:8080"
-    )
-    
-    print("✅ PayloadDiscovery Agent ready!")
-    print("💡 This agent can learn payload_discovery and create prompt injection sequences for waypoint")
+    parser = argparse.ArgumentParser(description="PayloadDiscovery Powerset Agent CLI")
+    parser.add_argument("--attach", action="store_true",
+                        help="Attach to the shared agent daemon instead of starting a new agent")
+    parser.add_argument("--prompt", help="Run this prompt once and stream the output")
+    args = parser.parse_args()
     
-    # Run the CLI
-    cli.run_sync()
+    if args.prompt is not None:
+        sys.exit(0 if asyncio.run(stream_prompt("payloaddiscovery", args.prompt)) else 1)
+    run_agent("payloaddiscovery", attach=args.attach)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -3,16 +3,169 @@ Powerset Agents Core - Factory for self-improving BaseHeavenAgent instances.
 
 Creates standardized agents that learn libraries through PayloadDiscovery sequences,
 using STARLOG for session tracking and Waypoint MCP for navigation.
+
+Public names are resolved lazily (PEP 562) so that importing the package, or building
+configs, does not pull in heaven_base or payload_discovery until they are needed.
 """
 
-from .factory import create_library_powerset_agent
-from .config import BasePowersetAgentConfig, LibraryPowersetAgentConfig, PayloadDiscoveryConfig
+import importlib
+from typing import TYPE_CHECKING, Any, Dict, List
 
 __version__ = "0.1.0"
 
+# Public name -> submodule that defines it
+_LAZY_ATTRS: Dict[str, str] = {
+    "create_library_powerset_agent": ".factory",
+    "heaven_config_cache_info": ".factory",
+    "clear_heaven_config_cache": ".factory",
+    "release_pooled_mcp_servers": ".factory",
+    "create_library_powerset_agents": ".batch",
+    "BatchResult": ".batch",
+    "BasePowersetAgentConfig": ".config",
+    "LibraryPowersetAgentConfig": ".config",
+    "PayloadDiscoveryConfig": ".config",
+    "CurriculumStore": ".curriculum",
+    "get_curriculum_store": ".curriculum",
+    "AgentRunner": ".runner",
+    "RunResult": ".runner",
+    "run_agent_prompts": ".runner",
+    "AgentWorkspace": ".workspace",
+    "WorkspaceAllocator": ".workspace",
+    "get_workspace_allocator": ".workspace",
+    "McpServerPool": ".mcp_pool",
+    "get_default_pool": ".mcp_pool",
+    "InMemorySink": ".tracing",
+    "JsonlSink": ".tracing",
+    "OtlpHttpSink": ".tracing",
+    "configure_tracing": ".tracing",
+    "get_tracer": ".tracing",
+    "RouteTable": ".routing",
+    "LatencyAwareRouter": ".routing",
+    "StubProvider": ".routing",
+    "get_route_table": ".routing",
+    "AgentDaemon": ".daemon",
+    "DaemonClient": ".daemon",
+    "KnowledgePack": ".knowledge",
+    "KnowledgePackStore": ".knowledge",
+    "get_knowledge_store": ".knowledge",
+    "snapshot_knowledge_pack": ".knowledge",
+    "FleetOrchestrator": ".fleet",
+    "FleetResult": ".fleet",
+    "load_manifest": ".fleet",
+    "AgentRegistry": ".registry",
+    "AgentSpec": ".registry",
+    "get_registry": ".registry",
+    "ToolRegistry": ".tool_registry",
+    "get_tool_registry": ".tool_registry",
+    "InProcessMcpHost": ".mcp_inprocess",
+    "get_inprocess_host": ".mcp_inprocess",
+    "BoundedExecutor": ".sandbox",
+    "ExecutionLimits": ".sandbox",
+    "ContextBudget": ".context",
+    "Cassette": ".cassette",
+    "get_cassette": ".cassette",
+    "stream_agent": ".streaming",
+    "AgentEvent": ".streaming",
+    "emit_event": ".streaming",
+    "WaypointPrefetcher": ".prefetch",
+    "get_prefetcher": ".prefetch",
+    "StarlogJournal": ".journal",
+    "get_journal": ".journal",
+}
+
 __all__ = [
     "create_library_powerset_agent",
+    "heaven_config_cache_info",
+    "clear_heaven_config_cache",
+    "release_pooled_mcp_servers",
+    "create_library_powerset_agents",
+    "BatchResult",
     "BasePowersetAgentConfig", 
     "LibraryPowersetAgentConfig",
-    "PayloadDiscoveryConfig"
-]
\ No newline at end of file
+    "PayloadDiscoveryConfig",
+    "CurriculumStore",
+    "get_curriculum_store",
+    "AgentRunner",
+    "RunResult",
+    "run_agent_prompts",
+    "AgentWorkspace",
+    "WorkspaceAllocator",
+    "get_workspace_allocator",
+    "McpServerPool",
+    "get_default_pool",
+    "InMemorySink",
+    "JsonlSink",
+    "OtlpHttpSink",
+    "configure_tracing",
+    "get_tracer",
+    "RouteTable",
+    "LatencyAwareRouter",
+    "StubProvider",
+    "get_route_table",
+    "AgentDaemon",
+    "DaemonClient",
+    "KnowledgePack",
+    "KnowledgePackStore",
+    "get_knowledge_store",
+    "snapshot_knowledge_pack",
+    "FleetOrchestrator",
+    "FleetResult",
+    "load_manifest",
+    "AgentRegistry",
+    "AgentSpec",
+    "get_registry",
+    "ToolRegistry",
+    "get_tool_registry",
+    "InProcessMcpHost",
+    "get_inprocess_host",
+    "BoundedExecutor",
+    "ExecutionLimits",
+    "ContextBudget",
+    "Cassette",
+    "get_cassette",
+    "stream_agent",
+    "AgentEvent",
+    "emit_event",
+    "WaypointPrefetcher",
+    "get_prefetcher",
+    "StarlogJournal",
+    "get_journal"
+]
+
+if TYPE_CHECKING:
+    from .factory import (
+        create_library_powerset_agent, heaven_config_cache_info, clear_heaven_config_cache, release_pooled_mcp_servers
+    )
+    from .batch import create_library_powerset_agents, BatchResult
+    from .config import BasePowersetAgentConfig, LibraryPowersetAgentConfig, PayloadDiscoveryConfig
+    from .curriculum import CurriculumStore, get_curriculum_store
+    from .runner import AgentRunner, RunResult, run_agent_prompts
+    from .workspace import AgentWorkspace, WorkspaceAllocator, get_workspace_allocator
+    from .mcp_pool import McpServerPool, get_default_pool
+    from .tracing import InMemorySink, JsonlSink, OtlpHttpSink, configure_tracing, get_tracer
+    from .routing import RouteTable, LatencyAwareRouter, StubProvider, get_route_table
+    from .daemon import AgentDaemon, DaemonClient
+    from .knowledge import KnowledgePack, KnowledgePackStore, get_knowledge_store, snapshot_knowledge_pack
+    from .fleet import FleetOrchestrator, FleetResult, load_manifest
+    from .registry import AgentRegistry, AgentSpec, get_registry
+    from .tool_registry import ToolRegistry, get_tool_registry
+    from .mcp_inprocess import InProcessMcpHost, get_inprocess_host
+    from .sandbox import BoundedExecutor, ExecutionLimits
+    from .context import ContextBudget
+    from .cassette import Cassette, get_cassette
+    from .streaming import AgentEvent, emit_event, stream_agent
+    from .prefetch import WaypointPrefetcher, get_prefetcher
+    from .journal import StarlogJournal, get_journal
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _LAZY_ATTRS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(_LAZY_ATTRS))
@@ -0,0 +1,211 @@
+"""Batch construction of library powerset agents."""
+
+import logging
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from .config import LibraryPowersetAgentConfig
+from .factory import (
+    ConversionArtifacts, _attach_local_mcp_servers, _convert_to_heaven_config, _start_agent_services
+)
+from .tracing import span
+
+if TYPE_CHECKING:
+    from heaven_base.baseheavenagent import HeavenAgentConfig
+    from heaven_base.unified_chat import ProviderEnum
+
+logger = logging.getLogger(__name__)
+
+# A spec is either a validated config or the keyword arguments of create_library_powerset_agent
+AgentSpec = Union[LibraryPowersetAgentConfig, Dict[str, Any]]
+
+
+@dataclass
+class BatchResult:
+    """Outcome of building one agent in a batch."""
+    index: int
+    name: Optional[str]
+    heaven_config: Optional["HeavenAgentConfig"] = None
+    config: Optional[LibraryPowersetAgentConfig] = None
+    error: Optional[BaseException] = None
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class SharedConversionArtifacts(ConversionArtifacts):
+    """
+    ConversionArtifacts that computes each distinct piece once and shares it across a batch.
+
+    Tool class lists are shared per tool-name tuple, providers per model, and MCP server
+    dicts per server selection and data dir. Each agent gets its own copy of the shared
+    containers, so adding a tool or server to one agent leaves the rest of the batch alone.
+    Pooled MCP leases are not part of these artifacts; each agent takes its own.
+    """
+
+    def __init__(self):
+        self._providers: Dict[str, "ProviderEnum"] = {}
+        self._tools: Dict[Tuple[str, ...], List] = {}
+        self._mcp_servers: Dict[Tuple[str, ...], Dict[str, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def provider(self, model: str) -> "ProviderEnum":
+        with self._lock:
+            if model not in self._providers:
+                self._providers[model] = super().provider(model)
+            return self._providers[model]
+
+    def tools(self, tool_names: List[str]) -> List:
+        key = tuple(name.lower() for name in tool_names)
+        with self._lock:
+            if key not in self._tools:
+                self._tools[key] = super().tools(tool_names)
+            return list(self._tools[key])
+
+    def mcp_servers(self, config: LibraryPowersetAgentConfig) -> Dict[str, Dict[str, Any]]:
+        key = tuple(config.mcp_servers) + (config.heaven_data_dir,)
+        with self._lock:
+            if key not in self._mcp_servers:
+                self._mcp_servers[key] = super().mcp_servers(config)
+            return {name: dict(spec) for name, spec in self._mcp_servers[key].items()}
+
+
+def create_library_powerset_agents(
+    specs: Iterable[AgentSpec],
+    executor: Optional[str] = None,
+    max_workers: Optional[int] = None,
+    artifacts: Optional[SharedConversionArtifacts] = None
+) -> Iterator[BatchResult]:
+    """
+    Build HeavenAgentConfigs for many libraries, streaming results as they are ready.
+
+    Each spec is either a LibraryPowersetAgentConfig (used without re-validation) or a dict
+    of create_library_powerset_agent keyword arguments. Agents come out as the factory
+    builds them: in-process MCP servers started, pooled ones leased, curriculum prefetch
+    and STARLOG journal started. With the process executor, workers only convert; those
+    servers and helpers are set up in this process, where the agents will run. Failures (including a spec that
+    cannot be pickled or a worker that dies) are reported on the corresponding
+    BatchResult and never abort the rest of the batch.
+
+    Args:
+        specs: Agent specs to build
+        executor: None to build inline, "thread" for a thread pool or "process" for a
+            process pool (each worker process shares artifacts among the agents it builds)
+        max_workers: Pool size when an executor is used
+        artifacts: Shared artifacts to reuse across batches; a fresh set is used if omitted
+
+    Yields:
+        BatchResult per spec, in input order when built inline and in completion order
+        when built in a pool
+
+    Example:
+        >>> for result in create_library_powerset_agents(specs, executor="thread"):
+        ...     if not result.ok:
+        ...         print(f"{result.name} failed: {result.error}")
+    """
+    artifacts = artifacts or SharedConversionArtifacts()
+
+    if executor is None:
+        for index, spec in enumerate(specs):
+            yield _build_one(index, spec, artifacts)
+        return
+
+    pool: Executor
+    if executor == "thread":
+        pool = ThreadPoolExecutor(max_workers=max_workers)
+    elif executor == "process":
+        pool = ProcessPoolExecutor(max_workers=max_workers)
+    else:
+        raise ValueError(f"Unknown executor: {executor} (expected 'thread' or 'process')")
+
+    with pool:
+        futures = {}
+        for index, spec in enumerate(specs):
+            try:
+                if executor == "thread":
+                    future = pool.submit(_build_one, index, spec, artifacts)
+                else:
+                    future = pool.submit(_build_one_in_worker, index, spec)
+            except Exception as e:
+                yield _failed(index, spec, e)
+                continue
+            futures[future] = (index, spec, time.perf_counter())
+
+        for future in as_completed(futures):
+            index, spec, submitted = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                # Pickling errors and a broken process pool surface here, per spec
+                result = _failed(index, spec, e, time.perf_counter() - submitted)
+            if executor == "process" and result.ok:
+                result = _finish(result)
+            yield result
+
+
+def _spec_name(spec: AgentSpec) -> Optional[str]:
+    if isinstance(spec, LibraryPowersetAgentConfig):
+        return spec.name
+    return spec.get("name") if isinstance(spec, dict) else None
+
+
+def _failed(index: int, spec: AgentSpec, error: BaseException, elapsed: float = 0.0) -> BatchResult:
+    logger.warning("Failed to build agent #%d (%s): %s", index, _spec_name(spec), error)
+    return BatchResult(index=index, name=_spec_name(spec), error=error, elapsed=elapsed)
+
+
+def _build_one(
+    index: int,
+    spec: AgentSpec,
+    artifacts: ConversionArtifacts,
+    finish: bool = True
+) -> BatchResult:
+    """
+    Validate and convert a single spec, capturing any failure on the result.
+
+    With finish=False (process workers), pooled and in-process MCP servers and the
+    in-process helpers are left for _finish in the process that runs the agent.
+    """
+    started = time.perf_counter()
+    name = _spec_name(spec)
+    try:
+        with span("factory.create", agent=name, batch_index=index):
+            with span("config.validate"):
+                config = spec if isinstance(spec, LibraryPowersetAgentConfig) else LibraryPowersetAgentConfig(**spec)
+            heaven_config = _convert_to_heaven_config(config, artifacts, attach_local=finish)
+            if finish:
+                _start_agent_services(config)
+        return BatchResult(index=index, name=name, heaven_config=heaven_config, config=config,
+                           elapsed=time.perf_counter() - started)
+    except Exception as e:
+        return _failed(index, spec, e, time.perf_counter() - started)
+
+
+def _finish(result: BatchResult) -> BatchResult:
+    """Attach local MCP servers and start helpers for an agent converted in a worker process."""
+    started = time.perf_counter()
+    try:
+        _attach_local_mcp_servers(result.heaven_config, result.config)
+        _start_agent_services(result.config)
+    except Exception as e:
+        logger.warning("Failed to build agent #%d (%s): %s", result.index, result.name, e)
+        return BatchResult(index=result.index, name=result.name, config=result.config, error=e,
+                           elapsed=result.elapsed + time.perf_counter() - started)
+    result.elapsed += time.perf_counter() - started
+    return result
+
+
+_worker_artifacts: Optional[SharedConversionArtifacts] = None
+
+
+def _build_one_in_worker(index: int, spec: AgentSpec) -> BatchResult:
+    """Process-pool entry point; artifacts are shared per worker process."""
+    global _worker_artifacts
+    if _worker_artifacts is None:
+        _worker_artifacts = SharedConversionArtifacts()
+    return _build_one(index, spec, _worker_artifacts, finish=False)
@@ -0,0 +1,17 @@
+"""HEAVEN BashTool variant that runs commands through the bounded executor."""
+
+from typing import Any
+
+from heaven_base.tools.bash_tool import BashTool
+
+from .sandbox import get_executor
+
+
+def bounded_bash(command: str, **_: Any) -> str:
+    """Run `command` with streaming, output caps, time/memory limits and result caching."""
+    return get_executor().run(command).render()
+
+
+class BoundedBashTool(BashTool):
+    """BashTool (same name and schema) whose commands run through BoundedExecutor."""
+    func = staticmethod(bounded_bash)
@@ -0,0 +1,276 @@
+"""
+Record/replay cassettes for LLM, MCP and tool calls.
+
+A cassette is a SQLite file of request/response pairs keyed by a hash of the normalized
+request: whitespace collapsed, and UUIDs, long hex ids and timestamps masked, so
+reruns that differ only in those still match. Modes:
+
+- "record": always call live and store the response (overwriting)
+- "replay": answer only from the cassette; a miss raises CassetteMiss (offline CI)
+- "replay-then-live": answer from the cassette, call live and record on a miss
+
+The store is an LRU bounded by entry count and total response bytes.
+
+    cassette = Cassette("/tmp/metastack.cassette", mode="replay-then-live")
+    runner = AgentRunner(create_metastack_agent(), cassette=cassette)
+
+AgentRunner and the bounded command executor use the process-wide cassette from
+POWERSET_CASSETTE (path) and POWERSET_CASSETTE_MODE when none is passed; MCP sessions
+are wrapped with `wrap_session()`, anything else with `call()` / `wrap()`. Responses
+that are not JSON are pickled, so only replay cassettes you recorded yourself.
+"""
+
+import hashlib
+import inspect
+import json
+import logging
+import os
+import pickle
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .tracing import span
+
+logger = logging.getLogger(__name__)
+
+MODES = ("record", "replay", "replay-then-live")
+
+_NORMALIZERS = [
+    (re.compile(r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b", re.I), "<uuid>"),
+    (re.compile(r"\b\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:\.\d+)?(?:Z|[+-]\d{2}:?\d{2})?\b"), "<timestamp>"),
+    (re.compile(r"\b[0-9a-f]{16,}\b", re.I), "<hex>"),
+    (re.compile(r"\s+"), " "),
+]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS calls (
+    key TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    request TEXT NOT NULL,
+    encoding TEXT NOT NULL,
+    response BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS calls_last_used ON calls (last_used);
+"""
+
+
+class CassetteMiss(KeyError):
+    """Raised in strict replay mode for a request the cassette has not recorded."""
+
+
+def _mask(value: Any) -> Any:
+    if isinstance(value, str):
+        for pattern, replacement in _NORMALIZERS:
+            value = pattern.sub(replacement, value)
+        return value.strip()
+    if isinstance(value, dict):
+        return {str(key): _mask(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_mask(item) for item in value]
+    return value
+
+
+def normalize(value: Any) -> str:
+    """Canonical text for a request: sorted JSON with volatile tokens masked in every string."""
+    masked = _mask(value)
+    return masked if isinstance(masked, str) else json.dumps(masked, sort_keys=True, default=str)
+
+
+def _encode(response: Any) -> Tuple[str, bytes]:
+    try:
+        return "json", json.dumps(response).encode()
+    except (TypeError, ValueError):
+        return "pickle", pickle.dumps(response)
+
+
+def _decode(encoding: str, data: bytes) -> Any:
+    return json.loads(data) if encoding == "json" else pickle.loads(data)
+
+
+class Cassette:
+    """
+    SQLite-backed request/response store with record and replay modes.
+
+    Args:
+        path: Cassette file
+        mode: "record", "replay" or "replay-then-live"
+        max_entries: Least recently used entries beyond this are evicted
+        max_bytes: Least recently used entries are evicted while stored responses exceed this
+    """
+
+    def __init__(
+        self,
+        path: str,
+        mode: str = "replay-then-live",
+        max_entries: int = 10000,
+        max_bytes: int = 512 * 1024 * 1024
+    ):
+        if mode not in MODES:
+            raise ValueError(f"Unknown cassette mode: {mode} (expected one of {', '.join(MODES)})")
+        self.path = path
+        self.mode = mode
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(kind: str, request: Any) -> str:
+        return hashlib.sha256(f"{kind}\0{normalize(request)}".encode()).hexdigest()
+
+    def lookup(self, kind: str, request: Any) -> Tuple[bool, Any]:
+        """(True, response) if the request was recorded, else (False, None)."""
+        key = self.key(kind, request)
+        with self._lock:
+            row = self._db.execute("SELECT encoding, response FROM calls WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return False, None
+            self._db.execute("UPDATE calls SET last_used = ?, hits = hits + 1 WHERE key = ?", (time.time(), key))
+        return True, _decode(row[0], row[1])
+
+    def put(self, kind: str, request: Any, response: Any) -> None:
+        """Record a response, evicting least recently used entries beyond the limits."""
+        encoding, data = _encode(response)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO calls (key, kind, request, encoding, response, size, created, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (self.key(kind, request), kind, normalize(request)[:2000], encoding, data, len(data), now, now)
+            )
+            self._evict()
+
+    def _evict(self) -> None:
+        count, total = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM calls").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        evicted = 0
+        for key, size in self._db.execute("SELECT key, size FROM calls ORDER BY last_used").fetchall():
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            self._db.execute("DELETE FROM calls WHERE key = ?", (key,))
+            count -= 1
+            total -= size
+            evicted += 1
+        logger.debug("Evicted %d cassette entries from %s", evicted, self.path)
+
+    def _replay(self, kind: str, request: Any) -> Tuple[bool, Any]:
+        if self.mode == "record":
+            return False, None
+        found, response = self.lookup(kind, request)
+        if found:
+            self.hits += 1
+            return True, response
+        self.misses += 1
+        if self.mode == "replay":
+            raise CassetteMiss(f"No recorded {kind} call in {self.path} for: {normalize(request)[:200]}")
+        return False, None
+
+    async def call(self, kind: str, request: Any, live: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Answer `request` according to the mode, calling `live()` when it must go live.
+
+        Args:
+            kind: Call category, e.g. "llm", "mcp:starlog" or "tool:bash"
+            request: JSON-serializable description of the call
+            live: Zero-argument coroutine function performing the real call
+        """
+        with span("cassette.call", kind=kind, mode=self.mode) as call_span:
+            found, response = self._replay(kind, request)
+            call_span.set("replayed", found)
+            if found:
+                return response
+            response = await live()
+            self.put(kind, request, response)
+            return response
+
+    def call_sync(self, kind: str, request: Any, live: Callable[[], Any]) -> Any:
+        """Blocking form of call() for synchronous calls such as shell commands."""
+        with span("cassette.call", kind=kind, mode=self.mode) as call_span:
+            found, response = self._replay(kind, request)
+            call_span.set("replayed", found)
+            if found:
+                return response
+            response = live()
+            self.put(kind, request, response)
+            return response
+
+    def wrap(self, kind: str, func: Callable[..., Any]) -> Callable[..., Any]:
+        """Record/replay `func(*args, **kwargs)` keyed by its arguments (sync or async)."""
+        if inspect.iscoroutinefunction(func):
+            async def wrapped_async(*args: Any, **kwargs: Any) -> Any:
+                return await self.call(kind, {"args": list(args), "kwargs": kwargs}, lambda: func(*args, **kwargs))
+            return wrapped_async
+
+        def wrapped(*args: Any, **kwargs: Any) -> Any:
+            return self.call_sync(kind, {"args": list(args), "kwargs": kwargs}, lambda: func(*args, **kwargs))
+        return wrapped
+
+    def wrap_session(self, session: Any, server_name: str) -> Any:
+        """Route an MCP ClientSession's call_tool through the cassette (in place)."""
+        call_tool = session.call_tool
+
+        async def recorded_call_tool(name: str, arguments: Optional[Dict[str, Any]] = None, **kwargs: Any) -> Any:
+            return await self.call(f"mcp:{server_name}", {"tool": name, "arguments": arguments or {}},
+                                   lambda: call_tool(name, arguments, **kwargs))
+        session.call_tool = recorded_call_tool
+        return session
+
+    def wrap_executor(self, executor: Callable[[str, Any], Awaitable[Any]]) -> Callable[[str, Any], Awaitable[Any]]:
+        """Wrap an AgentRunner executor: calls are keyed by model, system prompt and prompt."""
+        async def execute(prompt: str, agent_config: Any) -> Any:
+            request = {
+                "model": getattr(agent_config, "model", None),
+                "system_prompt": getattr(agent_config, "system_prompt", ""),
+                "prompt": prompt,
+            }
+            return await self.call("llm", request, lambda: executor(prompt, agent_config))
+        return execute
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            count, total = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM calls").fetchone()
+        return {"entries": count, "bytes": total, "hits": self.hits, "misses": self.misses}
+
+    def entries(self, kind: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Recorded calls (normalized request, size, hits), most recently used first."""
+        query = "SELECT kind, request, size, hits FROM calls"
+        params: tuple = ()
+        if kind is not None:
+            query += " WHERE kind = ?"
+            params = (kind,)
+        with self._lock:
+            rows = self._db.execute(query + " ORDER BY last_used DESC", params).fetchall()
+        return [{"kind": k, "request": r, "size": s, "hits": h} for k, r, s, h in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+_default_cassette: Optional[Cassette] = None
+_default_cassette_lock = threading.Lock()
+
+
+def get_cassette() -> Optional[Cassette]:
+    """Process-wide cassette from POWERSET_CASSETTE / POWERSET_CASSETTE_MODE, or None if unset."""
+    global _default_cassette
+    path = os.environ.get("POWERSET_CASSETTE")
+    if not path:
+        return None
+    with _default_cassette_lock:
+        if _default_cassette is None or _default_cassette.path != path:
+            _default_cassette = Cassette(path, mode=os.environ.get("POWERSET_CASSETTE_MODE", "replay-then-live"))
+        return _default_cassette
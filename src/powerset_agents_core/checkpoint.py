@@ -0,0 +1,204 @@
+"""
+Curriculum progress read back from a STARLOG session.
+
+Waypoint logs every step it serves to the session's debug diary, stored at
+`<HEAVEN_DATA_DIR>/registry/<project>_debug_diary_registry.json`, as
+`🧭 @waypoint:<domain>:<version>(<config>) Completed step n/t - <filename> served`.
+A step is complete once waypoint serves the step after it, or ends the journey
+(logging END, or serving a step numbered n >= t, which waypoint treats as the
+last). A START, ABORT or RESET entry means the step in flight was not finished.
+
+Progress is only counted for the curriculum hash and package version an agent
+resumes with. `<starlog_path>/powerset_checkpoint.json` records which pair the
+session was last resumed with, and since when. Only the factory writes it. When
+either value changes, diary entries from before the change are ignored.
+"""
+
+import argparse
+import json
+import os
+import re
+import tempfile
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+CHECKPOINT_FILENAME = "powerset_checkpoint.json"
+
+_STEP_SERVED = re.compile(r"Completed step (\d+)/(\d+) - (.+?) served(?: - |$)")
+
+_write_lock = threading.Lock()
+
+
+def checkpoint_path(starlog_path: str) -> str:
+    return os.path.join(starlog_path, CHECKPOINT_FILENAME)
+
+
+def diary_registry_path(starlog_path: str, heaven_data_dir: str) -> str:
+    """Registry file STARLOG and waypoint keep the session's debug diary in."""
+    return os.path.join(heaven_data_dir, "registry", f"{Path(starlog_path).name}_debug_diary_registry.json")
+
+
+def read_waypoint_state(starlog_path: str) -> Dict[str, Any]:
+    """Waypoint's saved position in the session's journey (empty when none is running)."""
+    return _read_json(f"/tmp/waypoint_state_{Path(starlog_path).name}.json")
+
+
+def _progress_key(curriculum_hash: str, version: str) -> str:
+    return f"{curriculum_hash}:{version}"
+
+
+def _read_json(path: str) -> Dict[str, Any]:
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _stat_token(path: str) -> str:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return "none"
+    return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+
+def checkpoint_fingerprint(starlog_path: str, heaven_data_dir: str) -> str:
+    """Cheap token that changes whenever the diary or the resume binding is rewritten."""
+    return f"{_stat_token(diary_registry_path(starlog_path, heaven_data_dir))}/{_stat_token(checkpoint_path(starlog_path))}"
+
+
+def resume_since(starlog_path: str, curriculum_hash: str, version: str) -> Optional[str]:
+    """
+    Bind the session to this curriculum hash and package version.
+
+    Returns the ISO time diary entries count from. This is None (all of them)
+    for the first binding of a session, and the current time when the curriculum
+    or package version changed since the last one.
+    """
+    key = _progress_key(curriculum_hash, version)
+    with _write_lock:
+        data = _read_json(checkpoint_path(starlog_path))
+        if data.get("key") == key:
+            return data.get("since")
+        since = datetime.now().isoformat() if data.get("key") else None
+
+        os.makedirs(starlog_path, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=starlog_path, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump({"key": key, "since": since}, f, indent=2)
+        os.replace(tmp_path, checkpoint_path(starlog_path))
+        return since
+
+
+def _after(timestamp: str, since: Optional[str]) -> bool:
+    if since is None:
+        return True
+    try:
+        return datetime.fromisoformat(timestamp) >= datetime.fromisoformat(since)
+    except (TypeError, ValueError):
+        return False
+
+
+def completed_filenames(starlog_path: str, heaven_data_dir: str, domain: str, pd_version: str,
+                        since: Optional[str] = None) -> Set[str]:
+    """Files of the waypoint steps finished in the session's diary for one curriculum."""
+    registry = _read_json(diary_registry_path(starlog_path, heaven_data_dir))
+    entries = [e for e in registry.values() if isinstance(e, dict) and isinstance(e.get("content"), str)]
+    entries = [e for e in entries if _after(str(e.get("timestamp", "")), since)]
+    entries.sort(key=lambda e: str(e.get("timestamp", "")))
+
+    tag = f"🧭 @waypoint:{domain}:{pd_version}("
+    completed: Set[str] = set()
+    in_flight: Optional[str] = None
+    for entry in entries:
+        content = entry["content"]
+        if not content.startswith(tag) or ") " not in content[len(tag):]:
+            continue
+        status = content[len(tag):].split(") ", 1)[1]
+        served = _STEP_SERVED.match(status)
+        if served:
+            if in_flight is not None:
+                completed.add(in_flight)
+            step, total, in_flight = int(served.group(1)), int(served.group(2)), served.group(3)
+            if step >= total:
+                completed.add(in_flight)
+                in_flight = None
+        elif status.startswith("END"):
+            if in_flight is not None:
+                completed.add(in_flight)
+            in_flight = None
+        elif status.startswith(("START", "ABORT", "RESET")):
+            in_flight = None
+    return completed
+
+
+def load_progress(starlog_path: str, heaven_data_dir: str, raw: Dict[str, Any],
+                  since: Optional[str] = None) -> Set[str]:
+    """Waypoints of a curriculum that the session's diary shows as completed."""
+    filenames = completed_filenames(starlog_path, heaven_data_dir, raw.get("domain", ""),
+                                    raw.get("version", "v01"), since)
+    completed = {_piece_id(piece) for piece in raw.get("root_files", []) if _filename(piece) in filenames}
+    directories = raw.get("directories", {})
+    if isinstance(directories, dict):
+        for directory, pieces in directories.items():
+            completed.update(_piece_id(piece, directory) for piece in pieces if _filename(piece) in filenames)
+    return completed
+
+
+def _filename(piece: Any) -> str:
+    return piece.get("filename", "") if isinstance(piece, dict) else str(piece)
+
+
+def _piece_id(piece: Any, directory: str = "") -> str:
+    if isinstance(piece, dict):
+        name = piece.get("filename") or piece.get("title") or str(piece.get("sequence_number", ""))
+    else:
+        name = str(piece)
+    return f"{directory}/{name}" if directory else name
+
+
+def waypoint_ids(raw: Dict[str, Any]) -> List[str]:
+    """Waypoint identifiers of a PayloadDiscovery curriculum, in file order."""
+    ids = [_piece_id(piece) for piece in raw.get("root_files", [])]
+    directories = raw.get("directories", {})
+    if isinstance(directories, dict):
+        for directory, pieces in directories.items():
+            ids.extend(_piece_id(piece, directory) for piece in pieces)
+    return ids
+
+
+def trim_curriculum(raw: Dict[str, Any], completed: Set[str]) -> Dict[str, Any]:
+    """Copy of a curriculum without the completed waypoints."""
+    trimmed = dict(raw)
+    trimmed["root_files"] = [p for p in raw.get("root_files", []) if _piece_id(p) not in completed]
+    directories = raw.get("directories", {})
+    if isinstance(directories, dict):
+        trimmed["directories"] = {
+            directory: remaining
+            for directory, pieces in directories.items()
+            for remaining in [[p for p in pieces if _piece_id(p, directory) not in completed]]
+            if remaining
+        }
+    return trimmed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Show the curriculum waypoints a STARLOG session has completed")
+    parser.add_argument("starlog_path")
+    parser.add_argument("curriculum", help="PayloadDiscovery JSON file")
+    parser.add_argument("--heaven-data-dir", default=os.environ.get("HEAVEN_DATA_DIR", "/tmp/heaven_data"))
+    args = parser.parse_args()
+
+    with open(args.curriculum) as f:
+        raw = json.load(f)
+    since = _read_json(checkpoint_path(args.starlog_path)).get("since")
+    for waypoint in sorted(load_progress(args.starlog_path, args.heaven_data_dir, raw, since)):
+        print(waypoint)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Generic CLI for registered powerset agents.
+
+Usage:
+    powerset-agent list
+    powerset-agent show metastack
+    powerset-agent run metastack                 # interactive HEAVEN CLI (needs the HEAVEN HTTP server)
+    powerset-agent run metastack --attach        # attach through the shared agent daemon
+    powerset-agent run metastack --prompt "..."  # one streamed completion, printed as it happens
+    powerset-agent run metastack --prompt "..." --hermes 3   # streamed Hermes run
+
+Only the requested agent's config is built; other catalog entries are never imported.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from typing import List, Optional
+
+from .registry import get_registry
+
+
+DEFAULT_SERVER_URL = "http://localhost:8080"
+
+
+def run_agent(name: str, server_url: Optional[str] = None, attach: bool = False) -> None:
+    """
+    Start the interactive CLI for one registered agent.
+
+    The HEAVEN CLI talks to `server_url` (default DEFAULT_SERVER_URL). With `attach`, the
+    daemon runs turns in-process unless a `server_url` is given.
+    """
+    spec = get_registry().get(name)
+
+    if attach:
+        from .daemon import attach_repl
+        attach_repl(spec.key, server_url=server_url)
+        return
+
+    from heaven_base.cli import make_cli
+
+    print(f"🌟 Initializing {spec.name}...")
+    agent_config = get_registry().create(spec.key)
+    cli = make_cli(agent_config=agent_config, server_url=server_url or DEFAULT_SERVER_URL)
+    print(f"✅ {spec.name} ready!")
+    if spec.tagline:
+        print(f"💡 {spec.tagline}")
+    cli.run_sync()
+
+
+async def stream_prompt(name: str, prompt: str, hermes_iterations: Optional[int] = None) -> bool:
+    """Run one prompt through a registered agent, printing events as they arrive; True on success."""
+    from .streaming import hermes_executor, stream_agent
+
+    spec = get_registry().get(name)
+    print(f"🌟 {spec.name}", flush=True)
+    executor = hermes_executor(hermes_iterations) if hermes_iterations else None
+    ok = False
+    async for event in stream_agent(prompt, get_registry().create(spec.key), executor=executor):
+        sys.stdout.write(event.render())
+        sys.stdout.flush()
+        ok = event.kind == "done"
+    return ok
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="powerset-agent", description="Run registered powerset agents")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="List registered agents")
+    show = sub.add_parser("show", help="Print an agent's catalog entry")
+    show.add_argument("name")
+    run = sub.add_parser("run", help="Start an agent's interactive CLI")
+    run.add_argument("name")
+    run.add_argument("--server-url", default=None,
+                     help=f"HEAVEN HTTP server (default {DEFAULT_SERVER_URL}); with --attach, the daemon "
+                          "forwards turns to it only when given, and runs them itself otherwise")
+    run.add_argument("--attach", action="store_true",
+                     help="Attach to the shared agent daemon instead of starting a new agent")
+    run.add_argument("--prompt", help="Run this prompt once and stream the output instead of the interactive CLI")
+    run.add_argument("--hermes", type=int, metavar="ITERATIONS",
+                     help="With --prompt: run it as a Hermes goal for this many iterations")
+    args = parser.parse_args(argv)
+
+    registry = get_registry()
+    if args.command != "list" and args.name not in registry:
+        parser.error(f"unknown agent: {args.name} (known: {', '.join(registry.names())})")
+    if args.command == "run" and args.hermes is not None and args.prompt is None:
+        parser.error("--hermes needs --prompt")
+    if args.command == "list":
+        for key in registry.names():
+            spec = registry.get(key)
+            aliases = f" (aliases: {', '.join(spec.aliases)})" if spec.aliases else ""
+            print(f"{key:<20} {spec.fields.get('pkg_path', ''):<28} {spec.name}{aliases}")
+    elif args.command == "show":
+        spec = registry.get(args.name)
+        print(json.dumps({"key": spec.key, "aliases": spec.aliases, "source": spec.source, **spec.fields}, indent=2))
+    elif args.prompt is not None:
+        if not asyncio.run(stream_prompt(args.name, args.prompt, args.hermes)):
+            sys.exit(1)
+    else:
+        run_agent(args.name, server_url=args.server_url, attach=args.attach)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,62 @@
 """Configuration models for Powerset Agents."""
 
-from typing import Optional, List
-from pydantic import BaseModel, Field
-from payload_discovery.core import PayloadDiscovery
+import hashlib
+import json
+import os
+from typing import TYPE_CHECKING, Any, Optional, List
+from pydantic import BaseModel, Field, field_validator, model_validator
+
+if TYPE_CHECKING:
+    from payload_discovery.core import PayloadDiscovery
 
 
 class PayloadDiscoveryConfig(BaseModel):
     """Configuration for PayloadDiscovery curriculum."""
     path: Optional[str] = Field(None, description="Path to the PayloadDiscovery JSON file")
-    model: Optional[PayloadDiscovery] = Field(None, description="PayloadDiscovery model instance")
+    model: Optional[Any] = Field(None, description="PayloadDiscovery model instance")
     instructions: str = Field(..., description="When/how to use this curriculum")
+    validate_curriculum: bool = Field(
+        default=False,
+        description="Load and validate the curriculum file once per process when building agents"
+    )
+    prefetch_depth: int = Field(
+        default=0,
+        ge=0,
+        description="Curriculum steps loaded and validated in the background ahead of the agent (0 disables); "
+                    "needs the 'inprocess:waypoint' MCP server, which moves the read-ahead with the journey"
+    )
+    prefetch_max_mb: int = Field(default=64, gt=0, description="Memory cap for prefetched curriculum steps")
     
     class Config:
         arbitrary_types_allowed = True
 
+    @field_validator("model")
+    @classmethod
+    def _validate_model(cls, value: Any) -> Optional["PayloadDiscovery"]:
+        """Validate as PayloadDiscovery, importing payload_discovery only when a model is given."""
+        if value is None:
+            return None
+        from payload_discovery.core import PayloadDiscovery
+        if isinstance(value, PayloadDiscovery):
+            return value
+        return PayloadDiscovery.model_validate(value)
+
+    def content_hash(self) -> str:
+        """Stable SHA-256 over the settings and the curriculum's actual contents."""
+        from .curriculum import get_curriculum_store
+        
+        if self.path and os.path.exists(self.path):
+            curriculum = get_curriculum_store().content_hash(self.path)
+        elif self.model is not None:
+            curriculum = json.dumps(self.model.model_dump(mode="json"), sort_keys=True)
+        else:
+            curriculum = "missing"
+        
+        payload = json.dumps(
+            [self.path, curriculum, self.instructions, self.validate_curriculum], sort_keys=True
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
 
 class BasePowersetAgentConfig(BaseModel):
     """Base configuration for all powerset agents."""
@@ -23,19 +66,98 @@ class BasePowersetAgentConfig(BaseModel):
     description: Optional[str] = Field(None, description="Description of what this agent does")
     
     # HEAVEN agent configuration
-    model: str = Field(default="gpt-5-mini", description="LLM model to use")
+    model: str = Field(default="gpt-5-mini", description="LLM model, routing alias or model group to use")
     max_iterations: int = Field(default=50, description="Maximum agent iterations")
+    context_budget_tokens: Optional[int] = Field(
+        default=None,
+        description="Token budget for the history resent each iteration; enables compaction and a pinned prompt prefix"
+    )
+    context_keep_recent: int = Field(default=8, description="Trailing messages never compacted")
     
     # Session configuration
     starlog_path: str = Field(..., description="Path for STARLOG session tracking")
     workspace_path: str = Field(default="/tmp", description="Workspace directory for agent operations")
+    heaven_data_dir: str = Field(default="/tmp/heaven_data", description="HEAVEN_DATA_DIR passed to the STARLOG MCP")
+    starlog_journal: Optional[str] = Field(
+        default=None,
+        description="Journal STARLOG writes write-behind with this durability policy: 'always', 'interval' or "
+                    "'session' (needs the 'inprocess:starlog' MCP server)"
+    )
+    starlog_journal_interval_ms: int = Field(default=50, gt=0, description="Flush period of the 'interval' journal policy")
     
     # MCP configuration (common to all powerset agents)
-    mcp_servers: List[str] = Field(default=["waypoint", "starlog"], description="MCP servers to equip")
-    tools: List[str] = Field(default=["networkedittool", "bashtool"], description="Tools to equip")
+    mcp_servers: List[str] = Field(
+        default=["waypoint", "starlog"],
+        description="MCP servers to equip (prefix with 'pooled:' to lease from the shared MCP server pool, "
+                    "or 'inprocess:' to serve from the agent's own process)"
+    )
+    tools: List[str] = Field(
+        default=["networkedittool", "bashtool"],
+        description="Tools to equip: built-in names or plugins from the 'powerset_agents.tools' entry point group"
+    )
+    bounded_execution: bool = Field(
+        default=False,
+        description="Run BashTool commands with output caps, time/memory limits and caching of read-only commands"
+    )
     
     # System prompt override
     custom_system_prompt: Optional[str] = Field(None, description="Custom system prompt (overrides default)")
+    pin_prompt_prefix: bool = Field(
+        default=False,
+        description="Render the generated prompt with a stable agent-independent prefix for provider prompt caching"
+    )
+
+    @field_validator("mcp_servers")
+    @classmethod
+    def _validate_mcp_servers(cls, value: List[str]) -> List[str]:
+        """Check MCP server names (after any 'pooled:'/'inprocess:' prefix) are known."""
+        from .mcp_inprocess import split_inprocess_name
+        from .mcp_pool import MCP_SERVER_MODULES, split_pooled_name
+        unknown = [
+            server for server in value
+            if (split_pooled_name(server) or split_inprocess_name(server) or server) not in MCP_SERVER_MODULES
+        ]
+        if unknown:
+            raise ValueError(
+                f"Unknown MCP server(s): {', '.join(unknown)} (known: {', '.join(sorted(MCP_SERVER_MODULES))})"
+            )
+        return value
+
+    @model_validator(mode="after")
+    def _validate_inprocess_starlog(self) -> "BasePowersetAgentConfig":
+        """In-process STARLOG reads the process's HEAVEN_DATA_DIR, so it must be this agent's."""
+        if "inprocess:starlog" in self.mcp_servers:
+            from .mcp_inprocess import check_inprocess_env
+            check_inprocess_env("starlog", {"HEAVEN_DATA_DIR": self.heaven_data_dir})
+        return self
+
+    @field_validator("starlog_journal")
+    @classmethod
+    def _validate_starlog_journal(cls, value: Optional[str]) -> Optional[str]:
+        from .journal import POLICIES
+        if value is not None and value not in POLICIES:
+            raise ValueError(f"Unknown starlog_journal policy: {value} (expected one of {', '.join(POLICIES)})")
+        return value
+
+    @field_validator("tools")
+    @classmethod
+    def _validate_tools(cls, value: List[str]) -> List[str]:
+        """Check tool names against the tool registry without importing any tool."""
+        from .tool_registry import get_tool_registry
+        get_tool_registry().validate(value)
+        return value
+
+    def content_hash(self) -> str:
+        """Stable SHA-256 over every field, with nested curricula hashed by content."""
+        digest = hashlib.sha256()
+        for field_name in sorted(type(self).model_fields):
+            value = getattr(self, field_name)
+            if isinstance(value, PayloadDiscoveryConfig):
+                encoded = value.content_hash()
+            else:
+                encoded = json.dumps(value, sort_keys=True, default=str)
+            digest.update(f"{field_name}={encoded}\0".encode())
+        return digest.hexdigest()
 
 
 class LibraryPowersetAgentConfig(BasePowersetAgentConfig):
@@ -44,6 +166,20 @@ class LibraryPowersetAgentConfig(BasePowersetAgentConfig):
     # Target library to learn
     pkg_path: str = Field(..., description="Path or name of the library package to learn")
     help_command: str = Field(..., description="Command to introspect the library (e.g., 'python -c \"import pkg; help(pkg)\"')")
+    preload_help: bool = Field(
+        default=False,
+        description="Run help_command once per package version and expose the cached, chunked output to the agent"
+    )
+    resume_from_checkpoint: bool = Field(
+        default=False,
+        description="Skip curriculum waypoints the STARLOG session's diary shows as completed "
+                    "for this curriculum and package version"
+    )
+    use_knowledge_pack: bool = Field(
+        default=False,
+        description="Inject the saved knowledge pack for the installed package version in place of the curriculum walk"
+    )
+    knowledge_pack_budget: int = Field(default=8000, description="Maximum characters of knowledge pack in the prompt")
     
     # Learning sequence
     payload_discovery_config: PayloadDiscoveryConfig = Field(..., description="PayloadDiscovery configuration for this library")
\ No newline at end of file
@@ -0,0 +1,226 @@
+"""
+Context-window budget for long learning runs.
+
+A learning run resends its whole history every iteration: curriculum walk, help output
+and tool results. ContextBudget keeps that history under a token budget. It applies
+deterministic rules to everything except the leading system prompt and the most
+recent messages:
+
+1. Tool outputs from STARLOG (any tool in mcp_pool.STARLOG_TOOLS) are kept verbatim,
+   because they hold the facts the agent chose to record.
+2. pydoc/help dumps are replaced by a one-line note.
+3. Other tool outputs are cut to a short head.
+4. If the history is still over budget, the oldest turns are dropped whole. STARLOG
+   outputs from those turns are carried over in a single note right after the system
+   prompt.
+
+The same input always produces the same output, and nothing is touched while the
+history fits the budget. Every call is recorded, so per-iteration prompt sizes can be
+checked for flat growth with `report()`.
+
+Message lists may hold OpenAI-style dicts ({"role", "content", "name"}) or LangChain
+message objects (`.type`, `.content`, `.name`).
+"""
+
+import copy
+import logging
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from .help_cache import _SECTION_RE
+from .mcp_pool import STARLOG_TOOLS
+from .tracing import span
+
+if TYPE_CHECKING:
+    from .config import BasePowersetAgentConfig
+
+logger = logging.getLogger(__name__)
+
+_ROLE_ALIASES = {"human": "user", "ai": "assistant"}
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token)."""
+    return (len(text) + 3) // 4
+
+
+def _role(message: Any) -> str:
+    if isinstance(message, dict):
+        return message.get("role", "")
+    role = getattr(message, "type", "")
+    return _ROLE_ALIASES.get(role, role)
+
+
+def _content(message: Any) -> str:
+    content = message.get("content") if isinstance(message, dict) else getattr(message, "content", "")
+    if isinstance(content, list):  # multi-part content
+        return "\n".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+    return content or ""
+
+
+def _tool_name(message: Any) -> str:
+    name = message.get("name") if isinstance(message, dict) else getattr(message, "name", None)
+    return name or ""
+
+
+def _is_starlog_output(message: Any) -> bool:
+    return _tool_name(message) in STARLOG_TOOLS
+
+
+def _with_content(message: Any, content: str) -> Any:
+    if isinstance(message, dict):
+        return {**message, "content": content}
+    if hasattr(message, "model_copy"):
+        return message.model_copy(update={"content": content})
+    replaced = copy.copy(message)
+    replaced.content = content
+    return replaced
+
+
+def _note_message(dropped: Any, head: List[Any], note: str) -> Any:
+    """The compaction note as its own message: in place of a dropped user turn, else after the system prompt."""
+    if _role(dropped) == "user":
+        return _with_content(dropped, note)
+    if head:
+        return _with_content(head[-1], note)
+    if isinstance(dropped, dict):
+        return {"role": "user", "content": note}
+    from langchain_core.messages import HumanMessage
+    return HumanMessage(content=note)
+
+
+def _message_tokens(message: Any) -> int:
+    return estimate_tokens(_content(message)) + 4  # role/framing overhead
+
+
+def _is_help_dump(text: str) -> bool:
+    if text.lstrip().startswith("Help on "):
+        return True
+    sections = sum(1 for line in text.splitlines() if _SECTION_RE.match(line))
+    return sections >= 2
+
+
+@dataclass
+class IterationStats:
+    """Prompt size for one iteration, before and after compaction."""
+    iteration: int
+    messages: int
+    tokens_before: int
+    tokens_after: int
+    compacted: int = 0
+    dropped: int = 0
+
+
+class ContextBudget:
+    """
+    Keeps an agent's message history under a token budget.
+
+    Args:
+        budget_tokens: Target size of the history sent each iteration
+        keep_recent: Trailing messages never compacted
+        tool_output_chars: Characters kept from an old, non-STARLOG tool output
+    """
+
+    def __init__(self, budget_tokens: int, keep_recent: int = 8, tool_output_chars: int = 400):
+        self.budget_tokens = budget_tokens
+        self.keep_recent = keep_recent
+        self.tool_output_chars = tool_output_chars
+        self.stats: List[IterationStats] = []
+
+    @classmethod
+    def for_config(cls, config: "BasePowersetAgentConfig") -> Optional["ContextBudget"]:
+        """Budget from a powerset config, or None when context management is off."""
+        if config.context_budget_tokens is None:
+            return None
+        return cls(config.context_budget_tokens, keep_recent=config.context_keep_recent)
+
+    def compact(self, messages: List[Any], iteration: Optional[int] = None) -> List[Any]:
+        """Return `messages` compacted to fit the budget (the input list is not modified)."""
+        iteration = len(self.stats) + 1 if iteration is None else iteration
+        before = sum(_message_tokens(m) for m in messages)
+        stats = IterationStats(iteration, len(messages), before, before)
+        with span("context.compact", iteration=iteration) as compact_span:
+            if before > self.budget_tokens:
+                messages = self._compact(messages, stats)
+                stats.tokens_after = sum(_message_tokens(m) for m in messages)
+            compact_span.add("tokens_before", stats.tokens_before)
+            compact_span.add("tokens_after", stats.tokens_after)
+        self.stats.append(stats)
+        logger.debug("Context iteration %d: %d -> %d tokens", iteration, stats.tokens_before, stats.tokens_after)
+        return messages
+
+    def compact_in_place(self, history: Any, iteration: Optional[int] = None) -> None:
+        """Compact a message list, or an object with a `.messages` list, in place."""
+        messages = history if isinstance(history, list) else history.messages
+        messages[:] = self.compact(list(messages), iteration)
+
+    def report(self) -> List[Dict[str, int]]:
+        """Per-iteration prompt sizes recorded so far."""
+        return [asdict(stats) for stats in self.stats]
+
+    def _compact(self, messages: List[Any], stats: IterationStats) -> List[Any]:
+        pinned = 0
+        while pinned < len(messages) and _role(messages[pinned]) == "system":
+            pinned += 1
+        head, body = messages[:pinned], messages[pinned:]
+
+        # Never separate tool results from the assistant message that requested them
+        recent = max(0, len(body) - self.keep_recent)
+        while recent > 0 and _role(body[recent]) == "tool":
+            recent -= 1
+        old, tail = body[:recent], body[recent:]
+
+        compacted = []
+        for message in old:
+            if _role(message) == "tool":
+                replacement = self._compact_tool_output(message)
+                if replacement is not message:
+                    stats.compacted += 1
+                message = replacement
+            compacted.append(message)
+
+        budget = self.budget_tokens - sum(_message_tokens(m) for m in head + tail)
+        used = sum(_message_tokens(m) for m in compacted)
+        if used <= budget:
+            return head + compacted + tail
+
+        # Drop whole turns (a user message and everything up to the next one), oldest first
+        turns: List[List[Any]] = []
+        for message in compacted:
+            if _role(message) == "user" or not turns:
+                turns.append([])
+            turns[-1].append(message)
+        carried: List[str] = []
+        first_dropped = None
+        while turns and used > budget:
+            turn = turns.pop(0)
+            first_dropped = first_dropped or turn[0]
+            used -= sum(_message_tokens(m) for m in turn)
+            stats.dropped += len(turn)
+            carried.extend(_content(m) for m in turn if _role(m) == "tool" and _is_starlog_output(m))
+
+        kept = [message for turn in turns for message in turn]
+        if first_dropped is not None:
+            note = f"[{stats.dropped} earlier messages compacted to stay within the context budget."
+            if carried:
+                note += " STARLOG facts recorded in them:]\n" + "\n".join(carried)
+            else:
+                note += "]"
+            kept.insert(0, _note_message(first_dropped, head, note))
+        return head + kept + tail
+
+    def _compact_tool_output(self, message: Any) -> Any:
+        text = _content(message)
+        if _is_starlog_output(message):
+            return message
+        if _is_help_dump(text):
+            return _with_content(
+                message,
+                f"[help output compacted ({len(text)} chars); use the help index or query a specific symbol]"
+            )
+        if len(text) <= self.tool_output_chars:
+            return message
+        return _with_content(
+            message,
+            f"{text[:self.tool_output_chars]}\n... [{len(text) - self.tool_output_chars} chars compacted]"
+        )
@@ -0,0 +1,169 @@
+"""Process-wide store of parsed PayloadDiscovery curricula."""
+
+import hashlib
+import json
+import logging
+import mmap
+import os
+import tempfile
+import threading
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+from .tracing import span
+
+if TYPE_CHECKING:
+    from payload_discovery.core import PayloadDiscovery
+    from .config import PayloadDiscoveryConfig
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MATERIALIZE_DIR = "/tmp/powerset_curricula"
+
+
+@dataclass
+class _CachedCurriculum:
+    mtime_ns: int
+    size: int
+    content_hash: str
+    raw: Dict[str, Any]
+    model: Optional["PayloadDiscovery"] = None
+
+
+def _hash_mapped(path: str) -> str:
+    """SHA-256 of a file hashed straight from an mmap, without copying it into memory."""
+    with open(path, "rb") as f:
+        try:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return hashlib.sha256(mapped).hexdigest()
+        except ValueError:
+            # Empty files cannot be mapped
+            return hashlib.sha256(f.read()).hexdigest()
+
+
+class CurriculumStore:
+    """
+    Parses each PayloadDiscovery file once and shares the result across agents.
+
+    Entries are revalidated by mtime/size on every lookup; when those change the content
+    hash decides whether the file really changed (touch-only updates keep the parsed
+    model). In-memory `model` curricula are serialized to a content-addressed path under
+    `materialize_dir` exactly once.
+
+    Args:
+        materialize_dir: Directory for curricula written from in-memory models
+    """
+
+    def __init__(self, materialize_dir: str = DEFAULT_MATERIALIZE_DIR):
+        self.materialize_dir = materialize_dir
+        self._entries: Dict[str, _CachedCurriculum] = {}
+        self._materialized: Dict[str, str] = {}
+        self._lock = threading.RLock()
+
+    def load_raw(self, path: str) -> Dict[str, Any]:
+        """Return the curriculum's parsed JSON without importing payload_discovery."""
+        return self._entry(path).raw
+
+    def load(self, path: str) -> "PayloadDiscovery":
+        """Return the validated PayloadDiscovery model for a curriculum file."""
+        entry = self._entry(path)
+        with self._lock:
+            if entry.model is None:
+                from payload_discovery.core import PayloadDiscovery
+                entry.model = PayloadDiscovery.model_validate(entry.raw)
+            return entry.model
+
+    def content_hash(self, path: str) -> str:
+        """SHA-256 of the curriculum file's current contents."""
+        return self._entry(path).content_hash
+
+    def materialize(self, model: "PayloadDiscovery") -> str:
+        """Write an in-memory curriculum to its content-addressed path (once) and return it."""
+        return self.materialize_raw(model.model_dump(mode="json"))
+
+    def materialize_raw(self, raw: Dict[str, Any]) -> str:
+        """Like materialize, for curriculum JSON that is already a plain dict."""
+        payload = json.dumps(raw, sort_keys=True).encode()
+        digest = hashlib.sha256(payload).hexdigest()
+
+        with self._lock:
+            path = self._materialized.get(digest)
+            if path is not None:
+                return path
+
+            os.makedirs(self.materialize_dir, exist_ok=True)
+            path = os.path.join(self.materialize_dir, f"curriculum-{digest[:16]}.json")
+            if not os.path.exists(path):
+                fd, tmp_path = tempfile.mkstemp(dir=self.materialize_dir, suffix=".tmp")
+                with os.fdopen(fd, "wb") as f:
+                    f.write(payload)
+                os.replace(tmp_path, path)
+                logger.info("Materialized curriculum model to %s", path)
+
+            self._materialized[digest] = path
+            return path
+
+    def curriculum_path(self, pd_config: "PayloadDiscoveryConfig") -> str:
+        """
+        Resolve the file waypoint should walk for a PayloadDiscoveryConfig.
+
+        Uses `path` when given (loading and validating it once if the config asks for
+        validation), otherwise materializes `model`.
+        """
+        if pd_config.path:
+            if pd_config.validate_curriculum:
+                self.load(pd_config.path)
+            return pd_config.path
+        if pd_config.model is not None:
+            return self.materialize(pd_config.model)
+        raise ValueError("PayloadDiscoveryConfig needs either a path or a model")
+
+    def invalidate(self, path: Optional[str] = None) -> None:
+        """Drop one cached curriculum, or all of them."""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(os.path.abspath(path), None)
+
+    def _entry(self, path: str) -> _CachedCurriculum:
+        key = os.path.abspath(path)
+        stat = os.stat(key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.mtime_ns == stat.st_mtime_ns and entry.size == stat.st_size:
+                return entry
+
+            # A touch-only change is confirmed by hashing the mapped file; only real
+            # changes (and first loads) read the contents in to parse them
+            if entry is not None and entry.content_hash == _hash_mapped(key):
+                entry.mtime_ns, entry.size = stat.st_mtime_ns, stat.st_size
+                return entry
+
+            with open(key, "rb") as f:
+                data = f.read()
+            digest = hashlib.sha256(data).hexdigest()
+            with span("curriculum.parse", path=key) as parse_span:
+                parse_span.add("curriculum_bytes", stat.st_size)
+                entry = _CachedCurriculum(
+                    mtime_ns=stat.st_mtime_ns,
+                    size=stat.st_size,
+                    content_hash=digest,
+                    raw=json.loads(data)
+                )
+            self._entries[key] = entry
+            logger.debug("Parsed curriculum %s (%d bytes)", key, stat.st_size)
+            return entry
+
+
+_default_store: Optional[CurriculumStore] = None
+_default_store_lock = threading.Lock()
+
+
+def get_curriculum_store() -> CurriculumStore:
+    """Return the process-wide curriculum store, creating it on first use."""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = CurriculumStore()
+        return _default_store
@@ -0,0 +1,489 @@
+"""
+Long-lived agent daemon that thin CLI invocations attach to over a Unix socket.
+
+The daemon builds each agent config once, keeps HEAVEN imported and runs each turn
+in-process with that config. Given a `server_url`, it forwards turns to a HEAVEN HTTP
+server instead, over the server's session API (`/api/session/start`, `.../message`,
+`.../stream`) and a pool of keep-alive connections. Like HEAVEN's own CLI, it then sends
+only the agent's name and tools, so the server runs its own copy of the agent. Every
+attached client gets its own session; sessions run concurrently and share the configs
+and the connection pool.
+
+Start it explicitly with `python -m powerset_agents_core.daemon serve`, or let
+`ensure_daemon()` (used by the `--attach` mode of the agent CLIs) spawn it on demand.
+
+Protocol: newline-delimited JSON requests, one JSON response per request:
+
+    {"op": "attach", "agent": "metastack"}           -> {"ok": true, "session": "..."}
+    {"op": "send", "session": "...", "message": ""}  -> {"ok": true, "response": "..."}
+    {"op": "detach", "session": "..."}               -> {"ok": true}
+    {"op": "status"}                                 -> {"ok": true, "agents": [...], ...}
+    {"op": "shutdown"}                               -> {"ok": true}
+"""
+
+import argparse
+import asyncio
+import functools
+import http.client
+import importlib
+import json
+import logging
+import os
+import queue
+import secrets
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Iterator, Optional
+from urllib.parse import urlsplit
+
+if TYPE_CHECKING:
+    from heaven_base.baseheavenagent import HeavenAgentConfig
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SOCKET_PATH = os.environ.get(
+    "POWERSET_DAEMON_SOCKET", os.path.join(tempfile.gettempdir(), f"powerset-agents-{os.getuid()}.sock")
+)
+
+
+class KeepAliveHttpClient:
+    """
+    Thread-safe pool of persistent HTTP/1.1 connections to one server.
+
+    Args:
+        base_url: Server URL, e.g. http://localhost:8080
+        max_connections: Connections kept open
+        timeout: Socket timeout in seconds
+    """
+
+    def __init__(self, base_url: str, max_connections: int = 8, timeout: float = 300.0):
+        parts = urlsplit(base_url)
+        self.scheme = parts.scheme or "http"
+        self.host = parts.hostname or "localhost"
+        self.port = parts.port
+        self.base_path = parts.path.rstrip("/")
+        self.timeout = timeout
+        self.requests = 0
+        self.connects = 0
+        self._idle: "queue.LifoQueue[http.client.HTTPConnection]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max_connections)
+
+    def _connect(self) -> http.client.HTTPConnection:
+        self.connects += 1
+        if self.scheme == "https":
+            return http.client.HTTPSConnection(self.host, self.port, timeout=self.timeout)
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def request_json(self, method: str, path: str, payload: Optional[Any] = None) -> Any:
+        """Send a JSON request on a pooled connection and decode the JSON response."""
+        body = json.dumps(payload).encode() if payload is not None else None
+        headers = {"Content-Type": "application/json", "Connection": "keep-alive"}
+        with self._slots:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._connect()
+            # A pooled connection may have been closed by the server; retry once on a fresh one
+            for attempt in (1, 2):
+                try:
+                    conn.request(method, self.base_path + path, body=body, headers=headers)
+                    response = conn.getresponse()
+                    data = response.read()
+                    break
+                except (http.client.RemoteDisconnected, ConnectionError, http.client.CannotSendRequest):
+                    conn.close()
+                    if attempt == 2:
+                        raise
+                    conn = self._connect()
+            self.requests += 1
+            if response.will_close:
+                conn.close()
+            else:
+                self._idle.put(conn)
+        if response.status >= 400:
+            raise RuntimeError(f"HEAVEN server returned {response.status}: {data[:500]!r}")
+        return json.loads(data) if data else None
+
+    def stream_events(self, path: str) -> Iterator[Dict[str, Any]]:
+        """
+        GET a server-sent event stream and yield each JSON `data:` payload.
+
+        The stream's connection is closed once the caller stops reading, as an
+        unfinished event stream cannot be reused for another request.
+        """
+        with self._slots:
+            conn = self._connect()
+            try:
+                conn.request("GET", self.base_path + path, headers={"Accept": "text/event-stream"})
+                response = conn.getresponse()
+                self.requests += 1
+                if response.status >= 400:
+                    raise RuntimeError(f"HEAVEN server returned {response.status}: {response.read(500)!r}")
+                for line in response:
+                    line = line.strip()
+                    if not line.startswith(b"data: "):
+                        continue
+                    try:
+                        yield json.loads(line[6:])
+                    except ValueError:
+                        logger.debug("Skipping malformed event from %s", path)
+            finally:
+                conn.close()
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def stats(self) -> Dict[str, int]:
+        return {"requests": self.requests, "connects": self.connects, "idle": self._idle.qsize()}
+
+
+@dataclass
+class AgentSession:
+    """One attached conversation with an agent."""
+    session_id: str
+    agent_name: str
+    agent_config: "HeavenAgentConfig"
+    history_id: Optional[str] = None
+    # Session id on the HEAVEN server, when turns are forwarded to one
+    server_session: Optional[str] = None
+    turns: int = 0
+    created: float = field(default_factory=time.time)
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock, repr=False)
+
+
+# (session, message) -> response text
+SessionExecutor = Callable[[AgentSession, str], Awaitable[str]]
+
+
+def _response_text(result: Any) -> str:
+    if isinstance(result, dict):
+        for key in ("response", "content", "final_output", "text"):
+            if isinstance(result.get(key), str):
+                return result[key]
+    return result if isinstance(result, str) else str(result)
+
+
+def _remember_history(session: AgentSession, result: Any) -> None:
+    if isinstance(result, dict) and result.get("history_id"):
+        session.history_id = result["history_id"]
+
+
+async def _exec_in_process(session: AgentSession, message: str) -> str:
+    """Run the turn with HEAVEN in the daemon process, continuing the session's history."""
+    from heaven_base.tool_utils.completion_runners import exec_completion_style
+    result = await exec_completion_style(prompt=message, agent=session.agent_config, history_id=session.history_id)
+    _remember_history(session, result)
+    return _response_text(result)
+
+
+def http_session_executor(client: KeepAliveHttpClient) -> SessionExecutor:
+    """
+    Executor forwarding each turn to a HEAVEN HTTP server over pooled connections.
+
+    Speaks the protocol of HEAVEN's CLI: one server session per daemon session
+    (POST /api/session/start), then per turn a POST of {"text", "agent", "tools",
+    "history_id"} to /api/session/{id}/message and a read of /api/session/{id}/stream
+    until CONVERSATION_COMPLETE. The reply is the turn's AGENT_MESSAGE contents; the
+    latest history_id seen is kept so later turns continue the same conversation.
+    """
+    def turn(session: AgentSession, message: str) -> str:
+        if session.server_session is None:
+            session.server_session = client.request_json("POST", "/api/session/start")["session_id"]
+        path = f"/api/session/{session.server_session}"
+        tools = getattr(session.agent_config, "tools", None) or []
+        client.request_json("POST", f"{path}/message", {
+            "text": message,
+            "agent": session.agent_config.name,
+            "tools": [str(tool) for tool in tools],
+            "history_id": session.history_id,
+        })
+        replies = []
+        for event in client.stream_events(f"{path}/stream"):
+            if event.get("history_id"):
+                session.history_id = event["history_id"]
+            if event.get("event_type") == "CONVERSATION_COMPLETE":
+                break
+            if event.get("event_type") == "AGENT_MESSAGE":
+                replies.append((event.get("data") or {}).get("content", ""))
+        return "\n".join(replies)
+
+    async def execute(session: AgentSession, message: str) -> str:
+        return await asyncio.to_thread(turn, session, message)
+    return execute
+
+
+class AgentDaemon:
+    """
+    Serves attached agent sessions over a Unix socket.
+
+    Args:
+        agents: Extra agents: name -> "module:factory" import path or zero-argument callable
+            returning a HeavenAgentConfig; other names are looked up in the agent registry
+        socket_path: Unix socket to listen on
+        server_url: HEAVEN HTTP server to forward turns to; None runs turns in-process
+        max_connections: Keep-alive connections to the HEAVEN server
+        executor: Custom SessionExecutor (overrides server_url)
+    """
+
+    def __init__(
+        self,
+        agents: Optional[Dict[str, Any]] = None,
+        socket_path: str = DEFAULT_SOCKET_PATH,
+        server_url: Optional[str] = None,
+        max_connections: int = 8,
+        executor: Optional[SessionExecutor] = None
+    ):
+        self.agents = dict(agents or {})
+        self.socket_path = socket_path
+        self.server_url = server_url
+        self.http_client = KeepAliveHttpClient(server_url, max_connections) if server_url else None
+        if executor is None:
+            executor = http_session_executor(self.http_client) if self.http_client else _exec_in_process
+        self.executor = executor
+        self.sessions: Dict[str, AgentSession] = {}
+        self._configs: Dict[str, "HeavenAgentConfig"] = {}
+        self._build_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._started = time.time()
+
+    def agent_config(self, agent_name: str) -> "HeavenAgentConfig":
+        """
+        Build (once) and return the config for an agent given here or in the registry.
+
+        Attaches run this on worker threads; concurrent attaches to the same agent wait
+        for one build, while other agents build in parallel.
+        """
+        factory = self.agents.get(agent_name)
+        if factory is None:
+            from .registry import get_registry
+            agent_name = get_registry().get(agent_name).key
+            factory = functools.partial(get_registry().create, agent_name)
+        config = self._configs.get(agent_name)
+        if config is not None:
+            return config
+        with self._lock:
+            build_lock = self._build_locks.setdefault(agent_name, threading.Lock())
+        with build_lock:
+            config = self._configs.get(agent_name)
+            if config is None:
+                if isinstance(factory, str):
+                    module_name, attr = factory.split(":")
+                    factory = getattr(importlib.import_module(module_name), attr)
+                config = self._configs[agent_name] = factory()
+                logger.info("Built agent config %s", agent_name)
+        return config
+
+    async def serve(self) -> None:
+        """Listen until a shutdown request arrives."""
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self._server = await asyncio.start_unix_server(self._handle, path=self.socket_path)
+        os.chmod(self.socket_path, 0o600)
+        logger.info("Agent daemon listening on %s", self.socket_path)
+        try:
+            async with self._server:
+                await self._server.serve_forever()
+        except asyncio.CancelledError:
+            pass
+        finally:
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+            if self.http_client:
+                self.http_client.close()
+
+    def serve_forever(self) -> None:
+        asyncio.run(self.serve())
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        owned = []
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    response = {"ok": True, **await self._dispatch(request, owned)}
+                except Exception as e:
+                    response = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+                writer.write((json.dumps(response) + "\n").encode())
+                await writer.drain()
+                if response.get("shutdown"):
+                    self._server.close()
+                    break
+        finally:
+            # Sessions die with the connection that attached them
+            for session_id in owned:
+                self.sessions.pop(session_id, None)
+            writer.close()
+
+    async def _dispatch(self, request: Dict[str, Any], owned: list) -> Dict[str, Any]:
+        op = request.get("op")
+        if op == "attach":
+            agent_name = request["agent"]
+            config = await asyncio.to_thread(self.agent_config, agent_name)
+            session = AgentSession(session_id=secrets.token_hex(8), agent_name=agent_name, agent_config=config)
+            self.sessions[session.session_id] = session
+            owned.append(session.session_id)
+            return {"session": session.session_id}
+        if op == "send":
+            session = self.sessions[request["session"]]
+            async with session.lock:
+                session.turns += 1
+                return {"response": await self.executor(session, request["message"])}
+        if op == "detach":
+            self.sessions.pop(request["session"], None)
+            return {}
+        if op == "status":
+            from .registry import get_registry
+            return {
+                "pid": os.getpid(),
+                "uptime": time.time() - self._started,
+                "agents": sorted(set(self.agents) | set(get_registry().names())),
+                "loaded": sorted(self._configs),
+                "sessions": len(self.sessions),
+                "server_url": self.server_url,
+                "http": self.http_client.stats() if self.http_client else None,
+            }
+        if op == "shutdown":
+            return {"shutdown": True}
+        raise ValueError(f"Unknown op: {op}")
+
+
+class DaemonClient:
+    """
+    Blocking client for one connection to the daemon.
+
+    Args:
+        socket_path: Daemon socket
+        timeout: Seconds to wait for each response (None waits indefinitely)
+    """
+
+    def __init__(self, socket_path: str = DEFAULT_SOCKET_PATH, timeout: Optional[float] = None):
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.settimeout(timeout)
+        self._sock.connect(socket_path)
+        self._file = self._sock.makefile("rwb")
+        self.session: Optional[str] = None
+
+    def request(self, op: str, **fields: Any) -> Dict[str, Any]:
+        self._file.write((json.dumps({"op": op, **fields}) + "\n").encode())
+        self._file.flush()
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("Agent daemon closed the connection")
+        response = json.loads(line)
+        if not response.pop("ok"):
+            raise RuntimeError(response["error"])
+        return response
+
+    def attach(self, agent_name: str) -> str:
+        self.session = self.request("attach", agent=agent_name)["session"]
+        return self.session
+
+    def send(self, message: str) -> str:
+        return self.request("send", session=self.session, message=message)["response"]
+
+    def close(self) -> None:
+        self._file.close()
+        self._sock.close()
+
+    def __enter__(self) -> "DaemonClient":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+def _daemon_status(socket_path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with DaemonClient(socket_path, timeout=2.0) as client:
+            return client.request("status")
+    except (OSError, ConnectionError, RuntimeError, ValueError):
+        return None
+
+
+def _daemon_running(socket_path: str) -> bool:
+    return _daemon_status(socket_path) is not None
+
+
+def ensure_daemon(
+    socket_path: str = DEFAULT_SOCKET_PATH,
+    server_url: Optional[str] = None,
+    startup_timeout: float = 30.0
+) -> None:
+    """
+    Start a detached daemon on `socket_path` unless one is already answering.
+
+    A running daemon is reused only if it forwards to the same `server_url` (None: runs
+    turns in-process); otherwise RuntimeError is raised rather than sending turns to a
+    server the caller did not ask for.
+    """
+    status = _daemon_status(socket_path)
+    if status is not None:
+        running_url = status.get("server_url")
+        if (running_url or "").rstrip("/") != (server_url or "").rstrip("/"):
+            raise RuntimeError(
+                f"Agent daemon on {socket_path} forwards to {running_url or 'nothing (in-process turns)'}, "
+                f"not {server_url or 'nothing (in-process turns)'}; stop it with "
+                f"`python -m powerset_agents_core.daemon stop --socket {socket_path}` or use another socket"
+            )
+        return
+    command = [sys.executable, "-m", "powerset_agents_core.daemon", "serve", "--socket", socket_path]
+    if server_url:
+        command += ["--server-url", server_url]
+    subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                     stderr=subprocess.DEVNULL, start_new_session=True)
+    deadline = time.monotonic() + startup_timeout
+    while time.monotonic() < deadline:
+        if os.path.exists(socket_path) and _daemon_running(socket_path):
+            return
+        time.sleep(0.05)
+    raise RuntimeError(f"Agent daemon did not start on {socket_path}")
+
+
+def attach_repl(agent_name: str, socket_path: str = DEFAULT_SOCKET_PATH, server_url: Optional[str] = None) -> None:
+    """Interactive loop against a daemon session, starting the daemon if needed."""
+    ensure_daemon(socket_path, server_url)
+    with DaemonClient(socket_path) as client:
+        client.attach(agent_name)
+        print(f"Attached to {agent_name} (type 'exit' to leave)")
+        while True:
+            try:
+                message = input("> ")
+            except EOFError:
+                break
+            if message.strip() in ("exit", "quit"):
+                break
+            if message.strip():
+                print(client.send(message))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Powerset agent daemon")
+    parser.add_argument("command", choices=["serve", "status", "stop"])
+    parser.add_argument("--socket", default=DEFAULT_SOCKET_PATH)
+    parser.add_argument("--server-url", default=None,
+                        help="Forward turns to this HEAVEN HTTP server instead of running them in-process")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        logging.basicConfig(level=logging.INFO)
+        AgentDaemon(socket_path=args.socket, server_url=args.server_url).serve_forever()
+        return
+    with DaemonClient(args.socket, timeout=10.0) as client:
+        print(json.dumps(client.request("status" if args.command == "status" else "shutdown"), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,38 @@
 """Factory function for creating Powerset Agents."""
 
 import logging
-from typing import Optional, List, Dict, Any
-from payload_discovery.core import PayloadDiscovery
-from heaven_base.baseheavenagent import HeavenAgentConfig
-from heaven_base.unified_chat import ProviderEnum
-from heaven_base.tools.network_edit_tool import NetworkEditTool
-from heaven_base.tools.bash_tool import BashTool
+import subprocess
+import weakref
+from typing import TYPE_CHECKING, Optional, List, Dict, Any, Tuple
+from .cache import LRUCache
+from .checkpoint import (
+    checkpoint_fingerprint, load_progress, read_waypoint_state, resume_since, trim_curriculum, waypoint_ids
+)
 from .config import LibraryPowersetAgentConfig, PayloadDiscoveryConfig
+from .curriculum import get_curriculum_store
+from .help_cache import get_help_cache, package_fingerprint
+from .journal import get_journal
+from .knowledge import get_knowledge_store
+from .mcp_inprocess import get_inprocess_host, split_inprocess_name
+from .mcp_pool import MCP_SERVER_MODULES, McpLease, McpServerPool, get_default_pool, split_pooled_name
+from .prefetch import get_prefetcher, plan_journey
+from .prompts import render_library_learning_prompt
+from .routing import get_route_table
+from .tool_registry import get_tool_registry
+from .tracing import current_span, span
+
+if TYPE_CHECKING:
+    from heaven_base.baseheavenagent import HeavenAgentConfig
+    from heaven_base.unified_chat import ProviderEnum
 
 logger = logging.getLogger(__name__)
 
+# Converted HeavenAgentConfigs keyed by content_hash() plus the model the route table resolves to
+_heaven_config_cache: "LRUCache[HeavenAgentConfig]" = LRUCache(maxsize=256)
+
+# Release hooks for the pooled MCP leases of live HeavenAgentConfigs, keyed by id()
+_agent_leases: Dict[int, weakref.finalize] = {}
+
 
 def create_library_powerset_agent(
     pkg_path: str,
@@ -22,8 +44,21 @@ def create_library_powerset_agent(
     workspace_path: str = "/tmp",
     model: str = "gpt-5-mini",
     max_iterations: int = 50,
-    custom_system_prompt: Optional[str] = None
-) -> HeavenAgentConfig:
+    custom_system_prompt: Optional[str] = None,
+    mcp_servers: Optional[List[str]] = None,
+    pin_prompt_prefix: bool = False,
+    heaven_data_dir: str = "/tmp/heaven_data",
+    preload_help: bool = False,
+    resume_from_checkpoint: bool = False,
+    use_knowledge_pack: bool = False,
+    knowledge_pack_budget: int = 8000,
+    bounded_execution: bool = False,
+    context_budget_tokens: Optional[int] = None,
+    context_keep_recent: int = 8,
+    starlog_journal: Optional[str] = None,
+    starlog_journal_interval_ms: int = 50,
+    use_cache: bool = True
+) -> "HeavenAgentConfig":
     """
     Create a HeavenAgentConfig for learning a specific library.
     
@@ -38,6 +73,34 @@ def create_library_powerset_agent(
         model: LLM model to use
         max_iterations: Maximum learning iterations
         custom_system_prompt: Custom system prompt (overrides default)
+        mcp_servers: MCP servers to equip; use 'pooled:starlog' / 'pooled:waypoint' to lease
+            long-lived servers from the shared pool instead of spawning per agent
+        pin_prompt_prefix: Render the system prompt with an agent-independent prefix so
+            provider-side prompt caching hits across agents
+        heaven_data_dir: HEAVEN_DATA_DIR for the agent's STARLOG MCP (see WorkspaceAllocator
+            for unique per-agent trees)
+        preload_help: Run help_command once per package version and give the agent the
+            cached, chunked output instead of a live shell call
+        resume_from_checkpoint: Read the waypoint steps completed in the STARLOG session's
+            diary and give the agent a curriculum with only the remaining ones, counting
+            progress for this curriculum and package version only
+        use_knowledge_pack: Give the agent the knowledge pack snapshotted for the installed
+            package version (if any) instead of having it walk the curriculum
+        knowledge_pack_budget: Maximum characters of knowledge pack in the system prompt
+        bounded_execution: Swap BashTool for BoundedBashTool: streamed output with head/tail
+            truncation, per-command time and memory limits, and cached results for
+            read-only commands such as help(...) and pip show
+        context_budget_tokens: Keep the history resent each iteration under this many
+            tokens (see ContextBudget.for_config); also pins the system prompt prefix and
+            tells the agent to record facts in STARLOG, since compaction keeps those
+        context_keep_recent: Trailing messages never compacted under a context budget
+        starlog_journal: Journal STARLOG diary/rule writes under starlog_path and apply them
+            write-behind, flushing per write ('always'), every starlog_journal_interval_ms
+            ('interval') or at session end ('session'); needs the 'inprocess:starlog'
+            MCP server, which applies the journal
+        starlog_journal_interval_ms: Flush period of the 'interval' policy
+        use_cache: Reuse a previously converted config with the same content hash (a
+            deep copy is returned); pass False to always convert afresh
         
     Returns:
         HeavenAgentConfig configured for library learning with waypoint/starlog MCPs and tools
@@ -54,164 +117,369 @@ def create_library_powerset_agent(
         ... )
         >>> # Use with HEAVEN framework to create actual agent
     """
-    logger.info(f"Creating Library Powerset Agent config: {name} for package: {pkg_path}")
-    logger.debug(f"Agent config - model: {model}, max_iterations: {max_iterations}, workspace: {workspace_path}")
+    logger.info("Creating Library Powerset Agent config: %s for package: %s", name, pkg_path)
+    logger.debug("Agent config - model: %s, max_iterations: %s, workspace: %s", model, max_iterations, workspace_path)
     
-    config = LibraryPowersetAgentConfig(
-        pkg_path=pkg_path,
-        help_command=help_command,
-        payload_discovery_config=payload_discovery_config,
-        name=name,
-        starlog_path=starlog_path,
-        description=description,
-        workspace_path=workspace_path,
-        model=model,
-        max_iterations=max_iterations,
-        custom_system_prompt=custom_system_prompt
-    )
+    optional_fields: Dict[str, Any] = {}
+    if mcp_servers is not None:
+        optional_fields["mcp_servers"] = mcp_servers
     
-    # Convert to HeavenAgentConfig
-    heaven_config = _convert_to_heaven_config(config)
-    logger.info(f"Successfully created HeavenAgentConfig for: {name}")
+    with span("factory.create", agent=name, pkg_path=pkg_path, model=model):
+        with span("config.validate"):
+            config = LibraryPowersetAgentConfig(
+                pkg_path=pkg_path,
+                help_command=help_command,
+                payload_discovery_config=payload_discovery_config,
+                name=name,
+                starlog_path=starlog_path,
+                description=description,
+                workspace_path=workspace_path,
+                model=model,
+                max_iterations=max_iterations,
+                custom_system_prompt=custom_system_prompt,
+                pin_prompt_prefix=pin_prompt_prefix,
+                heaven_data_dir=heaven_data_dir,
+                preload_help=preload_help,
+                resume_from_checkpoint=resume_from_checkpoint,
+                use_knowledge_pack=use_knowledge_pack,
+                knowledge_pack_budget=knowledge_pack_budget,
+                bounded_execution=bounded_execution,
+                context_budget_tokens=context_budget_tokens,
+                context_keep_recent=context_keep_recent,
+                starlog_journal=starlog_journal,
+                starlog_journal_interval_ms=starlog_journal_interval_ms,
+                **optional_fields
+            )
+        
+        # Convert to HeavenAgentConfig
+        if use_cache:
+            heaven_config = _convert_to_heaven_config_cached(config)
+        else:
+            heaven_config = _convert_to_heaven_config(config)
+        
+        _start_agent_services(config)
+    logger.info("Successfully created HeavenAgentConfig for: %s", name)
     
     return heaven_config
 
 
-def _convert_to_heaven_config(config: LibraryPowersetAgentConfig) -> HeavenAgentConfig:
-    """Convert LibraryPowersetAgentConfig to HeavenAgentConfig."""
-    logger.info(f"Converting {config.name} to HeavenAgentConfig")
+class ConversionArtifacts:
+    """
+    Resolves the pieces of a HeavenAgentConfig from a LibraryPowersetAgentConfig.
+    
+    The base implementation computes everything per call; batch construction substitutes
+    a subclass that shares results between agents.
+    """
+    
+    def system_prompt(self, config: LibraryPowersetAgentConfig) -> str:
+        return config.custom_system_prompt or _generate_library_learning_prompt(config)
+    
+    def provider(self, model: str) -> "ProviderEnum":
+        return _get_provider_for_model(model)
+    
+    def tools(self, tool_names: List[str]) -> List:
+        return _resolve_tool_classes(tool_names)
+    
+    def mcp_servers(self, config: LibraryPowersetAgentConfig) -> Dict[str, Dict[str, Any]]:
+        return _build_mcp_servers(config)
+
+
+_DIRECT_ARTIFACTS = ConversionArtifacts()
+
+
+def _convert_to_heaven_config(
+    config: LibraryPowersetAgentConfig,
+    artifacts: Optional[ConversionArtifacts] = None,
+    attach_local: bool = True
+) -> "HeavenAgentConfig":
+    """
+    Convert LibraryPowersetAgentConfig to HeavenAgentConfig.
+
+    With attach_local=False, 'pooled:<name>' and 'inprocess:<name>' servers are left out
+    so that the process that will run the agent can attach them with
+    _attach_local_mcp_servers.
+    """
+    from heaven_base.baseheavenagent import HeavenAgentConfig
+
+    logger.info("Converting %s to HeavenAgentConfig", config.name)
+    artifacts = artifacts or _DIRECT_ARTIFACTS
     
-    system_prompt = config.custom_system_prompt or _generate_library_learning_prompt(config)
-    provider = _get_provider_for_model(config.model)
-    tools = _resolve_tool_classes(config.tools)
-    mcp_servers = _get_default_mcp_servers()
+    with span("factory.convert", agent=config.name):
+        system_prompt = artifacts.system_prompt(config)
+        model = get_route_table().resolve(config.model)
+        provider = artifacts.provider(model)
+        with span("tools.resolve"):
+            tool_names = config.tools
+            if config.bounded_execution:
+                tool_names = ["boundedbashtool" if name.lower() == "bashtool" else name for name in tool_names]
+            tools = artifacts.tools(tool_names)
+        with span("mcp.configure"):
+            mcp_servers = artifacts.mcp_servers(config)
     
-    return HeavenAgentConfig(
+    heaven_config = HeavenAgentConfig(
         name=config.name,
         system_prompt=system_prompt,
         tools=tools,
         provider=provider,
-        model=config.model,
+        model=model,
         mcp_servers=mcp_servers
     )
+    if attach_local:
+        _attach_local_mcp_servers(heaven_config, config)
+    return heaven_config
 
 
-def _get_default_mcp_servers() -> Dict[str, Dict[str, Any]]:
-    """Get default MCP server configurations for powerset agents."""
-    return {
-        "starlog": {
-            "transport": "stdio", 
-            "command": "python",
-            "args": ["-m", "starlog_mcp.starlog_mcp"],
-            "env": {"HEAVEN_DATA_DIR": "/tmp/heaven_data"}
-        },
-        "waypoint": {
-            "transport": "stdio",
-            "command": "python", 
-            "args": ["-m", "payload_discovery.mcp_server_v2"]
-        }
-    }
+def _attach_local_mcp_servers(heaven_config: "HeavenAgentConfig", config: LibraryPowersetAgentConfig) -> None:
+    """
+    Add the servers tied to this process to the agent (in place).
 
+    'inprocess:<name>' servers are served from this process, and 'pooled:<name>' servers
+    are leased from its pool.
+    """
+    local_servers = {}
+    for server in config.mcp_servers:
+        server_name = split_inprocess_name(server)
+        if server_name is not None:
+            env = {"HEAVEN_DATA_DIR": config.heaven_data_dir} if server_name == "starlog" else {}
+            local_servers[server_name] = get_inprocess_host().spec(server_name, env)
+    leases = _lease_pooled_mcp_servers(config)
+    local_servers.update({lease.server_name: lease.spec for lease in leases})
+    if local_servers:
+        heaven_config.mcp_servers = {**(heaven_config.mcp_servers or {}), **local_servers}
+    if leases:
+        _bind_leases(heaven_config, get_default_pool(), leases)
 
-def _resolve_tool_classes(tool_names: List[str]) -> List:
-    """Resolve tool names to actual tool classes."""
-    tool_mapping = {
-        "networkedittool": NetworkEditTool,
-        "bashtool": BashTool
-    }
-    
-    tools = []
-    for tool_name in tool_names:
-        tool_class = tool_mapping.get(tool_name.lower())
-        if tool_class:
-            tools.append(tool_class)
-        else:
-            logger.warning(f"Unknown tool: {tool_name}")
-    
-    return tools
 
+def _start_agent_services(config: LibraryPowersetAgentConfig) -> None:
+    """Start the in-process helpers a config asks for: curriculum prefetch and the STARLOG journal."""
+    if config.payload_discovery_config.prefetch_depth:
+        _start_prefetch(config)
+    if config.starlog_journal:
+        _start_journal(config)
 
-def _build_mcp_servers(config: LibraryPowersetAgentConfig) -> Dict[str, Dict[str, Any]]:
-    """Build MCP server configurations for the agent."""
-    mcp_configs = {}
-    
-    if "waypoint" in config.mcp_servers:
-        mcp_configs["waypoint"] = {
-            "command": "python",
-            "args": ["-m", "payload_discovery.mcp_server"],
-            # "env": {"PYTHONPATH": "/home/GOD"}
-        }
+
+def _start_journal(config: LibraryPowersetAgentConfig) -> None:
+    """Open the agent's STARLOG journal, which only the in-process STARLOG server applies."""
+    if "inprocess:starlog" not in config.mcp_servers:
+        logger.warning("%s: starlog_journal needs the 'inprocess:starlog' MCP server; not journaling",
+                       config.name)
+        return
+    get_journal(config.starlog_path, config.starlog_journal, config.starlog_journal_interval_ms)
+
+
+def _convert_to_heaven_config_cached(config: LibraryPowersetAgentConfig) -> "HeavenAgentConfig":
+    """Memoized _convert_to_heaven_config keyed by the config's content hash."""
+    # Pooled leases are live resources, so those configs are never reused
+    if any(split_pooled_name(server) for server in config.mcp_servers):
+        return _convert_to_heaven_config(config)
     
-    if "starlog" in config.mcp_servers:
-        mcp_configs["starlog"] = {
-            "command": "python",
-            "args": ["-m", "starlog_mcp.server"],
-            # "env": {"PYTHONPATH": "/home/GOD"}
-        }
+    # The route table can change at runtime, so key on what it currently resolves to
+    route_table = get_route_table()
+    key = f"{config.content_hash()}\0{route_table.resolve(config.model)}\0{route_table.provider_for(config.model)}"
+    if config.preload_help or config.resume_from_checkpoint:
+        key += package_fingerprint(config.pkg_path)
+    if config.resume_from_checkpoint:
+        key += checkpoint_fingerprint(config.starlog_path, config.heaven_data_dir)
+    if config.use_knowledge_pack:
+        key += get_knowledge_store().fingerprint(config.pkg_path)
     
-    return mcp_configs
+    cached = _heaven_config_cache.get(key)
+    current_span().set("cache_hit", cached is not None)
+    if cached is None:
+        cached = _convert_to_heaven_config(config)
+        _heaven_config_cache.put(key, cached)
+    # Deep copy: callers may mutate tools / mcp_servers and must not affect each other
+    return cached.model_copy(deep=True)
 
 
-def _get_provider_for_model(model: str) -> ProviderEnum:
-    """Map model name to provider enum."""
-    model_lower = model.lower()
-    
-    if "gpt" in model_lower:
-        return ProviderEnum.OPENAI
-    elif "claude" in model_lower:
-        return ProviderEnum.ANTHROPIC
-    elif "gemini" in model_lower or "bison" in model_lower:
-        return ProviderEnum.GOOGLE
-    elif "llama" in model_lower or "mixtral" in model_lower:
-        return ProviderEnum.GROQ
-    elif "deepseek" in model_lower:
-        return ProviderEnum.DEEPSEEK
-    else:
-        # Default to OpenAI for unknown models
-        logger.warning(f"Unknown model {model}, defaulting to OpenAI provider")
-        return ProviderEnum.OPENAI
+def heaven_config_cache_info() -> Dict[str, Any]:
+    """Hit/miss counters and size of the converted-config memo cache."""
+    return _heaven_config_cache.stats()
 
 
-def _generate_library_learning_prompt(config: LibraryPowersetAgentConfig) -> str:
-    """Generate system prompt for library learning."""
-    # Determine curriculum path
-    if config.payload_discovery_config.path:
-        curriculum_path = config.payload_discovery_config.path
-    else:
-        curriculum_path = "/tmp/generated_curriculum.json"  # Will need to save model to path
-    
-    return f"""You are {config.name}, a specialized library learning agent.
+def clear_heaven_config_cache() -> None:
+    """Drop every memoized HeavenAgentConfig."""
+    _heaven_config_cache.clear()
+
+
+def _stdio_mcp_server(server_name: str, heaven_data_dir: str) -> Dict[str, Any]:
+    """Spec running an MCP server as a stdio subprocess of the agent."""
+    module = MCP_SERVER_MODULES.get(server_name)
+    if module is None:
+        raise ValueError(f"No MCP server registered for: {server_name}")
+    spec = {"transport": "stdio", "command": "python", "args": ["-m", module]}
+    # Waypoint logs served steps to the STARLOG diary, which resume reads back
+    if server_name in ("starlog", "waypoint"):
+        spec["env"] = {"HEAVEN_DATA_DIR": heaven_data_dir}
+    return spec
+
+
+def _lease_pooled_mcp_servers(config: LibraryPowersetAgentConfig) -> List[McpLease]:
+    """Lease pooled MCP servers requested as 'pooled:<name>'; all or nothing."""
+    leases: List[McpLease] = []
+    try:
+        for server in config.mcp_servers:
+            server_name = split_pooled_name(server)
+            if server_name is None:
+                continue
+            lease = get_default_pool().acquire(
+                server_name,
+                key=config.starlog_path,
+                env={"HEAVEN_DATA_DIR": config.heaven_data_dir}
+            )
+            leases.append(lease)
+            logger.info("Using pooled %s MCP server at %s for %s", server_name, lease.instance.url, config.name)
+    except Exception:
+        get_default_pool().release_all(leases)
+        raise
+    return leases
+
+
+def _bind_leases(heaven_config: "HeavenAgentConfig", pool: McpServerPool, leases: List[McpLease]) -> None:
+    """Tie pooled MCP leases to the agent config: released with it or by release_pooled_mcp_servers."""
+    agent_id = id(heaven_config)
+    _agent_leases[agent_id] = weakref.finalize(heaven_config, _release_leases, agent_id, pool, leases)
+
+
+def _release_leases(agent_id: int, pool: McpServerPool, leases: List[McpLease]) -> None:
+    _agent_leases.pop(agent_id, None)
+    pool.release_all(leases)
+
+
+def release_pooled_mcp_servers(heaven_config: "HeavenAgentConfig") -> None:
+    """
+    Return the pooled MCP leases held by an agent built with 'pooled:<name>' servers.
+
+    Call this when the agent's run ends. Leases are also returned when the config is
+    garbage collected; releasing twice, or an agent without pooled servers, is a no-op.
+    """
+    finalizer = _agent_leases.get(id(heaven_config))
+    if finalizer is not None:
+        finalizer()
+
+
+def _resolve_tool_classes(tool_names: List[str]) -> List:
+    """Resolve tool names to tool classes from the plugin registry, importing each on first use."""
+    return get_tool_registry().resolve(tool_names)
 
-Your mission: Learn the {config.pkg_path} library and complete user requests. The `help command` for this library is: `{config.help_command}`.
 
-CURRICULUM: {config.payload_discovery_config.instructions}
+def _build_mcp_servers(config: LibraryPowersetAgentConfig) -> Dict[str, Dict[str, Any]]:
+    """
+    Build stdio MCP server specs for the plain names in config.mcp_servers.
 
-CAPABILITIES:
-- STARLOG MCP: Session management and progress tracking
-- Waypoint MCP: Navigate through structured learning sequences  
-- NetworkEditTool: Read, write, and edit files
-- BashTool: Run commands, test code, explore the library
+    'pooled:<name>' and 'inprocess:<name>' entries are skipped here: they belong to the
+    process that runs the agent, and _attach_local_mcp_servers adds them.
+    """
+    mcp_servers = {}
+    for server in config.mcp_servers:
+        if split_pooled_name(server) is None and split_inprocess_name(server) is None:
+            mcp_servers[server] = _stdio_mcp_server(server, config.heaven_data_dir)
+    return mcp_servers
 
-CRITICAL DIRECTORY SEPARATION:
-- WORKING DIRECTORY: Use current directory for all file operations (reading user files, writing code)
-- STARLOG DIRECTORY: ALWAYS use "{config.starlog_path}" for ALL STARLOG commands
 
-STARLOG PATH RULE: For ALL STARLOG commands, ALWAYS use path="{config.starlog_path}":
-- fly("{config.starlog_path}")
-- check("{config.starlog_path}")  
-- start_starlog(..., path="{config.starlog_path}")
-- update_debug_diary(..., path="{config.starlog_path}")
-- add_rule(..., path="{config.starlog_path}")
-- All other STARLOG commands
+def _get_provider_for_model(model: str) -> "ProviderEnum":
+    """Map model name (or routing alias/group) to provider enum via the routing table."""
+    from heaven_base.unified_chat import ProviderEnum
 
-WORKFLOW:
-1. Start session: Use fly("{config.starlog_path}") to initialize your STARLOG session journey
-2. Learn library: Use waypoint with {curriculum_path}
-3. Complete request: Follow user's request using your library knowledge (work in current directory)
-4. Upload project: Use waypoint with /tmp/github_update_protocol.json to create and upload to GitHub
+    provider = get_route_table().provider_for(model)
+    member = getattr(ProviderEnum, provider.upper(), None)
+    if member is None:
+        # e.g. the stub provider: runs through a local executor, HEAVEN never calls it
+        logger.debug("Provider %s for %s has no HEAVEN provider, using OpenAI placeholder", provider, model)
+        return ProviderEnum.OPENAI
+    return member
 
-WORKSPACE: {config.workspace_path}
 
-Your main workflow is to use starlog.fly("{config.starlog_path}") then follow instructions to begin the session. Once session is confirmed started by STARLOG, use the library learning PD in waypoint. Then, proceed as necessary to complete user request. Once you are done, use waypoint with github_update_protocol.
+def _generate_library_learning_prompt(config: LibraryPowersetAgentConfig) -> str:
+    """Generate system prompt for library learning."""
+    with span("prompt.render", agent=config.name) as prompt_span:
+        # Path as given, or the content-addressed file an in-memory model was written to
+        curriculum_path = get_curriculum_store().curriculum_path(config.payload_discovery_config)
+        instructions = config.payload_discovery_config.instructions
+        if config.resume_from_checkpoint:
+            curriculum_path, resume_note = _resume_curriculum(config, curriculum_path)
+            instructions = f"{instructions}\n\n{resume_note}"
+        pack = get_knowledge_store().load(config.pkg_path) if config.use_knowledge_pack else None
+        if pack is not None:
+            instructions = f"{instructions}\n\n{pack.render(config.knowledge_pack_budget)}"
+        
+        if config.context_budget_tokens is not None:
+            instructions = (
+                f"{instructions}\n\nCONTEXT BUDGET: older tool output is compacted as the session grows. "
+                "Record anything you will need later (APIs, working patterns, errors and fixes) in "
+                "STARLOG; STARLOG results are kept, raw help output and command logs are not."
+            )
+        
+        help_index_path = None
+        if config.preload_help:
+            try:
+                help_index_path = get_help_cache().preload(config.pkg_path, config.help_command).index_path
+            except (OSError, RuntimeError, subprocess.SubprocessError) as e:
+                logger.warning("Could not preload help for %s, agent will run it live: %s", config.pkg_path, e)
+        
+        prompt = render_library_learning_prompt(
+            name=config.name,
+            pkg_path=config.pkg_path,
+            help_command=config.help_command,
+            instructions=instructions,
+            starlog_path=config.starlog_path,
+            workspace_path=config.workspace_path,
+            curriculum_path=curriculum_path,
+            pin_prefix=config.pin_prompt_prefix or config.context_budget_tokens is not None,
+            help_index_path=help_index_path,
+            knowledge_pack=pack is not None
+        ).text
+        prompt_span.add("prompt_chars", len(prompt))
+        return prompt
 
-Begin by calling fly("{config.starlog_path}") to start your session."""
\ No newline at end of file
+
+def _resume_curriculum(config: LibraryPowersetAgentConfig, curriculum_path: str) -> Tuple[str, str]:
+    """Trim the waypoints the STARLOG diary shows as completed from the curriculum."""
+    store = get_curriculum_store()
+    since = resume_since(config.starlog_path, store.content_hash(curriculum_path), package_fingerprint(config.pkg_path))
+    raw = store.load_raw(curriculum_path)
+    completed = load_progress(config.starlog_path, config.heaven_data_dir, raw, since)
+    remaining = [waypoint for waypoint in waypoint_ids(raw) if waypoint not in completed]
+    
+    if completed:
+        curriculum_path = store.materialize_raw(trim_curriculum(raw, completed))
+        logger.info("Resuming %s: %d waypoints done, %d remaining", config.name,
+                    len(completed), len(remaining))
+    
+    if not remaining:
+        return curriculum_path, (
+            f"RESUME: all {len(completed)} curriculum waypoints were completed in earlier sessions. "
+            "Skip the waypoint walk and go straight to the task."
+        )
+    return curriculum_path, (
+        f"RESUME: {len(completed)} curriculum waypoints were completed in earlier sessions and "
+        f"have been removed; the curriculum starts at the first remaining step. Remaining: "
+        f"{', '.join(remaining)}. If start_waypoint_journey says a journey is already in progress, "
+        "call abort_waypoint_journey and start again with this curriculum."
+    )
+
+
+def _start_prefetch(config: LibraryPowersetAgentConfig) -> None:
+    """
+    Plan curriculum prefetch for the agent's waypoint journey.
+
+    Only an in-process waypoint server sees the journey in this process, so other
+    transports get no prefetcher. A journey waypoint already has under way for the
+    STARLOG path is read ahead from its current step right away; otherwise the first
+    steps are warmed, unless the agent resumes, in which case the prefetcher is
+    created for the trimmed copy when the journey starts.
+    """
+    if "inprocess:waypoint" not in config.mcp_servers:
+        logger.warning("%s: prefetch_depth needs the 'inprocess:waypoint' MCP server; not prefetching",
+                       config.name)
+        return
+    pd_config = config.payload_discovery_config
+    max_bytes = pd_config.prefetch_max_mb * 1024 * 1024
+    plan_journey(config.starlog_path, depth=pd_config.prefetch_depth, max_bytes=max_bytes)
+    if config.resume_from_checkpoint or read_waypoint_state(config.starlog_path):
+        return
+    curriculum_path = get_curriculum_store().curriculum_path(pd_config)
+    try:
+        get_prefetcher(curriculum_path, depth=pd_config.prefetch_depth, max_bytes=max_bytes).start()
+    except (OSError, ValueError) as e:
+        logger.warning("Could not prefetch curriculum %s for %s: %s", curriculum_path, config.name, e)
@@ -0,0 +1,303 @@
+"""
+Fleet orchestrator: run learning agents for a manifest of libraries across processes.
+
+Each library runs in a process-pool worker inside its own workspace. Progress is
+journaled so that after a crash, a new run skips finished libraries. Libraries that were
+in flight get their old workspace back, and resume from their curriculum checkpoint.
+
+Manifest (JSON):
+
+    {
+        "defaults": {"model": "gpt-5-mini", "payload_discovery_config": {...}},
+        "libraries": [
+            {"pkg_path": "pydantic_stack_core",
+             "help_command": "python -c 'import pydantic_stack_core; help(pydantic_stack_core)'",
+             "prompt": "Learn the library and write three working examples."},
+            ...
+        ]
+    }
+
+Entries are LibraryPowersetAgentConfig fields (merged over `defaults`) plus an optional
+`prompt`, in which `{pkg_path}` is replaced by the library; starlog/workspace/HEAVEN data
+paths come from the allocated workspace.
+
+    python -m powerset_agents_core.fleet manifest.json --state-dir /var/tmp/fleet --dry-run
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import asdict, dataclass
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional
+
+from .routing import STUB_PROVIDER, get_route_table
+from .workspace import AgentWorkspace, WorkspaceAllocator
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROMPT = "Start your learning session for {pkg_path} and work through the curriculum."
+JOURNAL_FILENAME = "fleet_journal.jsonl"
+
+
+@dataclass
+class FleetResult:
+    """Outcome of one library in a fleet run."""
+    name: str
+    status: str  # "done" or "failed"
+    provider: str
+    workspace: str
+    elapsed: float = 0.0
+    error: Optional[str] = None
+    resumed: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "done"
+
+
+def load_manifest(path: str) -> List[Dict[str, Any]]:
+    """Read a manifest and return its entries with defaults merged in and names filled."""
+    with open(path) as f:
+        manifest = json.load(f)
+    if isinstance(manifest, list):
+        manifest = {"libraries": manifest}
+    defaults = manifest.get("defaults", {})
+
+    entries = []
+    names = set()
+    for entry in manifest.get("libraries", []):
+        merged = {**defaults, **entry}
+        merged.setdefault("name", f"{merged['pkg_path']}_learner")
+        if merged["name"] in names:
+            raise ValueError(f"Duplicate agent name in manifest: {merged['name']}")
+        names.add(merged["name"])
+        entries.append(merged)
+    return entries
+
+
+def _workspace_from_root(name: str, root: str) -> AgentWorkspace:
+    return AgentWorkspace(
+        name=name,
+        root=root,
+        starlog_path=os.path.join(root, "starlog"),
+        workspace_path=os.path.join(root, "workspace"),
+        heaven_data_dir=os.path.join(root, "heaven_data"),
+    )
+
+
+async def _run_prompt(runner: Any, prompt: str) -> Any:
+    async for result in runner.run([prompt]):
+        return result
+
+
+def _run_fleet_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Process-pool entry point: build one library agent and run its learning prompt."""
+    from .config import LibraryPowersetAgentConfig
+    from .routing import StubProvider
+    from .runner import AgentRunner
+
+    started = time.perf_counter()
+    spec = dict(job["spec"])
+    workspace = _workspace_from_root(spec["name"], job["workspace"])
+
+    try:
+        # Only {pkg_path} is substituted; any other braces in a prompt are literal
+        prompt = spec.pop("prompt", DEFAULT_PROMPT).replace("{pkg_path}", str(spec["pkg_path"]))
+        fields = {**spec, **workspace.config_fields()}
+        if job["resume"]:
+            fields["resume_from_checkpoint"] = True
+
+        if job["dry_run"]:
+            from .factory import _generate_library_learning_prompt
+
+            config = LibraryPowersetAgentConfig(**{**fields, "model": STUB_PROVIDER})
+            agent = SimpleNamespace(
+                name=config.name, model=STUB_PROVIDER,
+                system_prompt=_generate_library_learning_prompt(config)
+            )
+            runner = AgentRunner(agent, concurrency=1, provider=STUB_PROVIDER,
+                                 executor=StubProvider(latency=job["stub_latency"]))
+        else:
+            from .factory import create_library_powerset_agent, release_pooled_mcp_servers
+
+            agent = create_library_powerset_agent(**fields)
+            runner = AgentRunner(agent, concurrency=1)
+
+        try:
+            result = asyncio.run(_run_prompt(runner, prompt))
+        finally:
+            if not job["dry_run"]:
+                release_pooled_mcp_servers(agent)
+        if not result.ok:
+            raise result.error
+        with open(os.path.join(workspace.workspace_path, "fleet_result.json"), "w") as f:
+            json.dump({"prompt": prompt, "result": result.result}, f, indent=2, default=str)
+        return {"status": "done", "elapsed": time.perf_counter() - started}
+    except Exception as e:
+        return {"status": "failed", "elapsed": time.perf_counter() - started, "error": f"{type(e).__name__}: {e}"}
+
+
+class FleetOrchestrator:
+    """
+    Schedules library learning agents across a process pool.
+
+    At most `max_workers` libraries run at once (default: one per core), and at most
+    `provider_quotas[provider]` of them against any one provider. Every start and finish
+    is appended to `<state_dir>/fleet_journal.jsonl` and fsynced. On the next run over
+    the same state directory:
+    - finished libraries are skipped;
+    - interrupted ones reuse their workspace with resume_from_checkpoint enabled;
+    - failed ones are retried unless `retry_failed` is False.
+
+    Args:
+        entries: Manifest entries (see load_manifest)
+        state_dir: Directory for the journal and the per-library workspaces
+        max_workers: Worker processes; defaults to os.cpu_count()
+        provider_quotas: Maximum concurrent libraries per provider key (e.g. {"openai": 4})
+        dry_run: Validate configs and render prompts, but answer with a local StubProvider
+            instead of HEAVEN and a real model
+        stub_latency: Simulated seconds per stub completion in dry-run mode
+        retry_failed: Run libraries again whose last recorded outcome was a failure
+    """
+
+    def __init__(
+        self,
+        entries: List[Dict[str, Any]],
+        state_dir: str,
+        max_workers: Optional[int] = None,
+        provider_quotas: Optional[Dict[str, int]] = None,
+        dry_run: bool = False,
+        stub_latency: float = 0.0,
+        retry_failed: bool = True
+    ):
+        self.entries = entries
+        self.state_dir = state_dir
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.provider_quotas = provider_quotas or {}
+        if any(quota < 1 for quota in self.provider_quotas.values()):
+            raise ValueError(f"Provider quotas must be at least 1: {self.provider_quotas}")
+        self.dry_run = dry_run
+        self.stub_latency = stub_latency
+        self.retry_failed = retry_failed
+        self.journal_path = os.path.join(state_dir, JOURNAL_FILENAME)
+        self.allocator = WorkspaceAllocator(base_dir=os.path.join(state_dir, "workspaces"), max_age=None)
+
+    def _provider(self, entry: Dict[str, Any]) -> str:
+        if self.dry_run:
+            return STUB_PROVIDER
+        return get_route_table().provider_for(entry.get("model", "gpt-5-mini"))
+
+    def load_journal(self) -> Dict[str, Dict[str, Any]]:
+        """Latest journal record per library name."""
+        latest: Dict[str, Dict[str, Any]] = {}
+        try:
+            with open(self.journal_path) as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # torn final line from a crash
+                    latest[record["name"]] = record
+        except OSError:
+            pass
+        return latest
+
+    def _append(self, journal: Any, record: Dict[str, Any]) -> None:
+        journal.write(json.dumps({**record, "time": time.time()}) + "\n")
+        journal.flush()
+        os.fsync(journal.fileno())
+
+    def run(self) -> Iterator[FleetResult]:
+        """Run every unfinished library, yielding results as they complete."""
+        os.makedirs(self.state_dir, exist_ok=True)
+        latest = self.load_journal()
+        pending = []
+        for entry in self.entries:
+            record = latest.get(entry["name"])
+            status = record["status"] if record else None
+            if status == "done" or (status == "failed" and not self.retry_failed):
+                continue
+            resumed = status == "started" and os.path.isdir(record["workspace"])
+            pending.append((entry, record["workspace"] if resumed else None, resumed))
+        logger.info("Fleet: %d of %d libraries to run", len(pending), len(self.entries))
+
+        in_flight: Dict[Future, Any] = {}
+        per_provider: Dict[str, int] = {}
+        with open(self.journal_path, "a") as journal, \
+                ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+            while pending or in_flight:
+                for item in list(pending):
+                    if len(in_flight) >= self.max_workers:
+                        break
+                    entry, root, resumed = item
+                    provider = self._provider(entry)
+                    quota = self.provider_quotas.get(provider)
+                    if quota is not None and per_provider.get(provider, 0) >= quota:
+                        continue
+                    pending.remove(item)
+                    root = root or self.allocator.allocate(entry["name"]).root
+                    self._append(journal, {"name": entry["name"], "status": "started", "workspace": root})
+                    future = pool.submit(_run_fleet_job, {
+                        "spec": entry, "workspace": root, "resume": resumed,
+                        "dry_run": self.dry_run, "stub_latency": self.stub_latency,
+                    })
+                    in_flight[future] = (entry, root, resumed, provider)
+                    per_provider[provider] = per_provider.get(provider, 0) + 1
+
+                done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+                for future in done:
+                    entry, root, resumed, provider = in_flight.pop(future)
+                    per_provider[provider] -= 1
+                    try:
+                        outcome = future.result()
+                    except Exception as e:  # worker process died
+                        outcome = {"status": "failed", "elapsed": 0.0, "error": f"{type(e).__name__}: {e}"}
+                    result = FleetResult(name=entry["name"], provider=provider, workspace=root,
+                                         resumed=resumed, **outcome)
+                    self._append(journal, {k: v for k, v in asdict(result).items() if k != "resumed"})
+                    if not result.ok:
+                        logger.warning("Fleet: %s failed: %s", result.name, result.error)
+                    yield result
+
+    def summary(self) -> Dict[str, int]:
+        """Count of libraries per latest journal status (plus never-started ones)."""
+        latest = self.load_journal()
+        counts: Dict[str, int] = {}
+        for entry in self.entries:
+            status = latest.get(entry["name"], {}).get("status", "pending")
+            counts[status] = counts.get(status, 0) + 1
+        return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run library learning agents for a manifest")
+    parser.add_argument("manifest")
+    parser.add_argument("--state-dir", default="/tmp/powerset_fleet")
+    parser.add_argument("--max-workers", type=int, default=None)
+    parser.add_argument("--quota", action="append", default=[], metavar="PROVIDER=N",
+                        help="Maximum concurrent libraries for a provider (repeatable)")
+    parser.add_argument("--dry-run", action="store_true", help="Use the local stub provider")
+    parser.add_argument("--stub-latency", type=float, default=0.0)
+    parser.add_argument("--no-retry-failed", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    quotas = {provider: int(count) for provider, count in (q.split("=", 1) for q in args.quota)}
+    fleet = FleetOrchestrator(
+        load_manifest(args.manifest), args.state_dir, max_workers=args.max_workers,
+        provider_quotas=quotas, dry_run=args.dry_run, stub_latency=args.stub_latency,
+        retry_failed=not args.no_retry_failed
+    )
+    for result in fleet.run():
+        suffix = f" ({result.error})" if result.error else ""
+        print(f"{result.status:<7} {result.name:<40} {result.elapsed:6.1f}s{suffix}")
+    print(json.dumps(fleet.summary()))
+
+
+if __name__ == "__main__":
+    main()
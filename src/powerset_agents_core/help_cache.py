@@ -0,0 +1,299 @@
+"""On-disk cache of library `help_command` output, preloaded as chunked, indexed files."""
+
+import hashlib
+import importlib.metadata
+import importlib.util
+import json
+import logging
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from .tracing import span
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = "/tmp/powerset_help_cache"
+
+# pydoc section headings and member definitions worth indexing
+_SECTION_RE = re.compile(
+    r"^(NAME|DESCRIPTION|PACKAGE CONTENTS|SUBMODULES|CLASSES|FUNCTIONS|DATA|VERSION|FILE)\s*$"
+)
+_SYMBOL_RE = re.compile(r"^\s*(?:class\s+(\w+)|(\w+)\(.*\)\s*(?:->.*)?$)")
+
+
+@dataclass
+class HelpResource:
+    """Preloaded help output for one (package, version, command)."""
+    pkg_path: str
+    version: str
+    directory: str
+    index_path: str
+    chunk_paths: List[str]
+    total_chars: int
+
+
+def _is_path(pkg_path: str) -> bool:
+    """Whether pkg_path names a file or directory rather than an importable module."""
+    return os.sep in pkg_path or "/" in pkg_path or pkg_path.startswith(".") or os.path.exists(pkg_path)
+
+
+def normalize_pkg_path(pkg_path: str) -> str:
+    """Absolute path for path-like pkg_path values; module names are returned unchanged."""
+    return os.path.abspath(pkg_path) if _is_path(pkg_path) else pkg_path
+
+
+def _source_fingerprint(roots: List[str]) -> str:
+    """Hash of the sizes and mtimes of the Python files under `roots` (files or directories)."""
+    digest = hashlib.sha256()
+    for root in roots:
+        if os.path.isfile(root):
+            stat = os.stat(root)
+            digest.update(f"{os.path.basename(root)}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+            continue
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                if filename.endswith(".py"):
+                    path = os.path.join(dirpath, filename)
+                    stat = os.stat(path)
+                    digest.update(f"{os.path.relpath(path, root)}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return f"src-{digest.hexdigest()[:12]}"
+
+
+def package_fingerprint(pkg_path: str) -> str:
+    """
+    Identify the installed version of a package without importing it.
+
+    Module names use distribution metadata when available. Paths (absolute or relative,
+    such as `./mylib`), and modules without metadata, hash the sizes and mtimes of their
+    Python source files, so editing the package invalidates caches keyed on it.
+    Returns "unknown" only when the package cannot be found at all.
+    """
+    if _is_path(pkg_path):
+        path = os.path.abspath(pkg_path)
+        return _source_fingerprint([path]) if os.path.exists(path) else "unknown"
+
+    top_level = pkg_path.split(".")[0]
+    for dist_name in (top_level, top_level.replace("_", "-")):
+        try:
+            return importlib.metadata.version(dist_name)
+        except (importlib.metadata.PackageNotFoundError, ValueError):
+            continue
+
+    try:
+        spec = importlib.util.find_spec(top_level)
+    except (ImportError, ValueError):
+        spec = None
+    if spec is None or (spec.origin is None and not spec.submodule_search_locations):
+        return "unknown"
+    return _source_fingerprint(list(spec.submodule_search_locations or [spec.origin]))
+
+
+def _limit_memory(limit_bytes: int) -> None:
+    try:
+        import resource
+        resource.setrlimit(resource.RLIMIT_AS, (limit_bytes, limit_bytes))
+    except (ImportError, ValueError, OSError):
+        pass
+
+
+class HelpOutputCache:
+    """
+    Runs each library's help_command once per package version and caches the output.
+
+    The command runs in a subprocess with a scratch working directory, a reduced
+    environment, no stdin, a timeout and a memory limit. Output is split into chunks of
+    at most `chunk_chars` characters and indexed by pydoc section and symbol, so agents
+    can open only the parts they need instead of paging through a live shell call.
+
+    Args:
+        cache_dir: Directory for cached help output
+        timeout: Seconds the help command may run
+        chunk_chars: Maximum characters per chunk file
+        memory_limit_mb: Address-space limit for the help subprocess
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = DEFAULT_CACHE_DIR,
+        timeout: float = 60.0,
+        chunk_chars: int = 4000,
+        memory_limit_mb: int = 2048
+    ):
+        self.cache_dir = cache_dir
+        self.timeout = timeout
+        self.chunk_chars = chunk_chars
+        self.memory_limit_mb = memory_limit_mb
+        self._resources: Dict[str, HelpResource] = {}
+        self._building: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def preload(self, pkg_path: str, help_command: str) -> HelpResource:
+        """
+        Return cached help output for the package, running help_command on a miss.
+
+        The help command runs without holding the cache lock; concurrent preloads of the
+        same package wait for the one run instead of starting their own.
+        """
+        pkg_path = normalize_pkg_path(pkg_path)
+        version = package_fingerprint(pkg_path)
+        key = hashlib.sha256(
+            f"{pkg_path}\0{version}\0{help_command}\0{sys.version_info[:2]}".encode()
+        ).hexdigest()[:16]
+
+        with self._lock:
+            resource = self._resources.get(key)
+            if resource is not None:
+                return resource
+            key_lock = self._building.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                resource = self._resources.get(key)
+            if resource is not None:
+                return resource
+            try:
+                directory = os.path.join(self.cache_dir, f"{pkg_path.strip(os.sep).replace(os.sep, '_')}-{key}")
+                resource = self._load(pkg_path, version, directory)
+                if resource is None:
+                    resource = self._build(pkg_path, version, help_command, directory)
+                with self._lock:
+                    self._resources[key] = resource
+                return resource
+            finally:
+                with self._lock:
+                    self._building.pop(key, None)
+
+    def _run_help(self, help_command: str) -> str:
+        env = {
+            "PATH": os.environ.get("PATH", "/usr/bin:/bin"),
+            "PYTHONPATH": os.environ.get("PYTHONPATH", ""),
+            "PAGER": "cat",
+            "TERM": "dumb",
+        }
+        limit = self.memory_limit_mb * 1024 * 1024
+        with tempfile.TemporaryDirectory() as scratch:
+            env["HOME"] = scratch
+            proc = subprocess.run(
+                help_command,
+                shell=True,
+                cwd=scratch,
+                env=env,
+                stdin=subprocess.DEVNULL,
+                capture_output=True,
+                text=True,
+                timeout=self.timeout,
+                preexec_fn=(lambda: _limit_memory(limit)) if os.name == "posix" else None
+            )
+        if proc.returncode != 0:
+            raise RuntimeError(f"help command failed ({proc.returncode}): {proc.stderr.strip()[-500:]}")
+        return proc.stdout
+
+    def _build(self, pkg_path: str, version: str, help_command: str, directory: str) -> HelpResource:
+        started = time.perf_counter()
+        with span("help.run", pkg_path=pkg_path) as run_span:
+            output = self._run_help(help_command)
+            run_span.add("help_chars", len(output))
+        chunks = self._chunk(output)
+
+        os.makedirs(directory, exist_ok=True)
+        entries = []
+        chunk_paths = []
+        for number, chunk in enumerate(chunks):
+            chunk_path = os.path.join(directory, f"chunk-{number:03d}.txt")
+            with open(chunk_path, "w") as f:
+                f.write(chunk)
+            chunk_paths.append(chunk_path)
+            entries.append({"file": chunk_path, "chars": len(chunk), **self._index_chunk(chunk)})
+
+        index_path = os.path.join(directory, "INDEX.md")
+        with open(index_path, "w") as f:
+            f.write(f"# help({pkg_path}) — version {version}\n\n")
+            f.write(f"Output of `{help_command}` split into {len(chunks)} chunks.\n\n")
+            for entry in entries:
+                sections = ", ".join(entry["sections"]) or "-"
+                symbols = ", ".join(entry["symbols"][:40]) or "-"
+                f.write(f"- {entry['file']} ({entry['chars']} chars) sections: {sections}; symbols: {symbols}\n")
+
+        # Written last: its presence marks a complete cache entry
+        with open(os.path.join(directory, "index.json"), "w") as f:
+            json.dump({
+                "pkg_path": pkg_path,
+                "version": version,
+                "help_command": help_command,
+                "created_at": time.time(),
+                "index_path": index_path,
+                "chunks": entries,
+            }, f, indent=2)
+
+        logger.info("Cached help for %s %s: %d chars in %d chunks (%.2fs)",
+                    pkg_path, version, len(output), len(chunks), time.perf_counter() - started)
+        return HelpResource(pkg_path, version, directory, index_path, chunk_paths, len(output))
+
+    @staticmethod
+    def _load(pkg_path: str, version: str, directory: str) -> Optional[HelpResource]:
+        try:
+            with open(os.path.join(directory, "index.json")) as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return None
+        chunk_paths = [entry["file"] for entry in index["chunks"]]
+        if not all(os.path.exists(path) for path in chunk_paths):
+            return None
+        total = sum(entry["chars"] for entry in index["chunks"])
+        return HelpResource(pkg_path, version, directory, index["index_path"], chunk_paths, total)
+
+    def _chunk(self, output: str) -> List[str]:
+        """Split on blank lines, packing paragraphs into chunks of at most chunk_chars."""
+        chunks: List[str] = []
+        current = ""
+        for paragraph in re.split(r"(?<=\n)\n", output):
+            while len(paragraph) > self.chunk_chars:
+                if current:
+                    chunks.append(current)
+                    current = ""
+                chunks.append(paragraph[:self.chunk_chars])
+                paragraph = paragraph[self.chunk_chars:]
+            if len(current) + len(paragraph) > self.chunk_chars:
+                chunks.append(current)
+                current = ""
+            current += paragraph + "\n"
+        if current.strip():
+            chunks.append(current)
+        return chunks or [""]
+
+    @staticmethod
+    def _index_chunk(chunk: str) -> Dict[str, Any]:
+        sections: List[str] = []
+        symbols: List[str] = []
+        for line in chunk.splitlines():
+            section = _SECTION_RE.match(line)
+            if section:
+                sections.append(section.group(1))
+                continue
+            symbol = _SYMBOL_RE.match(line.lstrip("| "))
+            if symbol:
+                name = symbol.group(1) or symbol.group(2)
+                if not name.startswith("__") and name not in symbols:
+                    symbols.append(name)
+        return {"sections": sections, "symbols": symbols}
+
+
+_default_cache: Optional[HelpOutputCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_help_cache() -> HelpOutputCache:
+    """Return the process-wide help output cache, creating it on first use."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = HelpOutputCache()
+        return _default_cache
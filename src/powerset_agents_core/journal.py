@@ -0,0 +1,511 @@
+"""
+Write-behind journal for STARLOG writes.
+
+The generated prompt has the agent call `update_debug_diary` and `add_rule` many times.
+Each call is a round trip to the STARLOG MCP server and a synchronous filesystem write.
+With many agents on one disk, that adds up to an fsync storm. In journaling mode the
+writes go to an append-only log, `<starlog_path>/powerset_journal.jsonl`, instead:
+
+1. The write is appended to the log and acknowledged straight away.
+2. A background task applies logged writes to STARLOG in order, off the agent's
+   critical path.
+3. Any other STARLOG call (`check`, `orient`, ...) first waits for pending writes to be
+   applied, so the agent always reads its own writes. A write STARLOG has rejected is
+   retried in the background instead, so it never holds up other calls.
+4. `fly()` first re-applies writes that a crashed session logged but never applied.
+
+How soon a logged write is on disk depends on the durability policy:
+
+- "always": fsync before acknowledging; concurrent writes share one fsync
+- "interval": fsync every `interval_ms` from a background thread
+- "session": fsync only on flush()/close(), i.e. when the session ends
+
+Applied writes are marked in the log. A write is rejected when applying it raises, comes
+back as an MCP error, or returns STARLOG's own "❌ ..." message. It is retried up to
+`max_attempts` times and then moved to the journal's dead letters. Each rejection is
+reported to the agent with the result of its next STARLOG call. Once the log grows past
+`compact_bytes`, it is rewritten atomically with only the unapplied entries and the dead
+letters. Delivery to STARLOG is at-least-once: a crash between applying a write and
+logging that it was applied replays that write once on the next `fly()`.
+
+The in-process STARLOG server (`"inprocess:starlog"`) routes its tool handlers through
+`wrap_session`, so the journal sees the agent's calls whatever client HEAVEN uses.
+A ClientSession can be wrapped the same way:
+
+    journal = get_journal("/tmp/agent_starlog", policy="interval", interval_ms=50)
+    session = wrap_session(starlog_client_session)
+"""
+
+import asyncio
+import atexit
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from .mcp_pool import STARLOG_WRITE_TOOLS
+from .tracing import span
+
+logger = logging.getLogger(__name__)
+
+POLICIES = ("always", "interval", "session")
+JOURNAL_FILENAME = "powerset_journal.jsonl"
+
+# STARLOG tools whose calls are journaled; every other tool reads and waits for them
+JOURNALED_TOOLS = STARLOG_WRITE_TOOLS
+_RECOVER_TOOLS = frozenset({"fly"})
+_PATH_ARGUMENTS = ("path", "starlog_path", "project_path")
+# STARLOG reports a refused call as a normal result starting with this mark
+REJECTION_MARK = "❌"
+
+
+@dataclass
+class JournalEntry:
+    """One journaled STARLOG write."""
+    seq: int
+    tool: str
+    arguments: Dict[str, Any]
+    ts: float
+
+
+def _read_log(path: str) -> Tuple[Dict[int, JournalEntry], int, Dict[int, str], int]:
+    """(entries by seq, highest applied seq, dead-letter errors by seq, highest seq) from a journal file."""
+    entries: Dict[int, JournalEntry] = {}
+    applied = 0
+    dead: Dict[int, str] = {}
+    last = 0
+    try:
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A torn final line from a crash mid-append; everything before it is intact
+                    logger.warning("Skipping torn record in %s", path)
+                    continue
+                if "applied" in record:
+                    applied = max(applied, record["applied"])
+                    last = max(last, record["applied"])
+                elif "dead" in record:
+                    dead[record["dead"]] = record.get("error", "")
+                else:
+                    entries[record["seq"]] = JournalEntry(**record)
+                    last = max(last, record["seq"])
+    except FileNotFoundError:
+        pass
+    return entries, applied, dead, last
+
+
+class StarlogJournal:
+    """
+    Append-only write-behind log of one STARLOG session's writes.
+
+    Args:
+        starlog_path: STARLOG session directory the journal lives in
+        policy: "always", "interval" or "session" (see module docstring)
+        interval_ms: Flush period for the "interval" policy
+        compact_bytes: Rewrite the log without applied entries once it grows past this
+        max_attempts: Rejections after which a write becomes a dead letter
+    """
+
+    def __init__(
+        self,
+        starlog_path: str,
+        policy: str = "interval",
+        interval_ms: int = 50,
+        compact_bytes: int = 1024 * 1024,
+        max_attempts: int = 3
+    ):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown journal policy: {policy} (expected one of {', '.join(POLICIES)})")
+        self.starlog_path = os.path.abspath(starlog_path)
+        self.path = os.path.join(self.starlog_path, JOURNAL_FILENAME)
+        self.policy = policy
+        self.interval_ms = interval_ms
+        self.compact_bytes = compact_bytes
+        self.max_attempts = max_attempts
+        self.fsyncs = 0
+        self.appended = 0
+
+        os.makedirs(self.starlog_path, exist_ok=True)
+        entries, self.applied_seq, dead, last = _read_log(self.path)
+        self._pending: Deque[JournalEntry] = deque(
+            entry for seq, entry in sorted(entries.items()) if seq > self.applied_seq and seq not in dead
+        )
+        # Writes STARLOG kept rejecting, with the last error; they are never applied
+        self.dead_letters: List[Tuple[JournalEntry, str]] = [
+            (entries[seq], error) for seq, error in sorted(dead.items()) if seq in entries
+        ]
+        self._attempts: Dict[int, int] = {}
+        self._notices: List[str] = []
+        if self._pending:
+            logger.info("Journal %s has %d unapplied STARLOG writes", self.path, len(self._pending))
+        self._in_flight: Dict[int, JournalEntry] = {}
+        self._next_seq = last + 1
+        self._durable_seq = last
+        self._buffer: List[bytes] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._file = open(self.path, "ab")
+        self._log_bytes = self._file.tell()
+        self._closed = threading.Event()
+        self._writer: Optional[threading.Thread] = None
+        if policy == "interval":
+            self._writer = threading.Thread(target=self._flush_periodically, name="powerset-journal", daemon=True)
+            self._writer.start()
+
+    def append(self, tool: str, arguments: Dict[str, Any]) -> JournalEntry:
+        """Log a write; with the "always" policy, return only once it is on disk."""
+        with self._lock:
+            entry = JournalEntry(self._next_seq, tool, dict(arguments), time.time())
+            self._next_seq += 1
+            self._buffer.append(json.dumps(asdict(entry), default=str).encode() + b"\n")
+            self._pending.append(entry)
+            self.appended += 1
+        if self.policy == "always":
+            self._flush_through(entry.seq)
+        return entry
+
+    def pending(self) -> List[JournalEntry]:
+        """Logged writes not yet applied to STARLOG, oldest first."""
+        with self._lock:
+            return list(self._pending)
+
+    def claim(self) -> Optional[JournalEntry]:
+        """Take the oldest unapplied write for applying (None when there is nothing to apply)."""
+        with self._lock:
+            if not self._pending:
+                return None
+            entry = self._pending.popleft()
+            self._in_flight[entry.seq] = entry
+            return entry
+
+    def release(self, entry: JournalEntry) -> None:
+        """Return a claimed write whose application failed, so it is retried first."""
+        with self._lock:
+            self._in_flight.pop(entry.seq, None)
+            self._pending.appendleft(entry)
+
+    def mark_applied(self, entry: JournalEntry) -> None:
+        """Record that a claimed write reached STARLOG (durable with the next flush)."""
+        with self._lock:
+            self._in_flight.pop(entry.seq, None)
+            self._attempts.pop(entry.seq, None)
+            self.applied_seq = max(self.applied_seq, entry.seq)
+            self._buffer.append(json.dumps({"applied": entry.seq}).encode() + b"\n")
+
+    def reject(self, entry: JournalEntry, error: str) -> bool:
+        """
+        Record that STARLOG rejected a claimed write; True if it became a dead letter.
+
+        Below `max_attempts` the write goes back to the head of the queue for a retry.
+        Either way a notice for the agent is queued (see take_notices).
+        """
+        with self._lock:
+            self._in_flight.pop(entry.seq, None)
+            attempts = self._attempts[entry.seq] = self._attempts.get(entry.seq, 0) + 1
+            notice = f"STARLOG rejected journaled {entry.tool} (journal entry {entry.seq}): {error}"
+            dead = attempts >= self.max_attempts
+            if dead:
+                del self._attempts[entry.seq]
+                self.dead_letters.append((entry, error))
+                self._buffer.append(json.dumps({"dead": entry.seq, "error": error}).encode() + b"\n")
+                notice += f" [dropped after {attempts} attempts]"
+            else:
+                self._pending.appendleft(entry)
+                notice += f" [attempt {attempts} of {self.max_attempts}; will retry]"
+            self._notices.append(notice)
+        logger.warning("%s: %s", self.path, notice)
+        return dead
+
+    def blocked(self) -> bool:
+        """True while the oldest pending write is one STARLOG has already rejected."""
+        with self._lock:
+            return bool(self._pending) and self._pending[0].seq in self._attempts
+
+    def take_notices(self) -> List[str]:
+        """Rejection notices not yet shown to the agent, oldest first (clears them)."""
+        with self._lock:
+            notices, self._notices = self._notices, []
+            return notices
+
+    def requeue_notices(self, notices: List[str]) -> None:
+        """Put back notices that could not be delivered with a call's result."""
+        with self._lock:
+            self._notices[:0] = notices
+
+    def needs_compaction(self) -> bool:
+        return self._log_bytes > self.compact_bytes
+
+    def flush(self) -> None:
+        """Write and fsync everything logged so far."""
+        with self._lock:
+            last = self._next_seq - 1
+        self._flush_through(last)
+
+    def _flush_through(self, seq: int) -> None:
+        # Group commit: whoever holds the flush lock writes every buffered record, so
+        # writers queued behind it usually find their record already durable
+        with self._flush_lock:
+            if self._file.closed:
+                return
+            with self._lock:
+                batch, self._buffer = self._buffer, []
+                last = self._next_seq - 1
+            if not batch and self._durable_seq >= seq:
+                return
+            with span("journal.flush", policy=self.policy) as flush_span:
+                data = b"".join(batch)
+                self._file.write(data)
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._log_bytes += len(data)
+                flush_span.add("records", len(batch))
+            self.fsyncs += 1
+            self._durable_seq = max(self._durable_seq, last)
+
+    def _flush_periodically(self) -> None:
+        while not self._closed.wait(self.interval_ms / 1000):
+            if self._buffer:
+                try:
+                    self.flush()
+                except OSError as e:
+                    logger.warning("Journal flush to %s failed: %s", self.path, e)
+
+    def compact(self) -> None:
+        """Atomically rewrite the log with only the writes not yet applied, plus the dead letters."""
+        with self._flush_lock:
+            with self._lock:
+                self._buffer = []
+                # Claimed writes are still unapplied and must survive the rewrite
+                unapplied = sorted(list(self._in_flight.values()) + list(self._pending), key=lambda e: e.seq)
+                records = [json.dumps({"applied": self.applied_seq}).encode() + b"\n"]
+                records.extend(json.dumps(asdict(entry), default=str).encode() + b"\n" for entry in unapplied)
+                for entry, error in self.dead_letters:
+                    records.append(json.dumps(asdict(entry), default=str).encode() + b"\n")
+                    records.append(json.dumps({"dead": entry.seq, "error": error}).encode() + b"\n")
+                last = self._next_seq - 1
+                data = b"".join(records)
+                fd, tmp_path = tempfile.mkstemp(dir=self.starlog_path, suffix=".tmp")
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+                self._file.close()
+                self._file = open(self.path, "ab")
+                self._log_bytes = len(data)
+            self.fsyncs += 1
+            self._durable_seq = max(self._durable_seq, last)
+        logger.debug("Compacted journal %s to %d unapplied writes", self.path, len(unapplied))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            "policy": self.policy,
+            "appended": self.appended,
+            "pending": pending,
+            "applied_seq": self.applied_seq,
+            "dead_letters": len(self.dead_letters),
+            "fsyncs": self.fsyncs,
+        }
+
+    def close(self) -> None:
+        """Flush (the "session" policy's durability point), compact and stop the writer."""
+        self._closed.set()
+        if self._writer is not None:
+            self._writer.join()
+        if self._file.closed:
+            return
+        self.flush()
+        self.compact()
+        with self._flush_lock:
+            self._file.close()
+
+
+def _result_text(result: Any) -> str:
+    if isinstance(result, str):
+        return result
+    return " ".join(getattr(item, "text", "") for item in getattr(result, "content", None) or [])
+
+
+def _rejection(result: Any) -> Optional[str]:
+    """The error of a STARLOG call that did not take effect, or None if it did."""
+    text = _result_text(result)
+    if getattr(result, "isError", False):
+        return text or "MCP error result"
+    if text.lstrip().startswith(REJECTION_MARK):
+        return text.strip()
+    return None
+
+
+async def apply_pending(journal: StarlogJournal, call_tool: Callable[..., Any]) -> int:
+    """
+    Apply the journal's unapplied writes through `call_tool`, in order; returns how many.
+
+    A write whose call raises or is rejected (see journal.reject) stops the run, so later
+    writes keep their order. Once it becomes a dead letter, the run moves on past it.
+    Compaction runs in a worker thread, off the event loop.
+    """
+    applied = 0
+    with span("journal.apply", starlog_path=journal.starlog_path) as apply_span:
+        while True:
+            entry = journal.claim()
+            if entry is None:
+                break
+            try:
+                result = await call_tool(entry.tool, entry.arguments)
+            except Exception as e:
+                error: Optional[str] = f"{type(e).__name__}: {e}"
+            except BaseException:
+                journal.release(entry)
+                raise
+            else:
+                error = _rejection(result)
+            if error is not None:
+                apply_span.add("rejected", 1)
+                if journal.reject(entry, error):
+                    continue
+                break
+            journal.mark_applied(entry)
+            applied += 1
+        apply_span.add("applied", applied)
+    if journal.needs_compaction():
+        await asyncio.get_running_loop().run_in_executor(None, journal.compact)
+    return applied
+
+
+_journals: Dict[str, StarlogJournal] = {}
+_journals_lock = threading.Lock()
+
+
+def get_journal(starlog_path: str, policy: str = "interval", interval_ms: int = 50) -> StarlogJournal:
+    """Process-wide journal for a STARLOG session directory (reopened when the policy changes)."""
+    key = os.path.abspath(starlog_path)
+    with _journals_lock:
+        journal = _journals.get(key)
+        if journal is not None:
+            if (journal.policy, journal.interval_ms) == (policy, interval_ms):
+                return journal
+            journal.close()
+        journal = _journals[key] = StarlogJournal(key, policy=policy, interval_ms=interval_ms)
+        return journal
+
+
+def _find_journal(arguments: Optional[Dict[str, Any]]) -> Optional[StarlogJournal]:
+    with _journals_lock:
+        for name in _PATH_ARGUMENTS:
+            value = (arguments or {}).get(name)
+            if isinstance(value, str):
+                journal = _journals.get(os.path.abspath(value))
+                if journal is not None:
+                    return journal
+    return None
+
+
+def text_ack(entry: JournalEntry) -> str:
+    """Plain-text acknowledgement of a journaled write, for servers whose tools return strings."""
+    return f"{entry.tool} recorded (journal entry {entry.seq}); applied to STARLOG in the background"
+
+
+def _mcp_ack(entry: JournalEntry) -> Any:
+    from mcp.types import CallToolResult, TextContent
+    return CallToolResult(content=[TextContent(type="text", text=text_ack(entry))])
+
+
+def _with_notices(result: Any, notices: List[str]) -> Optional[Any]:
+    """`result` with rejection notices in front, or None if its type cannot carry text."""
+    text = "\n".join(f"⚠️ {notice}" for notice in notices)
+    if isinstance(result, str):
+        return f"{text}\n\n{result}"
+    if isinstance(getattr(result, "content", None), list) and hasattr(result, "model_copy"):
+        from mcp.types import TextContent
+        return result.model_copy(update={"content": [TextContent(type="text", text=text), *result.content]})
+    return None
+
+
+def wrap_session(session: Any, ack: Callable[[JournalEntry], Any] = _mcp_ack) -> Any:
+    """
+    Route a STARLOG session's writes through the registered journals (in place).
+
+    `session` is anything with an async `call_tool(name, arguments)`: an MCP
+    ClientSession, or the in-process server's hook chain, which passes
+    `ack=text_ack` since its tools return plain values. Calls whose path argument
+    names a journaled STARLOG session are journaled and acknowledged with
+    `ack(entry)`; other calls pass straight through. Rejections of earlier writes are
+    prepended to the next text result returned for that session.
+    """
+    call_tool = session.call_tool
+    # One applier at a time per journal keeps writes reaching STARLOG in log order
+    locks: Dict[str, asyncio.Lock] = {}
+    appliers: Dict[str, "asyncio.Future[int]"] = {}
+
+    async def apply(journal: StarlogJournal) -> int:
+        async with locks.setdefault(journal.path, asyncio.Lock()):
+            return await apply_pending(journal, call_tool)
+
+    def apply_in_background(journal: StarlogJournal) -> None:
+        running = appliers.get(journal.path)
+        if running is None or running.done():
+            task = appliers[journal.path] = asyncio.ensure_future(apply(journal))
+            task.add_done_callback(lambda done: applied(journal, done))
+
+    def applied(journal: StarlogJournal, task: "asyncio.Future[int]") -> None:
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            logger.warning("Applying journaled STARLOG writes failed, will retry: %s", task.exception())
+        elif journal.pending() and not journal.blocked():
+            # Writes logged while the applier was finishing up
+            apply_in_background(journal)
+
+    def notify(journal: StarlogJournal, result: Any) -> Any:
+        notices = journal.take_notices()
+        if not notices:
+            return result
+        annotated = _with_notices(result, notices)
+        if annotated is None:
+            journal.requeue_notices(notices)
+            return result
+        return annotated
+
+    async def journaled_call_tool(name: str, arguments: Optional[Dict[str, Any]] = None, **kwargs: Any) -> Any:
+        journal = _find_journal(arguments)
+        if journal is None or kwargs:
+            return await call_tool(name, arguments, **kwargs)
+        if name in JOURNALED_TOOLS:
+            if journal.policy == "always":
+                entry = await asyncio.get_running_loop().run_in_executor(None, journal.append, name, arguments)
+            else:
+                entry = journal.append(name, arguments)
+            apply_in_background(journal)
+            return notify(journal, ack(entry))
+        if journal.blocked():
+            # A rejected write is retried in the background rather than holding up this call
+            apply_in_background(journal)
+        else:
+            if name in _RECOVER_TOOLS and journal.pending():
+                logger.info("Replaying %d journaled STARLOG writes before fly()", len(journal.pending()))
+            await apply(journal)
+        return notify(journal, await call_tool(name, arguments))
+    session.call_tool = journaled_call_tool
+    return session
+
+
+def _close_all() -> None:
+    with _journals_lock:
+        for journal in _journals.values():
+            try:
+                journal.close()
+            except OSError as e:
+                logger.warning("Could not close journal %s: %s", journal.path, e)
+        _journals.clear()
+
+
+atexit.register(_close_all)
@@ -0,0 +1,244 @@
+"""
+Versioned "knowledge packs" distilled from a finished learning pass.
+
+A pack holds the compact essentials an agent learned about a library: key API
+signatures, examples that worked, and STARLOG rules. Packs are stored per package
+version, so a new release of the library simply has no pack until the next pass
+snapshots one. Agents built with `use_knowledge_pack=True` get the pack in their
+instructions instead of walking the curriculum from the start.
+
+Snapshot after a learning pass with:
+
+    python -m powerset_agents_core.knowledge snapshot pydantic_stack_core \\
+        --help-command "python -c 'import pydantic_stack_core; help(pydantic_stack_core)'" \\
+        --examples-dir /tmp/metastack_workspace/examples --rules-file rules.md
+"""
+
+import argparse
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import List, Optional
+
+from .help_cache import get_help_cache, package_fingerprint
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_KNOWLEDGE_DIR = "/tmp/powerset_knowledge"
+
+# "name(args)" / "name(args) -> ret" lines from pydoc output
+_SIGNATURE_RE = re.compile(r"^(?:class\s+)?([A-Za-z]\w*)\(.*\)(?:\s*->.*)?$")
+
+
+@dataclass
+class KnowledgePack:
+    """Distilled knowledge about one version of a library."""
+    pkg_path: str
+    version: str
+    api_signatures: List[str] = field(default_factory=list)
+    examples: List[str] = field(default_factory=list)
+    rules: List[str] = field(default_factory=list)
+    created_at: float = field(default_factory=time.time)
+
+    def render(self, budget_chars: int = 8000) -> str:
+        """
+        Markdown for the system prompt, at most `budget_chars` long.
+
+        Rules come first, then signatures, then examples; items that do not fit are
+        dropped whole and counted in a trailing note.
+        """
+        limit = budget_chars - 40  # room for the omitted-items note
+        header = f"KNOWLEDGE PACK for {self.pkg_path} {self.version} (from an earlier learning pass):\n"
+        parts = [header]
+        used = len(header)
+        dropped = 0
+        for title, items, fence in (
+            ("Rules", self.rules, False),
+            ("API signatures", self.api_signatures, False),
+            ("Examples that worked", self.examples, True),
+        ):
+            if not items:
+                continue
+            heading = f"\n## {title}\n"
+            if used + len(heading) > limit:
+                dropped += len(items)
+                continue
+            parts.append(heading)
+            used += len(heading)
+            for item in items:
+                text = f"```python\n{item.strip()}\n```\n" if fence else f"- {item}\n"
+                if used + len(text) > limit:
+                    dropped += 1
+                    continue
+                parts.append(text)
+                used += len(text)
+        if dropped:
+            parts.append(f"\n({dropped} items omitted for size)\n")
+        return "".join(parts)[:budget_chars]
+
+
+def extract_signatures(help_text: str, limit: int = 400) -> List[str]:
+    """Public function and class signatures from pydoc output, in order of appearance."""
+    signatures: List[str] = []
+    seen = set()
+    for line in help_text.splitlines():
+        candidate = line.lstrip("| ").strip()
+        match = _SIGNATURE_RE.match(candidate)
+        if not match or match.group(1).startswith("_") or candidate in seen:
+            continue
+        seen.add(candidate)
+        signatures.append(candidate)
+        if len(signatures) >= limit:
+            break
+    return signatures
+
+
+class KnowledgePackStore:
+    """
+    Stores knowledge packs as `<root>/<package>/<version>.json`.
+
+    Args:
+        root: Directory holding the packs
+    """
+
+    def __init__(self, root: str = DEFAULT_KNOWLEDGE_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+
+    def path_for(self, pkg_path: str, version: str) -> str:
+        safe_pkg = pkg_path.replace(os.sep, "_")
+        return os.path.join(self.root, safe_pkg, f"{version.replace(os.sep, '_')}.json")
+
+    def save(self, pack: KnowledgePack) -> str:
+        """Write a pack atomically and return its path."""
+        path = self.path_for(pack.pkg_path, pack.version)
+        with self._lock:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump(asdict(pack), f, indent=2)
+            os.replace(tmp_path, path)
+        logger.info("Saved knowledge pack for %s %s to %s", pack.pkg_path, pack.version, path)
+        return path
+
+    def load(self, pkg_path: str, version: Optional[str] = None) -> Optional[KnowledgePack]:
+        """Pack for the package's installed version (or `version`), if one was saved."""
+        version = version or package_fingerprint(pkg_path)
+        try:
+            with open(self.path_for(pkg_path, version)) as f:
+                return KnowledgePack(**json.load(f))
+        except (OSError, ValueError, TypeError):
+            return None
+
+    def fingerprint(self, pkg_path: str) -> str:
+        """Token that changes when the installed version or its pack changes."""
+        version = package_fingerprint(pkg_path)
+        try:
+            stat = os.stat(self.path_for(pkg_path, version))
+        except OSError:
+            return f"{version}-none"
+        return f"{version}-{stat.st_mtime_ns}"
+
+    def prune(self, pkg_path: str) -> int:
+        """Delete packs for versions other than the installed one; returns how many."""
+        current = os.path.basename(self.path_for(pkg_path, package_fingerprint(pkg_path)))
+        directory = os.path.dirname(self.path_for(pkg_path, "x"))
+        removed = 0
+        for name in os.listdir(directory) if os.path.isdir(directory) else []:
+            if name.endswith(".json") and name != current:
+                os.unlink(os.path.join(directory, name))
+                removed += 1
+        return removed
+
+
+def snapshot_knowledge_pack(
+    pkg_path: str,
+    help_command: Optional[str] = None,
+    examples: Optional[List[str]] = None,
+    rules: Optional[List[str]] = None,
+    store: Optional["KnowledgePackStore"] = None
+) -> KnowledgePack:
+    """
+    Distill and save a knowledge pack for the installed version of a package.
+
+    Args:
+        pkg_path: Package the agent learned
+        help_command: Introspection command; its (cached) output supplies API signatures
+        examples: Source of examples that ran successfully during the pass
+        rules: STARLOG rules worth carrying over
+        store: Pack store; defaults to the process-wide one
+
+    Returns:
+        The saved KnowledgePack
+    """
+    signatures: List[str] = []
+    if help_command:
+        resource = get_help_cache().preload(pkg_path, help_command)
+        for chunk_path in resource.chunk_paths:
+            with open(chunk_path) as f:
+                signatures.extend(s for s in extract_signatures(f.read()) if s not in signatures)
+
+    pack = KnowledgePack(
+        pkg_path=pkg_path,
+        version=package_fingerprint(pkg_path),
+        api_signatures=signatures,
+        examples=list(examples or []),
+        rules=list(rules or []),
+    )
+    (store or get_knowledge_store()).save(pack)
+    return pack
+
+
+_default_store: Optional[KnowledgePackStore] = None
+_default_store_lock = threading.Lock()
+
+
+def get_knowledge_store() -> KnowledgePackStore:
+    """Return the process-wide knowledge pack store, creating it on first use."""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = KnowledgePackStore(os.environ.get("POWERSET_KNOWLEDGE_DIR", DEFAULT_KNOWLEDGE_DIR))
+        return _default_store
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Manage library knowledge packs")
+    sub = parser.add_subparsers(dest="command", required=True)
+    snapshot = sub.add_parser("snapshot", help="Distill a pack for the installed package version")
+    snapshot.add_argument("pkg_path")
+    snapshot.add_argument("--help-command")
+    snapshot.add_argument("--examples-dir", help="Directory of example .py files that worked")
+    snapshot.add_argument("--rules-file", help="Text file with one rule per line")
+    show = sub.add_parser("show", help="Print the pack for the installed package version")
+    show.add_argument("pkg_path")
+    show.add_argument("--budget", type=int, default=8000)
+    args = parser.parse_args()
+
+    if args.command == "snapshot":
+        examples = []
+        if args.examples_dir:
+            for name in sorted(os.listdir(args.examples_dir)):
+                if name.endswith(".py"):
+                    with open(os.path.join(args.examples_dir, name)) as f:
+                        examples.append(f.read())
+        rules = []
+        if args.rules_file:
+            with open(args.rules_file) as f:
+                rules = [line.strip().lstrip("-* ") for line in f if line.strip()]
+        pack = snapshot_knowledge_pack(args.pkg_path, args.help_command, examples, rules)
+        print(f"Saved {len(pack.api_signatures)} signatures, {len(pack.examples)} examples, "
+              f"{len(pack.rules)} rules for {pack.pkg_path} {pack.version}")
+        return
+
+    pack = get_knowledge_store().load(args.pkg_path)
+    print(pack.render(args.budget) if pack else f"No knowledge pack for the installed {args.pkg_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+"""
+In-process STARLOG/Waypoint MCP servers.
+
+Listing `"inprocess:starlog"` / `"inprocess:waypoint"` in `mcp_servers` serves the
+server's FastMCP app from an event loop inside the agent's own process, so there is no
+interpreter to spawn. HEAVEN connects to it over loopback SSE, since its MCP client
+only speaks the standard transports. Code that talks MCP directly can skip the
+transport as well: `InProcessMcpHost.session()` connects a ClientSession to the
+server over in-memory streams on the caller's event loop.
+
+Every FastMCP app served here, or by a pooled server process, is instrumented: its tool
+handlers run inside a tracing span (`waypoint.step` for the calls that move a waypoint
+journey, `mcp.tool_call` otherwise), whichever client made the call. Waypoint calls also
+drive the curriculum prefetchers of this process, and waypoint loads its curricula from
+the process's CurriculumStore (see prefetch.py). STARLOG writes go through its
+write-behind journals (see journal.py). Prefetchers and journals only have an effect
+for in-process servers, as that is where the agent's prefetchers and journals live.
+
+In-process servers read the process environment on every call, so they serve only the
+environment the process already has: an agent can use `inprocess:starlog` only if its
+heaven_data_dir is the process's HEAVEN_DATA_DIR (checked when the config is validated).
+Agents with their own data dir, such as those in allocated workspaces, use a stdio or
+pooled STARLOG server instead. The host never modifies os.environ.
+"""
+
+import asyncio
+import atexit
+import importlib
+import logging
+import os
+import threading
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+from .mcp_pool import MCP_SERVER_MODULES, WAYPOINT_STEP_TOOLS, free_port
+from .tracing import span
+
+logger = logging.getLogger(__name__)
+
+# Prefix used in BasePowersetAgentConfig.mcp_servers to request an in-process server
+INPROCESS_PREFIX = "inprocess:"
+
+
+def split_inprocess_name(server: str) -> Optional[str]:
+    """Return the server name if `server` requests an in-process MCP server, else None."""
+    if server.startswith(INPROCESS_PREFIX):
+        return server[len(INPROCESS_PREFIX):]
+    return None
+
+
+class _ServerTools:
+    """
+    Calls a FastMCP app's original tool functions; the innermost link of the hook chain.
+
+    The chain carries JSON arguments, as a journal logs and replays them, so they are
+    validated into the function's parameter types here.
+    """
+
+    def __init__(self, tools: Dict[str, Any]):
+        self._tools = {name: (tool.fn, tool.is_async, tool.fn_metadata) for name, tool in tools.items()}
+
+    async def call_tool(self, name: str, arguments: Optional[Dict[str, Any]] = None) -> Any:
+        fn, is_async, fn_metadata = self._tools[name]
+        return await fn_metadata.call_fn_with_arg_validation(fn, is_async, arguments or {}, None)
+
+
+def _trace_calls(server_name: str, session: Any) -> Any:
+    call_tool = session.call_tool
+
+    async def traced_call_tool(name: str, arguments: Optional[Dict[str, Any]] = None) -> Any:
+        if server_name == "waypoint" and name in WAYPOINT_STEP_TOOLS:
+            span_name = "waypoint.step"
+        else:
+            span_name = "mcp.tool_call"
+        with span(span_name, server=server_name, tool=name) as s:
+            starlog_path = (arguments or {}).get("starlog_path")
+            if starlog_path:
+                s.set("starlog_path", starlog_path)
+            result = await call_tool(name, arguments)
+            s.add("output_chars", len(str(result)))
+            return result
+
+    session.call_tool = traced_call_tool
+    return session
+
+
+def check_inprocess_env(server_name: str, env: Dict[str, str]) -> None:
+    """Raise ValueError unless the process environment already provides `env`."""
+    for key, value in env.items():
+        current = os.environ.get(key)
+        if current is None or os.path.realpath(current) != os.path.realpath(value):
+            raise ValueError(
+                f"In-process {server_name} MCP server uses this process's {key} "
+                f"({current if current is not None else 'unset'}), but the agent needs {key}={value}; "
+                f"use '{server_name}' or 'pooled:{server_name}' for agents with their own {key}"
+            )
+
+
+def _hooked(chain: Any, name: str) -> Callable[..., Any]:
+    from pydantic_core import to_jsonable_python
+
+    async def hooked(**arguments: Any) -> Any:
+        return await chain.call_tool(name, to_jsonable_python(arguments))
+    return hooked
+
+
+def instrument_server(server_name: str, app: Any) -> Any:
+    """
+    Route every tool of a FastMCP `app` through the server-side hook chain (idempotent).
+
+    FastMCP validates arguments against the original function's signature and then
+    calls `tool.fn(**arguments)`, so replacing `fn` with an async wrapper keeps
+    validation and result conversion unchanged.
+    """
+    if getattr(app, "_powerset_instrumented", False):
+        return app
+    tools = {tool.name: tool for tool in app._tool_manager.list_tools()}
+    chain: Any = _ServerTools(tools)
+    if server_name == "starlog":
+        from . import journal
+        chain = journal.wrap_session(chain, ack=journal.text_ack)
+    elif server_name == "waypoint":
+        from . import prefetch
+        chain = prefetch.wrap_session(chain)
+    chain = _trace_calls(server_name, chain)
+
+    for name, tool in tools.items():
+        tool.fn = _hooked(chain, name)
+        tool.is_async = True
+    app._powerset_instrumented = True
+    return app
+
+
+def load_fastmcp(server_name: str, module: Optional[str] = None) -> Any:
+    """Import the server's FastMCP instance (named `mcp` or `app`) and instrument it."""
+    module = module or MCP_SERVER_MODULES.get(server_name)
+    if module is None:
+        raise ValueError(f"No MCP server registered for: {server_name}")
+    imported = importlib.import_module(module)
+    if server_name == "waypoint":
+        from . import prefetch
+        prefetch.route_curriculum_loads(imported)
+    app = getattr(imported, "mcp", None) or getattr(imported, "app")
+    return instrument_server(server_name, app)
+
+
+async def _serve(uvicorn_server: Any) -> None:
+    # uvicorn calls sys.exit() when startup fails; a SystemExit escaping a task would
+    # also stop the host's event loop and every other server on it
+    try:
+        await uvicorn_server.serve()
+    except SystemExit as e:
+        raise RuntimeError(f"uvicorn failed to start (exit status {e.code})") from None
+
+
+@dataclass
+class InProcessServer:
+    """A FastMCP app served from the host's event loop."""
+    server_name: str
+    port: int
+    env: Dict[str, str]
+    uvicorn_server: Any
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/sse"
+
+    @property
+    def spec(self) -> Dict[str, Any]:
+        """MCP server spec suitable for HeavenAgentConfig.mcp_servers."""
+        return {"transport": "sse", "url": self.url}
+
+
+class InProcessMcpHost:
+    """
+    Runs MCP servers on one background event loop in the current process.
+
+    Each server name is started at most once and shared by every agent in the process.
+
+    Args:
+        startup_timeout: Seconds to wait for a server to start accepting connections
+    """
+
+    def __init__(self, startup_timeout: float = 15.0):
+        self.startup_timeout = startup_timeout
+        self._servers: Dict[str, InProcessServer] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+            threading.Thread(target=self._loop.run_forever, name="powerset-mcp-inprocess", daemon=True).start()
+        return self._loop
+
+    def start(self, server_name: str, env: Optional[Dict[str, str]] = None) -> InProcessServer:
+        """
+        Start `server_name` (once per process) and return it.
+
+        `env` is what the caller needs the server to see; it must match the process
+        environment (see check_inprocess_env).
+        """
+        if server_name not in MCP_SERVER_MODULES:
+            raise ValueError(f"No MCP server registered for: {server_name}")
+        env = dict(env or {})
+        check_inprocess_env(server_name, env)
+        with self._lock:
+            server = self._servers.get(server_name)
+            if server is not None:
+                return server
+
+            import uvicorn
+
+            with span("mcp.spawn", server=server_name, transport="inprocess"):
+                app = load_fastmcp(server_name).sse_app()
+                port = free_port()
+                uvicorn_server = uvicorn.Server(
+                    uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+                )
+                serving = asyncio.run_coroutine_threadsafe(_serve(uvicorn_server), self._ensure_loop())
+                deadline = time.monotonic() + self.startup_timeout
+                while not uvicorn_server.started:
+                    if serving.done():
+                        # serve() gave up before listening, e.g. because the port was taken
+                        serving.result()
+                        raise RuntimeError(f"In-process MCP server {server_name} stopped before serving on port {port}")
+                    if time.monotonic() > deadline:
+                        uvicorn_server.should_exit = True
+                        raise RuntimeError(f"In-process MCP server {server_name} failed to start on port {port}")
+                    time.sleep(0.01)
+
+            server = self._servers[server_name] = InProcessServer(server_name, port, env, uvicorn_server)
+            logger.info("Serving %s MCP server in-process on port %d", server_name, port)
+            return server
+
+    def spec(self, server_name: str, env: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """Start the server if needed and return its HeavenAgentConfig spec."""
+        return self.start(server_name, env).spec
+
+    @asynccontextmanager
+    async def session(self, server_name: str) -> AsyncIterator[Any]:
+        """
+        ClientSession wired to the server through in-memory streams on the current loop.
+
+        Tool calls go through the POWERSET_CASSETTE record/replay store when one is set.
+        The server side drives curriculum prefetch and the STARLOG journal, as it does
+        for HEAVEN's SSE client.
+        """
+        from mcp.shared.memory import create_connected_server_and_client_session
+
+        from .cassette import get_cassette
+
+        server = load_fastmcp(server_name)
+        async with create_connected_server_and_client_session(server._mcp_server) as client:
+            cassette = get_cassette()
+            if cassette is not None:
+                client = cassette.wrap_session(client, server_name)
+            yield client
+
+    def shutdown(self) -> None:
+        """Stop every server and the host's event loop."""
+        with self._lock:
+            for server in self._servers.values():
+                server.uvicorn_server.should_exit = True
+            self._servers.clear()
+            if self._loop is not None:
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._loop = None
+
+
+_default_host: Optional[InProcessMcpHost] = None
+_default_host_lock = threading.Lock()
+
+
+def get_inprocess_host() -> InProcessMcpHost:
+    """Return the process-wide in-process MCP host, creating it on first use."""
+    global _default_host
+    with _default_host_lock:
+        if _default_host is None:
+            _default_host = InProcessMcpHost()
+            atexit.register(_default_host.shutdown)
+        return _default_host
@@ -0,0 +1,411 @@
+"""Shared pool of long-lived STARLOG/Waypoint MCP servers for powerset agents."""
+
+import atexit
+import logging
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, Iterator, List, Optional, Tuple
+
+from .tracing import span
+
+logger = logging.getLogger(__name__)
+
+# Prefix used in BasePowersetAgentConfig.mcp_servers to request a pooled server
+POOLED_PREFIX = "pooled:"
+
+# Server name -> module exposing a FastMCP instance named `mcp` or `app`
+MCP_SERVER_MODULES: Dict[str, str] = {
+    "starlog": "starlog_mcp.starlog_mcp",
+    "waypoint": "payload_discovery.mcp_server_v2",
+}
+POOLED_SERVER_MODULES = MCP_SERVER_MODULES
+
+# Tools each server exposes. `fly` is the session entry point the agent prompt names.
+STARLOG_TOOLS = frozenset({
+    "fly", "init_project", "check", "orient", "rules", "update_rules", "add_rule", "delete_rule",
+    "view_debug_diary", "update_debug_diary", "view_starlog", "start_starlog", "end_starlog",
+    "retrieve_starlog", "starlog_guide", "query_project_rules", "list_most_recent_projects",
+})
+WAYPOINT_TOOLS = frozenset({
+    "start_waypoint_journey", "navigate_to_next_waypoint", "get_waypoint_progress",
+    "abort_waypoint_journey", "get_current_step_content", "reset_waypoint_journey",
+})
+# STARLOG calls that record facts (journaled write-behind, see journal.py)
+STARLOG_WRITE_TOOLS = frozenset({"update_debug_diary", "add_rule"})
+# Waypoint calls that begin a journey / move to the next step (drive prefetch.py)
+WAYPOINT_START_TOOLS = frozenset({"start_waypoint_journey"})
+WAYPOINT_NEXT_TOOLS = frozenset({"navigate_to_next_waypoint"})
+WAYPOINT_STEP_TOOLS = WAYPOINT_START_TOOLS | WAYPOINT_NEXT_TOOLS
+MCP_SERVER_TOOLS: Dict[str, FrozenSet[str]] = {"starlog": STARLOG_TOOLS, "waypoint": WAYPOINT_TOOLS}
+
+# Directory this package is imported from, so pooled servers can load its instrumentation
+_PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs the module's FastMCP server over SSE on a loopback port instead of stdio, with
+# the same tool instrumentation as in-process servers
+_LAUNCH_SNIPPET = (
+    "import sys; "
+    "from powerset_agents_core.mcp_inprocess import load_fastmcp; "
+    "server = load_fastmcp(sys.argv[3], sys.argv[1]); "
+    "server.settings.host = '127.0.0.1'; "
+    "server.settings.port = int(sys.argv[2]); "
+    "server.run(transport='sse')"
+)
+
+
+def mcp_server_for_tool(tool_name: str) -> Optional[str]:
+    """Name of the STARLOG/Waypoint server that provides `tool_name`, if any."""
+    for server_name, tools in MCP_SERVER_TOOLS.items():
+        if tool_name in tools:
+            return server_name
+    return None
+
+
+def split_pooled_name(server: str) -> Optional[str]:
+    """Return the server name if `server` requests a pooled MCP server, else None."""
+    if server.startswith(POOLED_PREFIX):
+        return server[len(POOLED_PREFIX):]
+    return None
+
+
+def free_port() -> int:
+    """Ask the OS for a free loopback port."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@dataclass
+class McpServerInstance:
+    """A pooled MCP server process (`process` is None while it is being started)."""
+    server_name: str
+    env: Dict[str, str] = field(default_factory=dict)
+    port: int = 0
+    process: Optional[subprocess.Popen] = None
+    leases: int = 0
+    last_used: float = field(default_factory=time.monotonic)
+    ready: threading.Event = field(default_factory=threading.Event)
+    error: Optional[str] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/sse"
+
+    @property
+    def starting(self) -> bool:
+        return not self.ready.is_set()
+
+    def is_healthy(self, timeout: float = 0.5) -> bool:
+        """Check that the process is alive and accepting connections."""
+        if self.process is None or self.process.poll() is not None:
+            return False
+        try:
+            with socket.create_connection(("127.0.0.1", self.port), timeout=timeout):
+                return True
+        except OSError:
+            return False
+
+    def terminate(self, timeout: float = 5.0) -> None:
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+
+@dataclass
+class McpLease:
+    """A lease on a pooled MCP server, held for one isolation key (the STARLOG path)."""
+    server_name: str
+    key: str
+    instance: McpServerInstance
+
+    @property
+    def spec(self) -> Dict[str, Any]:
+        """MCP server spec suitable for HeavenAgentConfig.mcp_servers."""
+        return {"transport": "sse", "url": self.instance.url}
+
+
+class McpServerPool:
+    """
+    Pool of long-lived MCP server processes that agents lease from.
+
+    STARLOG and Waypoint take the session path as an argument on every tool call, so
+    one instance can serve many agents. Instances are shared by every lease that asks
+    for the same extra environment (such as HEAVEN_DATA_DIR); a new instance is started
+    once each compatible one holds `leases_per_instance` leases and there is room under
+    `max_size`. When the pool is full, a free instance started with a different env is
+    retired to make room; failing that, a compatible instance takes the extra lease, or
+    acquire waits up to `acquire_timeout` for a release before giving up.
+
+    Instances start outside the pool lock, so cold starts of different servers or envs
+    overlap; leases that arrive meanwhile for the same env wait for that start instead
+    of spawning their own. Instances idle longer than `idle_timeout` are evicted, and
+    dead or unresponsive instances are replaced on the next acquire.
+
+    Args:
+        max_size: Maximum number of instances per server name
+        idle_timeout: Seconds an unleased instance may stay alive
+        startup_timeout: Seconds to wait for a new instance to accept connections
+        server_env: Default extra environment variables per server name
+        leases_per_instance: Leases an instance takes before another one is started
+        acquire_timeout: Seconds acquire waits for a free slot when the pool is full
+    """
+
+    def __init__(
+        self,
+        max_size: int = 4,
+        idle_timeout: float = 300.0,
+        startup_timeout: float = 15.0,
+        server_env: Optional[Dict[str, Dict[str, str]]] = None,
+        leases_per_instance: int = 8,
+        acquire_timeout: float = 30.0
+    ):
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.startup_timeout = startup_timeout
+        self.server_env = server_env or {"starlog": {"HEAVEN_DATA_DIR": "/tmp/heaven_data"}}
+        self.leases_per_instance = leases_per_instance
+        self.acquire_timeout = acquire_timeout
+        self._instances: Dict[str, List[McpServerInstance]] = {}
+        self._leases: Dict[str, List[McpLease]] = {}
+        self._lock = threading.RLock()
+        self._released = threading.Condition(self._lock)
+
+    def warm_up(self, server_names: Optional[List[str]] = None, count: int = 1) -> None:
+        """Start up to `count` instances of each server ahead of the first lease."""
+        server_names = server_names or list(POOLED_SERVER_MODULES)
+        with span("mcp.warm_up", count=count):
+            with self._lock:
+                pending = []
+                for server_name in server_names:
+                    instances = self._instances.setdefault(server_name, [])
+                    for _ in range(max(0, min(count, self.max_size) - len(instances))):
+                        instance = McpServerInstance(server_name, env=dict(self.server_env.get(server_name, {})))
+                        instances.append(instance)
+                        pending.append(instance)
+            # Launch everything first, then wait, so interpreters boot in parallel
+            launched = [instance for instance in pending if self._launch(instance)]
+            for instance in launched:
+                try:
+                    self._wait_ready(instance)
+                except RuntimeError as e:
+                    logger.warning("%s", e)
+        logger.info("Warmed up MCP pool: %s", self.stats())
+
+    def acquire(
+        self,
+        server_name: str,
+        key: str,
+        env: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None
+    ) -> McpLease:
+        """Lease an instance of `server_name` for isolation key `key`, optionally with extra env."""
+        if server_name not in POOLED_SERVER_MODULES:
+            raise ValueError(f"No pooled MCP server registered for: {server_name}")
+        env = {**self.server_env.get(server_name, {}), **(env or {})}
+        deadline = time.monotonic() + (self.acquire_timeout if timeout is None else timeout)
+        with self._lock:
+            while True:
+                self.evict_idle()
+                instance, created = self._pick(server_name, env)
+                if instance is not None:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise RuntimeError(
+                        f"MCP pool exhausted for {server_name}: {self.max_size} instances all leased"
+                    )
+                self._released.wait(remaining)
+            instance.leases += 1
+            instance.last_used = time.monotonic()
+            lease = McpLease(server_name=server_name, key=key, instance=instance)
+            self._leases.setdefault(key, []).append(lease)
+
+        if created:
+            with span("mcp.spawn", server=server_name):
+                if not self._launch(instance):
+                    raise RuntimeError(instance.error)
+                self._wait_ready(instance)
+        elif not instance.ready.wait(self.startup_timeout) or instance.error:
+            self.release(lease)
+            raise RuntimeError(instance.error or f"Pooled MCP server {server_name} did not start in time")
+        logger.debug("Leased %s on port %d for %s", server_name, instance.port, key)
+        return lease
+
+    def release(self, lease: McpLease) -> None:
+        """Return a lease to the pool."""
+        with self._lock:
+            leases = self._leases.get(lease.key, [])
+            if lease in leases:
+                leases.remove(lease)
+                if not leases:
+                    del self._leases[lease.key]
+                lease.instance.leases = max(0, lease.instance.leases - 1)
+                lease.instance.last_used = time.monotonic()
+                self._released.notify_all()
+
+    def release_all(self, leases: List[McpLease]) -> None:
+        """Return several leases (e.g. everything one agent acquired)."""
+        for lease in leases:
+            self.release(lease)
+
+    def release_key(self, key: str) -> None:
+        """Release every lease held for an isolation key (e.g. when an agent run ends)."""
+        with self._lock:
+            self.release_all(list(self._leases.get(key, [])))
+
+    @contextmanager
+    def lease(self, server_name: str, key: str, env: Optional[Dict[str, str]] = None) -> Iterator[McpLease]:
+        """Context manager form of acquire/release."""
+        lease = self.acquire(server_name, key, env)
+        try:
+            yield lease
+        finally:
+            self.release(lease)
+
+    def health_check(self) -> Dict[str, int]:
+        """Drop dead or unresponsive instances; return the number removed per server."""
+        removed: Dict[str, int] = {}
+        with self._lock:
+            for server_name, instances in self._instances.items():
+                for instance in list(instances):
+                    if not instance.starting and not instance.is_healthy():
+                        self._remove(instance)
+                        removed[server_name] = removed.get(server_name, 0) + 1
+        if removed:
+            logger.warning("Removed unhealthy MCP pool instances: %s", removed)
+        return removed
+
+    def evict_idle(self) -> int:
+        """Terminate unleased instances that have been idle past idle_timeout or died."""
+        now = time.monotonic()
+        evicted = 0
+        with self._lock:
+            for instances in self._instances.values():
+                for instance in list(instances):
+                    if instance.starting:
+                        continue
+                    dead = instance.process is None or instance.process.poll() is not None
+                    idle = instance.leases == 0 and now - instance.last_used > self.idle_timeout
+                    if dead or idle:
+                        self._remove(instance)
+                        evicted += 1
+        return evicted
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Instance and lease counts per server name."""
+        with self._lock:
+            return {
+                server_name: {
+                    "instances": len(instances),
+                    "leased": sum(1 for i in instances if i.leases),
+                    "leases": sum(i.leases for i in instances),
+                }
+                for server_name, instances in self._instances.items()
+            }
+
+    def shutdown(self) -> None:
+        """Terminate every pooled instance."""
+        with self._lock:
+            for instances in self._instances.values():
+                for instance in instances:
+                    instance.terminate()
+            self._instances.clear()
+            self._leases.clear()
+            self._released.notify_all()
+
+    def _pick(self, server_name: str, env: Dict[str, str]) -> Tuple[Optional[McpServerInstance], bool]:
+        """Instance to lease for `env` and whether it is a new one the caller must start."""
+        instances = self._instances.setdefault(server_name, [])
+        compatible = [i for i in instances if i.env == env and i.error is None]
+        shared = min(compatible, key=lambda i: i.leases, default=None)
+        if shared is not None and shared.leases < self.leases_per_instance:
+            return shared, False
+        if len(instances) >= self.max_size:
+            # Make room by retiring a free instance started with a different env
+            spare = self._find(instances, lambda i: i.leases == 0 and i.env != env and not i.starting)
+            if spare is None:
+                return shared, False
+            self._remove(spare)
+        instance = McpServerInstance(server_name, env=dict(env))
+        instances.append(instance)
+        return instance, True
+
+    def _launch(self, instance: McpServerInstance) -> bool:
+        """Start the server process; False (with the instance failed) if it could not be spawned."""
+        module = POOLED_SERVER_MODULES[instance.server_name]
+        instance.port = free_port()
+        try:
+            pythonpath = os.pathsep.join(filter(None, [_PACKAGE_ROOT, instance.env.get("PYTHONPATH"),
+                                                       os.environ.get("PYTHONPATH")]))
+            instance.process = subprocess.Popen(
+                [sys.executable, "-c", _LAUNCH_SNIPPET, module, str(instance.port), instance.server_name],
+                env={**os.environ, **instance.env, "PYTHONPATH": pythonpath},
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL
+            )
+        except OSError as e:
+            self._fail(instance, f"Could not spawn pooled MCP server {instance.server_name}: {e}")
+            return False
+        logger.info("Spawned pooled MCP server %s on port %d", instance.server_name, instance.port)
+        return True
+
+    def _wait_ready(self, instance: McpServerInstance) -> None:
+        """Wait for a launched instance; on failure drop it and fail every lease waiting on it."""
+        deadline = time.monotonic() + self.startup_timeout
+        while time.monotonic() < deadline:
+            if instance.is_healthy(timeout=0.2):
+                instance.ready.set()
+                return
+            if instance.process.poll() is not None:
+                break
+            time.sleep(0.05)
+        self._fail(instance, f"Pooled MCP server {instance.server_name} failed to start on port {instance.port}")
+        raise RuntimeError(instance.error)
+
+    def _fail(self, instance: McpServerInstance, error: str) -> None:
+        """Drop an instance that could not start and wake every lease waiting on it."""
+        instance.error = error
+        with self._lock:
+            if instance in self._instances.get(instance.server_name, []):
+                self._remove(instance)
+            self._released.notify_all()
+        instance.ready.set()
+
+    def _remove(self, instance: McpServerInstance) -> None:
+        instance.terminate()
+        self._instances[instance.server_name].remove(instance)
+        for key in list(self._leases):
+            leases = self._leases[key]
+            leases[:] = [lease for lease in leases if lease.instance is not instance]
+            if not leases:
+                del self._leases[key]
+
+    @staticmethod
+    def _find(instances: List[McpServerInstance], predicate) -> Optional[McpServerInstance]:
+        for instance in instances:
+            if predicate(instance):
+                return instance
+        return None
+
+
+_default_pool: Optional[McpServerPool] = None
+_default_pool_lock = threading.Lock()
+
+
+def get_default_pool() -> McpServerPool:
+    """Return the process-wide MCP server pool, creating it on first use."""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = McpServerPool()
+            atexit.register(_default_pool.shutdown)
+        return _default_pool
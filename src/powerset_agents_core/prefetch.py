@@ -0,0 +1,360 @@
+"""
+Pipelined curriculum traversal: waypoint steps are loaded ahead of the agent.
+
+Normally the agent walks a PayloadDiscovery curriculum one step at a time. On every
+call, waypoint re-reads its saved state, reloads and validates the whole curriculum
+JSON, and serves the next step's inline `content`; the model only starts afterwards.
+WaypointPrefetcher takes that work off the critical path. While the model works on
+step N, a small thread pool revalidates the curriculum through the process's
+CurriculumStore and validates steps N+1..N+depth against the parsed model. The
+in-process waypoint server loads curricula from the same store (see
+`route_curriculum_loads()`), so its reload is a stat check on a model already in
+memory, and the next step is known to be servable before the agent asks for it.
+
+Steps follow waypoint's own order (by `sequence_number`), and the cursor follows
+waypoint's own position: after each journey call it is moved to the step waypoint
+last served, as saved in waypoint's state file. Journeys that resume, restart or were
+already under way therefore stay in step.
+
+Memory stays bounded. Steps up to the cursor are released, and read-ahead stops when
+the loaded steps would exceed `max_bytes`. The next step always loads.
+
+    prefetcher = get_prefetcher(curriculum_path, depth=2, max_bytes=64 * 1024 * 1024)
+    prefetcher.start(starlog_path)      # position from waypoint's state, read ahead
+    step = prefetcher.get()             # next step, waiting only if it is still loading
+    prefetcher.advance()                # waypoint served it: release it, read ahead
+
+Agents built with `PayloadDiscoveryConfig(prefetch_depth=N)` and an in-process waypoint
+server (`"inprocess:waypoint"`) plan a journey in the factory: `plan_journey()` records the
+settings for the agent's STARLOG path. The in-process server runs every tool call,
+whoever the client is, through `wrap_session()`, so HEAVEN's own waypoint calls drive the
+prefetcher of the curriculum the journey names. Stdio and pooled waypoint servers run in
+other processes, where no cursor can follow the journey, so the factory does not
+prefetch for them.
+"""
+
+import asyncio
+import atexit
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from .checkpoint import _piece_id, read_waypoint_state
+from .curriculum import get_curriculum_store
+from .mcp_pool import WAYPOINT_START_TOOLS, WAYPOINT_STEP_TOOLS
+from .tracing import span
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+@dataclass
+class _Step:
+    index: int
+    sequence_number: int
+    waypoint: str
+    size: int
+
+
+@dataclass
+class PrefetchedStep:
+    """One curriculum step, validated against the parsed curriculum and held in memory."""
+    index: int
+    sequence_number: int
+    waypoint: str
+    content: str
+    error: Optional[str] = None
+
+    @property
+    def size(self) -> int:
+        return len(self.content)
+
+
+def curriculum_steps(raw: Dict[str, Any]) -> List[_Step]:
+    """Steps of a curriculum in the order waypoint serves them (by sequence_number)."""
+    pieces: List[Tuple[Any, str]] = [(piece, "") for piece in raw.get("root_files", [])]
+    directories = raw.get("directories", {})
+    if isinstance(directories, dict):
+        pieces.extend((piece, directory) for directory, items in directories.items() for piece in items)
+    pieces = [(piece, directory) for piece, directory in pieces if isinstance(piece, dict)]
+    pieces.sort(key=lambda item: item[0].get("sequence_number", 0))
+    return [
+        _Step(index, piece.get("sequence_number", 0), _piece_id(piece, directory), len(piece.get("content") or ""))
+        for index, (piece, directory) in enumerate(pieces)
+    ]
+
+
+class WaypointPrefetcher:
+    """
+    Loads curriculum steps ahead of the agent on background threads.
+
+    Args:
+        curriculum_path: PayloadDiscovery file the agent walks
+        depth: Steps loaded ahead of the current one
+        max_bytes: Cap on the memory held by loaded steps
+        workers: Loader threads
+    """
+
+    def __init__(
+        self,
+        curriculum_path: str,
+        depth: int = 2,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        workers: int = 2
+    ):
+        store = get_curriculum_store()
+        self.curriculum_path = os.path.abspath(curriculum_path)
+        self.depth = depth
+        self.max_bytes = max_bytes
+        self.content_hash = store.content_hash(self.curriculum_path)
+        self.steps = curriculum_steps(store.load_raw(self.curriculum_path))
+        self.cursor = -1
+        self.hits = 0
+        self.stalls = 0
+        self.stall_seconds = 0.0
+        self._futures: Dict[int, "Future[PrefetchedStep]"] = {}
+        self._reserved: Dict[int, int] = {}
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="powerset-prefetch")
+        self._lock = threading.Lock()
+
+    @property
+    def loaded_bytes(self) -> int:
+        return sum(self._reserved.values())
+
+    def index_of(self, sequence_number: Any) -> Optional[int]:
+        """Step index of a waypoint sequence number, if the curriculum has it."""
+        for step in self.steps:
+            if step.sequence_number == sequence_number:
+                return step.index
+        return None
+
+    def start(self, starlog_path: Optional[str] = None) -> "WaypointPrefetcher":
+        """Position on waypoint's saved step for `starlog_path` (or before the first) and read ahead."""
+        if starlog_path is None or not self.sync(starlog_path):
+            self.advance(-1)
+        return self
+
+    def sync(self, starlog_path: str) -> bool:
+        """Move the cursor to the step waypoint last served for `starlog_path`, if it is in this curriculum."""
+        state = read_waypoint_state(starlog_path)
+        config_path = state.get("config_path")
+        if not isinstance(config_path, str) or os.path.abspath(config_path) != self.curriculum_path:
+            return False
+        index = self.index_of(state.get("last_served_sequence"))
+        if index is None:
+            return False
+        self.advance(index)
+        return True
+
+    def advance(self, index: Optional[int] = None) -> None:
+        """Move the cursor to `index` (default: the next step), release served steps, read ahead."""
+        with self._lock:
+            self.cursor = self.cursor + 1 if index is None else index
+            for old in [i for i in self._futures if i <= self.cursor]:
+                del self._futures[old]
+                self._reserved.pop(old, None)
+            for ahead in range(self.cursor + 1, min(self.cursor + self.depth + 1, len(self.steps))):
+                if ahead in self._futures:
+                    continue
+                estimate = self.steps[ahead].size
+                if ahead > self.cursor + 1 and self.loaded_bytes + estimate > self.max_bytes:
+                    logger.debug("Prefetch of %s stopped at step %d: %d byte cap",
+                                 self.curriculum_path, ahead, self.max_bytes)
+                    break
+                self._reserved[ahead] = estimate
+                self._futures[ahead] = self._pool.submit(self._load, self.steps[ahead])
+
+    def get(self, index: Optional[int] = None) -> PrefetchedStep:
+        """Loaded step `index` (default: the next one), waiting only if it is still loading."""
+        index = self.cursor + 1 if index is None else index
+        with self._lock:
+            future = self._futures.get(index)
+            if future is None:
+                self._reserved[index] = self.steps[index].size
+                future = self._futures[index] = self._pool.submit(self._load, self.steps[index])
+        if future.done():
+            self.hits += 1
+            return future.result()
+        waited = time.perf_counter()
+        step = future.result()
+        self.stalls += 1
+        self.stall_seconds += time.perf_counter() - waited
+        return step
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "steps": len(self.steps),
+            "cursor": self.cursor,
+            "in_flight": len(self._futures),
+            "loaded_bytes": self.loaded_bytes,
+            "hits": self.hits,
+            "stalls": self.stalls,
+            "stall_seconds": round(self.stall_seconds, 4),
+        }
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=False)
+        with self._lock:
+            self._futures.clear()
+            self._reserved.clear()
+
+    def _load(self, step: _Step) -> PrefetchedStep:
+        with span("waypoint.prefetch", waypoint=step.waypoint) as prefetch_span:
+            loaded = PrefetchedStep(step.index, step.sequence_number, step.waypoint, "")
+            try:
+                # Parses only if the file changed, so waypoint's own reload finds the model in memory
+                model = get_curriculum_store().load(self.curriculum_path)
+            except (OSError, ValueError) as e:
+                loaded.error = f"curriculum does not load: {e}"
+            else:
+                pieces = list(model.root_files) + [p for items in model.directories.values() for p in items]
+                piece = next((p for p in pieces if p.sequence_number == step.sequence_number), None)
+                if piece is None:
+                    loaded.error = f"no piece with sequence number {step.sequence_number}"
+                else:
+                    loaded.content = piece.content
+                    if not piece.content.strip():
+                        loaded.error = "piece has no content"
+            if loaded.error:
+                logger.warning("Curriculum step %s of %s: %s", step.waypoint, self.curriculum_path, loaded.error)
+            prefetch_span.add("prefetch_bytes", loaded.size)
+        with self._lock:
+            if step.index in self._reserved:
+                self._reserved[step.index] = loaded.size
+        return loaded
+
+
+_prefetchers: Dict[str, WaypointPrefetcher] = {}
+_prefetchers_lock = threading.Lock()
+
+
+def get_prefetcher(
+    curriculum_path: str,
+    depth: int = 2,
+    max_bytes: int = DEFAULT_MAX_BYTES
+) -> WaypointPrefetcher:
+    """Process-wide prefetcher for a curriculum file, recreated when its settings or contents change."""
+    key = os.path.abspath(curriculum_path)
+    content_hash = get_curriculum_store().content_hash(key)
+    with _prefetchers_lock:
+        prefetcher = _prefetchers.get(key)
+        if prefetcher is not None:
+            if (prefetcher.depth, prefetcher.max_bytes, prefetcher.content_hash) == (depth, max_bytes, content_hash):
+                return prefetcher
+            prefetcher.close()
+        prefetcher = _prefetchers[key] = WaypointPrefetcher(key, depth=depth, max_bytes=max_bytes)
+        return prefetcher
+
+
+def route_curriculum_loads(module: Any) -> None:
+    """
+    Make a waypoint server module load curricula from the process's CurriculumStore (idempotent).
+
+    Waypoint reloads the curriculum on every call. The store revalidates by mtime and
+    content hash, so edits are still picked up, but an unchanged file is not parsed again.
+    """
+    if not hasattr(module, "load_payload_discovery") or getattr(module, "_powerset_routed", False):
+        return
+
+    def load_payload_discovery(config_path: str) -> Any:
+        return get_curriculum_store().load(config_path)
+    module.load_payload_discovery = load_payload_discovery
+    module._powerset_routed = True
+
+
+# Absolute STARLOG path -> (depth, max_bytes) for journeys planned by the factory
+_journey_plans: Dict[str, Tuple[int, int]] = {}
+
+
+def plan_journey(starlog_path: str, depth: int = 2, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+    """
+    Prefetch the curriculum of the journeys started for `starlog_path`.
+
+    The curriculum is taken from the start call itself, so an agent that walks a
+    trimmed resume copy gets a prefetcher for exactly that file. A journey waypoint
+    already has under way for the path is picked up where it stands.
+    """
+    with _prefetchers_lock:
+        _journey_plans[os.path.abspath(starlog_path)] = (depth, max_bytes)
+    config_path = read_waypoint_state(starlog_path).get("config_path")
+    if isinstance(config_path, str) and os.path.isfile(config_path):
+        try:
+            get_prefetcher(config_path, depth=depth, max_bytes=max_bytes).start(starlog_path)
+        except (OSError, ValueError) as e:
+            logger.warning("Could not prefetch curriculum %s: %s", config_path, e)
+
+
+def _find_prefetcher(arguments: Optional[Dict[str, Any]]) -> Optional[WaypointPrefetcher]:
+    """The prefetcher for a curriculum named in tool `arguments`, or the only one running."""
+    with _prefetchers_lock:
+        for value in (arguments or {}).values():
+            if isinstance(value, str) and os.path.abspath(value) in _prefetchers:
+                return _prefetchers[os.path.abspath(value)]
+        return next(iter(_prefetchers.values())) if len(_prefetchers) == 1 else None
+
+
+def _journey_prefetcher(arguments: Dict[str, Any]) -> Optional[WaypointPrefetcher]:
+    """Prefetcher for a journey start: the one planned for its STARLOG path, else any match."""
+    starlog_path, config_path = arguments.get("starlog_path"), arguments.get("config_path")
+    with _prefetchers_lock:
+        plan = _journey_plans.get(os.path.abspath(starlog_path)) if isinstance(starlog_path, str) else None
+    if plan is not None and isinstance(config_path, str):
+        depth, max_bytes = plan
+        try:
+            return get_prefetcher(config_path, depth=depth, max_bytes=max_bytes)
+        except (OSError, ValueError) as e:
+            logger.warning("Could not prefetch curriculum %s: %s", config_path, e)
+            return None
+    return _find_prefetcher(arguments)
+
+
+def wrap_session(session: Any) -> Any:
+    """
+    Drive prefetchers from waypoint tool calls made through `session` (in place).
+
+    `session` is anything with an async `call_tool(name, arguments)`: a ClientSession, or
+    the in-process server's own tool dispatch. Journeys are told apart by their STARLOG
+    path. Before a start or next call, the step waypoint is about to serve is awaited
+    (normally already loaded); after it, the cursor moves to the step waypoint saved as
+    served and the following ones are read ahead while the model works.
+    """
+    call_tool = session.call_tool
+    journeys: Dict[str, WaypointPrefetcher] = {}
+
+    async def pipelined_call_tool(name: str, arguments: Optional[Dict[str, Any]] = None, **kwargs: Any) -> Any:
+        args = arguments or {}
+        starlog_path = args.get("starlog_path")
+        prefetcher = None
+        if isinstance(starlog_path, str) and name in WAYPOINT_STEP_TOOLS:
+            key = os.path.abspath(starlog_path)
+            if name in WAYPOINT_START_TOOLS:
+                prefetcher = _journey_prefetcher(args)
+                if prefetcher is not None:
+                    journeys[key] = prefetcher
+                    prefetcher.start()
+            else:
+                prefetcher = journeys.get(key)
+            if prefetcher is not None and prefetcher.cursor + 1 < len(prefetcher.steps):
+                await asyncio.to_thread(prefetcher.get)
+        result = await call_tool(name, arguments, **kwargs)
+        if prefetcher is not None:
+            prefetcher.sync(starlog_path)
+        return result
+    session.call_tool = pipelined_call_tool
+    return session
+
+
+def _close_all() -> None:
+    with _prefetchers_lock:
+        for prefetcher in _prefetchers.values():
+            prefetcher.close()
+        _prefetchers.clear()
+        _journey_plans.clear()
+
+
+atexit.register(_close_all)
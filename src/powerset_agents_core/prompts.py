@@ -0,0 +1,204 @@
+"""System prompt templates for library powerset agents, rendered once per distinct set of fields."""
+
+from functools import lru_cache
+from typing import NamedTuple, Optional, Union
+
+
+class RenderedPrompt(NamedTuple):
+    """A rendered system prompt split into its cacheable prefix and per-agent suffix."""
+    prefix: str
+    suffix: str
+
+    @property
+    def text(self) -> str:
+        return self.prefix + self.suffix
+
+
+# Original layout: agent-specific values are interleaved from the first line on
+def _render_legacy(
+    name: str,
+    pkg_path: str,
+    help_reference: str,
+    instructions: str,
+    starlog_path: str,
+    workspace_path: str,
+    curriculum_path: str,
+    knowledge_pack: bool
+) -> str:
+    if knowledge_pack:
+        learn_step = (f"2. Use the knowledge pack: It replaces the curriculum walk; only open waypoint "
+                      f"with {curriculum_path} for what the pack does not cover")
+        learn_sentence = "work from the knowledge pack"
+    else:
+        learn_step = f"2. Learn library: Use waypoint with {curriculum_path}"
+        learn_sentence = "use the library learning PD in waypoint"
+    return f"""You are {name}, a specialized library learning agent.
+
+Your mission: Learn the {pkg_path} library and complete user requests. {help_reference}
+
+CURRICULUM: {instructions}
+
+CAPABILITIES:
+- STARLOG MCP: Session management and progress tracking
+- Waypoint MCP: Navigate through structured learning sequences  
+- NetworkEditTool: Read, write, and edit files
+- BashTool: Run commands, test code, explore the library
+
+CRITICAL DIRECTORY SEPARATION:
+- WORKING DIRECTORY: Use current directory for all file operations (reading user files, writing code)
+- STARLOG DIRECTORY: ALWAYS use "{starlog_path}" for ALL STARLOG commands
+
+STARLOG PATH RULE: For ALL STARLOG commands, ALWAYS use path="{starlog_path}":
+- fly("{starlog_path}")
+- check("{starlog_path}")  
+- start_starlog(..., path="{starlog_path}")
+- update_debug_diary(..., path="{starlog_path}")
+- add_rule(..., path="{starlog_path}")
+- All other STARLOG commands
+
+WORKFLOW:
+1. Start session: Use fly("{starlog_path}") to initialize your STARLOG session journey
+{learn_step}
+3. Complete request: Follow user's request using your library knowledge (work in current directory)
+4. Upload project: Use waypoint with /tmp/github_update_protocol.json to create and upload to GitHub
+
+WORKSPACE: {workspace_path}
+
+Your main workflow is to use starlog.fly("{starlog_path}") then follow instructions to begin the session. Once session is confirmed started by STARLOG, {learn_sentence}. Then, proceed as necessary to complete user request. Once you are done, use waypoint with github_update_protocol.
+
+Begin by calling fly("{starlog_path}") to start your session."""
+
+
+# Pinned layout: everything agent-independent comes first so it is byte-identical across
+# agents and provider-side prompt caches can hit on it
+_PINNED_PROMPT_TEMPLATE = """You are a specialized library learning agent. Your name, target library, curriculum and paths are listed under AGENT CONFIGURATION at the end of this prompt.
+
+Your mission: Learn the target library and complete user requests. Use the HELP entry to introspect the library.
+
+CAPABILITIES:
+- STARLOG MCP: Session management and progress tracking
+- Waypoint MCP: Navigate through structured learning sequences
+- NetworkEditTool: Read, write, and edit files
+- BashTool: Run commands, test code, explore the library
+
+CRITICAL DIRECTORY SEPARATION:
+- WORKING DIRECTORY: Use current directory for all file operations (reading user files, writing code)
+- STARLOG DIRECTORY: ALWAYS use STARLOG_PATH for ALL STARLOG commands
+
+STARLOG PATH RULE: For ALL STARLOG commands, ALWAYS pass path=STARLOG_PATH:
+- fly(STARLOG_PATH)
+- check(STARLOG_PATH)
+- start_starlog(..., path=STARLOG_PATH)
+- update_debug_diary(..., path=STARLOG_PATH)
+- add_rule(..., path=STARLOG_PATH)
+- All other STARLOG commands
+
+WORKFLOW:
+1. Start session: Use fly(STARLOG_PATH) to initialize your STARLOG session journey
+{learn_step}
+3. Complete request: Follow user's request using your library knowledge (work in current directory)
+4. Upload project: Use waypoint with /tmp/github_update_protocol.json to create and upload to GitHub
+
+Your main workflow is to use starlog.fly(STARLOG_PATH) then follow instructions to begin the session. Once session is confirmed started by STARLOG, {learn_sentence}. Then, proceed as necessary to complete user request. Once you are done, use waypoint with github_update_protocol.
+
+"""
+PINNED_PROMPT_PREFIX = _PINNED_PROMPT_TEMPLATE.format(
+    learn_step="2. Learn library: Use waypoint with CURRICULUM_PATH",
+    learn_sentence="use the library learning PD in waypoint",
+)
+# Same layout for agents whose CURRICULUM carries a knowledge pack instead of the walk
+PINNED_KNOWLEDGE_PACK_PREFIX = _PINNED_PROMPT_TEMPLATE.format(
+    learn_step=("2. Use the knowledge pack: It replaces the curriculum walk; only open waypoint "
+                "with CURRICULUM_PATH for what the pack does not cover"),
+    learn_sentence="work from the knowledge pack",
+)
+
+
+def _render_pinned_suffix(
+    name: str,
+    pkg_path: str,
+    help_reference: str,
+    instructions: str,
+    starlog_path: str,
+    workspace_path: str,
+    curriculum_path: str
+) -> str:
+    return f"""AGENT CONFIGURATION:
+NAME: {name}
+LIBRARY: {pkg_path}
+HELP: {help_reference}
+CURRICULUM: {instructions}
+CURRICULUM_PATH: {curriculum_path}
+STARLOG_PATH: "{starlog_path}"
+WORKSPACE: {workspace_path}
+
+Begin by calling fly("{starlog_path}") to start your session."""
+
+
+def _help_reference(help_command: str, help_index_path: Optional[str]) -> str:
+    if help_index_path:
+        return (
+            f"The output of the `help command` (`{help_command}`) is preloaded: read {help_index_path} "
+            "for the chunk index and open only the chunks you need with NetworkEditTool instead of running it."
+        )
+    return f"The `help command` for this library is: `{help_command}`."
+
+
+@lru_cache(maxsize=1024)
+def render_library_learning_prompt(
+    name: str,
+    pkg_path: str,
+    help_command: str,
+    instructions: str,
+    starlog_path: str,
+    workspace_path: str,
+    curriculum_path: str,
+    pin_prefix: bool = False,
+    help_index_path: Optional[str] = None,
+    knowledge_pack: bool = False
+) -> RenderedPrompt:
+    """
+    Render the library learning system prompt, caching on every field that affects it.
+
+    Rendering itself is a plain f-string; repeated agents are served from the LRU cache.
+
+    Args:
+        name: Agent name
+        pkg_path: Library to learn
+        help_command: Command to introspect the library
+        instructions: Curriculum instructions
+        starlog_path: STARLOG session path
+        workspace_path: Workspace directory
+        curriculum_path: PayloadDiscovery file the agent walks with waypoint
+        pin_prefix: Use the layout with a stable, agent-independent prefix
+        help_index_path: Index of preloaded help output; replaces the live help command
+        knowledge_pack: `instructions` include a knowledge pack, so the workflow points the
+            agent at the pack instead of the curriculum walk
+
+    Returns:
+        RenderedPrompt; with pin_prefix the prefix is PINNED_PROMPT_PREFIX (or
+        PINNED_KNOWLEDGE_PACK_PREFIX), otherwise the whole prompt is in the suffix
+    """
+    fields = dict(
+        name=name,
+        pkg_path=pkg_path,
+        help_reference=_help_reference(help_command, help_index_path),
+        instructions=instructions,
+        starlog_path=starlog_path,
+        workspace_path=workspace_path,
+        curriculum_path=curriculum_path
+    )
+    if not pin_prefix:
+        return RenderedPrompt("", _render_legacy(**fields, knowledge_pack=knowledge_pack))
+    # The knowledge pack only changes the pinned prefix; the suffix is the same either way
+    prefix = PINNED_KNOWLEDGE_PACK_PREFIX if knowledge_pack else PINNED_PROMPT_PREFIX
+    return RenderedPrompt(prefix, _render_pinned_suffix(**fields))
+
+
+def stable_prefix_of(prompt: Union[str, RenderedPrompt]) -> str:
+    """Return the pinned prefix of a prompt, or "" if it was not rendered with pin_prefix."""
+    text = prompt.text if isinstance(prompt, RenderedPrompt) else prompt
+    for prefix in (PINNED_PROMPT_PREFIX, PINNED_KNOWLEDGE_PACK_PREFIX):
+        if text.startswith(prefix):
+            return prefix
+    return ""
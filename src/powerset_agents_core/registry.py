@@ -0,0 +1,152 @@
+"""
+Declarative registry of library agents.
+
+Agents are described in a JSON (or TOML) catalog instead of one package per library:
+
+    {"agents": {"metastack": {
+        "name": "MetaStackPowersetAgent",
+        "pkg_path": "pydantic_stack_core",
+        "help_command": "python -c 'import pydantic_stack_core; help(pydantic_stack_core)'",
+        "payload_discovery_config": {"path": "...", "instructions": "..."},
+        "starlog_path": "/tmp/metastack_agent_starlog",
+        "aliases": ["pydantic_stack_core"]
+    }}}
+
+Entries hold create_library_powerset_agent keyword arguments plus optional `aliases`
+and a CLI `tagline`. The bundled catalog (agents.json) is loaded first, then any
+catalogs listed in POWERSET_AGENT_CATALOG (os.pathsep-separated), whose entries
+override bundled ones of the same name. Catalogs are compiled once into a name/alias
+index; configs are only built when an agent is requested.
+"""
+
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+if TYPE_CHECKING:
+    from heaven_base.baseheavenagent import HeavenAgentConfig
+    from .workspace import AgentWorkspace
+
+BUNDLED_CATALOG = os.path.join(os.path.dirname(__file__), "agents.json")
+
+
+@dataclass(frozen=True)
+class AgentSpec:
+    """One catalog entry."""
+    key: str
+    fields: Dict[str, Any]
+    aliases: List[str] = field(default_factory=list)
+    tagline: Optional[str] = None
+    source: Optional[str] = None
+
+    @property
+    def name(self) -> str:
+        return self.fields.get("name", self.key)
+
+
+def _read_catalog(path: str) -> Dict[str, Any]:
+    if path.endswith(".toml"):
+        try:
+            import tomllib
+        except ImportError:  # Python < 3.11
+            import tomli as tomllib
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+    with open(path) as f:
+        return json.load(f)
+
+
+class AgentRegistry:
+    """
+    Indexed, in-memory table of agent specs.
+
+    Lookups by key or alias are single dict accesses (case-insensitive). Nothing is
+    imported and no config is built until `create()` is called.
+    """
+
+    def __init__(self):
+        self._specs: Dict[str, AgentSpec] = {}
+        self._index: Dict[str, AgentSpec] = {}
+
+    @classmethod
+    def from_files(cls, paths: List[str]) -> "AgentRegistry":
+        registry = cls()
+        for path in paths:
+            registry.load(path)
+        return registry
+
+    def load(self, path: str) -> None:
+        """Add (or override) every agent in a catalog file."""
+        for key, entry in _read_catalog(path).get("agents", {}).items():
+            entry = dict(entry)
+            self.register(AgentSpec(
+                key=key,
+                aliases=list(entry.pop("aliases", [])),
+                tagline=entry.pop("tagline", None),
+                fields=entry,
+                source=path,
+            ))
+
+    def register(self, spec: AgentSpec) -> None:
+        previous = self._specs.get(spec.key)
+        if previous is not None:
+            for alias in [previous.key, *previous.aliases]:
+                self._index.pop(alias.lower(), None)
+        self._specs[spec.key] = spec
+        for alias in [spec.key, *spec.aliases]:
+            self._index[alias.lower()] = spec
+
+    def get(self, name: str) -> AgentSpec:
+        spec = self._index.get(name.lower())
+        if spec is None:
+            raise KeyError(f"Unknown agent: {name} (known: {', '.join(sorted(self._specs))})")
+        return spec
+
+    def __contains__(self, name: str) -> bool:
+        return name.lower() in self._index
+
+    def names(self) -> List[str]:
+        return sorted(self._specs)
+
+    def create(
+        self,
+        name: str,
+        workspace: Optional["AgentWorkspace"] = None,
+        **overrides: Any
+    ) -> "HeavenAgentConfig":
+        """
+        Build the HeavenAgentConfig for a registered agent.
+
+        Args:
+            name: Catalog key or alias
+            workspace: Isolated directory tree; overrides the catalog's session paths
+            **overrides: Any other create_library_powerset_agent arguments
+
+        Returns:
+            HeavenAgentConfig from create_library_powerset_agent
+        """
+        from .config import PayloadDiscoveryConfig
+        from .factory import create_library_powerset_agent
+
+        kwargs = {"workspace_path": "/tmp", **self.get(name).fields, **overrides}
+        if workspace is not None:
+            kwargs.update(workspace.config_fields())
+        if isinstance(kwargs.get("payload_discovery_config"), dict):
+            kwargs["payload_discovery_config"] = PayloadDiscoveryConfig(**kwargs["payload_discovery_config"])
+        return create_library_powerset_agent(**kwargs)
+
+
+_registry: Optional[AgentRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> AgentRegistry:
+    """Return the process-wide agent registry, compiling the catalogs on first use."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            extra = [p for p in os.environ.get("POWERSET_AGENT_CATALOG", "").split(os.pathsep) if p]
+            _registry = AgentRegistry.from_files([BUNDLED_CATALOG, *extra])
+        return _registry
@@ -0,0 +1,369 @@
+"""
+Model -> provider routing table and latency-aware selection among equivalent models.
+
+The routing table is declarative:
+
+    {
+        "exact":    {"gpt-5-mini": "openai"},
+        "prefixes": {"claude-": "anthropic"},
+        "contains": [["llama", "groq"]],
+        "aliases":  {"default": "gpt-5-mini"},
+        "groups":   {"fast": ["gpt-5-mini", "claude-haiku-4-5"]},
+        "default":  "openai"
+    }
+
+Lookups try exact names, then the longest matching prefix, then substring rules in
+order, then `default` (set it to null to make unknown models an error). Aliases and
+groups are resolved to a concrete model first; a group resolves to its first member
+unless a LatencyAwareRouter picks among its members.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+STUB_PROVIDER = "stub"
+
+DEFAULT_ROUTES: Dict[str, Any] = {
+    "exact": {
+        STUB_PROVIDER: STUB_PROVIDER,
+    },
+    "prefixes": {
+        "gpt-": "openai",
+        "o1": "openai",
+        "o3": "openai",
+        "o4-": "openai",
+        "claude-": "anthropic",
+        "gemini-": "google",
+        "chat-bison": "google",
+        "llama": "groq",
+        "mixtral": "groq",
+        "deepseek": "deepseek",
+        "stub-": STUB_PROVIDER,
+    },
+    # Substring rules in priority order; keeps names like "openai/gpt-4o" routing as before
+    "contains": [
+        ["gpt", "openai"],
+        ["claude", "anthropic"],
+        ["gemini", "google"],
+        ["bison", "google"],
+        ["llama", "groq"],
+        ["mixtral", "groq"],
+        ["deepseek", "deepseek"],
+    ],
+    "aliases": {},
+    "groups": {},
+    "default": "openai",
+}
+
+
+class UnknownModelError(ValueError):
+    """Raised for a model no routing rule matches when the table has no default."""
+
+
+class RouteTable:
+    """
+    Precompiled routing table.
+
+    Prefix rules are compiled into one anchored regex (longest prefix first), alias
+    chains are flattened at load time, and every lookup result is memoized, so repeated
+    lookups cost a single dict access.
+
+    Args:
+        routes: Declarative table (see module docstring); missing sections are empty
+    """
+
+    def __init__(self, routes: Dict[str, Any]):
+        self.exact: Dict[str, str] = {k.lower(): v for k, v in routes.get("exact", {}).items()}
+        self.prefixes: Dict[str, str] = {k.lower(): v for k, v in routes.get("prefixes", {}).items()}
+        self.contains: List[Tuple[str, str]] = [(k.lower(), v) for k, v in routes.get("contains", [])]
+        self.groups: Dict[str, List[str]] = {k: list(v) for k, v in routes.get("groups", {}).items()}
+        self.default: Optional[str] = routes.get("default")
+        self.aliases = self._flatten_aliases(routes.get("aliases", {}))
+
+        for name, members in self.groups.items():
+            if not members:
+                raise ValueError(f"Model group {name!r} is empty")
+
+        ordered = sorted(self.prefixes, key=len, reverse=True)
+        self._prefix_re = re.compile("|".join(re.escape(p) for p in ordered)) if ordered else None
+        self._providers: Dict[str, str] = {}
+
+    @classmethod
+    def from_file(cls, path: str) -> "RouteTable":
+        """Load a JSON routing table."""
+        with open(path) as f:
+            return cls(json.load(f))
+
+    @staticmethod
+    def _flatten_aliases(aliases: Dict[str, str]) -> Dict[str, str]:
+        flat = {}
+        for alias in aliases:
+            target, seen = alias, set()
+            while target in aliases:
+                if target in seen:
+                    raise ValueError(f"Alias cycle through {alias!r}")
+                seen.add(target)
+                target = aliases[target]
+            flat[alias] = target
+        return flat
+
+    def resolve(self, model: str) -> str:
+        """Concrete model name for a model, alias or group (a group yields its first member)."""
+        model = self.aliases.get(model, model)
+        members = self.groups.get(model)
+        return self.aliases.get(members[0], members[0]) if members else model
+
+    def candidates(self, model: str) -> List[str]:
+        """Interchangeable concrete models for a model, alias or group."""
+        model = self.aliases.get(model, model)
+        members = self.groups.get(model)
+        if members:
+            return [self.aliases.get(m, m) for m in members]
+        for members in self.groups.values():
+            if model in members:
+                return [self.aliases.get(m, m) for m in members]
+        return [model]
+
+    def provider_for(self, model: str) -> str:
+        """Provider key (e.g. 'openai') for a model, alias or group."""
+        provider = self._providers.get(model)
+        if provider is None:
+            provider = self._lookup(self.resolve(model))
+            self._providers[model] = provider
+        return provider
+
+    def _lookup(self, model: str) -> str:
+        name = model.lower()
+        provider = self.exact.get(name)
+        if provider is not None:
+            return provider
+        if self._prefix_re is not None:
+            match = self._prefix_re.match(name)
+            if match:
+                return self.prefixes[match.group(0)]
+        for needle, provider in self.contains:
+            if needle in name:
+                return provider
+        if self.default is None:
+            raise UnknownModelError(f"No route for model {model!r}")
+        logger.warning("Unknown model %s, defaulting to %s provider", model, self.default)
+        return self.default
+
+
+_route_table: Optional[RouteTable] = None
+_route_table_lock = threading.Lock()
+
+
+def get_route_table() -> RouteTable:
+    """Return the process-wide routing table, loaded from POWERSET_ROUTES (JSON) if set."""
+    global _route_table
+    if _route_table is None:
+        with _route_table_lock:
+            if _route_table is None:
+                path = os.environ.get("POWERSET_ROUTES")
+                _route_table = RouteTable.from_file(path) if path else RouteTable(DEFAULT_ROUTES)
+    return _route_table
+
+
+def set_route_table(table: RouteTable) -> None:
+    """Replace the process-wide routing table."""
+    global _route_table
+    with _route_table_lock:
+        _route_table = table
+
+
+@dataclass
+class ModelStats:
+    """Rolling latency/error window and quota for one model."""
+    latencies: Deque[float] = field(default_factory=lambda: deque(maxlen=200))
+    outcomes: Deque[bool] = field(default_factory=lambda: deque(maxlen=200))
+    quota_remaining: Optional[int] = None
+    quota_reset_at: Optional[float] = None  # None: exhausted quota never resets on its own
+
+    def percentile(self, q: float) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    @property
+    def error_rate(self) -> float:
+        return self.outcomes.count(False) / len(self.outcomes) if self.outcomes else 0.0
+
+    def has_quota(self, now: float) -> bool:
+        if self.quota_remaining is None or self.quota_remaining > 0:
+            return True
+        return self.quota_reset_at is not None and now >= self.quota_reset_at
+
+
+class LatencyAwareRouter:
+    """
+    Picks among equivalent models by observed latency, error rate and remaining quota.
+
+    Candidates come from the routing table's groups: routing "fast", or any member of
+    the "fast" group, chooses among all of its members. Each candidate is scored as
+    `p50 + p95_weight * p95`, inflated by its recent error rate; models with too many
+    recent errors or no remaining quota are skipped while any alternative is available.
+    Models with fewer than `min_samples` observations are tried first so every
+    candidate gets measured.
+
+    Args:
+        table: Routing table; defaults to the process-wide one
+        window: Calls remembered per model
+        p95_weight: Weight of tail latency in the score
+        error_penalty: Score multiplier per unit of error rate
+        max_error_rate: Error rate above which a model is avoided
+        min_samples: Observations before a model's latency is trusted
+    """
+
+    def __init__(
+        self,
+        table: Optional[RouteTable] = None,
+        window: int = 200,
+        p95_weight: float = 0.5,
+        error_penalty: float = 4.0,
+        max_error_rate: float = 0.5,
+        min_samples: int = 3
+    ):
+        self.table = table or get_route_table()
+        self.window = window
+        self.p95_weight = p95_weight
+        self.error_penalty = error_penalty
+        self.max_error_rate = max_error_rate
+        self.min_samples = min_samples
+        self._stats: Dict[str, ModelStats] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, model: str) -> ModelStats:
+        stats = self._stats.get(model)
+        if stats is None:
+            stats = self._stats[model] = ModelStats(
+                latencies=deque(maxlen=self.window), outcomes=deque(maxlen=self.window)
+            )
+        return stats
+
+    def choose(self, model: str) -> str:
+        """Best concrete model to call for `model` (a model, alias or group) right now."""
+        candidates = self.table.candidates(model)
+        if len(candidates) == 1:
+            return candidates[0]
+
+        now = time.time()
+        with self._lock:
+            scored = []
+            for position, candidate in enumerate(candidates):
+                stats = self._get(candidate)
+                available = stats.has_quota(now) and stats.error_rate <= self.max_error_rate
+                if len(stats.latencies) < self.min_samples:
+                    score = -1.0  # explore unmeasured models first
+                else:
+                    score = (stats.percentile(0.5) + self.p95_weight * stats.percentile(0.95)) \
+                        * (1 + self.error_penalty * stats.error_rate)
+                scored.append((not available, score, position, candidate))
+        return min(scored)[3]
+
+    def record(self, model: str, latency: float, ok: bool = True) -> None:
+        """Record one call's outcome."""
+        with self._lock:
+            stats = self._get(model)
+            stats.outcomes.append(ok)
+            if ok:
+                stats.latencies.append(latency)
+                if stats.quota_remaining:
+                    stats.quota_remaining -= 1
+
+    def set_quota(self, model: str, remaining: int, reset_at: Optional[float] = None) -> None:
+        """
+        Update remaining quota, e.g. from provider rate-limit headers.
+
+        `reset_at` is the epoch time the quota refills; without one an exhausted model
+        stays unavailable until the next set_quota().
+        """
+        with self._lock:
+            stats = self._get(model)
+            stats.quota_remaining = remaining
+            stats.quota_reset_at = reset_at
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """p50/p95 latency, error rate, sample count and quota per model."""
+        with self._lock:
+            return {
+                model: {
+                    "p50": stats.percentile(0.5),
+                    "p95": stats.percentile(0.95),
+                    "error_rate": stats.error_rate,
+                    "samples": len(stats.outcomes),
+                    "quota_remaining": stats.quota_remaining,
+                }
+                for model, stats in self._stats.items()
+            }
+
+
+class StubProvider:
+    """
+    Local stand-in for an LLM provider, usable as an AgentRunner executor.
+
+    Returns a canned completion after a simulated latency and fails a configurable
+    fraction of calls, so routing, retries and rate limiting can be exercised offline.
+
+    Args:
+        latency: Mean simulated latency in seconds
+        jitter: Uniform +/- jitter added to the latency
+        error_rate: Fraction of calls that raise RuntimeError
+        response: Completion text; '{prompt}' and '{model}' are substituted
+        seed: Seed for reproducible latencies and failures
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        response: str = "stub response from {model} to: {prompt}",
+        seed: Optional[int] = None
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.response = response
+        self.calls = 0
+        self._random = random.Random(seed)
+
+    async def __call__(self, prompt: str, agent_config: Any) -> Dict[str, Any]:
+        self.calls += 1
+        delay = max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+        if delay:
+            await asyncio.sleep(delay)
+        if self._random.random() < self.error_rate:
+            raise RuntimeError("stub provider error")
+        model = getattr(agent_config, "model", STUB_PROVIDER)
+        content = self.response.replace("{prompt}", prompt).replace("{model}", model)
+        return {
+            "model": model,
+            "content": content,
+            "usage": {"input_tokens": len(prompt.split()), "output_tokens": len(content.split())},
+        }
+
+    async def stream(self, prompt: str, agent_config: Any) -> AsyncIterator[str]:
+        """Streaming form of a call: the completion word by word, with the latency spread across it."""
+        self.calls += 1
+        delay = max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+        if self._random.random() < self.error_rate:
+            raise RuntimeError("stub provider error")
+        model = getattr(agent_config, "model", STUB_PROVIDER)
+        words = self.response.replace("{prompt}", prompt).replace("{model}", model).split(" ")
+        for number, word in enumerate(words):
+            if delay:
+                await asyncio.sleep(delay / len(words))
+            yield word if number == 0 else f" {word}"
@@ -0,0 +1,272 @@
+"""Async runner for pushing many prompts through powerset agent configs."""
+
+import asyncio
+import copy
+import logging
+import time
+from dataclasses import dataclass
+from typing import (
+    TYPE_CHECKING, Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Dict, Iterable,
+    Optional, Set, Tuple, Union
+)
+
+from .cassette import Cassette, get_cassette
+from .factory import _get_provider_for_model
+from .routing import STUB_PROVIDER, LatencyAwareRouter, StubProvider, get_route_table
+from .tracing import span
+
+if TYPE_CHECKING:
+    from heaven_base.baseheavenagent import HeavenAgentConfig
+
+logger = logging.getLogger(__name__)
+
+# (prompt, agent_config) -> result
+PromptExecutor = Callable[[str, "HeavenAgentConfig"], Awaitable[Any]]
+PromptSource = Union[AsyncIterable[str], Iterable[str]]
+
+
+@dataclass
+class RunResult:
+    """Outcome of running one prompt."""
+    index: int
+    prompt: str
+    result: Any = None
+    error: Optional[BaseException] = None
+    attempts: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class RateLimiter:
+    """
+    Async token bucket limiting calls to `rate` per second with bursts up to `burst`.
+    """
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def acquire(self) -> None:
+        # Limiters outlive event loops (one per asyncio.run), so bind the lock per loop
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock, self._lock_loop = asyncio.Lock(), loop
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+# Limiters are shared per (provider, rate) so every runner in the process draws from one bucket
+_rate_limiters: Dict[Tuple[str, float], RateLimiter] = {}
+
+
+def get_rate_limiter(provider: str, rate: float) -> RateLimiter:
+    """Return the process-wide rate limiter for a provider."""
+    key = (provider, rate)
+    if key not in _rate_limiters:
+        _rate_limiters[key] = RateLimiter(rate)
+    return _rate_limiters[key]
+
+
+def _provider_key(model: str) -> str:
+    return get_route_table().provider_for(model)
+
+
+async def _exec_completion(prompt: str, agent_config: "HeavenAgentConfig") -> Any:
+    from heaven_base.tool_utils.completion_runners import exec_completion_style
+    return await exec_completion_style(prompt=prompt, agent=agent_config)
+
+
+async def _iterate(prompts: PromptSource) -> AsyncIterator[str]:
+    if hasattr(prompts, "__aiter__"):
+        async for prompt in prompts:
+            yield prompt
+    else:
+        for prompt in prompts:
+            yield prompt
+
+
+class AgentRunner:
+    """
+    Runs prompts against one HeavenAgentConfig with bounded concurrency.
+
+    Prompts are pulled from the source only when a concurrency slot is free, so a slow
+    consumer of results also slows intake (backpressure). Each call waits on the
+    provider's rate limiter, is retried with exponential backoff on failure, and is
+    cancelled if the consumer stops iterating.
+
+    Args:
+        agent_config: HeavenAgentConfig from the factory
+        concurrency: Maximum prompts in flight
+        rate_limits: Requests per second per provider (e.g. {"openai": 5.0}); the provider
+            is chosen by the factory's model mapping
+        max_retries: Retries per prompt after the first attempt
+        retry_backoff: Base delay in seconds, doubled on each retry
+        timeout: Optional per-attempt timeout in seconds
+        executor: Coroutine function (prompt, agent_config) -> result; defaults to
+            HEAVEN's exec_completion_style, or a StubProvider for 'stub' models
+        provider: Provider key for rate limiting; derived from the model if omitted
+        router: LatencyAwareRouter choosing, per attempt, among the models grouped with
+            the agent's model in the routing table (failed attempts move to other models)
+        cassette: Record/replay store for completions; defaults to the one configured by
+            POWERSET_CASSETTE, if any
+
+    Example:
+        >>> runner = AgentRunner(create_metastack_agent(), concurrency=8, rate_limits={"openai": 5})
+        >>> async for result in runner.run(prompts):
+        ...     print(result.index, result.ok)
+    """
+
+    def __init__(
+        self,
+        agent_config: "HeavenAgentConfig",
+        concurrency: int = 4,
+        rate_limits: Optional[Dict[str, float]] = None,
+        max_retries: int = 2,
+        retry_backoff: float = 1.0,
+        timeout: Optional[float] = None,
+        executor: Optional[PromptExecutor] = None,
+        provider: Optional[str] = None,
+        router: Optional[LatencyAwareRouter] = None,
+        cassette: Optional[Cassette] = None
+    ):
+        self.agent_config = agent_config
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.timeout = timeout
+        self.router = router
+        self.rate_limits = rate_limits or {}
+
+        self.provider = provider or _provider_key(agent_config.model)
+        if executor is None:
+            executor = StubProvider() if self.provider == STUB_PROVIDER else _exec_completion
+        self.cassette = cassette or get_cassette()
+        if self.cassette is not None:
+            executor = self.cassette.wrap_executor(executor)
+        self.executor = executor
+        rate = self.rate_limits.get(self.provider)
+        self.rate_limiter = get_rate_limiter(self.provider, rate) if rate else None
+        self._routed_configs: Dict[str, "HeavenAgentConfig"] = {}
+
+    def _route(self) -> Tuple["HeavenAgentConfig", str, Optional[RateLimiter]]:
+        """Agent config, provider and rate limiter for the router's current pick."""
+        model = self.router.choose(self.agent_config.model)
+        if model == self.agent_config.model:
+            return self.agent_config, self.provider, self.rate_limiter
+        routed = self._routed_configs.get(model)
+        if routed is None:
+            routed = copy.copy(self.agent_config)
+            routed.model = model
+            if _provider_key(model) != STUB_PROVIDER:
+                routed.provider = _get_provider_for_model(model)
+            self._routed_configs[model] = routed
+        provider = _provider_key(model)
+        rate = self.rate_limits.get(provider)
+        return routed, provider, get_rate_limiter(provider, rate) if rate else None
+
+    async def run(self, prompts: PromptSource) -> AsyncIterator[RunResult]:
+        """Yield a RunResult per prompt, in completion order."""
+        source = _iterate(prompts).__aiter__()
+        in_flight: Set[asyncio.Task] = set()
+        index = 0
+        exhausted = False
+
+        try:
+            while True:
+                while not exhausted and len(in_flight) < self.concurrency:
+                    try:
+                        prompt = await source.__anext__()
+                    except StopAsyncIteration:
+                        exhausted = True
+                        break
+                    in_flight.add(asyncio.ensure_future(self._run_one(index, prompt)))
+                    index += 1
+
+                if not in_flight:
+                    return
+
+                done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in in_flight:
+                task.cancel()
+            if in_flight:
+                await asyncio.gather(*in_flight, return_exceptions=True)
+
+    async def _run_one(self, index: int, prompt: str) -> RunResult:
+        started = time.perf_counter()
+        error: Optional[BaseException] = None
+
+        with span("agent.prompt", agent=self.agent_config.name, index=index) as prompt_span:
+            for attempt in range(1, self.max_retries + 2):
+                prompt_span.set("attempts", attempt)
+                if self.router:
+                    agent_config, provider, rate_limiter = self._route()
+                else:
+                    agent_config, provider, rate_limiter = self.agent_config, self.provider, self.rate_limiter
+                if rate_limiter:
+                    await rate_limiter.acquire()
+                call_started = time.perf_counter()
+                try:
+                    with span("llm.round_trip", provider=provider, model=agent_config.model,
+                              attempt=attempt) as call_span:
+                        call = self.executor(prompt, agent_config)
+                        result = await (asyncio.wait_for(call, self.timeout) if self.timeout else call)
+                        if call_span.recording:
+                            _record_usage(call_span, prompt, result)
+                    if self.router:
+                        self.router.record(agent_config.model, time.perf_counter() - call_started)
+                    return RunResult(index=index, prompt=prompt, result=result, attempts=attempt,
+                                     elapsed=time.perf_counter() - started)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    error = e
+                    if self.router:
+                        self.router.record(agent_config.model, time.perf_counter() - call_started, ok=False)
+                    logger.warning("Prompt #%d failed on attempt %d (%s): %s", index, attempt, provider, e)
+                    if attempt <= self.max_retries:
+                        await asyncio.sleep(self.retry_backoff * 2 ** (attempt - 1))
+
+            prompt_span.set("failed", True)
+        return RunResult(index=index, prompt=prompt, error=error, attempts=self.max_retries + 1,
+                         elapsed=time.perf_counter() - started)
+
+
+def _record_usage(call_span: Any, prompt: str, result: Any) -> None:
+    """Add byte counts and, when the result reports them, token counts to an LLM span."""
+    call_span.add("prompt_bytes", len(prompt.encode()))
+    if isinstance(result, (str, bytes)):
+        call_span.add("response_bytes", len(result.encode() if isinstance(result, str) else result))
+    usage = result.get("usage") if isinstance(result, dict) else getattr(result, "usage", None)
+    if usage is None:
+        return
+    for name in ("input_tokens", "prompt_tokens", "output_tokens", "completion_tokens", "total_tokens"):
+        count = usage.get(name) if isinstance(usage, dict) else getattr(usage, name, None)
+        if isinstance(count, int):
+            call_span.add(name, count)
+
+
+async def run_agent_prompts(
+    agent_config: "HeavenAgentConfig",
+    prompts: PromptSource,
+    **runner_kwargs: Any
+) -> AsyncIterator[RunResult]:
+    """Convenience wrapper: `async for result in run_agent_prompts(config, prompts, concurrency=8)`."""
+    async for result in AgentRunner(agent_config, **runner_kwargs).run(prompts):
+        yield result
@@ -0,0 +1,292 @@
+"""
+Bounded execution of agent shell commands.
+
+Commands run in their own process group, with a time limit and an address-space limit.
+Merged stdout/stderr is read incrementally: every chunk can be passed to a callback as
+it arrives, and only the head and tail of the output are kept, so a command that
+prints megabytes costs a fixed amount of memory and context.
+
+Deterministic read-only commands (`help(...)`, `pip show`, version prints, pydoc) are
+cached. The cache key includes an environment fingerprint that changes whenever
+packages are installed or removed.
+"""
+
+import codecs
+import hashlib
+import logging
+import os
+import re
+import selectors
+import signal
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import Callable, List, Optional
+
+from .cache import LRUCache
+from .cassette import Cassette, get_cassette
+from .help_cache import _limit_memory
+from .streaming import emit_event
+from .tracing import span
+
+logger = logging.getLogger(__name__)
+
+# Read-only commands whose output depends only on the installed environment
+_CACHEABLE_RES: List["re.Pattern[str]"] = [re.compile(p) for p in (
+    r"^(?:pip3?|python3?\s+-m\s+pip)\s+(?:show|list|freeze)(?:\s+[\w.\-=\s]*)?$",
+    r"^(?:pydoc3?|python3?\s+-m\s+pydoc)\s+[\w.]+$",
+    r"^python3?\s+-c\s+(['\"])\s*(?:import\s+[\w.]+(?:\s*,\s*[\w.]+)*\s*;\s*)*"
+    r"(?:help\([\w.]+\)|print\([\w.]+\.__version__\))\s*;?\s*\1$",
+)]
+
+
+def is_cacheable(command: str) -> bool:
+    """True for deterministic read-only commands whose output may be reused."""
+    command = command.strip()
+    return any(pattern.match(command) for pattern in _CACHEABLE_RES)
+
+
+def environment_fingerprint() -> str:
+    """
+    Token that changes when the Python environment changes.
+
+    Hashes the interpreter and the mtimes of the directories on sys.path, which change
+    whenever a package is installed into or removed from them.
+    """
+    digest = hashlib.sha256(f"{sys.executable}\0{sys.version}".encode())
+    for path in sys.path:
+        try:
+            digest.update(f"\0{path}:{os.stat(path or '.').st_mtime_ns}".encode())
+        except OSError:
+            continue
+    return digest.hexdigest()[:16]
+
+
+@dataclass(frozen=True)
+class ExecutionLimits:
+    """Per-command limits."""
+    timeout: float = 120.0
+    memory_limit_mb: Optional[int] = 2048
+    max_output_chars: int = 20000
+    head_chars: int = 4000
+
+
+@dataclass
+class CommandResult:
+    """Outcome of one bounded command."""
+    command: str
+    returncode: Optional[int]
+    output: str
+    total_chars: int
+    elapsed: float
+    timed_out: bool = False
+    cached: bool = False
+
+    @property
+    def truncated(self) -> bool:
+        return self.total_chars > len(self.output)
+
+    def render(self) -> str:
+        """Output plus a status line, as returned to the agent."""
+        if self.timed_out:
+            status = f"[timed out after {self.elapsed:.0f}s]"
+        else:
+            status = f"[exit code {self.returncode}]"
+        return f"{self.output.rstrip()}\n{status}" if self.output.strip() else status
+
+
+class _HeadTailBuffer:
+    """Keeps the first `head` and last `tail` characters of a stream."""
+
+    def __init__(self, head: int, tail: int):
+        self.head_limit = head
+        self.tail_limit = tail
+        self.head = ""
+        self.tail = ""
+        self.total = 0
+
+    def write(self, text: str) -> None:
+        self.total += len(text)
+        if len(self.head) < self.head_limit:
+            room = self.head_limit - len(self.head)
+            self.head += text[:room]
+            text = text[room:]
+        if text:
+            self.tail += text
+            # Trim lazily so long streams are not re-sliced on every chunk
+            if len(self.tail) > 2 * self.tail_limit:
+                self.tail = self.tail[-self.tail_limit:]
+
+    def getvalue(self) -> str:
+        tail = self.tail[-self.tail_limit:] if self.tail_limit else ""
+        omitted = self.total - len(self.head) - len(tail)
+        if omitted <= 0:
+            return self.head + self.tail
+        return f"{self.head}\n... [{omitted} chars omitted] ...\n{tail}"
+
+
+def run_bounded(
+    command: str,
+    limits: ExecutionLimits = ExecutionLimits(),
+    cwd: Optional[str] = None,
+    on_output: Optional[Callable[[str], None]] = None
+) -> CommandResult:
+    """
+    Run a shell command under `limits`, streaming its merged stdout/stderr.
+
+    Args:
+        command: Shell command line
+        limits: Time, memory and output limits
+        cwd: Working directory
+        on_output: Called with each decoded chunk of output as it arrives
+
+    Returns:
+        CommandResult with head/tail-truncated output
+    """
+    started = time.monotonic()
+    deadline = started + limits.timeout
+    memory = limits.memory_limit_mb * 1024 * 1024 if limits.memory_limit_mb else None
+    posix = os.name == "posix"
+    proc = subprocess.Popen(
+        command,
+        shell=True,
+        cwd=cwd,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        start_new_session=posix,
+        preexec_fn=(lambda: _limit_memory(memory)) if posix and memory else None
+    )
+    buffer = _HeadTailBuffer(limits.head_chars, max(0, limits.max_output_chars - limits.head_chars))
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    timed_out = False
+
+    def emit(text: str) -> None:
+        if text:
+            buffer.write(text)
+            if on_output is not None:
+                on_output(text)
+
+    with selectors.DefaultSelector() as selector:
+        selector.register(proc.stdout, selectors.EVENT_READ)
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                timed_out = True
+                break
+            if not selector.select(timeout=remaining):
+                continue
+            chunk = os.read(proc.stdout.fileno(), 65536)
+            if not chunk:
+                break
+            emit(decoder.decode(chunk))
+    emit(decoder.decode(b"", final=True))
+
+    if timed_out:
+        _kill(proc, posix)
+    try:
+        returncode = proc.wait(timeout=max(0.0, deadline - time.monotonic()))
+    except subprocess.TimeoutExpired:
+        timed_out = True
+        _kill(proc, posix)
+        returncode = proc.wait()
+    proc.stdout.close()
+
+    return CommandResult(
+        command=command,
+        returncode=None if timed_out else returncode,
+        output=buffer.getvalue(),
+        total_chars=buffer.total,
+        elapsed=time.monotonic() - started,
+        timed_out=timed_out,
+    )
+
+
+def _kill(proc: subprocess.Popen, posix: bool) -> None:
+    try:
+        if posix:
+            os.killpg(proc.pid, signal.SIGKILL)
+        else:
+            proc.kill()
+    except OSError:
+        pass
+
+
+class BoundedExecutor:
+    """
+    Runs agent commands under ExecutionLimits and caches deterministic read-only ones.
+
+    Args:
+        limits: Limits applied to every command
+        cache_size: Maximum cached command results
+        cassette: Record/replay store for every command (not just read-only ones)
+    """
+
+    def __init__(
+        self,
+        limits: Optional[ExecutionLimits] = None,
+        cache_size: int = 256,
+        cassette: Optional[Cassette] = None
+    ):
+        self.limits = limits or ExecutionLimits()
+        self.cache: "LRUCache[CommandResult]" = LRUCache(maxsize=cache_size)
+        self.cassette = cassette
+
+    def run(
+        self,
+        command: str,
+        cwd: Optional[str] = None,
+        on_output: Optional[Callable[[str], None]] = None,
+        use_cache: bool = True
+    ) -> CommandResult:
+        """
+        Run `command`, answering from the cache when it is cacheable and unchanged.
+
+        Inside a streamed run (see streaming.stream_agent) the command and its output are
+        also published as "tool_call" / "tool_output" events as they happen.
+        """
+        emit_event("tool_call", name="BashTool", args=command)
+        user_on_output = on_output
+
+        def on_output(text: str) -> None:
+            emit_event("tool_output", text=text)
+            if user_on_output is not None:
+                user_on_output(text)
+
+        key = None
+        if use_cache and is_cacheable(command):
+            key = (environment_fingerprint(), os.path.abspath(cwd or os.getcwd()), command.strip(), self.limits)
+            hit = self.cache.get(key)
+            if hit is not None:
+                on_output(hit.output)
+                return replace(hit, cached=True, elapsed=0.0)
+
+        with span("sandbox.exec") as exec_span:
+            if self.cassette is not None:
+                result = self.cassette.call_sync(
+                    "tool:bash", {"command": command.strip(), "cwd": cwd},
+                    lambda: run_bounded(command, self.limits, cwd=cwd, on_output=on_output)
+                )
+            else:
+                result = run_bounded(command, self.limits, cwd=cwd, on_output=on_output)
+            exec_span.add("output_chars", result.total_chars)
+        if result.timed_out:
+            logger.warning("Command timed out after %.0fs: %s", self.limits.timeout, command[:200])
+        if key is not None and result.returncode == 0:
+            self.cache.put(key, result)
+        return result
+
+
+_default_executor: Optional[BoundedExecutor] = None
+_default_executor_lock = threading.Lock()
+
+
+def get_executor() -> BoundedExecutor:
+    """Return the process-wide bounded executor, creating it on first use."""
+    global _default_executor
+    with _default_executor_lock:
+        if _default_executor is None:
+            _default_executor = BoundedExecutor(cassette=get_cassette())
+        return _default_executor
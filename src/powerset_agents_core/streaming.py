@@ -0,0 +1,280 @@
+"""
+Streaming interface for agent runs.
+
+`stream_agent()` is an async generator of AgentEvents that yields output as it happens
+instead of after the run:
+
+- "start": the run began (emitted immediately)
+- "token": a chunk of model output, from executors that stream
+- "tool_output": incremental output of a bounded shell command
+- "tool_call": a tool call, with "waypoint" and "starlog" calls reported as their own kinds
+- "message": an AI message
+- "done" / "error": the run's outcome (always last)
+
+The default and Hermes executors pass HEAVEN's `heaven_main_callback` (see
+`message_callback()`), so tool calls and AI messages are emitted as the agent produces
+them. For executors that never call it, they are taken from the final result instead.
+
+Events pass through a bounded buffer. Producers on the event loop wait when it is
+full. Events from tool threads never block: when the buffer is full, their token and
+tool_output events are dropped and counted on the final event.
+
+Code running inside a streamed run (such as BoundedBashTool) publishes events with
+`emit_event()`. The target run is found through a context variable, so concurrent
+runs never see each other's events. Threads that do not inherit the context (plain
+threads, `loop.run_in_executor`) publish to the active run only while exactly one run
+is streaming.
+
+    async for event in stream_agent(prompt, agent_config):
+        print(event.render(), end="", flush=True)
+"""
+
+import asyncio
+import contextvars
+import inspect
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, Dict, Iterator, Optional, Set
+
+from .mcp_pool import mcp_server_for_tool
+from .tracing import span
+
+if TYPE_CHECKING:
+    from heaven_base.baseheavenagent import HeavenAgentConfig
+
+logger = logging.getLogger(__name__)
+
+# Kinds that may be dropped under backpressure from threads; everything else is kept
+_DROPPABLE = frozenset({"token", "tool_output"})
+
+# (prompt, agent_config) -> final result, or an async iterator of str chunks / AgentEvents
+StreamingExecutor = Callable[[str, "HeavenAgentConfig"], Any]
+
+
+@dataclass
+class AgentEvent:
+    """One event from a streamed run."""
+    kind: str
+    data: Dict[str, Any] = field(default_factory=dict)
+    elapsed: float = 0.0
+
+    @property
+    def text(self) -> str:
+        return self.data.get("text", "")
+
+    def render(self) -> str:
+        """Human-readable form for printing as the run progresses."""
+        if self.kind in ("token", "tool_output"):
+            return self.text
+        if self.kind in ("tool_call", "waypoint", "starlog"):
+            return f"\n🔧 [{self.kind}] {self.data.get('name', '')} {self.data.get('args', '')}\n"
+        if self.kind == "message":
+            return f"\n{self.text}\n"
+        if self.kind == "error":
+            return f"\n❌ {self.data.get('error')}\n"
+        if self.kind == "done":
+            return f"\n✅ done in {self.elapsed:.1f}s\n"
+        return ""
+
+
+class EventChannel:
+    """Bounded, loop-bound queue of AgentEvents fed from the loop or from threads."""
+
+    def __init__(self, buffer_size: int = 256):
+        self.queue: "asyncio.Queue[Optional[AgentEvent]]" = asyncio.Queue(maxsize=buffer_size)
+        self.loop = asyncio.get_running_loop()
+        self.started = time.perf_counter()
+        self.dropped = 0
+        # Set once the run reports its messages as they happen (see message_callback)
+        self.messages_streamed = False
+
+    def event(self, kind: str, **data: Any) -> AgentEvent:
+        return AgentEvent(kind, data, time.perf_counter() - self.started)
+
+    async def put(self, kind: str, **data: Any) -> None:
+        await self.queue.put(self.event(kind, **data))
+
+    def put_threadsafe(self, kind: str, **data: Any) -> None:
+        event = self.event(kind, **data)
+
+        def enqueue() -> None:
+            try:
+                self.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                if event.kind in _DROPPABLE:
+                    self.dropped += 1
+                else:
+                    asyncio.ensure_future(self.queue.put(event))
+
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self.loop:
+            enqueue()
+        else:
+            self.loop.call_soon_threadsafe(enqueue)
+
+
+_current_channel: "contextvars.ContextVar[Optional[EventChannel]]" = contextvars.ContextVar(
+    "powerset_event_channel", default=None
+)
+
+
+_active_channels: "Set[EventChannel]" = set()
+_active_channels_lock = threading.Lock()
+
+
+def emit_event(kind: str, **data: Any) -> None:
+    """Publish an event to the streamed run this code is part of (no-op outside one)."""
+    channel = _current_channel.get()
+    if channel is None:
+        with _active_channels_lock:
+            if len(_active_channels) == 1:
+                channel = next(iter(_active_channels))
+    if channel is not None:
+        channel.put_threadsafe(kind, **data)
+
+
+def _classify_tool(name: str) -> str:
+    """Event kind for a tool call: "starlog"/"waypoint" for those servers' tools, else "tool_call"."""
+    return mcp_server_for_tool(name) or "tool_call"
+
+
+def _field(message: Any, name: str, default: Any = None) -> Any:
+    return message.get(name, default) if isinstance(message, dict) else getattr(message, name, default)
+
+
+def _message_events(message: Any) -> Iterator[tuple]:
+    """(kind, data) pairs for the tool calls and text of one HEAVEN message."""
+    for call in _field(message, "tool_calls") or []:
+        name = _field(call, "name") or _field(_field(call, "function", {}), "name", "")
+        args = _field(call, "args") or _field(_field(call, "function", {}), "arguments", "")
+        yield _classify_tool(name), {"name": name, "args": args}
+    kind = _field(message, "type", "")
+    if kind in ("ai", "AIMessage", "assistant") and _field(message, "content"):
+        yield "message", {"text": str(_field(message, "content"))}
+
+
+def _result_events(result: Any) -> Iterator[tuple]:
+    """(kind, data) pairs for the tool calls and AI messages in a HEAVEN result."""
+    messages = _field(result, "messages")
+    if not messages:
+        text = (_field(result, "response") or _field(result, "content")) if isinstance(result, dict) else result
+        if text:
+            yield "message", {"text": str(text)}
+        return
+    for message in messages:
+        yield from _message_events(message)
+
+
+def message_callback() -> Optional[Callable[[Any], None]]:
+    """
+    heaven_main_callback publishing each message of the current streamed run as it happens.
+
+    HEAVEN calls it with every message it appends to the conversation, possibly from a
+    worker thread. Returns None outside a streamed run.
+    """
+    channel = _current_channel.get()
+    if channel is None:
+        return None
+
+    def callback(message: Any) -> None:
+        channel.messages_streamed = True
+        for kind, data in _message_events(message):
+            channel.put_threadsafe(kind, **data)
+    return callback
+
+
+async def _exec_completion(prompt: str, agent_config: "HeavenAgentConfig") -> Any:
+    from heaven_base.tool_utils.completion_runners import exec_completion_style
+    return await exec_completion_style(prompt=prompt, agent=agent_config, heaven_main_callback=message_callback())
+
+
+def hermes_executor(iterations: int = 3, **hermes_kwargs: Any) -> StreamingExecutor:
+    """Executor running the prompt as a Hermes goal via HEAVEN's use_hermes_dict."""
+    async def execute(goal: str, agent_config: "HeavenAgentConfig") -> Any:
+        from heaven_base.tool_utils.hermes_utils import use_hermes_dict
+        kwargs = {"heaven_main_callback": message_callback(), **hermes_kwargs}
+        return await use_hermes_dict(goal=goal, iterations=iterations, agent=agent_config, **kwargs)
+    return execute
+
+
+async def stream_agent(
+    prompt: str,
+    agent_config: "HeavenAgentConfig",
+    executor: Optional[StreamingExecutor] = None,
+    buffer_size: int = 256
+) -> AsyncIterator[AgentEvent]:
+    """
+    Run one prompt and yield AgentEvents as they happen.
+
+    Args:
+        prompt: Prompt (or Hermes goal) for the agent
+        agent_config: HeavenAgentConfig from the factory
+        executor: Called as executor(prompt, agent_config); may return an awaitable final
+            result or an async iterator of text chunks / AgentEvents. Defaults to HEAVEN's
+            exec_completion_style
+        buffer_size: Events buffered between the run and the consumer
+
+    Yields:
+        AgentEvents, starting with "start" and ending with "done" or "error"
+    """
+    executor = executor or _exec_completion
+    channel = EventChannel(buffer_size)
+
+    async def produce() -> None:
+        token = _current_channel.set(channel)
+        try:
+            outcome = executor(prompt, agent_config)
+            if hasattr(outcome, "__aiter__"):
+                parts = []
+                async for chunk in outcome:
+                    if isinstance(chunk, AgentEvent):
+                        await channel.queue.put(chunk)
+                    else:
+                        parts.append(str(chunk))
+                        await channel.put("token", text=str(chunk))
+                result = "".join(parts)
+                streamed = True
+            else:
+                result = await outcome if inspect.isawaitable(outcome) else outcome
+                streamed = False
+            # Fallback for executors that did not report messages as they happened
+            if not channel.messages_streamed:
+                for kind, data in _result_events(result):
+                    if not (streamed and kind == "message"):
+                        await channel.put(kind, **data)
+            await channel.put("done", result=result, dropped=channel.dropped)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("Streamed run of %s failed: %s", getattr(agent_config, "name", "agent"), e)
+            await channel.put("error", error=f"{type(e).__name__}: {e}", dropped=channel.dropped)
+        finally:
+            _current_channel.reset(token)
+        await channel.queue.put(None)
+
+    with span("agent.stream", agent=getattr(agent_config, "name", None)) as stream_span:
+        yield channel.event("start", prompt=prompt, agent=getattr(agent_config, "name", None))
+        with _active_channels_lock:
+            _active_channels.add(channel)
+        task = asyncio.ensure_future(produce())
+        first_output = True
+        try:
+            while True:
+                event = await channel.queue.get()
+                if event is None:
+                    break
+                if first_output and event.kind not in ("done", "error"):
+                    first_output = False
+                    stream_span.set("first_output_s", event.elapsed)
+                yield event
+        finally:
+            if not task.done():
+                task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            with _active_channels_lock:
+                _active_channels.discard(channel)
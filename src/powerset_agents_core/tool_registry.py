@@ -0,0 +1,191 @@
+"""
+Plugin registry for the tools agents can be equipped with.
+
+Built-in tools (HEAVEN's plus BoundedBashTool) are registered by import path. Other
+packages add tools through the `powerset_agents.tools` entry point group:
+
+    # pyproject.toml of a plugin package
+    [project.entry-points."powerset_agents.tools"]
+    sqltool = "my_plugin.tools:SqlTool"
+
+Names are case-insensitive. Entry points are read once per process (metadata only);
+a tool's module is imported the first time an agent asks for that tool, then cached.
+Config validation checks names against the registry without importing anything.
+HEAVEN tool classes are instrumented on load so every call of the tools they create
+runs inside a `tool.call` tracing span.
+"""
+
+import functools
+import importlib
+import inspect
+import logging
+import threading
+from importlib.metadata import entry_points
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from .tracing import span
+
+logger = logging.getLogger(__name__)
+
+ENTRY_POINT_GROUP = "powerset_agents.tools"
+
+# Tool name -> "module:attribute"
+BUILTIN_TOOLS: Dict[str, str] = {
+    "networkedittool": "heaven_base.tools.network_edit_tool:NetworkEditTool",
+    "bashtool": "heaven_base.tools.bash_tool:BashTool",
+    "boundedbashtool": "powerset_agents_core.bounded_bash_tool:BoundedBashTool",
+}
+
+
+class UnknownToolError(ValueError):
+    """Raised for a tool name that is neither built in nor provided by a plugin."""
+
+
+def _traced_call(tool_name: str, func: Callable[..., Any]) -> Callable[..., Any]:
+    if getattr(func, "_powerset_traced", False):
+        return func
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def traced(*args: Any, **kwargs: Any) -> Any:
+            with span("tool.call", tool=tool_name) as s:
+                result = await func(*args, **kwargs)
+                s.add("output_chars", len(str(result)))
+                return result
+    else:
+        @functools.wraps(func)
+        def traced(*args: Any, **kwargs: Any) -> Any:
+            with span("tool.call", tool=tool_name) as s:
+                result = func(*args, **kwargs)
+                s.add("output_chars", len(str(result)))
+                return result
+    traced._powerset_traced = True
+    return traced
+
+
+def _trace_tool_class(tool_class: Any) -> None:
+    """
+    Make a HEAVEN tool class trace the LangChain tool its `create()` builds.
+
+    HEAVEN calls the tool through `base_tool.func` or `base_tool.coroutine`, and some
+    tools (BashTool) only bind their function inside `create()`, so the instance's
+    callables are wrapped rather than the class's `func`. The class is patched in place
+    so it keeps its identity (and stays picklable); other classes are left alone.
+    """
+    try:
+        from heaven_base.baseheaventool import BaseHeavenTool
+    except ImportError:
+        return
+    if not (isinstance(tool_class, type) and issubclass(tool_class, BaseHeavenTool)):
+        return
+    if "_powerset_traced" in vars(tool_class):
+        return
+    original = inspect.getattr_static(tool_class, "create")
+
+    def create(cls: Any, adk: bool = False) -> Any:
+        instance = original.__func__(cls, adk)
+        base_tool = getattr(instance, "base_tool", None)
+        if base_tool is not None:
+            for attr in ("func", "coroutine"):
+                func = getattr(base_tool, attr, None)
+                if func is not None:
+                    setattr(base_tool, attr, _traced_call(cls.name, func))
+        return instance
+
+    tool_class.create = classmethod(functools.wraps(original.__func__)(create))
+    tool_class._powerset_traced = True
+
+
+def _tool_entry_points() -> List[Any]:
+    eps = entry_points()
+    if hasattr(eps, "select"):
+        return list(eps.select(group=ENTRY_POINT_GROUP))
+    return list(eps.get(ENTRY_POINT_GROUP, []))  # Python 3.9
+
+
+class ToolRegistry:
+    """
+    Maps tool names to import paths (or classes) and imports each tool on first use.
+
+    Args:
+        builtins: Name -> "module:attribute" registered before any plugins
+        discover: Read the `powerset_agents.tools` entry points on first lookup
+    """
+
+    def __init__(self, builtins: Optional[Dict[str, str]] = None, discover: bool = True):
+        self._targets: Dict[str, Union[str, Any]] = {
+            name.lower(): target for name, target in (BUILTIN_TOOLS if builtins is None else builtins).items()
+        }
+        self._classes: Dict[str, Any] = {}
+        self._discover = discover
+        self._lock = threading.Lock()
+
+    def _discover_plugins(self) -> None:
+        with self._lock:
+            if not self._discover:
+                return
+            for ep in _tool_entry_points():
+                key = ep.name.lower()
+                if key in self._targets:
+                    logger.warning("Tool plugin %s (%s) shadows an existing tool", ep.name, ep.value)
+                self._targets[key] = ep.value
+            self._discover = False
+
+    def register(self, name: str, target: Union[str, Any]) -> None:
+        """Register a tool by "module:attribute" import path or by class."""
+        self._discover_plugins()
+        key = name.lower()
+        with self._lock:
+            self._targets[key] = target
+            self._classes.pop(key, None)
+
+    def names(self) -> List[str]:
+        self._discover_plugins()
+        return sorted(self._targets)
+
+    def __contains__(self, name: str) -> bool:
+        self._discover_plugins()
+        return name.lower() in self._targets
+
+    def validate(self, tool_names: List[str]) -> None:
+        """Raise UnknownToolError for any unregistered name; imports nothing."""
+        self._discover_plugins()
+        unknown = [name for name in tool_names if name.lower() not in self._targets]
+        if unknown:
+            raise UnknownToolError(
+                f"Unknown tool(s): {', '.join(unknown)} (known: {', '.join(sorted(self._targets))})"
+            )
+
+    def load(self, name: str) -> Any:
+        """Return the tool class registered under `name`, importing it on first use."""
+        key = name.lower()
+        tool_class = self._classes.get(key)
+        if tool_class is not None:
+            return tool_class
+
+        self.validate([name])
+        target = self._targets[key]
+        if isinstance(target, str):
+            module_name, attr = target.split(":")
+            tool_class = getattr(importlib.import_module(module_name), attr)
+        else:
+            tool_class = target
+        _trace_tool_class(tool_class)
+        self._classes[key] = tool_class
+        return tool_class
+
+    def resolve(self, tool_names: List[str]) -> List[Any]:
+        """Tool classes for `tool_names`, in order."""
+        return [self.load(name) for name in tool_names]
+
+
+_tool_registry: Optional[ToolRegistry] = None
+_tool_registry_lock = threading.Lock()
+
+
+def get_tool_registry() -> ToolRegistry:
+    """Return the process-wide tool registry, creating it on first use."""
+    global _tool_registry
+    with _tool_registry_lock:
+        if _tool_registry is None:
+            _tool_registry = ToolRegistry()
+        return _tool_registry
@@ -0,0 +1,402 @@
+"""
+Span tracing and counters for factory and agent runs, with pluggable sinks.
+
+Tracing is off until a sink is added. While off, `span()` returns a shared no-op object,
+so instrumented hot paths cost one attribute check and a function call.
+
+Enable it in code:
+
+    >>> from powerset_agents_core.tracing import InMemorySink, configure_tracing
+    >>> sink = InMemorySink()
+    >>> configure_tracing(sink)
+    >>> ...  # build and run agents
+    >>> sink.summary()["llm.round_trip"]["total_duration"]
+
+or from the environment with POWERSET_TRACE_JSONL=/path/spans.jsonl and/or
+POWERSET_TRACE_OTLP_ENDPOINT=http://localhost:4318/v1/traces.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import secrets
+import threading
+import time
+import urllib.request
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_OTLP_ENDPOINT = "http://localhost:4318/v1/traces"
+
+
+@dataclass
+class Span:
+    """One timed operation with attributes and numeric counters (tokens, bytes, ...)."""
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    counters: Dict[str, float] = field(default_factory=dict)
+    start_time: float = 0.0
+    duration: float = 0.0
+    error: Optional[str] = None
+    recording = True
+
+    def set(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def add(self, counter: str, amount: float = 1) -> None:
+        self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_time": self.start_time,
+            "duration": self.duration,
+            "attributes": self.attributes,
+            "counters": self.counters,
+            "error": self.error,
+        }
+
+
+class _NoopSpan:
+    """Stand-in returned while tracing is disabled."""
+    __slots__ = ()
+    recording = False
+
+    def set(self, key: str, value: Any) -> None:
+        pass
+
+    def add(self, counter: str, amount: float = 1) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> bool:
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+_current_span: "ContextVar[Optional[Span]]" = ContextVar("powerset_current_span", default=None)
+
+
+class _ActiveSpan:
+    """Context manager that times a Span and hands it to the tracer on exit."""
+    __slots__ = ("tracer", "span", "_started", "_token")
+
+    def __init__(self, tracer: "Tracer", span: Span):
+        self.tracer = tracer
+        self.span = span
+
+    def __enter__(self) -> Span:
+        self.span.start_time = time.time()
+        self._started = time.perf_counter()
+        self._token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type: Any, exc: Optional[BaseException], tb: Any) -> bool:
+        self.span.duration = time.perf_counter() - self._started
+        if exc is not None:
+            self.span.error = f"{exc_type.__name__}: {exc}"
+        _current_span.reset(self._token)
+        self.tracer._finish(self.span)
+        return False
+
+
+class SpanSink:
+    """Receives finished spans. Subclasses must be safe to call from several threads."""
+
+    def export(self, span: Span) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class InMemorySink(SpanSink):
+    """
+    Keeps the most recent finished spans in memory.
+
+    Args:
+        max_spans: Oldest spans are dropped beyond this many
+    """
+
+    def __init__(self, max_spans: int = 10000):
+        self._spans: Deque[Span] = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        with self._lock:
+            self._spans.append(span)
+
+    @property
+    def spans(self) -> List[Span]:
+        with self._lock:
+            return list(self._spans)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._spans.clear()
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """Count, total/max duration, errors and summed counters per span name."""
+        summary: Dict[str, Dict[str, Any]] = {}
+        for span in self.spans:
+            entry = summary.setdefault(span.name, {
+                "count": 0, "errors": 0, "total_duration": 0.0, "max_duration": 0.0, "counters": {}
+            })
+            entry["count"] += 1
+            entry["errors"] += span.error is not None
+            entry["total_duration"] += span.duration
+            entry["max_duration"] = max(entry["max_duration"], span.duration)
+            for counter, amount in span.counters.items():
+                entry["counters"][counter] = entry["counters"].get(counter, 0) + amount
+        return summary
+
+
+class JsonlSink(SpanSink):
+    """
+    Appends one JSON object per finished span to a file.
+
+    Args:
+        path: File to append to (created if missing)
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = open(path, "a", buffering=1)
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=str) + "\n"
+        with self._lock:
+            self._file.write(line)
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class OtlpHttpSink(SpanSink):
+    """
+    Exports spans as OTLP/JSON over HTTP, e.g. to a local OpenTelemetry collector.
+
+    Spans are queued and posted in batches from a background thread, so exporting never
+    blocks the traced code; failed posts are logged and dropped. Counters are sent as
+    span attributes.
+
+    Args:
+        endpoint: OTLP/HTTP traces endpoint
+        service_name: Value of the `service.name` resource attribute
+        batch_size: Spans per request
+        flush_interval: Seconds a partial batch may wait before being sent
+        timeout: HTTP request timeout in seconds
+    """
+
+    def __init__(
+        self,
+        endpoint: str = DEFAULT_OTLP_ENDPOINT,
+        service_name: str = "powerset-agents",
+        batch_size: int = 256,
+        flush_interval: float = 2.0,
+        timeout: float = 5.0
+    ):
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.timeout = timeout
+        self._queue: "queue.Queue[Optional[Span]]" = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="otlp-span-exporter", daemon=True)
+        self._worker.start()
+
+    def export(self, span: Span) -> None:
+        self._queue.put(span)
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._worker.join(timeout=self.timeout + self.flush_interval)
+
+    def _run(self) -> None:
+        batch: List[Span] = []
+        deadline = 0.0
+        while True:
+            wait = max(0.0, deadline - time.monotonic()) if batch else None
+            try:
+                span = self._queue.get(timeout=wait)
+            except queue.Empty:
+                self._post(batch)
+                batch = []
+                continue
+            if span is None:
+                if batch:
+                    self._post(batch)
+                return
+            if not batch:
+                deadline = time.monotonic() + self.flush_interval
+            batch.append(span)
+            if len(batch) >= self.batch_size:
+                self._post(batch)
+                batch = []
+
+    def _post(self, spans: List[Span]) -> None:
+        body = json.dumps(self._encode(spans)).encode()
+        request = urllib.request.Request(
+            self.endpoint, data=body, headers={"Content-Type": "application/json"}
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout):
+                pass
+        except OSError as e:
+            logger.warning("Dropped %d spans, OTLP export to %s failed: %s", len(spans), self.endpoint, e)
+
+    def _encode(self, spans: List[Span]) -> Dict[str, Any]:
+        encoded = []
+        for span in spans:
+            start_ns = int(span.start_time * 1e9)
+            attributes = {**span.attributes, **span.counters}
+            encoded.append({
+                "traceId": span.trace_id,
+                "spanId": span.span_id,
+                "parentSpanId": span.parent_id or "",
+                "name": span.name,
+                "kind": 1,
+                "startTimeUnixNano": str(start_ns),
+                "endTimeUnixNano": str(start_ns + int(span.duration * 1e9)),
+                "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in attributes.items()],
+                "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+            })
+        return {"resourceSpans": [{
+            "resource": {"attributes": [
+                {"key": "service.name", "value": {"stringValue": self.service_name}}
+            ]},
+            "scopeSpans": [{"scope": {"name": "powerset_agents_core"}, "spans": encoded}],
+        }]}
+
+
+class Tracer:
+    """
+    Creates spans and fans finished ones out to the registered sinks.
+
+    Counters added to spans are also accumulated process-wide and available from
+    `counters()` regardless of which sinks are installed.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._sinks: List[SpanSink] = []
+        self._totals: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def add_sink(self, sink: SpanSink) -> None:
+        with self._lock:
+            self._sinks = self._sinks + [sink]
+            self.enabled = True
+
+    def remove_sink(self, sink: SpanSink) -> None:
+        with self._lock:
+            self._sinks = [s for s in self._sinks if s is not sink]
+            self.enabled = bool(self._sinks)
+
+    def span(self, name: str, **attributes: Any) -> Any:
+        """Context manager timing `name`; nests under the current span of this task/thread."""
+        if not self.enabled:
+            return _NOOP_SPAN
+        parent = _current_span.get()
+        return _ActiveSpan(self, Span(
+            name=name,
+            trace_id=parent.trace_id if parent else secrets.token_hex(16),
+            span_id=secrets.token_hex(8),
+            parent_id=parent.span_id if parent else None,
+            attributes=attributes,
+        ))
+
+    def counters(self) -> Dict[str, float]:
+        """Totals of every counter recorded since the last reset."""
+        with self._lock:
+            return dict(self._totals)
+
+    def reset_counters(self) -> None:
+        with self._lock:
+            self._totals.clear()
+
+    def shutdown(self) -> None:
+        """Close and remove every sink, disabling tracing."""
+        with self._lock:
+            sinks, self._sinks = self._sinks, []
+            self.enabled = False
+        for sink in sinks:
+            sink.close()
+
+    def _finish(self, span: Span) -> None:
+        if span.counters:
+            with self._lock:
+                for counter, amount in span.counters.items():
+                    self._totals[counter] = self._totals.get(counter, 0) + amount
+        for sink in self._sinks:
+            try:
+                sink.export(span)
+            except Exception as e:
+                logger.warning("Span sink %s failed: %s", type(sink).__name__, e)
+
+
+_tracer = Tracer()
+
+
+def get_tracer() -> Tracer:
+    """Return the process-wide tracer."""
+    return _tracer
+
+
+def span(name: str, **attributes: Any) -> Any:
+    """Shortcut for `get_tracer().span(name, **attributes)`."""
+    if not _tracer.enabled:
+        return _NOOP_SPAN
+    return _tracer.span(name, **attributes)
+
+
+def current_span() -> Any:
+    """The innermost active span, or a no-op span when there is none."""
+    return _current_span.get() or _NOOP_SPAN
+
+
+def configure_tracing(*sinks: SpanSink) -> Tracer:
+    """Install sinks on the process-wide tracer, enabling tracing."""
+    for sink in sinks:
+        _tracer.add_sink(sink)
+    return _tracer
+
+
+def _configure_from_env() -> None:
+    jsonl_path = os.environ.get("POWERSET_TRACE_JSONL")
+    if jsonl_path:
+        _tracer.add_sink(JsonlSink(jsonl_path))
+    otlp_endpoint = os.environ.get("POWERSET_TRACE_OTLP_ENDPOINT")
+    if otlp_endpoint:
+        _tracer.add_sink(OtlpHttpSink(otlp_endpoint))
+
+
+_configure_from_env()
+atexit.register(_tracer.shutdown)
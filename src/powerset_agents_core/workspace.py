@@ -0,0 +1,180 @@
+"""Per-agent STARLOG, workspace and HEAVEN data directories for parallel runs."""
+
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_MARKER_FILE = ".powerset_workspace.json"
+_TMPFS_DIR = "/dev/shm"
+
+
+@dataclass
+class AgentWorkspace:
+    """Directory tree owned by a single agent instance."""
+    name: str
+    root: str
+    starlog_path: str
+    workspace_path: str
+    heaven_data_dir: str
+
+    def config_fields(self) -> Dict[str, str]:
+        """Keyword arguments for create_library_powerset_agent / LibraryPowersetAgentConfig."""
+        return {
+            "starlog_path": self.starlog_path,
+            "workspace_path": self.workspace_path,
+            "heaven_data_dir": self.heaven_data_dir,
+        }
+
+
+def _pid_alive(pid: Any) -> bool:
+    if not isinstance(pid, int) or pid <= 0:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class WorkspaceAllocator:
+    """
+    Allocates a unique starlog/workspace/HEAVEN_DATA_DIR tree per agent instance.
+
+    Released workspaces, and workspaces whose owning process has died, are garbage
+    collected by `collect()` according to the retention policy: anything older than
+    `max_age` seconds is removed, and beyond that only the newest `max_count` are kept.
+
+    A HEAVEN_DATA_DIR per agent keeps STARLOG registries apart, but pooled MCP servers
+    are shared only by agents with the same data dir, so every agent then gets its own
+    pooled STARLOG instance. With `share_heaven_data_dir`, all workspaces of the
+    allocator use `<base_dir>/heaven_data` and share pooled instances; their STARLOG
+    sessions are still separate (each agent has its own starlog_path), but they write to
+    one HEAVEN registry.
+
+    Args:
+        base_dir: Parent directory for workspaces; defaults to /dev/shm/powerset_agents when
+            `use_tmpfs` is set and tmpfs is available, else /tmp/powerset_agents
+        use_tmpfs: Prefer a RAM-backed directory
+        max_age: Seconds to retain a released workspace (None keeps them indefinitely)
+        max_count: Maximum released workspaces to retain (None for no limit)
+        share_heaven_data_dir: Give every workspace the same HEAVEN data dir
+    """
+
+    def __init__(
+        self,
+        base_dir: Optional[str] = None,
+        use_tmpfs: bool = False,
+        max_age: Optional[float] = 24 * 3600,
+        max_count: Optional[int] = None,
+        share_heaven_data_dir: bool = False
+    ):
+        if base_dir is None:
+            parent = _TMPFS_DIR if use_tmpfs and os.path.isdir(_TMPFS_DIR) else tempfile.gettempdir()
+            base_dir = os.path.join(parent, "powerset_agents")
+        self.base_dir = base_dir
+        self.max_age = max_age
+        self.max_count = max_count
+        self.share_heaven_data_dir = share_heaven_data_dir
+        self._lock = threading.Lock()
+
+    def allocate(self, name: str) -> AgentWorkspace:
+        """Create a fresh workspace tree for one agent instance."""
+        os.makedirs(self.base_dir, exist_ok=True)
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]", "_", name)
+        root = tempfile.mkdtemp(prefix=f"{safe_name}-", dir=self.base_dir)
+
+        workspace = AgentWorkspace(
+            name=name,
+            root=root,
+            starlog_path=os.path.join(root, "starlog"),
+            workspace_path=os.path.join(root, "workspace"),
+            heaven_data_dir=os.path.join(self.base_dir if self.share_heaven_data_dir else root, "heaven_data"),
+        )
+        for path in (workspace.starlog_path, workspace.workspace_path, workspace.heaven_data_dir):
+            os.makedirs(path, exist_ok=True)
+
+        self._write_marker(root, {"name": name, "pid": os.getpid(), "created_at": time.time()})
+        logger.info("Allocated workspace for %s: %s", name, root)
+        return workspace
+
+    def release(self, workspace: AgentWorkspace) -> None:
+        """Mark a workspace as finished so it becomes eligible for collection."""
+        marker = self._read_marker(workspace.root)
+        if marker is None:
+            return
+        marker["released_at"] = time.time()
+        self._write_marker(workspace.root, marker)
+        if self.max_age == 0:
+            self.collect()
+
+    def collect(self) -> int:
+        """Delete workspaces that fall outside the retention policy; return how many."""
+        with self._lock:
+            candidates = self._collectable()
+            now = time.time()
+            doomed = [root for root, finished in candidates
+                      if self.max_age is not None and now - finished >= self.max_age]
+            if self.max_count is not None:
+                kept = [root for root, _ in sorted(candidates, key=lambda c: c[1], reverse=True)
+                        if root not in doomed]
+                doomed.extend(kept[self.max_count:])
+
+            for root in doomed:
+                shutil.rmtree(root, ignore_errors=True)
+            if doomed:
+                logger.info("Collected %d agent workspaces under %s", len(doomed), self.base_dir)
+            return len(doomed)
+
+    def _collectable(self) -> List[Any]:
+        """(root, finished_at) for released workspaces and ones whose owner process died."""
+        if not os.path.isdir(self.base_dir):
+            return []
+        candidates = []
+        for entry in os.scandir(self.base_dir):
+            marker = self._read_marker(entry.path) if entry.is_dir() else None
+            if marker is None:
+                continue
+            if "released_at" in marker:
+                candidates.append((entry.path, marker["released_at"]))
+            elif not _pid_alive(marker.get("pid")):
+                candidates.append((entry.path, marker.get("created_at", 0.0)))
+        return candidates
+
+    @staticmethod
+    def _read_marker(root: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(os.path.join(root, _MARKER_FILE)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _write_marker(root: str, marker: Dict[str, Any]) -> None:
+        tmp_path = os.path.join(root, _MARKER_FILE + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(marker, f)
+        os.replace(tmp_path, os.path.join(root, _MARKER_FILE))
+
+
+_default_allocator: Optional[WorkspaceAllocator] = None
+_default_allocator_lock = threading.Lock()
+
+
+def get_workspace_allocator() -> WorkspaceAllocator:
+    """Return the process-wide workspace allocator, creating it on first use."""
+    global _default_allocator
+    with _default_allocator_lock:
+        if _default_allocator is None:
+            _default_allocator = WorkspaceAllocator()
+        return _default_allocator
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""Test batch construction of library powerset agents."""
+
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add the package to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+pytest.importorskip("heaven_base")
+
+from powerset_agents_core import create_library_powerset_agents, journal, prefetch
+from powerset_agents_core.batch import SharedConversionArtifacts
+from powerset_agents_core.config import LibraryPowersetAgentConfig, PayloadDiscoveryConfig
+from powerset_agents_core.mcp_inprocess import get_inprocess_host
+
+
+class _KillsWorker:
+    """Unpickling this in a worker process exits it, breaking the pool."""
+
+    def __reduce__(self):
+        return os._exit, (1,)
+
+
+@pytest.fixture(autouse=True)
+def _reset_helpers():
+    yield
+    prefetch._close_all()
+    journal._close_all()
+
+
+def _spec(tmp_path, name, **overrides):
+    curriculum = tmp_path / "curriculum.json"
+    if not curriculum.exists():
+        curriculum.write_text(json.dumps({
+            "root_files": [{"sequence_number": 0, "filename": "00_intro.md", "content": "Start here."}],
+            "directories": {},
+        }))
+    spec = {
+        "pkg_path": "example_library",
+        "help_command": "true",
+        "payload_discovery_config": PayloadDiscoveryConfig(path=str(curriculum), instructions="Learn"),
+        "name": name,
+        "starlog_path": str(tmp_path / name),
+    }
+    spec.update(overrides)
+    return spec
+
+
+def test_failures_are_reported_per_spec(tmp_path):
+    specs = [_spec(tmp_path, "GoodAgent"), _spec(tmp_path, "BadAgent", max_iterations="many")]
+    results = sorted(create_library_powerset_agents(specs, executor="thread"), key=lambda r: r.index)
+    assert results[0].ok and results[0].heaven_config.name == "GoodAgent"
+    assert not results[1].ok and results[1].name == "BadAgent"
+
+
+@pytest.mark.parametrize("executor", [None, "thread", "process"])
+def test_batch_starts_prefetch_and_journal_like_the_factory(tmp_path, monkeypatch, executor):
+    data_dir = tmp_path / "heaven_data"
+    monkeypatch.setenv("HEAVEN_DATA_DIR", str(data_dir))
+    pd_config = PayloadDiscoveryConfig(path=str(tmp_path / "curriculum.json"), instructions="Learn", prefetch_depth=1)
+    specs = [
+        _spec(tmp_path, "JournalAgent", starlog_journal="interval", heaven_data_dir=str(data_dir),
+              mcp_servers=["waypoint", "inprocess:starlog"]),
+        # Only the in-process STARLOG server applies a journal, so none is opened here
+        _spec(tmp_path, "StdioJournalAgent", starlog_journal="interval"),
+        _spec(tmp_path, "PrefetchAgent", payload_discovery_config=pd_config,
+              mcp_servers=["inprocess:waypoint", "starlog"]),
+    ]
+    results = list(create_library_powerset_agents(specs, executor=executor, max_workers=2))
+    assert all(result.ok for result in results), [result.error for result in results]
+
+    # Started in this process, where the agents run, whichever executor built them
+    assert set(journal._journals) == {str(tmp_path / "JournalAgent")}
+    assert str(tmp_path / "curriculum.json") in prefetch._prefetchers
+    # The in-process waypoint server runs here too, not in a worker process
+    prefetch_agent = next(result for result in results if result.name == "PrefetchAgent")
+    port = get_inprocess_host().start("waypoint").port
+    assert prefetch_agent.heaven_config.mcp_servers["waypoint"]["url"] == f"http://127.0.0.1:{port}/sse"
+
+
+def test_shared_artifacts_hand_out_separate_containers(tmp_path):
+    artifacts = SharedConversionArtifacts()
+    config = LibraryPowersetAgentConfig(**_spec(tmp_path, "Agent"))
+    tools, servers = artifacts.tools(config.tools), artifacts.mcp_servers(config)
+    tools.append(object())
+    servers["starlog"]["command"] = "python3"
+    servers["extra"] = {}
+
+    assert len(artifacts.tools(config.tools)) == len(tools) - 1
+    fresh = artifacts.mcp_servers(config)
+    assert fresh["starlog"]["command"] == "python" and "extra" not in fresh
+
+
+def test_unpicklable_spec_fails_alone(tmp_path):
+    specs = [_spec(tmp_path, "GoodAgent"), {**_spec(tmp_path, "Unpicklable"), "description": lambda: "x"}]
+    results = sorted(create_library_powerset_agents(specs, executor="process", max_workers=1), key=lambda r: r.index)
+    assert results[0].ok
+    assert not results[1].ok and results[1].name == "Unpicklable"
+
+
+def test_broken_process_pool_is_reported_not_raised(tmp_path):
+    specs = [{**_spec(tmp_path, f"Agent{n}"), "description": _KillsWorker()} for n in range(3)]
+    results = list(create_library_powerset_agents(specs, executor="process", max_workers=1))
+    assert len(results) == 3
+    assert not any(result.ok for result in results)
+    assert {type(result.error).__name__ for result in results} == {"BrokenProcessPool"}
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""Test record/replay cassettes."""
+
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# Add the package to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from powerset_agents_core.cassette import Cassette, CassetteMiss, normalize
+from powerset_agents_core.sandbox import BoundedExecutor
+
+AGENT = SimpleNamespace(name="demo", model="stub-fast", system_prompt="Learn demo.")
+
+
+class CountingExecutor:
+    def __init__(self):
+        self.calls = 0
+
+    async def __call__(self, prompt, agent_config):
+        self.calls += 1
+        return {"response": f"answer to {prompt}", "call": self.calls}
+
+
+def _run(execute, prompts):
+    async def run_all():
+        results = {}
+        for prompt in prompts:
+            try:
+                results[prompt] = await execute(prompt, AGENT)
+            except CassetteMiss as e:
+                results[prompt] = e
+        return results
+    return asyncio.run(run_all())
+
+
+def test_normalize_masks_volatile_tokens():
+    a = normalize({"prompt": "run  2024-05-01T10:00:00Z in /tmp/ws-0123456789abcdef0123\n"})
+    b = normalize({"prompt": "run 2025-01-02T11:22:33Z in /tmp/ws-fedcba9876543210fedc"})
+    assert a == b
+
+
+def test_replay_then_live_records_misses(tmp_path):
+    live = CountingExecutor()
+    cassette = Cassette(str(tmp_path / "c.sqlite"))
+    execute = cassette.wrap_executor(live)
+    first = _run(execute, ["a", "b"])
+    second = _run(execute, ["a", "b", "c"])
+    assert live.calls == 3
+    assert [second[p]["call"] for p in "abc"] == [1, 2, 3]
+    assert first == {p: second[p] for p in "ab"}
+    assert cassette.stats()["hits"] == 2
+
+    other_model = SimpleNamespace(**{**vars(AGENT), "model": "stub-slow"})
+    asyncio.run(execute("a", other_model))
+    assert live.calls == 4
+
+
+def test_strict_replay_is_offline(tmp_path):
+    path = str(tmp_path / "c.sqlite")
+    _run(Cassette(path, mode="record").wrap_executor(CountingExecutor()), ["a"])
+
+    live = CountingExecutor()
+    results = _run(Cassette(path, mode="replay").wrap_executor(live), ["a", "unseen"])
+    assert live.calls == 0
+    assert results["a"]["response"] == "answer to a"
+    assert isinstance(results["unseen"], CassetteMiss)
+
+
+def test_record_mode_always_goes_live(tmp_path):
+    live = CountingExecutor()
+    execute = Cassette(str(tmp_path / "c.sqlite"), mode="record").wrap_executor(live)
+    _run(execute, ["a"])
+    _run(execute, ["a"])
+    assert live.calls == 2
+
+
+def test_lru_limits(tmp_path):
+    cassette = Cassette(str(tmp_path / "c.sqlite"), max_entries=3)
+    for number in range(5):
+        cassette.put("llm", {"prompt": f"p{number}"}, {"n": number})
+    cassette.lookup("llm", {"prompt": "p2"})
+    cassette.put("llm", {"prompt": "p5"}, {"n": 5})
+    assert cassette.stats()["entries"] == 3
+    assert cassette.lookup("llm", {"prompt": "p2"}) == (True, {"n": 2})
+    assert cassette.lookup("llm", {"prompt": "p3"}) == (False, None)
+
+    small = Cassette(str(tmp_path / "small.sqlite"), max_bytes=100)
+    small.put("llm", "a", "x" * 60)
+    small.put("llm", "b", "y" * 60)
+    assert small.stats()["entries"] == 1
+
+
+def test_sync_wrap_and_non_json_responses(tmp_path):
+    calls = []
+
+    def tool(x):
+        calls.append(x)
+        return {1, 2, x}
+
+    wrapped = Cassette(str(tmp_path / "c.sqlite")).wrap("tool:set", tool)
+    assert wrapped(3) == {1, 2, 3}
+    assert wrapped(3) == {1, 2, 3}
+    assert calls == [3]
+
+
+def test_bounded_commands_replay(tmp_path):
+    path = str(tmp_path / "c.sqlite")
+    marker = tmp_path / "ran"
+    command = f"touch {marker} && echo hi"
+    recorded = BoundedExecutor(cassette=Cassette(path, mode="record")).run(command)
+    marker.unlink()
+    replayed = BoundedExecutor(cassette=Cassette(path, mode="replay")).run(command)
+    assert replayed.output == recorded.output == "hi\n"
+    assert not marker.exists()
+    with pytest.raises(CassetteMiss):
+        BoundedExecutor(cassette=Cassette(path, mode="replay")).run("echo other")
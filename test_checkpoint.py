@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Test resuming curricula from waypoint progress in the STARLOG diary."""
+
+import json
+import os
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+
+# Add the package to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from powerset_agents_core.checkpoint import (
+    checkpoint_fingerprint,
+    load_progress,
+    resume_since,
+    trim_curriculum,
+    waypoint_ids,
+)
+
+CURRICULUM = {
+    "domain": "example",
+    "root_files": [{"sequence_number": 1, "filename": "00_overview.md", "title": "Overview", "content": "o"}],
+    "directories": {
+        "basics": [
+            {"sequence_number": 2, "filename": "01_models.md", "title": "Models", "content": "m"},
+            {"sequence_number": 3, "filename": "02_fields.md", "title": "Fields", "content": "f"},
+        ],
+        "advanced": [{"sequence_number": 4, "filename": "03_validators.md", "title": "Validators", "content": "v"}],
+    },
+}
+
+
+@pytest.fixture
+def waypoint(tmp_path, monkeypatch):
+    """Waypoint's own tools, logging to a diary under a fresh HEAVEN_DATA_DIR."""
+    mcp_server_v2 = pytest.importorskip("payload_discovery.mcp_server_v2")
+    heaven_data_dir = tmp_path / "heaven_data"
+    (heaven_data_dir / "registry").mkdir(parents=True)
+    monkeypatch.setenv("HEAVEN_DATA_DIR", str(heaven_data_dir))
+    starlog = tmp_path / f"session_{uuid.uuid4().hex[:8]}"
+    yield mcp_server_v2, str(starlog), str(heaven_data_dir)
+    for suffix in (".json", ".temp"):
+        state = f"/tmp/waypoint_state_{starlog.name}{suffix}"
+        if os.path.exists(state):
+            os.remove(state)
+
+
+def test_served_steps_count_once_the_next_one_is_served(tmp_path, waypoint):
+    server, starlog, heaven_data_dir = waypoint
+    path = tmp_path / "curriculum.json"
+    path.write_text(json.dumps(CURRICULUM))
+    assert checkpoint_fingerprint(starlog, heaven_data_dir) == "none/none"
+
+    server.start_waypoint_journey(str(path), starlog)
+    server.navigate_to_next_waypoint(starlog)
+    # The agent is on basics/01_models.md, so only the overview is done
+    assert load_progress(starlog, heaven_data_dir, CURRICULUM) == {"00_overview.md"}
+    fingerprint = checkpoint_fingerprint(starlog, heaven_data_dir)
+
+    server.navigate_to_next_waypoint(starlog)
+    assert load_progress(starlog, heaven_data_dir, CURRICULUM) == {"00_overview.md", "basics/01_models.md"}
+    assert checkpoint_fingerprint(starlog, heaven_data_dir) != fingerprint
+
+    # An aborted step was not finished; a resumed journey on the trimmed copy picks it up
+    server.abort_waypoint_journey(starlog)
+    completed = load_progress(starlog, heaven_data_dir, CURRICULUM)
+    trimmed = tmp_path / "trimmed.json"
+    trimmed.write_text(json.dumps(trim_curriculum(CURRICULUM, completed)))
+    server.start_waypoint_journey(str(trimmed), starlog)
+    server.navigate_to_next_waypoint(starlog)
+    # Serving the last waypoint ends the journey
+    assert load_progress(starlog, heaven_data_dir, CURRICULUM) == set(waypoint_ids(CURRICULUM))
+
+
+def test_progress_only_counts_for_the_bound_curriculum_and_version(tmp_path, waypoint):
+    server, starlog, heaven_data_dir = waypoint
+    path = tmp_path / "curriculum.json"
+    path.write_text(json.dumps(CURRICULUM))
+    assert resume_since(starlog, "abc", "1.0") is None
+
+    server.start_waypoint_journey(str(path), starlog)
+    server.navigate_to_next_waypoint(starlog)
+    assert resume_since(starlog, "abc", "1.0") is None
+    assert load_progress(starlog, heaven_data_dir, CURRICULUM, resume_since(starlog, "abc", "1.0")) == {
+        "00_overview.md"
+    }
+    # A new package version starts over
+    since = resume_since(starlog, "abc", "2.0")
+    assert since is not None
+    assert load_progress(starlog, heaven_data_dir, CURRICULUM, since) == set()
+    assert load_progress(starlog, heaven_data_dir, {**CURRICULUM, "domain": "other"}) == set()
+
+
+def test_trim_drops_completed_waypoints_and_empty_directories():
+    assert waypoint_ids(CURRICULUM) == [
+        "00_overview.md", "basics/01_models.md", "basics/02_fields.md", "advanced/03_validators.md"
+    ]
+    trimmed = trim_curriculum(CURRICULUM, {"00_overview.md", "advanced/03_validators.md"})
+    assert trimmed["root_files"] == []
+    assert list(trimmed["directories"]) == ["basics"]
+    assert waypoint_ids(trimmed) == ["basics/01_models.md", "basics/02_fields.md"]
+    assert trimmed["domain"] == "example"
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
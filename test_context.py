@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""Test context budget compaction."""
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add the package to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from powerset_agents_core.context import ContextBudget, estimate_tokens
+
+HELP_DUMP = "Help on package demo:\n\nNAME\n    demo\n\nCLASSES\n" + "    Widget(x)\n" * 400
+
+
+def _iteration(number, tool_name="BashTool", output="x" * 2000):
+    return [
+        {"role": "user", "content": f"step {number}"},
+        {"role": "assistant", "content": "", "tool_calls": [{"id": str(number)}]},
+        {"role": "tool", "name": tool_name, "content": output, "tool_call_id": str(number)},
+        {"role": "assistant", "content": f"done {number}"},
+    ]
+
+
+def _history(iterations):
+    messages = [{"role": "system", "content": "You are a learning agent."}]
+    for number in range(iterations):
+        if number == 0:
+            messages += _iteration(number, output=HELP_DUMP)
+        elif number == 1:
+            messages += _iteration(number, tool_name="update_debug_diary", output="FACT: Widget takes x")
+        else:
+            messages += _iteration(number)
+    return messages
+
+
+def _tokens(messages):
+    return sum(estimate_tokens(m["content"]) + 4 for m in messages)
+
+
+def test_under_budget_is_untouched():
+    messages = _history(2)
+    budget = ContextBudget(budget_tokens=100000)
+    assert budget.compact(messages) == messages
+    assert budget.report()[0]["tokens_before"] == budget.report()[0]["tokens_after"]
+
+
+def test_old_tool_outputs_are_compacted_deterministically():
+    messages = _history(6)
+    budget = ContextBudget(budget_tokens=3000, keep_recent=4)
+    compacted = budget.compact(messages)
+    assert compacted == ContextBudget(budget_tokens=3000, keep_recent=4).compact(messages)
+    assert compacted[0] == messages[0]
+    assert compacted[-4:] == messages[-4:]
+    tool_outputs = {m["tool_call_id"]: m["content"] for m in compacted if m["role"] == "tool"}
+    assert tool_outputs["0"].startswith("[help output compacted")
+    assert tool_outputs["1"] == "FACT: Widget takes x"
+    assert "chars compacted" in tool_outputs["2"]
+    assert _tokens(compacted) <= 3000
+    assert messages[3]["content"] == HELP_DUMP  # input untouched
+
+
+def test_every_starlog_tool_output_is_kept():
+    fact = "FACT: " + "y" * 600
+    messages = [{"role": "system", "content": "You are a learning agent."}]
+    for number, tool_name in enumerate(["add_rule", "check", "view_debug_diary", "query_project_rules"]):
+        messages += _iteration(number, tool_name=tool_name, output=fact)
+    messages += _iteration(4, tool_name="starlog_update", output="z" * 8000)  # not a STARLOG tool
+    messages += _iteration(5)
+
+    compacted = ContextBudget(budget_tokens=1500, keep_recent=4).compact(messages)
+    outputs = {m["name"]: m["content"] for m in compacted[:-4] if m["role"] == "tool"}
+    assert [outputs[name] for name in ("add_rule", "check", "view_debug_diary", "query_project_rules")] == [fact] * 4
+    assert "chars compacted" in outputs["starlog_update"]
+
+
+def test_oldest_turns_dropped_and_starlog_facts_carried():
+    messages = _history(12)
+    budget = ContextBudget(budget_tokens=1200, keep_recent=4, tool_output_chars=200)
+    compacted = budget.compact(messages)
+    assert _tokens(compacted) <= 1200
+    assert compacted[0]["role"] == "system"
+    assert compacted[1]["role"] == "user"
+    assert "earlier messages compacted" in compacted[1]["content"]
+    assert "FACT: Widget takes x" in compacted[1]["content"]
+    assert budget.report()[0]["dropped"] > 0
+    # Tool results stay paired with the assistant call that requested them
+    for index, message in enumerate(compacted):
+        if message["role"] == "tool":
+            assert compacted[index - 1]["role"] == "assistant"
+
+
+def test_facts_are_carried_when_the_history_starts_mid_turn():
+    messages = [
+        {"role": "system", "content": "You are a learning agent."},
+        {"role": "assistant", "content": "", "tool_calls": [{"id": "0"}]},
+        {"role": "tool", "name": "add_rule", "content": "FACT: Widget takes x", "tool_call_id": "0"},
+        {"role": "assistant", "content": "a" * 400},
+        {"role": "user", "content": "next step"},
+        {"role": "assistant", "content": "done"},
+    ]
+    compacted = ContextBudget(budget_tokens=60, keep_recent=2).compact(messages)
+    assert [m["role"] for m in compacted] == ["system", "system", "user", "assistant"]
+    assert compacted[1]["content"].startswith("[3 earlier messages compacted")
+    assert "FACT: Widget takes x" in compacted[1]["content"]
+
+
+def test_prompt_size_stays_flat_across_iterations():
+    budget = ContextBudget(budget_tokens=2500, keep_recent=4)
+    history = [{"role": "system", "content": "You are a learning agent."}]
+    for number in range(40):
+        history += _iteration(number)
+        budget.compact_in_place(history)
+    sizes = [stats["tokens_after"] for stats in budget.report()]
+    assert max(sizes[5:]) <= 2500
+    assert len(budget.report()) == 40
+
+
+def test_message_objects_and_history_attribute():
+    class Message(SimpleNamespace):
+        pass
+
+    history = SimpleNamespace(messages=[
+        Message(type="system", content="sys", name=None),
+        Message(type="human", content="go", name=None),
+        Message(type="tool", content=HELP_DUMP, name="BashTool"),
+        Message(type="ai", content="ok", name=None),
+    ])
+    ContextBudget(budget_tokens=50, keep_recent=1).compact_in_place(history)
+    assert history.messages[0].content == "sys"
+    assert all("Help on package" not in m.content for m in history.messages)
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""Test the process-wide curriculum store."""
+
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add the package to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from powerset_agents_core import curriculum
+from powerset_agents_core.config import PayloadDiscoveryConfig
+from powerset_agents_core.curriculum import CurriculumStore
+
+RAW = {"domain": "demo", "root_files": [], "directories": {}}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return CurriculumStore(materialize_dir=str(tmp_path / "materialized"))
+
+
+def _write(path, raw, mtime_ns=None):
+    path.write_text(json.dumps(raw))
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_file_is_parsed_once(store, tmp_path, monkeypatch):
+    path = tmp_path / "curriculum.json"
+    _write(path, RAW)
+    first = store.load_raw(str(path))
+    assert first == RAW
+
+    parses = []
+    monkeypatch.setattr(curriculum.json, "loads", lambda data: parses.append(data) or {})
+    assert store.load_raw(str(path)) is first
+    assert parses == []
+
+
+def test_touch_keeps_the_entry_and_real_changes_reparse(store, tmp_path):
+    path = tmp_path / "curriculum.json"
+    _write(path, RAW, mtime_ns=1_000_000_000)
+    first = store.load_raw(str(path))
+    first_hash = store.content_hash(str(path))
+
+    os.utime(path, ns=(2_000_000_000, 2_000_000_000))
+    assert store.load_raw(str(path)) is first
+
+    _write(path, {**RAW, "domain": "changed"}, mtime_ns=3_000_000_000)
+    assert store.load_raw(str(path))["domain"] == "changed"
+    assert store.content_hash(str(path)) != first_hash
+
+
+def test_empty_files_are_hashed_without_mmap(store, tmp_path):
+    path = tmp_path / "empty.json"
+    path.write_bytes(b"")
+    with pytest.raises(ValueError):
+        store.load_raw(str(path))
+    assert curriculum._hash_mapped(str(path)) == curriculum.hashlib.sha256(b"").hexdigest()
+
+
+def test_model_is_validated_once(store, tmp_path):
+    pytest.importorskip("payload_discovery")
+    path = tmp_path / "curriculum.json"
+    _write(path, RAW)
+    model = store.load(str(path))
+    assert model.domain == "demo"
+    assert store.load(str(path)) is model
+
+
+def test_materialize_is_content_addressed(store):
+    first = store.materialize_raw(RAW)
+    assert store.materialize_raw(dict(reversed(list(RAW.items())))) == first
+    assert json.loads(Path(first).read_text()) == RAW
+    assert store.materialize_raw({**RAW, "domain": "other"}) != first
+
+
+def test_curriculum_path_prefers_path_then_model(store, tmp_path):
+    path = tmp_path / "curriculum.json"
+    _write(path, RAW)
+    assert store.curriculum_path(PayloadDiscoveryConfig(path=str(path), instructions="Learn")) == str(path)
+    with pytest.raises(ValueError, match="either a path or a model"):
+        store.curriculum_path(PayloadDiscoveryConfig(instructions="Learn"))
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
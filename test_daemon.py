@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""Test the agent daemon and its Unix socket client."""
+
+import asyncio
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+# Add the package to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from powerset_agents_core import daemon as daemon_module
+from powerset_agents_core.daemon import AgentDaemon, DaemonClient, _daemon_running
+
+
+class FakeConfig:
+    name = "FakeAgent"
+
+
+def _start(daemon):
+    server = threading.Thread(target=daemon.serve_forever)
+    server.start()
+    while not _daemon_running(daemon.socket_path):
+        time.sleep(0.02)
+    return server
+
+
+def _stop(socket_path, server):
+    with DaemonClient(socket_path) as client:
+        status = client.request("status")
+        client.request("shutdown")
+    server.join(timeout=5)
+    return status
+
+
+def test_concurrent_sessions_share_one_daemon(tmp_path):
+    socket_path = str(tmp_path / "daemon.sock")
+    builds = []
+    in_flight = []
+    peak = [0]
+
+    def build():
+        builds.append(1)
+        time.sleep(0.05)  # widen the window for concurrent attaches
+        return FakeConfig()
+
+    async def echo_executor(session, message):
+        in_flight.append(session.session_id)
+        peak[0] = max(peak[0], len(in_flight))
+        await asyncio.sleep(0.05)
+        in_flight.remove(session.session_id)
+        return f"{session.agent_name}#{session.turns}: {message}"
+
+    daemon = AgentDaemon(agents={"fake": build}, socket_path=socket_path, executor=echo_executor)
+    server = _start(daemon)
+
+    responses = []
+
+    def converse(index):
+        with DaemonClient(socket_path) as client:
+            client.attach("fake")
+            responses.append(client.send(f"hello {index}"))
+            responses.append(client.send("again"))
+
+    clients = [threading.Thread(target=converse, args=(i,)) for i in range(4)]
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    status = _stop(socket_path, server)
+
+    assert sorted(responses) == [f"fake#1: hello {i}" for i in range(4)] + ["fake#2: again"] * 4
+    assert builds == [1]
+    assert status["loaded"] == ["fake"]
+    assert peak[0] > 1  # sessions' turns overlapped instead of running back to back
+    assert not server.is_alive()
+
+
+class HeavenSessionHandler(BaseHTTPRequestHandler):
+    """HEAVEN's session API: start, post a message, stream the turn's events."""
+    protocol_version = "HTTP/1.1"
+    sessions = {}
+    histories = {}
+
+    def _json(self, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"null")
+        if self.path == "/api/session/start":
+            session_id = f"s{len(self.sessions)}"
+            self.sessions[session_id] = None
+            return self._json({"session_id": session_id})
+        session_id = self.path.split("/")[3]
+        assert payload["agent"] == "FakeAgent" and payload["tools"] == ["BashTool"]
+        self.sessions[session_id] = payload
+        self._json({"status": "accepted"})
+
+    def do_GET(self):
+        payload = self.sessions[self.path.split("/")[3]]
+        history_id = payload["history_id"] or f"h{len(self.histories)}"
+        turns = self.histories[history_id] = self.histories.get(history_id, 0) + 1
+        events = [
+            {"event_type": "USER_MESSAGE", "data": {"content": payload["text"]}},
+            {"event_type": "AGENT_MESSAGE", "data": {"content": f"{history_id}/{turns}: {payload['text']}"},
+             "history_id": history_id},
+            {"event_type": "CONVERSATION_COMPLETE", "data": {}},
+        ]
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        for event in events:
+            self.wfile.write(f"data: {json.dumps(event)}\n\n".encode())
+        self.close_connection = True
+
+    def log_message(self, *args):
+        pass
+
+
+class ToolConfig(FakeConfig):
+    tools = ["BashTool"]
+
+
+def test_sessions_keep_their_history_on_the_heaven_server(tmp_path):
+    http_server = ThreadingHTTPServer(("127.0.0.1", 0), HeavenSessionHandler)
+    threading.Thread(target=http_server.serve_forever, daemon=True).start()
+    socket_path = str(tmp_path / "daemon.sock")
+    daemon = AgentDaemon(agents={"fake": ToolConfig}, socket_path=socket_path,
+                         server_url=f"http://127.0.0.1:{http_server.server_port}")
+    server = _start(daemon)
+    try:
+        with DaemonClient(socket_path) as first, DaemonClient(socket_path) as second:
+            first.attach("fake")
+            second.attach("fake")
+            replies = [first.send("a"), second.send("b"), first.send("c"), second.send("d")]
+        status = _stop(socket_path, server)
+    finally:
+        http_server.shutdown()
+
+    first_id, second_id = replies[0].split("/")[0], replies[1].split("/")[0]
+    assert first_id != second_id
+    assert replies == [f"{first_id}/1: a", f"{second_id}/1: b", f"{first_id}/2: c", f"{second_id}/2: d"]
+    assert sorted(HeavenSessionHandler.sessions) == ["s0", "s1"]
+    # Session starts and messages share one kept-alive connection; each event stream has its own
+    assert status["http"]["requests"] == 2 + 4 + 4 and status["http"]["connects"] == 1 + 4
+
+
+def test_running_daemon_is_reused_only_for_the_same_server(tmp_path):
+    socket_path = str(tmp_path / "daemon.sock")
+    server = _start(AgentDaemon(agents={"fake": FakeConfig}, socket_path=socket_path))
+    try:
+        daemon_module.ensure_daemon(socket_path)
+        with pytest.raises(RuntimeError, match="in-process turns"):
+            daemon_module.ensure_daemon(socket_path, server_url="http://heaven:9000")
+    finally:
+        _stop(socket_path, server)
+
+
+def test_cli_attach_runs_turns_in_the_daemon_unless_a_server_is_given(monkeypatch):
+    from powerset_agents_core import cli, registry
+
+    calls = []
+    monkeypatch.setattr(daemon_module, "attach_repl", lambda *args, **kwargs: calls.append((args, kwargs)))
+    name = registry.get_registry().names()[0]
+    cli.run_agent(name, attach=True)
+    cli.run_agent(name, server_url="http://heaven:9000", attach=True)
+    assert calls == [((name,), {"server_url": None}), ((name,), {"server_url": "http://heaven:9000"})]
@@ -3,13 +3,14 @@
 
 import sys
 import json
+import tempfile
 from pathlib import Path
 
 # Add the package to path
 sys.path.insert(0, str(Path(__file__).parent / "src"))
 
 from powerset_agents_core import create_library_powerset_agent
-from powerset_agents_core.config import LibraryPowersetAgentConfig
+from powerset_agents_core.config import LibraryPowersetAgentConfig, PayloadDiscoveryConfig
 
 # Create a mock PayloadDiscovery for testing
 class MockPayloadDiscovery:
@@ -27,14 +28,20 @@ class MockPayloadDiscovery:
 def test_factory():
     """Test creating a library powerset agent configuration."""
     
-    # Create mock PayloadDiscovery
+    # Create mock PayloadDiscovery and write it where waypoint can read it
     pd = MockPayloadDiscovery()
+    curriculum_path = Path(tempfile.mkdtemp()) / "example_curriculum.json"
+    curriculum_path.write_text(json.dumps(pd.model_dump()))
+    pd_config = PayloadDiscoveryConfig(
+        path=str(curriculum_path),
+        instructions="Learn example_library"
+    )
     
     # Create agent config using factory
     agent_config = create_library_powerset_agent(
         pkg_path="example_library",
         help_command="python -c 'import example_library; help(example_library)'",
-        payload_discovery=pd,
+        payload_discovery_config=pd_config,
         name="ExampleLibraryAgent",
         starlog_path="/tmp/example_learning_session",
         description="Agent that learns the example library",
@@ -57,5 +64,66 @@ def test_factory():
     
     return agent_config
 
+
+def _library_config(curriculum_path, **overrides):
+    fields = dict(
+        pkg_path="example_library",
+        help_command="true",
+        payload_discovery_config=PayloadDiscoveryConfig(path=str(curriculum_path), instructions="Learn"),
+        name="ExampleLibraryAgent",
+        starlog_path="/tmp/example_learning_session",
+    )
+    fields.update(overrides)
+    return fields
+
+
+def test_content_hash_tracks_fields_and_curriculum_contents():
+    curriculum_path = Path(tempfile.mkdtemp()) / "curriculum.json"
+    curriculum_path.write_text(json.dumps(MockPayloadDiscovery().model_dump()))
+    original = LibraryPowersetAgentConfig(**_library_config(curriculum_path)).content_hash()
+
+    assert LibraryPowersetAgentConfig(**_library_config(curriculum_path)).content_hash() == original
+    assert LibraryPowersetAgentConfig(**_library_config(curriculum_path, model="gpt-4o")).content_hash() != original
+
+    # Same path, new contents
+    curriculum_path.write_text(json.dumps({"root_files": ["CHANGED.md"], "directories": []}))
+    assert LibraryPowersetAgentConfig(**_library_config(curriculum_path)).content_hash() != original
+
+
+def test_cached_configs_are_independent_copies():
+    from powerset_agents_core import clear_heaven_config_cache, heaven_config_cache_info
+
+    curriculum_path = Path(tempfile.mkdtemp()) / "curriculum.json"
+    curriculum_path.write_text(json.dumps(MockPayloadDiscovery().model_dump()))
+    clear_heaven_config_cache()
+    first = create_library_powerset_agent(**_library_config(curriculum_path))
+    hits = heaven_config_cache_info()["hits"]
+    second = create_library_powerset_agent(**_library_config(curriculum_path))
+    assert heaven_config_cache_info()["hits"] == hits + 1
+
+    first.tools.append("ExtraTool")
+    first.mcp_servers["starlog"]["env"]["HEAVEN_DATA_DIR"] = "/tmp/mutated"
+    third = create_library_powerset_agent(**_library_config(curriculum_path))
+    for config in (second, third):
+        assert "ExtraTool" not in config.tools
+        assert config.mcp_servers["starlog"]["env"]["HEAVEN_DATA_DIR"] == "/tmp/heaven_data"
+
+
+def test_cache_follows_route_table_changes():
+    from powerset_agents_core.routing import DEFAULT_ROUTES, RouteTable, get_route_table, set_route_table
+
+    curriculum_path = Path(tempfile.mkdtemp()) / "curriculum.json"
+    curriculum_path.write_text(json.dumps(MockPayloadDiscovery().model_dump()))
+    original = get_route_table()
+    try:
+        set_route_table(RouteTable({**DEFAULT_ROUTES, "aliases": {"house-model": "gpt-4o"}}))
+        assert create_library_powerset_agent(**_library_config(curriculum_path, model="house-model")).model == "gpt-4o"
+        set_route_table(RouteTable({**DEFAULT_ROUTES, "aliases": {"house-model": "claude-sonnet-4"}}))
+        assert create_library_powerset_agent(**_library_config(curriculum_path, model="house-model")).model == \
+            "claude-sonnet-4"
+    finally:
+        set_route_table(original)
+
+
 if __name__ == "__main__":
     config = test_factory()
\ No newline at end of file
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""Test fleet scheduling, journaling and crash resume."""
+
+import json
+import sys
+import time
+from pathlib import Path
+
+# Add the package to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from powerset_agents_core import fleet
+from powerset_agents_core.fleet import FleetOrchestrator, load_manifest
+
+
+def _fake_job(job):
+    time.sleep(0.1)
+    if job["spec"]["pkg_path"] == "broken_lib":
+        return {"status": "failed", "elapsed": 0.1, "error": "ImportError: broken_lib"}
+    return {"status": "done", "elapsed": 0.1}
+
+
+def test_manifest_merges_defaults_and_names(tmp_path):
+    path = tmp_path / "manifest.json"
+    path.write_text(json.dumps({
+        "defaults": {"model": "claude-sonnet-4-5", "help_command": "true"},
+        "libraries": [{"pkg_path": "lib_a"}, {"pkg_path": "lib_b", "model": "gpt-5-mini"}],
+    }))
+    entries = load_manifest(str(path))
+    assert [e["name"] for e in entries] == ["lib_a_learner", "lib_b_learner"]
+    assert [e["model"] for e in entries] == ["claude-sonnet-4-5", "gpt-5-mini"]
+
+
+def test_run_respects_quota_and_resumes_from_journal(tmp_path, monkeypatch):
+    monkeypatch.setattr(fleet, "_run_fleet_job", _fake_job)
+    entries = [{"name": f"lib{i}", "pkg_path": f"lib{i}"} for i in range(4)]
+    entries.append({"name": "broken", "pkg_path": "broken_lib"})
+
+    orchestrator = FleetOrchestrator(entries, str(tmp_path), max_workers=4,
+                                     provider_quotas={"stub": 2}, dry_run=True)
+    started = time.perf_counter()
+    results = list(orchestrator.run())
+    assert time.perf_counter() - started >= 0.3  # 5 jobs, 2 at a time
+    assert sorted(r.name for r in results if r.ok) == ["lib0", "lib1", "lib2", "lib3"]
+    assert orchestrator.summary() == {"done": 4, "failed": 1}
+
+    # A library left "started" by a crash resumes in its old workspace
+    crashed_root = orchestrator.allocator.allocate("lib4").root
+    with open(orchestrator.journal_path, "a") as journal:
+        journal.write(json.dumps({"name": "lib4", "status": "started", "workspace": crashed_root}) + "\n")
+
+    rerun = FleetOrchestrator(entries + [{"name": "lib4", "pkg_path": "lib4"}], str(tmp_path),
+                              dry_run=True, retry_failed=False)
+    resumed = list(rerun.run())
+    assert [(r.name, r.resumed, r.workspace) for r in resumed] == [("lib4", True, crashed_root)]
+
+
+def test_dry_run_renders_prompts_with_literal_braces(tmp_path):
+    curriculum = tmp_path / "curriculum.json"
+    curriculum.write_text(json.dumps({
+        "root_files": [{"sequence_number": 0, "filename": "00_intro.md", "content": "Start here."}],
+        "directories": {},
+    }))
+    entries = [{
+        "name": "json_learner",
+        "pkg_path": "json",
+        "help_command": "true",
+        "payload_discovery_config": {"path": str(curriculum), "instructions": "Learn json"},
+        "prompt": 'Learn {pkg_path}, then parse {"a": 1}.',
+    }]
+    orchestrator = FleetOrchestrator(entries, str(tmp_path / "state"), max_workers=1, dry_run=True)
+    [result] = list(orchestrator.run())
+    assert result.ok, result.error
+
+    record = json.loads((Path(result.workspace) / "workspace" / "fleet_result.json").read_text())
+    assert record["prompt"] == 'Learn json, then parse {"a": 1}.'
+    assert record["result"]["content"].startswith("stub response")
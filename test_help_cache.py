@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""Test the help_command output cache and package fingerprints."""
+
+import os
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+# Add the package to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from powerset_agents_core.help_cache import HelpOutputCache, package_fingerprint
+
+
+def _package(tmp_path, name="mylib"):
+    package = tmp_path / name
+    package.mkdir()
+    (package / "__init__.py").write_text("VALUE = 1\n")
+    return package
+
+
+def _touch(path, mtime_ns):
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_relative_path_is_fingerprinted_from_sources(tmp_path, monkeypatch):
+    package = _package(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    fingerprint = package_fingerprint("./mylib")
+    assert fingerprint.startswith("src-")
+    assert package_fingerprint(str(package)) == fingerprint
+
+    _touch(package / "__init__.py", 1_000_000_000)
+    assert package_fingerprint("./mylib") != fingerprint
+
+
+def test_absolute_path_invalidates_when_sources_change(tmp_path):
+    package = _package(tmp_path)
+    fingerprint = package_fingerprint(str(package))
+    assert fingerprint.startswith("src-")
+
+    (package / "extra.py").write_text("pass\n")
+    assert package_fingerprint(str(package)) != fingerprint
+
+
+def test_module_names_use_metadata_or_sources(tmp_path, monkeypatch):
+    import pytest as installed
+    assert package_fingerprint("pytest") == installed.__version__
+
+    _package(tmp_path, "powerset_test_unpackaged")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    assert package_fingerprint("powerset_test_unpackaged.sub").startswith("src-")
+    assert package_fingerprint("powerset_test_missing_module") == "unknown"
+    assert package_fingerprint(str(tmp_path / "missing")) == "unknown"
+
+
+def test_preload_runs_help_once_and_indexes_chunks(tmp_path):
+    package = _package(tmp_path)
+    runs = tmp_path / "runs.log"
+    cache = HelpOutputCache(cache_dir=str(tmp_path / "cache"), chunk_chars=60)
+    command = f"echo run >> {runs}; printf 'NAME\\n    mylib\\n\\nCLASSES\\n    class Widget\\n'"
+
+    resource = cache.preload(str(package), command)
+    assert cache.preload(str(package), command) is resource
+    assert runs.read_text() == "run\n"
+    index = Path(resource.index_path).read_text()
+    assert "sections: NAME" in index and "Widget" in index
+
+    # A fresh cache finds the finished entry on disk instead of rerunning the command
+    reloaded = HelpOutputCache(cache_dir=str(tmp_path / "cache")).preload(str(package), command)
+    assert reloaded.chunk_paths == resource.chunk_paths
+    assert runs.read_text() == "run\n"
+
+
+def test_failed_help_command_raises(tmp_path):
+    cache = HelpOutputCache(cache_dir=str(tmp_path / "cache"))
+    with pytest.raises(RuntimeError, match="help command failed"):
+        cache.preload(str(_package(tmp_path)), "exit 3")
+
+
+def test_help_commands_run_outside_the_cache_lock(tmp_path):
+    slow, fast = _package(tmp_path, "slowlib"), _package(tmp_path, "fastlib")
+    release = tmp_path / "release"
+    cache = HelpOutputCache(cache_dir=str(tmp_path / "cache"))
+    results = []
+
+    def preload_slow():
+        results.append(cache.preload(str(slow), f"while [ ! -e {release} ]; do sleep 0.01; done; echo slow"))
+
+    threads = [threading.Thread(target=preload_slow) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    try:
+        # Served while the slow command is still running
+        assert cache.preload(str(fast), "echo fast").total_chars > 0
+        assert all(thread.is_alive() for thread in threads)
+    finally:
+        release.touch()
+        for thread in threads:
+            thread.join()
+    # Both callers got the single run's result
+    assert results[0] is results[1]
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""Test the write-behind STARLOG journal."""
+
+import asyncio
+import json
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+# Add the package to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from powerset_agents_core import journal as journal_module
+from powerset_agents_core.journal import StarlogJournal, apply_pending, get_journal, wrap_session
+
+
+class FakeStarlog:
+    """Records the calls that reach STARLOG."""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = []
+
+    async def call_tool(self, name, arguments=None):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.calls.append((name, dict(arguments or {})))
+        return {"tool": name, "writes_seen": sum(1 for call, _ in self.calls if call != name)}
+
+
+@pytest.fixture(autouse=True)
+def _reset_journals():
+    yield
+    journal_module._close_all()
+
+
+def _ack(entry):
+    return {"journaled": entry.seq}
+
+
+def test_writes_are_acknowledged_then_applied_in_order(tmp_path):
+    starlog = FakeStarlog(latency=0.01)
+    get_journal(str(tmp_path), policy="interval", interval_ms=10)
+    session = wrap_session(starlog, ack=_ack)
+
+    async def agent():
+        acks = [
+            await session.call_tool("update_debug_diary", {"path": str(tmp_path), "content": f"note {n}"})
+            for n in range(5)
+        ]
+        # Acknowledged before STARLOG saw them all
+        assert len(starlog.calls) < 5
+        check = await session.call_tool("check", {"path": str(tmp_path)})
+        return acks, check
+
+    acks, check = asyncio.run(agent())
+    assert [ack["journaled"] for ack in acks] == [1, 2, 3, 4, 5]
+    # check reads its own writes: every diary entry was applied first, in order
+    assert check == {"tool": "check", "writes_seen": 5}
+    assert [args["content"] for _, args in starlog.calls[:5]] == [f"note {n}" for n in range(5)]
+
+
+def test_unjournaled_paths_pass_through(tmp_path):
+    starlog = FakeStarlog()
+    session = wrap_session(starlog, ack=_ack)
+    result = asyncio.run(session.call_tool("add_rule", {"path": str(tmp_path / "other"), "rule": "r"}))
+    assert result["tool"] == "add_rule"
+
+
+def test_always_policy_group_commits(tmp_path):
+    journal = StarlogJournal(str(tmp_path), policy="always")
+    threads = [
+        threading.Thread(target=lambda n=n: [journal.append("add_rule", {"rule": f"{n}-{i}"}) for i in range(50)])
+        for n in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert journal.appended == 400
+    assert 0 < journal.fsyncs <= 400
+    lines = (tmp_path / journal_module.JOURNAL_FILENAME).read_text().splitlines()
+    assert len(lines) == 400
+    journal.close()
+
+
+def test_session_policy_writes_only_at_session_end(tmp_path):
+    journal = StarlogJournal(str(tmp_path), policy="session")
+    journal.append("add_rule", {"rule": "r"})
+    assert journal.fsyncs == 0
+    assert (tmp_path / journal_module.JOURNAL_FILENAME).read_bytes() == b""
+    journal.close()
+    assert StarlogJournal(str(tmp_path), policy="session").pending()[0].arguments == {"rule": "r"}
+
+
+def test_crash_recovery_replays_unapplied_writes_on_fly(tmp_path):
+    crashed = StarlogJournal(str(tmp_path), policy="always")
+    for n in range(3):
+        crashed.append("update_debug_diary", {"path": str(tmp_path), "content": f"note {n}"})
+    first = crashed.claim()
+    crashed.mark_applied(first)
+    crashed.flush()
+    # Simulate a crash: the file handle is dropped without close(), plus a torn last record
+    with open(crashed.path, "ab") as f:
+        f.write(b'{"seq": 4, "tool": "upd')
+
+    journal = get_journal(str(tmp_path), policy="always")
+    assert [entry.seq for entry in journal.pending()] == [2, 3]
+    starlog = FakeStarlog()
+    session = wrap_session(starlog, ack=_ack)
+    asyncio.run(session.call_tool("fly", {"path": str(tmp_path)}))
+    assert [call for call, _ in starlog.calls] == ["update_debug_diary", "update_debug_diary", "fly"]
+    assert journal.pending() == []
+    # New writes continue the sequence instead of reusing seq numbers
+    assert journal.append("add_rule", {"path": str(tmp_path), "rule": "r"}).seq == 4
+
+
+def test_compaction_keeps_only_unapplied_writes(tmp_path):
+    journal = StarlogJournal(str(tmp_path), policy="always", compact_bytes=2000)
+    for n in range(40):
+        journal.append("update_debug_diary", {"content": "x" * 40, "n": n})
+    applied = asyncio.run(apply_pending(journal, FakeStarlog().call_tool))
+    assert applied == 40
+    journal.append("add_rule", {"rule": "kept"})
+    journal.compact()
+
+    records = [json.loads(line) for line in Path(journal.path).read_text().splitlines()]
+    assert records[0] == {"applied": 40}
+    assert [record.get("arguments") for record in records[1:]] == [{"rule": "kept"}]
+    journal.close()
+    reopened = StarlogJournal(str(tmp_path), policy="session")
+    assert [entry.seq for entry in reopened.pending()] == [41]
+
+
+class StrictStarlog:
+    """Refuses every call until init_project, like STARLOG, with a "❌" result."""
+
+    def __init__(self):
+        self.initialised = False
+        self.rules = []
+
+    async def call_tool(self, name, arguments=None):
+        if name == "init_project":
+            self.initialised = True
+            return "✅ initialised"
+        if not self.initialised:
+            return "❌ project not initialised"
+        if name == "add_rule":
+            self.rules.append(arguments["rule"])
+            return "✅ rule added"
+        return f"{len(self.rules)} rules"
+
+
+def test_rejected_writes_are_retried_then_dead_lettered(tmp_path):
+    journal = StarlogJournal(str(tmp_path), policy="always", max_attempts=2)
+    journal.append("add_rule", {"rule": "r"})
+    journal.append("add_rule", {"rule": "s"})
+
+    async def raises(name, arguments):
+        raise ConnectionError("STARLOG went away")
+
+    starlog = StrictStarlog()
+    assert asyncio.run(apply_pending(journal, starlog.call_tool)) == 0
+    assert [entry.seq for entry in journal.pending()] == [1, 2] and journal.applied_seq == 0
+    # The second rejection of the head write makes it a dead letter; the run moves on
+    assert asyncio.run(apply_pending(journal, raises)) == 0
+    assert [entry.seq for entry in journal.pending()] == [2]
+    assert [(entry.seq, error) for entry, error in journal.dead_letters] == [
+        (1, "ConnectionError: STARLOG went away")
+    ]
+    notices = journal.take_notices()
+    assert "❌ project not initialised [attempt 1 of 2; will retry]" in notices[0]
+    assert notices[1:] == [
+        "STARLOG rejected journaled add_rule (journal entry 1): ConnectionError: STARLOG went away "
+        "[dropped after 2 attempts]",
+        "STARLOG rejected journaled add_rule (journal entry 2): ConnectionError: STARLOG went away "
+        "[attempt 1 of 2; will retry]",
+    ]
+    journal.close()
+
+    # Dead letters survive compaction and a restart, and are never replayed
+    reopened = StarlogJournal(str(tmp_path), policy="session")
+    assert [entry.seq for entry in reopened.pending()] == [2]
+    assert [entry.arguments for entry, _ in reopened.dead_letters] == [{"rule": "r"}]
+    reopened.close()
+
+
+def test_a_rejected_write_does_not_block_other_calls(tmp_path):
+    starlog = StrictStarlog()
+    get_journal(str(tmp_path), policy="interval", interval_ms=10)
+    session = wrap_session(starlog, ack=journal_module.text_ack)
+    path = str(tmp_path)
+
+    async def agent():
+        ack = await session.call_tool("add_rule", {"path": path, "rule": "r"})
+        await asyncio.sleep(0.01)  # the background applier is refused
+        init = await session.call_tool("init_project", {"path": path})
+        await asyncio.sleep(0.01)  # the background retry, started by init_project
+        check = await session.call_tool("check", {"path": path})
+        return ack, init, check
+
+    ack, init, check = asyncio.run(agent())
+    assert ack.startswith("add_rule recorded (journal entry 1)")
+    # The agent hears about the rejection with its next call, which is not held up by it
+    assert init.startswith("⚠️ STARLOG rejected journaled add_rule (journal entry 1): ❌ project not initialised")
+    assert init.endswith("✅ initialised")
+    # The retry succeeds once the project exists
+    assert check == "1 rules" and starlog.rules == ["r"]
+
+
+def test_unknown_policy_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        StarlogJournal(str(tmp_path), policy="sometimes")
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""Test knowledge pack distillation and storage."""
+
+import sys
+from pathlib import Path
+
+# Add the package to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from powerset_agents_core.knowledge import KnowledgePack, KnowledgePackStore, extract_signatures
+
+HELP_TEXT = """Help on package example_library:
+
+CLASSES
+    class Widget(builtins.object)
+     |  Widget(name: str, size: int = 1)
+     |
+     |  __init__(self, name: str, size: int = 1)
+     |  resize(self, size: int) -> 'Widget'
+
+FUNCTIONS
+    build(spec: dict) -> example_library.Widget
+    _private(x)
+"""
+
+
+def test_extract_signatures_skips_private_and_dunder():
+    assert extract_signatures(HELP_TEXT) == [
+        "class Widget(builtins.object)",
+        "Widget(name: str, size: int = 1)",
+        "resize(self, size: int) -> 'Widget'",
+        "build(spec: dict) -> example_library.Widget",
+    ]
+
+
+def test_render_respects_budget():
+    pack = KnowledgePack(
+        pkg_path="example_library",
+        version="1.2.0",
+        api_signatures=[f"func_{i}(x: int) -> int" for i in range(200)],
+        examples=["from example_library import build\nbuild({})"],
+        rules=["Always log a debug diary entry after each waypoint"],
+    )
+    text = pack.render(budget_chars=600)
+    assert len(text) <= 600
+    assert text.index("Always log") < text.index("func_0")
+    assert "items omitted for size" in text
+    assert "func_199" not in text
+
+
+def test_store_is_versioned(tmp_path):
+    store = KnowledgePackStore(str(tmp_path))
+    store.save(KnowledgePack(pkg_path="example_library", version="1.0", rules=["old"]))
+    store.save(KnowledgePack(pkg_path="example_library", version="2.0", rules=["new"]))
+
+    assert store.load("example_library", "2.0").rules == ["new"]
+    assert store.load("example_library", "3.0") is None
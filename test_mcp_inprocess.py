@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""Test in-process MCP server hosting."""
+
+import asyncio
+import os
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+# Add the package to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from powerset_agents_core import mcp_pool
+from powerset_agents_core.mcp_inprocess import InProcessMcpHost, check_inprocess_env, split_inprocess_name
+
+
+def test_split_inprocess_name():
+    assert split_inprocess_name("inprocess:starlog") == "starlog"
+    assert split_inprocess_name("pooled:starlog") is None
+    assert split_inprocess_name("starlog") is None
+
+
+def test_unknown_server_is_rejected():
+    with pytest.raises(ValueError, match="No MCP server registered"):
+        InProcessMcpHost().start("nosuchserver")
+
+
+def test_conflicting_env_is_rejected(monkeypatch):
+    monkeypatch.setenv("POWERSET_TEST_DATA_DIR", "/tmp/a")
+    check_inprocess_env("starlog", {"POWERSET_TEST_DATA_DIR": "/tmp/a"})
+    with pytest.raises(ValueError, match="POWERSET_TEST_DATA_DIR=/tmp/b"):
+        check_inprocess_env("starlog", {"POWERSET_TEST_DATA_DIR": "/tmp/b"})
+
+    # Unset variables are reported, never filled in
+    monkeypatch.delenv("POWERSET_TEST_DATA_DIR")
+    with pytest.raises(ValueError, match="unset"):
+        InProcessMcpHost().start("starlog", {"POWERSET_TEST_DATA_DIR": "/tmp/a"})
+    assert "POWERSET_TEST_DATA_DIR" not in os.environ
+
+
+def test_config_rejects_inprocess_starlog_with_its_own_data_dir(monkeypatch, tmp_path):
+    from pydantic import ValidationError
+
+    from powerset_agents_core.config import BasePowersetAgentConfig
+
+    monkeypatch.setenv("HEAVEN_DATA_DIR", str(tmp_path / "shared"))
+    fields = dict(name="A", starlog_path=str(tmp_path / "starlog"), mcp_servers=["inprocess:starlog"])
+    BasePowersetAgentConfig(**fields, heaven_data_dir=str(tmp_path / "shared"))
+    with pytest.raises(ValidationError, match="use 'starlog' or 'pooled:starlog'"):
+        BasePowersetAgentConfig(**fields, heaven_data_dir=str(tmp_path / "agent-1" / "heaven_data"))
+    # Other servers are unaffected
+    BasePowersetAgentConfig(**{**fields, "mcp_servers": ["starlog"]}, heaven_data_dir=str(tmp_path / "agent-1"))
+
+
+@pytest.fixture
+def echo_server(monkeypatch):
+    fastmcp = pytest.importorskip("mcp.server.fastmcp")
+    pytest.importorskip("uvicorn")
+    server = fastmcp.FastMCP("echo")
+
+    @server.tool()
+    def echo(text: str) -> str:
+        return text
+
+    module = types.ModuleType("powerset_test_echo_mcp")
+    module.mcp = server
+    monkeypatch.setitem(sys.modules, module.__name__, module)
+    monkeypatch.setitem(mcp_pool.MCP_SERVER_MODULES, "echo", module.__name__)
+    return server
+
+
+def test_server_starts_once_and_serves_sse(echo_server):
+    import socket
+
+    host = InProcessMcpHost()
+    try:
+        first = host.start("echo")
+        assert host.start("echo") is first
+        assert first.spec == {"transport": "sse", "url": f"http://127.0.0.1:{first.port}/sse"}
+        socket.create_connection(("127.0.0.1", first.port), timeout=1).close()
+    finally:
+        host.shutdown()
+
+
+def test_failed_start_is_reported_without_waiting(echo_server, monkeypatch):
+    import socket
+    import time
+
+    from powerset_agents_core import mcp_inprocess
+
+    taken = socket.socket()
+    taken.bind(("127.0.0.1", 0))
+    taken.listen()
+    monkeypatch.setattr(mcp_inprocess, "free_port", lambda: taken.getsockname()[1])
+    host = InProcessMcpHost(startup_timeout=10)
+    try:
+        started = time.monotonic()
+        with pytest.raises(RuntimeError, match="uvicorn failed to start"):
+            host.start("echo")
+        assert time.monotonic() - started < 5
+        # The host's event loop survived and serves the next start
+        monkeypatch.setattr(mcp_inprocess, "free_port", mcp_pool.free_port)
+        assert host.start("echo").port != taken.getsockname()[1]
+    finally:
+        taken.close()
+        host.shutdown()
+
+
+def test_in_memory_session_calls_tools(echo_server):
+    async def call():
+        async with InProcessMcpHost().session("echo") as session:
+            result = await session.call_tool("echo", {"text": "hi"})
+            return result.content[0].text
+
+    assert asyncio.run(call()) == "hi"
+
+
+def test_inprocess_starlog_server_applies_the_journal(tmp_path, monkeypatch):
+    fastmcp = pytest.importorskip("mcp.server.fastmcp")
+    from pydantic import BaseModel
+
+    from powerset_agents_core import journal
+
+    class DiaryEntry(BaseModel):
+        content: str
+
+    starlog = fastmcp.FastMCP("starlog")
+    diary = []
+
+    @starlog.tool()
+    def update_debug_diary(diary_entry: DiaryEntry, path: str) -> str:
+        diary.append(diary_entry.content)
+        return "updated"
+
+    @starlog.tool()
+    def check(path: str) -> str:
+        return f"{len(diary)} entries"
+
+    module = types.ModuleType("powerset_test_starlog_mcp")
+    module.app = starlog
+    monkeypatch.setitem(sys.modules, module.__name__, module)
+    monkeypatch.setitem(mcp_pool.MCP_SERVER_MODULES, "starlog", module.__name__)
+    starlog_path = str(tmp_path / "agent")
+    agent_journal = journal.get_journal(starlog_path, policy="session")
+
+    async def call():
+        async with InProcessMcpHost().session("starlog") as session:
+            ack = await session.call_tool("update_debug_diary",
+                                          {"diary_entry": {"content": "note"}, "path": starlog_path})
+            check = await session.call_tool("check", {"path": starlog_path})
+            return ack.content[0].text, check.content[0].text
+
+    try:
+        ack, check = asyncio.run(call())
+    finally:
+        journal._close_all()
+    assert ack.startswith("update_debug_diary recorded (journal entry 1)")
+    # The logged JSON arguments are validated back into the tool's model when applied
+    assert check == "1 entries" and diary == ["note"]
+    assert agent_journal.applied_seq == 1
+
+
+def test_tool_calls_and_waypoint_steps_are_traced(echo_server, monkeypatch):
+    from mcp.server.fastmcp import FastMCP
+
+    from powerset_agents_core.tracing import InMemorySink, configure_tracing, get_tracer
+
+    waypoint = FastMCP("waypoint")
+
+    @waypoint.tool()
+    def navigate_to_next_waypoint(starlog_path: str) -> str:
+        return f"step in {starlog_path}"
+
+    module = types.ModuleType("powerset_test_waypoint_mcp")
+    module.app = waypoint
+    monkeypatch.setitem(sys.modules, module.__name__, module)
+    monkeypatch.setitem(mcp_pool.MCP_SERVER_MODULES, "waypoint", module.__name__)
+
+    async def call():
+        host = InProcessMcpHost()
+        async with host.session("echo") as session:
+            await session.call_tool("echo", {"text": "hi"})
+        async with host.session("waypoint") as session:
+            result = await session.call_tool("navigate_to_next_waypoint", {"starlog_path": "/tmp/agent"})
+            return result.content[0].text
+
+    sink = InMemorySink()
+    configure_tracing(sink)
+    try:
+        assert asyncio.run(call()) == "step in /tmp/agent"
+    finally:
+        get_tracer().remove_sink(sink)
+    echo, step = sink.spans
+    assert (echo.name, echo.attributes) == ("mcp.tool_call", {"server": "echo", "tool": "echo"})
+    assert step.name == "waypoint.step"
+    assert step.attributes == {"server": "waypoint", "tool": "navigate_to_next_waypoint", "starlog_path": "/tmp/agent"}
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""Test the shared pool of long-lived MCP servers."""
+
+import gc
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+# Add the package to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from powerset_agents_core import mcp_pool
+from powerset_agents_core.mcp_pool import McpServerPool
+
+# Real FastMCP servers exposed as `app`, like starlog_mcp and payload_discovery
+ECHO_SERVER = '''
+import time
+from mcp.server.fastmcp import FastMCP
+
+time.sleep({delay})
+app = FastMCP("echo")
+
+
+@app.tool()
+def echo(text: str) -> str:
+    return text
+'''
+
+
+@pytest.fixture
+def echo_env(tmp_path, monkeypatch):
+    """Env that lets pooled subprocesses import a test-only 'echo' server module."""
+    pytest.importorskip("mcp.server.fastmcp")
+    pytest.importorskip("uvicorn")
+    (tmp_path / "powerset_test_echo_mcp.py").write_text(ECHO_SERVER.format(delay=0))
+    (tmp_path / "powerset_test_slow_mcp.py").write_text(ECHO_SERVER.format(delay=1.5))
+    monkeypatch.setitem(mcp_pool.MCP_SERVER_MODULES, "echo", "powerset_test_echo_mcp")
+    monkeypatch.setitem(mcp_pool.MCP_SERVER_MODULES, "slow", "powerset_test_slow_mcp")
+    return {"PYTHONPATH": str(tmp_path)}
+
+
+@pytest.fixture
+def pool():
+    pool = McpServerPool(max_size=2, leases_per_instance=2, server_env={})
+    yield pool
+    pool.shutdown()
+
+
+def test_leases_share_an_instance_until_it_is_full(pool, echo_env):
+    first = pool.acquire("echo", "/tmp/session-a", echo_env)
+    second = pool.acquire("echo", "/tmp/session-b", echo_env)
+    assert second.instance is first.instance
+    assert first.instance.is_healthy()
+    assert first.spec == {"transport": "sse", "url": f"http://127.0.0.1:{first.instance.port}/sse"}
+
+    third = pool.acquire("echo", "/tmp/session-c", echo_env)
+    assert third.instance is not first.instance
+    assert pool.stats()["echo"] == {"instances": 2, "leased": 2, "leases": 3}
+
+
+def test_released_instances_are_reused(pool, echo_env):
+    lease = pool.acquire("echo", "/tmp/session-a", echo_env)
+    instance = lease.instance
+    pool.release(lease)
+    pool.release(lease)
+    assert instance.leases == 0
+    assert pool.acquire("echo", "/tmp/session-b", echo_env).instance is instance
+
+    pool.release_key("/tmp/session-b")
+    assert pool.stats()["echo"]["leases"] == 0
+
+
+def test_more_agents_than_instances_share_instead_of_failing(pool, echo_env):
+    leases = [pool.acquire("echo", f"/tmp/session-{n}", echo_env) for n in range(6)]
+    assert len({id(lease.instance) for lease in leases}) == pool.max_size
+    assert pool.stats()["echo"]["leases"] == 6
+
+
+def test_full_pool_waits_for_a_release_then_gives_up(echo_env):
+    pool = McpServerPool(max_size=1, server_env={})
+    try:
+        held = pool.acquire("echo", "/tmp/a", {**echo_env, "HEAVEN_DATA_DIR": "/tmp/a"})
+        other_env = {**echo_env, "HEAVEN_DATA_DIR": "/tmp/b"}
+        with pytest.raises(RuntimeError, match="MCP pool exhausted"):
+            pool.acquire("echo", "/tmp/b", other_env, timeout=0.2)
+
+        threading.Timer(0.2, pool.release, args=(held,)).start()
+        lease = pool.acquire("echo", "/tmp/b", other_env, timeout=10)
+        # The freed instance was retired to make room for the other data dir
+        assert lease.instance is not held.instance
+        assert held.instance.process.poll() is not None
+    finally:
+        pool.shutdown()
+
+
+def test_pooled_servers_trace_their_tool_calls(pool, echo_env, tmp_path):
+    import asyncio
+
+    from mcp import ClientSession
+    from mcp.client.sse import sse_client
+
+    spans_path = tmp_path / "spans.jsonl"
+    lease = pool.acquire("echo", "/tmp/session-a", {**echo_env, "POWERSET_TRACE_JSONL": str(spans_path)})
+
+    async def call():
+        async with sse_client(lease.spec["url"]) as streams, ClientSession(*streams) as session:
+            await session.initialize()
+            return (await session.call_tool("echo", {"text": "hi"})).content[0].text
+
+    assert asyncio.run(call()) == "hi"
+    deadline = time.monotonic() + 5
+    while not (spans_path.exists() and spans_path.read_text()) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    record = json.loads(spans_path.read_text().splitlines()[0])
+    assert record["name"] == "mcp.tool_call"
+    assert record["attributes"] == {"server": "echo", "tool": "echo"}
+
+
+def test_cold_start_does_not_hold_the_pool_lock(pool, echo_env):
+    started = threading.Thread(target=pool.acquire, args=("slow", "/tmp/slow", echo_env))
+    started.start()
+    while not pool._instances.get("slow"):
+        time.sleep(0.01)
+    instance = pool._instances["slow"][0]
+
+    # A lease for another server is served while the slow one is still booting
+    assert pool.acquire("echo", "/tmp/fast", echo_env).instance.is_healthy()
+    assert instance.starting
+    started.join()
+    assert not instance.starting and instance.leases == 1
+
+
+def test_failed_start_is_reported_to_every_waiter(pool, echo_env, tmp_path):
+    (tmp_path / "powerset_test_broken_mcp.py").write_text("raise SystemExit(1)\n")
+    mcp_pool.MCP_SERVER_MODULES["broken"] = "powerset_test_broken_mcp"
+    try:
+        with pytest.raises(RuntimeError, match="failed to start"):
+            pool.acquire("broken", "/tmp/a", echo_env)
+        assert pool.stats()["broken"] == {"instances": 0, "leased": 0, "leases": 0}
+    finally:
+        del mcp_pool.MCP_SERVER_MODULES["broken"]
+
+
+def test_factory_leases_live_as_long_as_the_agent(echo_env, tmp_path, monkeypatch):
+    pytest.importorskip("heaven_base")
+    from powerset_agents_core import create_library_powerset_agent, release_pooled_mcp_servers
+    from powerset_agents_core.config import PayloadDiscoveryConfig
+
+    pool = McpServerPool(server_env={"echo": echo_env})
+    monkeypatch.setattr(mcp_pool, "_default_pool", pool)
+    curriculum = tmp_path / "curriculum.json"
+    curriculum.write_text(json.dumps({"root_files": [], "directories": {}}))
+
+    def build(name):
+        return create_library_powerset_agent(
+            pkg_path="example_library",
+            help_command="true",
+            payload_discovery_config=PayloadDiscoveryConfig(path=str(curriculum), instructions="Learn"),
+            name=name,
+            starlog_path=f"/tmp/{name}",
+            mcp_servers=["pooled:echo"],
+            heaven_data_dir=str(tmp_path / "heaven_data"),
+        )
+
+    try:
+        first, second = build("PoolAgentA"), build("PoolAgentB")
+        assert first.mcp_servers["echo"] == second.mcp_servers["echo"]
+        assert pool.stats()["echo"]["leases"] == 2
+
+        release_pooled_mcp_servers(first)
+        release_pooled_mcp_servers(first)
+        assert pool.stats()["echo"]["leases"] == 1
+
+        del second
+        gc.collect()
+        assert pool.stats()["echo"]["leases"] == 0
+    finally:
+        pool.shutdown()
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""Test pipelined curriculum prefetch."""
+
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+from pathlib import Path
+
+import pytest
+
+# Add the package to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from powerset_agents_core import prefetch
+from powerset_agents_core.curriculum import get_curriculum_store
+from powerset_agents_core.prefetch import WaypointPrefetcher, curriculum_steps, get_prefetcher, wrap_session
+
+
+def _piece(sequence_number, filename, content):
+    return {"sequence_number": sequence_number, "filename": filename, "title": filename, "content": content}
+
+
+def _curriculum(tmp_path, content_size=1000):
+    # Waypoint serves by sequence_number, not by where a piece sits in the file
+    raw = {
+        "domain": "demo",
+        "root_files": [_piece(4, "99_recap.md", "Recap.")],
+        "directories": {
+            "basics": [_piece(1, "01_models.md", "m" * content_size), _piece(2, "02_fields.md", "f" * content_size)],
+            "intro": [_piece(0, "00_intro.md", "Start here.")],
+            "advanced": [_piece(3, "03_validators.md", "v" * content_size)],
+        },
+    }
+    path = tmp_path / "curriculum.json"
+    path.write_text(json.dumps(raw))
+    return path, raw
+
+
+@pytest.fixture(autouse=True)
+def _reset_prefetchers():
+    yield
+    prefetch._close_all()
+
+
+@pytest.fixture
+def starlog(tmp_path):
+    """A STARLOG path with its own waypoint state file, removed afterwards."""
+    path = tmp_path / f"session_{uuid.uuid4().hex[:8]}"
+    yield str(path)
+    for suffix in (".json", ".temp"):
+        state = f"/tmp/waypoint_state_{path.name}{suffix}"
+        if os.path.exists(state):
+            os.remove(state)
+
+
+def test_steps_follow_waypoint_sequence_order(tmp_path):
+    _, raw = _curriculum(tmp_path)
+    steps = curriculum_steps(raw)
+    assert [step.waypoint for step in steps] == [
+        "intro/00_intro.md", "basics/01_models.md", "basics/02_fields.md", "advanced/03_validators.md", "99_recap.md"
+    ]
+    assert [step.sequence_number for step in steps] == [0, 1, 2, 3, 4]
+
+
+def test_reads_ahead_by_depth_and_releases_served_steps(tmp_path):
+    path, _ = _curriculum(tmp_path)
+    prefetcher = WaypointPrefetcher(str(path), depth=2).start()
+    assert sorted(prefetcher._futures) == [0, 1]
+
+    first = prefetcher.get()
+    assert (first.waypoint, first.content, first.error) == ("intro/00_intro.md", "Start here.", None)
+
+    prefetcher.advance()
+    assert sorted(prefetcher._futures) == [1, 2]
+    time.sleep(0.1)
+    stalls = prefetcher.stats()["stalls"]
+    step = prefetcher.get()
+    assert step.waypoint == "basics/01_models.md"
+    assert step.content == "m" * 1000
+    # Validated while the "model" was busy, so the step starts without waiting
+    assert prefetcher.stats()["stalls"] == stalls
+
+
+def test_memory_cap_limits_read_ahead(tmp_path):
+    path, _ = _curriculum(tmp_path, content_size=1000)
+    prefetcher = WaypointPrefetcher(str(path), depth=3, max_bytes=1500)
+    prefetcher.advance(0)
+    # The next step always loads; the one after would exceed the cap
+    assert sorted(prefetcher._futures) == [1]
+    assert prefetcher.loaded_bytes <= 1500
+
+
+def test_invalid_steps_are_reported_not_raised(tmp_path):
+    path, raw = _curriculum(tmp_path)
+    raw["root_files"][0]["content"] = "  "
+    path.write_text(json.dumps(raw))
+    prefetcher = WaypointPrefetcher(str(path), depth=0)
+    step = prefetcher.get(4)
+    assert step.error == "piece has no content"
+
+
+def test_get_prefetcher_reuses_until_settings_or_contents_change(tmp_path):
+    path, raw = _curriculum(tmp_path)
+    first = get_prefetcher(str(path), depth=2)
+    assert get_prefetcher(str(path), depth=2) is first
+    assert get_prefetcher(str(path), depth=3) is not first
+
+    raw["directories"]["intro"][0]["content"] = "Changed."
+    path.write_text(json.dumps(raw))
+    changed = get_prefetcher(str(path), depth=3)
+    assert changed.get(0).content == "Changed."
+
+
+def test_cursor_follows_waypoints_saved_position(tmp_path, starlog):
+    """Driven by waypoint's own tools: the cursor is wherever waypoint says the journey is."""
+    waypoint = pytest.importorskip("payload_discovery.mcp_server_v2")
+    path, raw = _curriculum(tmp_path)
+    prefetch.plan_journey(starlog, depth=1)
+
+    class Session:
+        async def call_tool(self, name, arguments=None):
+            return getattr(waypoint, name)(**arguments)
+
+    session = wrap_session(Session())
+
+    async def call(name, **arguments):
+        return await session.call_tool(name, {"starlog_path": starlog, **arguments})
+
+    async def journey():
+        assert await call("start_waypoint_journey", config_path=str(path)) == "Start here."
+        prefetcher = prefetch._prefetchers[str(path)]
+        assert prefetcher.cursor == 0
+        await call("navigate_to_next_waypoint")
+        await call("navigate_to_next_waypoint")
+        assert prefetcher.cursor == 2
+        assert sorted(prefetcher._futures) == [3]
+        assert prefetcher.get().content == "v" * 1000
+
+        # A second start is refused by waypoint; the cursor stays where the journey is
+        await call("start_waypoint_journey", config_path=str(path))
+        assert prefetcher.cursor == 2
+
+        # Resuming on a trimmed copy starts at that copy's first step, not at step 0
+        await call("abort_waypoint_journey")
+        trimmed = tmp_path / "trimmed.json"
+        trimmed.write_text(json.dumps({**raw, "directories": {"advanced": raw["directories"]["advanced"]}}))
+        await call("start_waypoint_journey", config_path=str(trimmed))
+        resumed = prefetch._prefetchers[str(trimmed)]
+        assert [step.waypoint for step in resumed.steps] == ["advanced/03_validators.md", "99_recap.md"]
+        assert resumed.cursor == 0
+        assert resumed.get().content == "Recap."
+
+    asyncio.run(journey())
+
+
+def test_planned_journey_already_under_way_is_picked_up(tmp_path, starlog):
+    waypoint = pytest.importorskip("payload_discovery.mcp_server_v2")
+    path, _ = _curriculum(tmp_path)
+    waypoint.start_waypoint_journey(str(path), starlog)
+    waypoint.navigate_to_next_waypoint(starlog)
+
+    prefetch.plan_journey(starlog, depth=2)
+    prefetcher = prefetch._prefetchers[str(path)]
+    assert prefetcher.cursor == 1
+    assert sorted(prefetcher._futures) == [2, 3]
+
+
+def test_inprocess_waypoint_server_drives_planned_journeys(tmp_path, starlog):
+    """HEAVEN's own SSE calls to the in-process server move the cursor and load from the store."""
+    waypoint = pytest.importorskip("payload_discovery.mcp_server_v2")
+    pytest.importorskip("uvicorn")
+    from mcp import ClientSession
+    from mcp.client.sse import sse_client
+
+    from powerset_agents_core.mcp_inprocess import InProcessMcpHost
+
+    path, _ = _curriculum(tmp_path)
+    prefetch.plan_journey(starlog, depth=1)
+
+    host = InProcessMcpHost()
+    url = host.start("waypoint").url
+
+    async def walk():
+        async with sse_client(url) as streams, ClientSession(*streams) as session:
+            await session.initialize()
+            await session.call_tool("start_waypoint_journey", {"config_path": str(path), "starlog_path": starlog})
+            for _ in range(2):
+                await session.call_tool("navigate_to_next_waypoint", {"starlog_path": starlog})
+
+    try:
+        asyncio.run(walk())
+    finally:
+        host.shutdown()
+    prefetcher = prefetch._prefetchers[str(path)]
+    assert prefetcher.cursor == 2
+    assert prefetcher.stats()["hits"] + prefetcher.stats()["stalls"] == 3
+    # Waypoint's per-call reload is the store's parsed model, not a fresh parse
+    assert waypoint.load_payload_discovery(str(path)) is get_curriculum_store().load(str(path))
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""Test the compiled system prompt templates."""
+
+import sys
+from pathlib import Path
+
+# Add the package to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from powerset_agents_core.prompts import (
+    PINNED_KNOWLEDGE_PACK_PREFIX,
+    PINNED_PROMPT_PREFIX,
+    render_library_learning_prompt,
+    stable_prefix_of,
+)
+
+FIELDS = dict(
+    name="ExampleLibraryAgent",
+    pkg_path="example_library",
+    help_command="python -c 'import example_library; help(example_library)'",
+    instructions="Learn example_library",
+    starlog_path="/tmp/example_learning_session",
+    workspace_path="/tmp",
+    curriculum_path="/tmp/understand_powerset_library.json",
+)
+
+
+def test_legacy_layout_embeds_agent_fields():
+    prompt = render_library_learning_prompt(**FIELDS)
+    assert prompt.prefix == ""
+    assert prompt.text.startswith("You are ExampleLibraryAgent, a specialized library learning agent.")
+    assert f'fly("{FIELDS["starlog_path"]}")' in prompt.text
+    assert FIELDS["curriculum_path"] in prompt.text
+    assert stable_prefix_of(prompt) == ""
+
+
+def test_pinned_layout_shares_prefix_across_agents():
+    first = render_library_learning_prompt(**FIELDS, pin_prefix=True)
+    other_fields = dict(FIELDS, name="OtherAgent", starlog_path="/tmp/other_session")
+    second = render_library_learning_prompt(**other_fields, pin_prefix=True)
+
+    assert first.prefix == second.prefix == PINNED_PROMPT_PREFIX
+    assert first.suffix != second.suffix
+    assert "NAME: OtherAgent" in second.suffix
+    assert stable_prefix_of(second.text) == PINNED_PROMPT_PREFIX
+
+
+def test_knowledge_pack_replaces_the_curriculum_walk_step():
+    walk_step = f"2. Learn library: Use waypoint with {FIELDS['curriculum_path']}"
+    assert walk_step in render_library_learning_prompt(**FIELDS).text
+
+    legacy = render_library_learning_prompt(**FIELDS, knowledge_pack=True).text
+    assert "2. Learn library" not in legacy
+    assert "use the library learning PD in waypoint" not in legacy
+    assert "2. Use the knowledge pack" in legacy
+
+    pinned = render_library_learning_prompt(**FIELDS, pin_prefix=True, knowledge_pack=True)
+    assert pinned.prefix == PINNED_KNOWLEDGE_PACK_PREFIX != PINNED_PROMPT_PREFIX
+    assert "2. Learn library" not in pinned.text
+    assert stable_prefix_of(pinned.text) == PINNED_KNOWLEDGE_PACK_PREFIX
+
+
+def test_render_is_cached():
+    render_library_learning_prompt.cache_clear()
+    render_library_learning_prompt(**FIELDS)
+    render_library_learning_prompt(**FIELDS)
+    assert render_library_learning_prompt.cache_info().hits == 1
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Test the declarative agent registry."""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add the package to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from powerset_agents_core.registry import BUNDLED_CATALOG, AgentRegistry
+
+
+def _write_catalog(path, agents):
+    path.write_text(json.dumps({"agents": agents}))
+    return str(path)
+
+
+def test_bundled_catalog_has_library_agents():
+    registry = AgentRegistry.from_files([BUNDLED_CATALOG])
+    assert registry.names() == ["metastack", "payloaddiscovery"]
+    assert registry.get("metastack").fields["pkg_path"] == "pydantic_stack_core"
+    assert registry.get("pydantic_stack_core").key == "metastack"
+
+
+def test_lookup_by_alias_is_case_insensitive(tmp_path):
+    catalog = _write_catalog(tmp_path / "agents.json", {
+        "demo": {"name": "DemoAgent", "pkg_path": "demo_lib", "aliases": ["Demo_Lib"], "tagline": "hi"},
+    })
+    registry = AgentRegistry.from_files([catalog])
+    spec = registry.get("DEMO_LIB")
+    assert spec.key == "demo"
+    assert spec.name == "DemoAgent"
+    assert spec.tagline == "hi"
+    assert "aliases" not in spec.fields and "tagline" not in spec.fields
+    assert "Demo" in registry
+
+
+def test_later_catalog_overrides_entry_and_aliases(tmp_path):
+    base = _write_catalog(tmp_path / "base.json", {
+        "demo": {"pkg_path": "demo_lib", "aliases": ["old"]},
+    })
+    override = _write_catalog(tmp_path / "override.json", {
+        "demo": {"pkg_path": "demo_lib2", "aliases": ["new"]},
+    })
+    registry = AgentRegistry.from_files([base, override])
+    assert registry.get("demo").fields["pkg_path"] == "demo_lib2"
+    assert registry.get("new").source == override
+    assert "old" not in registry
+
+
+def test_unknown_agent_raises_key_error(tmp_path):
+    registry = AgentRegistry.from_files([_write_catalog(tmp_path / "agents.json", {"demo": {}})])
+    with pytest.raises(KeyError, match="known: demo"):
+        registry.get("missing")
+
+
+def test_cli_reports_usage_errors(capsys):
+    from powerset_agents_core.cli import main
+
+    with pytest.raises(SystemExit) as exited:
+        main(["show", "no-such-agent"])
+    assert exited.value.code == 2
+    assert "unknown agent: no-such-agent (known: metastack" in capsys.readouterr().err
+
+    with pytest.raises(SystemExit):
+        main(["run", "metastack", "--hermes", "3"])
+    assert "--hermes needs --prompt" in capsys.readouterr().err
+
+
+def test_toml_catalog(tmp_path):
+    pytest.importorskip("tomllib" if sys.version_info >= (3, 11) else "tomli")
+    path = tmp_path / "agents.toml"
+    path.write_text('[agents.demo]\npkg_path = "demo_lib"\naliases = ["d"]\n')
+    registry = AgentRegistry.from_files([str(path)])
+    assert registry.get("d").fields == {"pkg_path": "demo_lib"}
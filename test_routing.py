@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Test the model routing table and latency-aware router."""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+# Add the package to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from powerset_agents_core.routing import (
+    DEFAULT_ROUTES,
+    LatencyAwareRouter,
+    RouteTable,
+    StubProvider,
+    UnknownModelError,
+)
+
+
+def test_default_table_matches_legacy_substring_mapping():
+    table = RouteTable(DEFAULT_ROUTES)
+    assert table.provider_for("gpt-5-mini") == "openai"
+    assert table.provider_for("openai/gpt-4o") == "openai"
+    assert table.provider_for("claude-sonnet-4-5") == "anthropic"
+    assert table.provider_for("chat-bison") == "google"
+    assert table.provider_for("meta-llama-3-70b") == "groq"
+    assert table.provider_for("deepseek-chat") == "deepseek"
+    assert table.provider_for("stub-echo") == "stub"
+    assert table.provider_for("mystery-model") == "openai"
+
+
+def test_longest_prefix_aliases_and_groups():
+    table = RouteTable({
+        "prefixes": {"gpt-": "openai", "gpt-oss": "groq"},
+        "aliases": {"cheap": "small", "small": "gpt-5-mini"},
+        "groups": {"fast": ["cheap", "claude-haiku-4-5"]},
+        "exact": {"claude-haiku-4-5": "anthropic"},
+        "default": None,
+    })
+    assert table.provider_for("gpt-oss-120b") == "groq"
+    assert table.resolve("cheap") == "gpt-5-mini"
+    assert table.resolve("fast") == "gpt-5-mini"
+    assert table.candidates("claude-haiku-4-5") == ["gpt-5-mini", "claude-haiku-4-5"]
+    with pytest.raises(UnknownModelError):
+        table.provider_for("mystery-model")
+
+
+def test_alias_cycles_are_rejected():
+    with pytest.raises(ValueError):
+        RouteTable({"aliases": {"a": "b", "b": "a"}})
+
+
+def test_router_prefers_fast_healthy_models():
+    table = RouteTable({**DEFAULT_ROUTES, "groups": {"fast": ["stub-a", "stub-b", "stub-c"]}})
+    router = LatencyAwareRouter(table, min_samples=2)
+    for _ in range(5):
+        router.record("stub-a", 0.50)
+        router.record("stub-b", 0.05)
+        router.record("stub-c", 0.01, ok=False)
+    assert router.choose("fast") == "stub-b"
+
+    router.set_quota("stub-b", remaining=0, reset_at=float("inf"))
+    assert router.choose("fast") == "stub-a"
+
+
+def test_exhausted_quota_without_reset_time_stays_exhausted():
+    table = RouteTable({**DEFAULT_ROUTES, "groups": {"fast": ["stub-a", "stub-b"]}})
+    router = LatencyAwareRouter(table, min_samples=1)
+    router.record("stub-a", 0.50)
+    router.record("stub-b", 0.05)
+
+    router.set_quota("stub-b", remaining=0)
+    assert router.choose("fast") == "stub-a"
+
+    # Once the reset time has passed the model is used again
+    router.set_quota("stub-b", remaining=0, reset_at=time.time() - 1)
+    assert router.choose("fast") == "stub-b"
+
+
+def test_stub_provider_reports_usage():
+    class Agent:
+        model = "stub-echo"
+
+    result = asyncio.run(StubProvider(seed=1)("hello there", Agent()))
+    assert result["content"] == "stub response from stub-echo to: hello there"
+    assert result["usage"]["input_tokens"] == 2
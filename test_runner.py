@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""Test the async prompt runner: retries, concurrency limits and rate limiting."""
+
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# Add the package to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from powerset_agents_core import runner as runner_module
+from powerset_agents_core.runner import AgentRunner, RateLimiter
+
+AGENT = SimpleNamespace(name="demo", model="demo-model", system_prompt="Learn demo.")
+
+
+def _run(runner, prompts):
+    async def collect():
+        return [result async for result in runner.run(prompts)]
+    return asyncio.run(collect())
+
+
+class VirtualClock:
+    """Stands in for time.monotonic and asyncio.sleep so waits are measured, not slept."""
+
+    def __init__(self):
+        self.now = 0.0
+        self._sleep = asyncio.sleep
+
+    def monotonic(self):
+        return self.now
+
+    async def sleep(self, delay):
+        self.now += delay
+        await self._sleep(0)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = VirtualClock()
+    # Replace the runner's view of `time` only; the event loop keeps the real clock
+    fake_time = SimpleNamespace(monotonic=clock.monotonic, perf_counter=clock.monotonic)
+    monkeypatch.setattr(runner_module, "time", fake_time)
+    monkeypatch.setattr(runner_module.asyncio, "sleep", clock.sleep)
+    return clock
+
+
+def test_failed_attempts_are_retried_with_backoff(clock):
+    calls = []
+
+    async def flaky(prompt, agent_config):
+        calls.append(clock.now)
+        if len(calls) < 3:
+            raise ConnectionError("provider hiccup")
+        return f"answer to {prompt}"
+
+    [result] = _run(AgentRunner(AGENT, provider="test", executor=flaky, max_retries=2, retry_backoff=1.0), ["q"])
+    assert result.ok and result.result == "answer to q"
+    assert result.attempts == 3
+    # Backoff doubles: 1s after the first failure, 2s after the second
+    assert calls == [0.0, 1.0, 3.0]
+
+
+def test_prompt_fails_after_the_last_retry(clock):
+    async def broken(prompt, agent_config):
+        raise ConnectionError("provider down")
+
+    [result] = _run(AgentRunner(AGENT, provider="test", executor=broken, max_retries=1, retry_backoff=0.5), ["q"])
+    assert not result.ok
+    assert isinstance(result.error, ConnectionError)
+    assert result.attempts == 2
+
+
+def test_attempts_time_out(clock):
+    async def hangs(prompt, agent_config):
+        await asyncio.Event().wait()
+
+    runner = AgentRunner(AGENT, provider="test", executor=hangs, max_retries=0, timeout=0.01)
+    [result] = _run(runner, ["q"])
+    assert isinstance(result.error, asyncio.TimeoutError)
+
+
+def test_concurrency_limit_and_backpressure():
+    in_flight = []
+    peak = [0]
+    pulled = []
+
+    async def execute(prompt, agent_config):
+        in_flight.append(prompt)
+        peak[0] = max(peak[0], len(in_flight))
+        await asyncio.sleep(0.01)
+        in_flight.remove(prompt)
+        return prompt
+
+    def prompts():
+        for n in range(10):
+            pulled.append(n)
+            yield f"p{n}"
+
+    async def first_three():
+        results = []
+        async for result in AgentRunner(AGENT, provider="test", executor=execute, concurrency=3).run(prompts()):
+            results.append(result)
+            if len(results) == 3:
+                break
+        return results
+
+    results = asyncio.run(first_three())
+    assert peak[0] == 3
+    # Prompts are only pulled when a slot frees up, so stopping early leaves the rest unread
+    assert len(pulled) < 10
+    assert all(result.ok for result in results)
+
+    peak[0] = 0
+    runner = AgentRunner(AGENT, provider="test", executor=execute, concurrency=3)
+    all_results = _run(runner, (f"p{n}" for n in range(10)))
+    assert sorted(result.index for result in all_results) == list(range(10))
+    assert peak[0] == 3
+
+
+def test_rate_limiter_allows_a_burst_then_spaces_calls(clock):
+    limiter = RateLimiter(rate=10, burst=2)
+    granted = []
+
+    async def acquire_all():
+        for _ in range(5):
+            await limiter.acquire()
+            granted.append(round(clock.now, 6))
+
+    asyncio.run(acquire_all())
+    assert granted == [0.0, 0.0, 0.1, 0.2, 0.3]
+
+
+def test_rate_limiter_refills_while_idle(clock):
+    limiter = RateLimiter(rate=2, burst=2)
+
+    async def drain_wait_drain():
+        for _ in range(2):
+            await limiter.acquire()
+        clock.now += 10
+        for _ in range(2):
+            await limiter.acquire()
+
+    asyncio.run(drain_wait_drain())
+    # The idle period refilled the bucket, but only up to the burst size
+    assert clock.now == 10
+    assert limiter._tokens == pytest.approx(0)
+
+
+def test_runner_shares_the_provider_rate_limiter():
+    first = AgentRunner(AGENT, provider="test-shared", executor=None, rate_limits={"test-shared": 5.0})
+    second = AgentRunner(AGENT, provider="test-shared", executor=None, rate_limits={"test-shared": 5.0})
+    assert first.rate_limiter is second.rate_limiter is not None
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""Test bounded command execution and read-only command caching."""
+
+import sys
+from pathlib import Path
+
+# Add the package to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from powerset_agents_core.sandbox import BoundedExecutor, ExecutionLimits, is_cacheable, run_bounded
+
+
+def test_cacheable_commands():
+    assert is_cacheable("python -c 'import pydantic_stack_core; help(pydantic_stack_core)'")
+    assert is_cacheable('python3 -c "import json; print(json.__version__)"')
+    assert is_cacheable("pip show pydantic")
+    assert is_cacheable("python -m pydoc json.decoder")
+    assert not is_cacheable("pip install pydantic")
+    assert not is_cacheable("python -c 'import os; os.remove(\"x\")'")
+    assert not is_cacheable("pip show pydantic; rm -rf /tmp/x")
+    assert not is_cacheable("python test_examples.py")
+
+
+def test_output_is_streamed_and_head_tail_truncated():
+    chunks = []
+    limits = ExecutionLimits(max_output_chars=300, head_chars=100)
+    result = run_bounded(
+        f"{sys.executable} -c \"import sys; [print(i) for i in range(5000)]; sys.exit(3)\"",
+        limits, on_output=chunks.append
+    )
+    assert result.returncode == 3
+    assert result.truncated
+    assert "".join(chunks).split() == [str(i) for i in range(5000)]
+    assert result.output.startswith("0\n1\n2\n")
+    assert result.output.rstrip().endswith("4999")
+    assert "chars omitted" in result.output
+    assert len(result.output) < 400
+    assert result.render().endswith("[exit code 3]")
+
+
+def test_stderr_is_merged():
+    result = run_bounded(f"{sys.executable} -c \"import sys; sys.stderr.write('oops')\"")
+    assert result.returncode == 0
+    assert result.output == "oops"
+    assert not result.truncated
+
+
+def test_timeout_kills_process_group():
+    result = run_bounded("sleep 30 & sleep 30", ExecutionLimits(timeout=0.5))
+    assert result.timed_out
+    assert result.returncode is None
+    assert result.elapsed < 5
+    assert "timed out" in result.render()
+
+
+def test_read_only_commands_are_cached(tmp_path):
+    executor = BoundedExecutor()
+    command = "python3 -c 'import json; print(json.__version__)'"
+    first = executor.run(command, cwd=str(tmp_path))
+    second = executor.run(command, cwd=str(tmp_path))
+    assert not first.cached and second.cached
+    assert second.output == first.output
+    assert executor.run(command, cwd=str(tmp_path), use_cache=False).cached is False
+
+    uncached = f"{sys.executable} -c 'print(1)'"
+    executor.run(uncached)
+    assert executor.run(uncached).cached is False
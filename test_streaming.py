@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""Test the streaming event API."""
+
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# Add the package to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from powerset_agents_core.routing import StubProvider
+from powerset_agents_core.sandbox import BoundedExecutor, ExecutionLimits
+from powerset_agents_core.streaming import AgentEvent, emit_event, message_callback, stream_agent
+
+AGENT = SimpleNamespace(name="demo", model="stub-fast", system_prompt="Learn demo.")
+
+
+def _collect(executor, buffer_size=256, prompt="hello there"):
+    async def collect():
+        events = []
+        async for event in stream_agent(prompt, AGENT, executor=executor, buffer_size=buffer_size):
+            events.append(event)
+        return events
+    return asyncio.run(collect())
+
+
+def test_tokens_arrive_before_the_run_finishes():
+    provider = StubProvider(latency=0.2, response="one two three four five")
+    events = _collect(provider.stream)
+
+    kinds = [event.kind for event in events]
+    assert kinds[0] == "start"
+    assert kinds[-1] == "done"
+    tokens = [event for event in events if event.kind == "token"]
+    assert "".join(event.text for event in tokens) == "one two three four five"
+    # The first token is out well before the full simulated latency has elapsed
+    assert tokens[0].elapsed < events[-1].elapsed / 2
+    # Streamed text is not repeated as a final message
+    assert "message" not in kinds
+    assert events[-1].data["result"] == "one two three four five"
+
+
+def test_result_messages_and_tool_calls_are_reported():
+    async def execute(prompt, agent_config):
+        return {"messages": [
+            {"type": "human", "content": prompt},
+            {"type": "ai", "content": "", "tool_calls": [
+                {"name": "start_waypoint_journey", "args": {"config_path": "/curriculum"}},
+                {"name": "update_debug_diary", "args": {"path": "/starlog"}},
+                {"name": "BashTool", "args": {"command": "ls"}},
+            ]},
+            {"type": "ai", "content": "All done."},
+        ]}
+
+    events = _collect(execute)
+    assert [event.kind for event in events] == ["start", "waypoint", "starlog", "tool_call", "message", "done"]
+    assert events[3].data["name"] == "BashTool"
+    assert events[4].text == "All done."
+    assert "All done." in events[4].render()
+
+
+def test_heaven_messages_stream_as_they_happen():
+    call = SimpleNamespace(type="ai", content="", tool_calls=[{"name": "navigate_to_next_waypoint", "args": {}}])
+    answer = SimpleNamespace(type="ai", content="Learned it.", tool_calls=[])
+
+    async def execute(prompt, agent_config):
+        # What exec_completion_style / use_hermes_dict do with the callback they are given
+        heaven_main_callback = message_callback()
+
+        def run():
+            # HEAVEN reports each message from the thread running the agent
+            heaven_main_callback(SimpleNamespace(type="human", content=prompt))
+            heaven_main_callback(call)
+            time.sleep(0.3)
+            heaven_main_callback(answer)
+        await asyncio.get_running_loop().run_in_executor(None, run)
+        return {"messages": [call, answer]}
+
+    events = _collect(execute)
+    # Reported once each, as they happened rather than from the final result
+    assert [event.kind for event in events] == ["start", "waypoint", "message", "done"]
+    assert events[1].elapsed < 0.2 <= events[2].elapsed
+    assert events[2].text == "Learned it."
+    assert message_callback() is None
+
+
+def test_tools_are_classified_with_the_shared_tables():
+    from powerset_agents_core.journal import JOURNALED_TOOLS
+    from powerset_agents_core.mcp_pool import STARLOG_TOOLS, WAYPOINT_TOOLS
+    from powerset_agents_core.streaming import _classify_tool
+
+    assert {_classify_tool(name) for name in STARLOG_TOOLS | JOURNALED_TOOLS} == {"starlog"}
+    assert {_classify_tool(name) for name in WAYPOINT_TOOLS} == {"waypoint"}
+    assert _classify_tool("fly") == "starlog"
+    assert _classify_tool("NetworkEditTool") == _classify_tool("starlog_update") == "tool_call"
+
+
+def test_errors_end_the_stream_with_an_error_event():
+    async def execute(prompt, agent_config):
+        raise RuntimeError("provider down")
+
+    events = _collect(execute)
+    assert [event.kind for event in events] == ["start", "error"]
+    assert "provider down" in events[-1].data["error"]
+
+
+def test_thread_output_is_dropped_not_blocking_when_buffer_is_full():
+    async def execute(prompt, agent_config):
+        def tool():
+            for number in range(200):
+                emit_event("tool_output", text=f"{number}\n")
+        worker = threading.Thread(target=tool)
+        worker.start()
+        await asyncio.get_running_loop().run_in_executor(None, worker.join)
+        return "ok"
+
+    async def slow_consumer():
+        events = []
+        async for event in stream_agent("p", AGENT, executor=execute, buffer_size=4):
+            events.append(event)
+            await asyncio.sleep(0.001)
+        return events
+
+    events = asyncio.run(slow_consumer())
+    outputs = [event for event in events if event.kind == "tool_output"]
+    assert events[-1].kind == "done"
+    assert len(outputs) + events[-1].data["dropped"] == 200
+    assert events[-1].data["dropped"] > 0
+
+
+def test_emit_event_outside_a_stream_is_a_no_op():
+    emit_event("tool_output", text="nobody listening")
+
+
+def test_bounded_commands_stream_inside_a_run():
+    executor = BoundedExecutor(ExecutionLimits(timeout=10, memory_limit_mb=None))
+
+    async def execute(prompt, agent_config):
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(None, executor.run, "echo first; sleep 0.3; echo second")
+        return result.render()
+
+    events = _collect(execute)
+    kinds = [event.kind for event in events]
+    assert kinds[:2] == ["start", "tool_call"]
+    assert events[1].data["args"].startswith("echo first")
+    outputs = [event for event in events if event.kind == "tool_output"]
+    assert "".join(event.text for event in outputs) == "first\nsecond\n"
+    # "first" is delivered while the command is still sleeping
+    assert outputs[1].elapsed - outputs[0].elapsed > 0.2
+
+
+def test_breaking_out_early_cancels_the_run():
+    finished = []
+
+    async def execute(prompt, agent_config):
+        for word in ("a", "b", "c"):
+            await asyncio.sleep(0.05)
+            yield word
+        finished.append(True)
+
+    async def first_token():
+        async for event in stream_agent("p", AGENT, executor=execute):
+            if event.kind == "token":
+                return event
+    started = time.perf_counter()
+    event = asyncio.run(first_token())
+    assert isinstance(event, AgentEvent) and event.text == "a"
+    assert time.perf_counter() - started < 0.15
+    assert not finished
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Test the tool plugin registry."""
+
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# Add the package to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from powerset_agents_core import tool_registry
+from powerset_agents_core.tool_registry import ToolRegistry, UnknownToolError
+
+
+def test_builtins_validate_without_importing():
+    registry = ToolRegistry(discover=False)
+    registry.validate(["NetworkEditTool", "bashtool"])
+    assert registry.names() == ["bashtool", "boundedbashtool", "networkedittool"]
+    with pytest.raises(UnknownToolError, match="nosuchtool"):
+        registry.validate(["bashtool", "nosuchtool"])
+
+
+def test_tools_import_on_first_load_and_are_cached():
+    registry = ToolRegistry(builtins={"decoder": "json.decoder:JSONDecoder", "broken": "no_such_module:Tool"},
+                            discover=False)
+    registry.validate(["broken"])  # validation never imports
+    from json.decoder import JSONDecoder
+    assert registry.resolve(["Decoder", "decoder"]) == [JSONDecoder, JSONDecoder]
+    with pytest.raises(ModuleNotFoundError):
+        registry.load("broken")
+
+
+def test_entry_point_plugins_are_discovered(monkeypatch):
+    calls = []
+
+    def fake_entry_points():
+        calls.append(1)
+        return [SimpleNamespace(name="SqlTool", value="collections:OrderedDict")]
+
+    monkeypatch.setattr(tool_registry, "_tool_entry_points", fake_entry_points)
+    registry = ToolRegistry()
+    assert "sqltool" in registry
+    assert "bashtool" in registry
+    from collections import OrderedDict
+    assert registry.load("sqltool") is OrderedDict
+    registry.validate(["SQLTOOL"])
+    assert len(calls) == 1
+
+
+def test_register_class_directly():
+    registry = ToolRegistry(builtins={}, discover=False)
+
+    class CustomTool:
+        pass
+
+    registry.register("custom", CustomTool)
+    assert registry.resolve(["CUSTOM"]) == [CustomTool]
+
+
+def test_heaven_tool_calls_are_traced():
+    pytest.importorskip("heaven_base")
+    from heaven_base.baseheaventool import CalculatorTool
+
+    from powerset_agents_core.tracing import InMemorySink, configure_tracing, get_tracer
+
+    registry = ToolRegistry(builtins={"calculator": "heaven_base.baseheaventool:CalculatorTool"}, discover=False)
+    assert registry.load("calculator") is CalculatorTool
+
+    sink = InMemorySink()
+    configure_tracing(sink)
+    try:
+        result = asyncio.run(CalculatorTool.create()._arun(a=6, b=7))
+    finally:
+        get_tracer().remove_sink(sink)
+    assert result.output == "42"
+    [call] = sink.spans
+    assert call.name == "tool.call" and call.attributes == {"tool": "calculator"}
+    assert call.counters == {"output_chars": 2}
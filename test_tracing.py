@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Test span tracing and sinks."""
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+# Add the package to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from powerset_agents_core.tracing import InMemorySink, JsonlSink, Tracer, span
+
+
+def test_disabled_tracer_returns_noop_span():
+    tracer = Tracer()
+    with tracer.span("factory.create") as s:
+        s.add("prompt_chars", 10)
+    assert not s.recording
+    assert tracer.counters() == {}
+
+
+def test_spans_nest_and_accumulate_counters():
+    tracer = Tracer()
+    sink = InMemorySink()
+    tracer.add_sink(sink)
+
+    with tracer.span("factory.create", agent="A") as outer:
+        with tracer.span("prompt.render") as inner:
+            inner.add("prompt_chars", 120)
+
+    render, create = sink.spans
+    assert render.parent_id == create.span_id
+    assert render.trace_id == create.trace_id
+    assert outer.attributes == {"agent": "A"}
+    assert sink.summary()["prompt.render"]["counters"] == {"prompt_chars": 120}
+    assert tracer.counters() == {"prompt_chars": 120}
+
+
+def test_errors_are_recorded_and_propagate(tmp_path):
+    tracer = Tracer()
+    path = tmp_path / "spans.jsonl"
+    tracer.add_sink(JsonlSink(str(path)))
+    try:
+        with tracer.span("llm.round_trip"):
+            raise TimeoutError("slow provider")
+    except TimeoutError:
+        pass
+    tracer.shutdown()
+
+    record = json.loads(path.read_text())
+    assert record["name"] == "llm.round_trip"
+    assert record["error"] == "TimeoutError: slow provider"
+
+
+def test_async_tasks_inherit_parent_span():
+    from powerset_agents_core.tracing import configure_tracing, get_tracer
+
+    sink = InMemorySink()
+    configure_tracing(sink)
+
+    async def call(index):
+        with span("llm.round_trip", index=index):
+            await asyncio.sleep(0)
+
+    async def main():
+        with span("agent.run"):
+            await asyncio.gather(call(0), call(1))
+
+    try:
+        asyncio.run(main())
+    finally:
+        get_tracer().remove_sink(sink)
+
+    *calls, run = sink.spans
+    assert [c.parent_id for c in calls] == [run.span_id, run.span_id]
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Test per-agent workspace allocation and collection."""
+
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+# Add the package to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from powerset_agents_core.workspace import WorkspaceAllocator
+
+
+@pytest.fixture
+def allocator(tmp_path):
+    return WorkspaceAllocator(base_dir=str(tmp_path / "agents"), max_age=None)
+
+
+def _finished_pid():
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def test_concurrent_allocations_are_unique(allocator):
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        workspaces = list(pool.map(lambda _: allocator.allocate("Same Agent/1"), range(32)))
+
+    roots = {workspace.root for workspace in workspaces}
+    assert len(roots) == 32
+    assert len({workspace.starlog_path for workspace in workspaces}) == 32
+    assert len({workspace.heaven_data_dir for workspace in workspaces}) == 32
+    for workspace in workspaces:
+        assert os.path.basename(workspace.root).startswith("Same_Agent_1-")
+        for path in workspace.config_fields().values():
+            assert os.path.isdir(path) and path.startswith(workspace.root)
+
+
+def test_shared_heaven_data_dir(tmp_path):
+    allocator = WorkspaceAllocator(base_dir=str(tmp_path / "agents"), max_age=0, share_heaven_data_dir=True)
+    first, second = allocator.allocate("a"), allocator.allocate("b")
+    assert first.heaven_data_dir == second.heaven_data_dir == str(tmp_path / "agents" / "heaven_data")
+    assert first.starlog_path != second.starlog_path
+
+    allocator.release(first)
+    allocator.release(second)
+    # Collection removes the workspaces but never the shared data dir
+    assert not os.path.exists(first.root)
+    assert os.path.isdir(first.heaven_data_dir)
+
+
+def test_collect_keeps_running_workspaces(allocator):
+    workspace = allocator.allocate("running")
+    allocator.max_age = 0
+    assert allocator.collect() == 0
+    assert os.path.isdir(workspace.root)
+
+
+def test_collect_removes_released_workspaces_past_max_age(allocator):
+    old, recent = allocator.allocate("old"), allocator.allocate("recent")
+    allocator.release(old)
+    allocator.release(recent)
+    marker = allocator._read_marker(old.root)
+    marker["released_at"] = time.time() - 120
+    allocator._write_marker(old.root, marker)
+
+    allocator.max_age = 60
+    assert allocator.collect() == 1
+    assert not os.path.exists(old.root)
+    assert os.path.isdir(recent.root)
+
+
+def test_collect_keeps_only_the_newest_max_count(allocator):
+    workspaces = [allocator.allocate(f"agent{n}") for n in range(4)]
+    for age, workspace in zip((40, 30, 20, 10), workspaces):
+        allocator.release(workspace)
+        marker = allocator._read_marker(workspace.root)
+        marker["released_at"] = time.time() - age
+        allocator._write_marker(workspace.root, marker)
+
+    allocator.max_count = 2
+    assert allocator.collect() == 2
+    assert [os.path.exists(workspace.root) for workspace in workspaces] == [False, False, True, True]
+
+
+def test_collect_removes_workspaces_of_dead_processes(allocator):
+    orphan = allocator.allocate("orphan")
+    marker = allocator._read_marker(orphan.root)
+    marker["pid"] = _finished_pid()
+    allocator._write_marker(orphan.root, marker)
+
+    allocator.max_age = 0
+    assert allocator.collect() == 1
+    assert not os.path.exists(orphan.root)
+
+
+def test_collect_ignores_directories_without_a_marker(allocator, tmp_path):
+    stranger = tmp_path / "agents" / "not-a-workspace"
+    stranger.mkdir(parents=True)
+    allocator.max_age = 0
+    assert allocator.collect() == 0
+    assert stranger.is_dir()
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))